@@ -1,20 +1,54 @@
 import logging
-from typing import Annotated, Literal, Sequence
-from fastapi import APIRouter, Query
-from fastapi.encoders import jsonable_encoder
-from fastapi.responses import JSONResponse, PlainTextResponse
-from redis import Redis
+from typing import Annotated, Any, Literal, Optional, Sequence
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+import orjson
+from prometheus_client import CONTENT_TYPE_LATEST
+from redis.asyncio import Redis as AsyncRedis
 
 from data_hub_metrics_api.api_router_typing import (
     CitationsResponseSequence,
+    CitationsSourceMetricTypedDict,
     ContentTypeLiteral,
+    MetricSummaryItemTypedDict,
+    MetricSummaryOrderLiteral,
+    MetricSummaryRequestTypedDict,
     MetricSummaryResponseTypedDict,
     MetricTimePeriodResponseTypedDict
 )
-from data_hub_metrics_api.citations_provider import CitationsProvider
-from data_hub_metrics_api.page_views_and_downloads_provider import PageViewsAndDownloadsProvider
-from data_hub_metrics_api.metric_summary_provider import MetricSummaryProvider
-from data_hub_metrics_api.non_article_page_views_provider import NonArticlePageViewsProvider
+from data_hub_metrics_api.citations_provider import (
+    DEFAULT_CITATIONS_PROVIDER_TIMEOUT_SECONDS,
+    CitationsProvider,
+    get_citations_source_metrics_concurrently,
+    is_any_citations_source_unavailable
+)
+from data_hub_metrics_api.crossref_citations_provider import CITATIONS_GENERATION_NAME
+from data_hub_metrics_api.page_views_and_downloads_provider import (
+    PERIODS_GENERATION_NAME,
+    TOTALS_GENERATION_NAME,
+    MetricNameLiteral,
+    PageViewsAndDownloadsProvider
+)
+from data_hub_metrics_api.metric_summary_provider import (
+    SUMMARIES_GENERATION_NAME,
+    MetricSummaryProvider
+)
+from data_hub_metrics_api.non_article_page_views_provider import (
+    NON_ARTICLE_PAGE_VIEWS_GENERATION_NAME,
+    NonArticlePageViewsProvider
+)
+from data_hub_metrics_api.prometheus_metrics import get_prometheus_exposition, observe_result_size
+from data_hub_metrics_api.utils.conditional_requests import (
+    ConditionalRequestRoute,
+    get_generation_validators_dependency
+)
+from data_hub_metrics_api.utils.cursors import get_article_id_for_cursor
+from data_hub_metrics_api.utils.keyspace_generations import KeyspaceGenerations
+from data_hub_metrics_api.utils.streaming_export import (
+    MEDIA_TYPE_BY_EXPORT_FORMAT,
+    ExportFormatLiteral,
+    iter_export_chunks
+)
 
 
 LOGGER = logging.getLogger(__name__)
@@ -32,63 +66,217 @@ PageQueryType = Annotated[
     Query(alias='page', ge=1)
 ]
 
+ArticleIdsQueryType = Annotated[
+    Optional[list[str]],
+    # either repeated (ids=1&ids=2) or comma separated (ids=1,2)
+    Query(alias='ids')
+]
+
+CursorQueryType = Annotated[
+    Optional[str],
+    # "*" for the first page, then the "next" cursor of the previous page
+    Query(alias='cursor')
+]
+
+SummaryOrderQueryType = Annotated[
+    Optional[MetricSummaryOrderLiteral],
+    Query(alias='order')
+]
+
+DescendingQueryType = Annotated[
+    bool,
+    Query(alias='desc')
+]
+
+ExportFormatQueryType = Annotated[
+    ExportFormatLiteral,
+    Query(alias='format')
+]
+
+# the generations of the data read by the routes, their validators change with the generations
+CITATIONS_GENERATION_NAMES = [CITATIONS_GENERATION_NAME]
+METRIC_TIME_PERIOD_GENERATION_NAMES = [TOTALS_GENERATION_NAME, PERIODS_GENERATION_NAME]
+# the summaries are calculated from the totals and citations if they were not precomputed
+SUMMARY_GENERATION_NAMES = [
+    SUMMARIES_GENERATION_NAME,
+    TOTALS_GENERATION_NAME,
+    CITATIONS_GENERATION_NAME
+]
+NON_ARTICLE_PAGE_VIEWS_GENERATION_NAMES = [NON_ARTICLE_PAGE_VIEWS_GENERATION_NAME]
+
+# the columns of the CSV export, in the order of the summary items
+SUMMARY_EXPORT_FIELD_NAMES = list(MetricSummaryItemTypedDict.__annotations__)
 
-class CitationsJsonResponse(JSONResponse):
+
+DEFAULT_MAX_SUMMARY_ARTICLE_IDS = 100
+
+
+def get_validated_article_ids(
+    ids: Sequence[str],
+    max_article_ids: int = DEFAULT_MAX_SUMMARY_ARTICLE_IDS
+) -> Sequence[str]:
+    article_ids = [
+        article_id.strip()
+        for value in ids
+        for article_id in value.split(',')
+        if article_id.strip()
+    ]
+    if len(article_ids) > max_article_ids:
+        raise HTTPException(
+            status_code=422,
+            detail=f'Too many article ids: {len(article_ids)} (max: {max_article_ids})'
+        )
+    invalid_article_ids = [article_id for article_id in article_ids if not article_id.isdigit()]
+    if invalid_article_ids:
+        raise HTTPException(
+            status_code=422,
+            detail=f'Invalid article ids: {invalid_article_ids}'
+        )
+    return article_ids
+
+
+def get_validated_after_article_id(cursor: str) -> Optional[str]:
+    try:
+        return get_article_id_for_cursor(cursor)
+    except ValueError as exc:
+        raise HTTPException(status_code=422, detail=str(exc)) from exc
+
+
+def get_json_default(value: Any) -> Any:
+    # a backstop for values the providers did not convert, e.g. bytes returned by Redis
+    if isinstance(value, bytes):
+        LOGGER.warning('Serializing unconverted bytes value: %r', value)
+        return value.decode('utf-8')
+    raise TypeError(f'Type is not JSON serializable: {type(value).__name__}')
+
+
+class FastJsonResponse(JSONResponse):
+    # the provider output only consists of plain dicts, lists, strings and numbers,
+    # it is serialized directly rather than encoded and validated by FastAPI first
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, default=get_json_default)
+
+
+class CitationsJsonResponse(FastJsonResponse):
     media_type = 'application/vnd.elife.metric-citations+json; version=1'
 
 
-class MetricTimePeriodJsonResponse(JSONResponse):
+def get_citations_json_response(
+    citations_source_metrics: Sequence[CitationsSourceMetricTypedDict]
+) -> CitationsJsonResponse:
+    # a response with an unavailable source should not be cached (or revalidated),
+    # the source is likely to be available again for the next request
+    if is_any_citations_source_unavailable(citations_source_metrics):
+        return CitationsJsonResponse(
+            citations_source_metrics,
+            headers={'Cache-Control': 'no-store'}
+        )
+    return CitationsJsonResponse(citations_source_metrics)
+
+
+class MetricTimePeriodJsonResponse(FastJsonResponse):
     media_type = 'application/vnd.elife.metric-time-period+json;version=1'
 
 
-def create_api_router(
-    redis_client: Redis,
+class MetricSummaryJsonResponse(FastJsonResponse):
+    pass
+
+
+def create_api_router(  # pylint: disable=too-many-locals
+    async_redis_client: AsyncRedis,
     citations_provider_list: Sequence[CitationsProvider],
     page_views_and_downloads_provider: PageViewsAndDownloadsProvider,
     metric_summary_provider: MetricSummaryProvider,
-    non_article_page_views_provider: NonArticlePageViewsProvider
+    non_article_page_views_provider: NonArticlePageViewsProvider,
+    *,
+    max_summary_article_ids: int = DEFAULT_MAX_SUMMARY_ARTICLE_IDS,
+    citations_provider_timeout_seconds: float = DEFAULT_CITATIONS_PROVIDER_TIMEOUT_SECONDS,
+    keyspace_generations: Optional[KeyspaceGenerations] = None
 ) -> APIRouter:
     assert page_views_and_downloads_provider is not None
-    router = APIRouter()
+    router = APIRouter(route_class=ConditionalRequestRoute)
+    keyspace_generations = keyspace_generations or KeyspaceGenerations(async_redis_client)
+
+    def get_validators_dependencies(generation_names: Sequence[str]) -> list[Any]:
+        # checked before the route handler, i.e. before the providers read the data
+        return [Depends(get_generation_validators_dependency(
+            keyspace_generations,
+            generation_names
+        ))]
+
+    # the routes return the responses themselves, the response models are used for the docs
+
+    async def get_article_metric_time_period_response(
+        article_id: str,
+        metric_name: MetricNameLiteral,
+        by: Literal['day', 'month'],
+        per_page: int,
+        page: int
+    ) -> Response:
+        metric_time_period = (
+            await page_views_and_downloads_provider.get_metric_for_article_id_by_time_period(
+                article_id=article_id,
+                metric_name=metric_name,
+                by=by,
+                per_page=per_page,
+                page=page
+            )
+        )
+        observe_result_size(f'article_periods_by_{by}', metric_time_period['totalPeriods'])
+        return MetricTimePeriodJsonResponse(metric_time_period)
 
     @router.get(
         '/metrics/article/{article_id}/citations/version/{version_number}',
-        response_class=CitationsJsonResponse
+        response_class=CitationsJsonResponse,
+        response_model=CitationsResponseSequence,
+        dependencies=get_validators_dependencies(CITATIONS_GENERATION_NAMES)
     )
-    def provide_citations(article_id: str, version_number: int) -> CitationsResponseSequence:
-        json_citation_response = jsonable_encoder([
-            citations_provider.get_citations_source_metric_for_article_id_and_version(
-                article_id=article_id,
-                version_number=version_number
+    async def provide_citations(article_id: str, version_number: int) -> Response:
+        return get_citations_json_response(
+            await get_citations_source_metrics_concurrently(
+                citations_provider_list,
+                lambda citations_provider: (
+                    citations_provider.get_citations_source_metric_for_article_id_and_version(
+                        article_id=article_id,
+                        version_number=version_number
+                    )
+                ),
+                timeout_seconds=citations_provider_timeout_seconds
             )
-            for citations_provider in citations_provider_list
-        ])
-        return json_citation_response
+        )
 
     @router.get(
         '/metrics/article/{article_id}/citations',
-        response_class=CitationsJsonResponse
+        response_class=CitationsJsonResponse,
+        response_model=CitationsResponseSequence,
+        dependencies=get_validators_dependencies(CITATIONS_GENERATION_NAMES)
     )
-    def provide_combined_citations(article_id: str) -> CitationsResponseSequence:
-        json_citation_response = jsonable_encoder([
-            citations_provider.get_combined_citations_source_metric_for_article_id(
-                article_id=article_id
+    async def provide_combined_citations(article_id: str) -> Response:
+        return get_citations_json_response(
+            await get_citations_source_metrics_concurrently(
+                citations_provider_list,
+                lambda citations_provider: (
+                    citations_provider.get_combined_citations_source_metric_for_article_id(
+                        article_id=article_id
+                    )
+                ),
+                timeout_seconds=citations_provider_timeout_seconds
             )
-            for citations_provider in citations_provider_list
-        ])
-        return json_citation_response
+        )
 
     @router.get(
         '/metrics/article/{article_id}/downloads',
-        response_class=MetricTimePeriodJsonResponse
+        response_class=MetricTimePeriodJsonResponse,
+        response_model=MetricTimePeriodResponseTypedDict,
+        dependencies=get_validators_dependencies(METRIC_TIME_PERIOD_GENERATION_NAMES)
     )
-    def provide_downloads(
+    async def provide_downloads(
         article_id: str,
         by: Literal['day', 'month'] = 'day',
         per_page: PerPageQueryType = 20,
         page: PageQueryType = 1
-    ) -> MetricTimePeriodResponseTypedDict:
-        return page_views_and_downloads_provider.get_metric_for_article_id_by_time_period(
+    ) -> Response:
+        return await get_article_metric_time_period_response(
             article_id=article_id,
             metric_name='downloads',
             by=by,
@@ -98,15 +286,17 @@ def create_api_router(
 
     @router.get(
         '/metrics/article/{article_id}/page-views',
-        response_class=MetricTimePeriodJsonResponse
+        response_class=MetricTimePeriodJsonResponse,
+        response_model=MetricTimePeriodResponseTypedDict,
+        dependencies=get_validators_dependencies(METRIC_TIME_PERIOD_GENERATION_NAMES)
     )
-    def provide_page_views(
+    async def provide_page_views(
         article_id: str,
         by: Literal['day', 'month'] = 'day',
         per_page: PerPageQueryType = 20,
         page: PageQueryType = 1
-    ) -> MetricTimePeriodResponseTypedDict:
-        return page_views_and_downloads_provider.get_metric_for_article_id_by_time_period(
+    ) -> Response:
+        return await get_article_metric_time_period_response(
             article_id=article_id,
             metric_name='page_views',
             by=by,
@@ -114,48 +304,156 @@ def create_api_router(
             page=page
         )
 
-    @router.get('/metrics/article/summary')
-    def provide_summary_for_all_articles(
+    @router.get(
+        '/metrics/article/summary',
+        response_class=MetricSummaryJsonResponse,
+        response_model=MetricSummaryResponseTypedDict,
+        dependencies=get_validators_dependencies(SUMMARY_GENERATION_NAMES)
+    )
+    async def provide_summary_for_all_articles(
+        *,
         per_page: PerPageQueryType = 20,
-        page: PageQueryType = 1
-    ) -> MetricSummaryResponseTypedDict:
-        return metric_summary_provider.get_summary_for_all_articles(
-            per_page=per_page,
-            page=page
+        page: PageQueryType = 1,
+        ids: ArticleIdsQueryType = None,
+        cursor: CursorQueryType = None,
+        order: SummaryOrderQueryType = None,
+        descending: DescendingQueryType = False
+    ) -> Response:
+        if ids is not None:
+            return MetricSummaryJsonResponse(
+                await metric_summary_provider.get_summary_for_article_ids(
+                    article_ids=get_validated_article_ids(ids, max_summary_article_ids)
+                )
+            )
+        if cursor is not None and order is not None:
+            # the cursor is the last article id, i.e. only valid for the article id order
+            raise HTTPException(
+                status_code=422,
+                detail='The cursor can not be combined with an order'
+            )
+        if descending and order is None:
+            raise HTTPException(
+                status_code=422,
+                detail='The descending order requires an order'
+            )
+        if cursor is not None:
+            # the cursor is used instead of the page
+            summary = await metric_summary_provider.get_summary_for_all_articles_after_article_id(
+                after_article_id=get_validated_after_article_id(cursor),
+                per_page=per_page
+            )
+        elif order is not None:
+            if not await metric_summary_provider.is_summary_order_available():
+                raise HTTPException(
+                    status_code=503,
+                    detail='The order is not available until the article summaries are refreshed'
+                )
+            summary = await metric_summary_provider.get_summary_for_all_articles_by_order(
+                order=order,
+                descending=descending,
+                per_page=per_page,
+                page=page
+            )
+        else:
+            summary = await metric_summary_provider.get_summary_for_all_articles(
+                per_page=per_page,
+                page=page
+            )
+        observe_result_size('summary_page_items', len(summary['items']))
+        return MetricSummaryJsonResponse(summary)
+
+    @router.get(
+        '/metrics/article/export',
+        response_class=StreamingResponse
+    )
+    async def provide_export_for_all_articles(
+        export_format: ExportFormatQueryType = 'ndjson'
+    ) -> Response:
+        # the summary items of all articles in one streamed response,
+        # rather than requesting every page of the summary
+        LOGGER.info('export: export_format=%r', export_format)
+        return StreamingResponse(
+            iter_export_chunks(
+                metric_summary_provider.iter_summary_item_json_batches_for_all_articles(),
+                export_format=export_format,
+                field_names=SUMMARY_EXPORT_FIELD_NAMES
+            ),
+            media_type=MEDIA_TYPE_BY_EXPORT_FORMAT[export_format],
+            headers={
+                'Cache-Control': 'no-store',
+                'Content-Disposition': f'attachment; filename="article-metrics.{export_format}"'
+            }
+        )
+
+    @router.post(
+        '/metrics/article/summary',
+        response_class=MetricSummaryJsonResponse,
+        response_model=MetricSummaryResponseTypedDict
+    )
+    async def provide_summary_for_article_ids(
+        summary_request: MetricSummaryRequestTypedDict
+    ) -> Response:
+        return MetricSummaryJsonResponse(
+            await metric_summary_provider.get_summary_for_article_ids(
+                article_ids=get_validated_article_ids(
+                    summary_request['ids'],
+                    max_summary_article_ids
+                )
+            )
         )
 
-    @router.get('/metrics/article/{article_id}/summary')
-    def provide_summary(
+    @router.get(
+        '/metrics/article/{article_id}/summary',
+        response_class=MetricSummaryJsonResponse,
+        response_model=MetricSummaryResponseTypedDict,
+        dependencies=get_validators_dependencies(SUMMARY_GENERATION_NAMES)
+    )
+    async def provide_summary(
         article_id: str
-    ) -> MetricSummaryResponseTypedDict:
+    ) -> Response:
         LOGGER.info('summary: article_id=%r', article_id)
-        return metric_summary_provider.get_summary_for_article_id(
-            article_id=article_id
+        return MetricSummaryJsonResponse(
+            await metric_summary_provider.get_summary_for_article_id(
+                article_id=article_id
+            )
         )
 
     @router.get(
         '/metrics/{content_type}/{content_id}/page-views',
-        response_class=MetricTimePeriodJsonResponse
+        response_class=MetricTimePeriodJsonResponse,
+        response_model=MetricTimePeriodResponseTypedDict,
+        dependencies=get_validators_dependencies(NON_ARTICLE_PAGE_VIEWS_GENERATION_NAMES)
     )
-    def provide_page_views_by_content_type(
+    async def provide_page_views_by_content_type(
         content_type: ContentTypeLiteral,
         content_id: str,
         by: Literal['day', 'month'] = 'day'
-    ) -> MetricTimePeriodResponseTypedDict:
-        return non_article_page_views_provider.get_page_views_by_content_type(
-            content_type=content_type,
-            content_id=content_id,
-            by=by
+    ) -> Response:
+        return MetricTimePeriodJsonResponse(
+            await non_article_page_views_provider.get_page_views_by_content_type(
+                content_type=content_type,
+                content_id=content_id,
+                by=by
+            )
+        )
+
+    @router.get('/metrics/internal/prometheus', include_in_schema=False)
+    async def provide_prometheus_metrics() -> Response:
+        return Response(
+            await get_prometheus_exposition(async_redis_client),
+            media_type=CONTENT_TYPE_LATEST,
+            headers={'Cache-Control': 'no-store'}
         )
 
     @router.get('/ping/metrics', response_class=PlainTextResponse)
-    def ping_pong() -> PlainTextResponse:
+    async def ping_pong() -> PlainTextResponse:
+        headers = {'Cache-Control': 'no-store'}
         try:
-            if redis_client.ping():
-                return PlainTextResponse('pong', status_code=200)
+            if await async_redis_client.ping():  # type: ignore[misc]
+                return PlainTextResponse('pong', status_code=200, headers=headers)
             LOGGER.warning('Redis ping returned false')
         except Exception as exc:  # pylint: disable=broad-exception-caught
             LOGGER.warning('Redis ping failed: %s', exc)
-        return PlainTextResponse('no pong available', status_code=500)
+        return PlainTextResponse('no pong available', status_code=500, headers=headers)
 
     return router
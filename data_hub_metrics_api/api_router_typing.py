@@ -1,4 +1,4 @@
-from typing import Literal, Sequence, TypedDict
+from typing import Literal, NotRequired, Optional, Sequence, TypedDict
 
 
 ContentTypeLiteral = Literal[
@@ -16,6 +16,8 @@ class CitationsSourceMetricTypedDict(TypedDict):
     service: str
     uri: str
     citations: int
+    # only present (and true) if the source timed out or failed, i.e. the citations are unknown
+    unavailable: NotRequired[bool]
 
 
 CitationsResponseSequence = Sequence[CitationsSourceMetricTypedDict]
@@ -41,6 +43,16 @@ class MetricSummaryItemTypedDict(TypedDict):
     scopus: int
 
 
+# the summary item fields the summary of all articles can be ordered by
+MetricSummaryOrderLiteral = Literal['views', 'downloads', 'crossref']
+
+
+class MetricSummaryRequestTypedDict(TypedDict):
+    ids: Sequence[str]
+
+
 class MetricSummaryResponseTypedDict(TypedDict):
     total: int
     items: Sequence[MetricSummaryItemTypedDict]
+    # the cursor of the next page (None on the last page), only when requested using a cursor
+    next: NotRequired[Optional[str]]
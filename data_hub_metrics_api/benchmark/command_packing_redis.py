@@ -0,0 +1,64 @@
+from typing import Any, Sequence
+
+from redis import Redis
+from redis.client import Pipeline
+from redis.connection import Connection
+
+
+# measures building and encoding the commands (as they would be sent to Redis),
+# without a Redis server, e.g. to compare loaders where no development Redis is available
+
+
+class CommandPackingStats:
+    def __init__(self):
+        self.command_count = 0
+        self.byte_count = 0
+        # only used to encode the commands, it never connects
+        self._connection = Connection()
+
+    def pack_commands(self, commands: Sequence[Sequence[Any]]) -> None:
+        for packed_part in self._connection.pack_commands(commands):
+            self.byte_count += len(packed_part)
+        self.command_count += len(commands)
+
+
+def get_fake_response(command_args: Sequence[Any]) -> Any:
+    if command_args[0] == 'SCAN':
+        # the cursor and no keys, i.e. there are no keys of other generations to expire
+        return [0, []]
+    return None
+
+
+# pylint: disable-next=abstract-method,too-many-ancestors
+class CommandPackingPipeline(Pipeline):
+    def __init__(self, stats: CommandPackingStats, *args: Any, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        self.stats = stats
+
+    def execute(self, raise_on_error: bool = True) -> list[Any]:
+        commands = [command_args for command_args, _options in self.command_stack]
+        try:
+            self.stats.pack_commands(commands)
+            return [get_fake_response(command_args) for command_args in commands]
+        finally:
+            self.reset()
+
+
+# pylint: disable-next=abstract-method,too-many-ancestors
+class CommandPackingRedis(Redis):
+    def __init__(self):
+        super().__init__()
+        self.stats = CommandPackingStats()
+
+    def execute_command(self, *args: Any, **options: Any) -> Any:
+        self.stats.pack_commands([args])
+        return get_fake_response(args)
+
+    def pipeline(self, transaction: bool = True, shard_hint: Any = None) -> Pipeline:
+        return CommandPackingPipeline(
+            self.stats,
+            self.connection_pool,
+            self.response_callbacks,
+            transaction,
+            shard_hint
+        )
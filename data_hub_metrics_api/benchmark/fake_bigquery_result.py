@@ -0,0 +1,60 @@
+from typing import Any, Iterator, Optional, Sequence
+
+from data_hub_metrics_api.utils.collections import iter_batch_iterable
+
+
+DEFAULT_RECORD_BATCH_SIZE = 10000
+
+
+class FakeRecordBatch:
+    def __init__(self, rows: Sequence[dict]):
+        self.rows = rows
+
+    def to_pylist(self) -> list[dict]:
+        return list(self.rows)
+
+    def to_pydict(self) -> dict[str, list]:
+        return {
+            key: [row[key] for row in self.rows]
+            for key in (self.rows[0].keys() if self.rows else [])
+        }
+
+
+class FakeBigQueryResult:
+    # provides locally generated rows in place of a BigQuery query result,
+    # either row by row or as record batches (similar to the Storage Read API)
+    def __init__(
+        self,
+        rows: Sequence[dict],
+        record_batch_size: int = DEFAULT_RECORD_BATCH_SIZE
+    ):
+        self.rows = rows
+        self.record_batch_size = record_batch_size
+
+    @property
+    def total_rows(self) -> Optional[int]:
+        return len(self.rows)
+
+    def __iter__(self) -> Iterator[Any]:
+        return iter(self.rows)
+
+    def to_arrow_iterable(  # pylint: disable=unused-argument
+        self,
+        *,
+        bqstorage_client: Any = None,
+        max_stream_count: Optional[int] = None
+    ) -> Iterator[Any]:
+        # the rows are already local, there is only one stream
+        for batch in iter_batch_iterable(self.rows, batch_size=self.record_batch_size):
+            yield FakeRecordBatch(list(batch))
+
+
+def get_fake_page_view_and_download_totals_rows(number_of_articles: int) -> Sequence[dict]:
+    return [
+        {
+            'article_id': str(10000 + index),
+            'page_view_count': (index * 7919) % 100000,
+            'download_count': (index * 104729) % 10000
+        }
+        for index in range(number_of_articles)
+    ]
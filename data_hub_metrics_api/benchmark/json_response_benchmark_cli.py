@@ -0,0 +1,103 @@
+import argparse
+import logging
+import time
+from typing import Literal, Optional, Sequence, get_args
+
+from fastapi import FastAPI, Response
+from fastapi.testclient import TestClient
+
+from data_hub_metrics_api.api_router import MetricSummaryJsonResponse
+from data_hub_metrics_api.api_router_typing import MetricSummaryResponseTypedDict
+from data_hub_metrics_api.metric_summary_provider import get_summary_item
+
+LOGGER = logging.getLogger(__name__)
+
+
+ResponsePathLiteral = Literal['default', 'fast']
+
+BENCHMARK_PATH = '/metrics/article/summary'
+
+DEFAULT_NUMBER_OF_ITEMS = 100
+DEFAULT_NUMBER_OF_REQUESTS = 2000
+
+
+def get_fake_summary_response(number_of_items: int) -> MetricSummaryResponseTypedDict:
+    return {
+        'total': number_of_items,
+        'items': [
+            get_summary_item(
+                article_id=str(10000 + index),
+                views=(index * 7919) % 100000,
+                downloads=(index * 104729) % 10000,
+                crossref=index % 100
+            )
+            for index in range(number_of_items)
+        ]
+    }
+
+
+def create_benchmark_app(
+    summary_response: MetricSummaryResponseTypedDict,
+    response_path: ResponsePathLiteral
+) -> FastAPI:
+    # only the route is included, to measure the serialization rather than Redis
+    app = FastAPI()
+    if response_path == 'fast':
+        @app.get(
+            BENCHMARK_PATH,
+            response_class=MetricSummaryJsonResponse,
+            response_model=MetricSummaryResponseTypedDict
+        )
+        async def provide_summary_using_fast_response() -> Response:
+            return MetricSummaryJsonResponse(summary_response)
+    else:
+        # the previous route, validated and encoded by FastAPI
+        @app.get(BENCHMARK_PATH)
+        async def provide_summary() -> MetricSummaryResponseTypedDict:
+            return summary_response
+    return app
+
+
+def get_cpu_seconds_per_request(client: TestClient, number_of_requests: int) -> float:
+    # the test client overhead is the same for both response paths
+    client.get(BENCHMARK_PATH).raise_for_status()
+    start_cpu_time = time.process_time()
+    for _ in range(number_of_requests):
+        client.get(BENCHMARK_PATH)
+    return (time.process_time() - start_cpu_time) / number_of_requests
+
+
+def parse_args(vargs: Optional[Sequence[str]]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description='Compares the CPU time per request of the summary JSON response paths'
+    )
+    parser.add_argument('--number-of-items', type=int, default=DEFAULT_NUMBER_OF_ITEMS)
+    parser.add_argument('--number-of-requests', type=int, default=DEFAULT_NUMBER_OF_REQUESTS)
+    return parser.parse_args(vargs)
+
+
+def main(vargs: Optional[Sequence[str]] = None) -> dict[ResponsePathLiteral, float]:
+    args = parse_args(vargs)
+    summary_response = get_fake_summary_response(args.number_of_items)
+    cpu_seconds_by_response_path: dict[ResponsePathLiteral, float] = {}
+    for response_path in get_args(ResponsePathLiteral):
+        with TestClient(create_benchmark_app(summary_response, response_path)) as client:
+            cpu_seconds_by_response_path[response_path] = get_cpu_seconds_per_request(
+                client,
+                number_of_requests=args.number_of_requests
+            )
+        LOGGER.info(
+            'Response path %r: %.1f microseconds CPU per request (%d items, %d requests)',
+            response_path,
+            cpu_seconds_by_response_path[response_path] * 1_000_000,
+            args.number_of_items,
+            args.number_of_requests
+        )
+    return cpu_seconds_by_response_path
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    # the test client would otherwise log every request
+    logging.getLogger('httpx').setLevel(logging.WARNING)
+    main()
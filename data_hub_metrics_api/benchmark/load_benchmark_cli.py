@@ -0,0 +1,181 @@
+import argparse
+import asyncio
+import logging
+import statistics
+import time
+from typing import Mapping, Optional, Sequence, TypedDict
+
+import httpx
+
+LOGGER = logging.getLogger(__name__)
+
+
+DEFAULT_BASE_URL = 'http://127.0.0.1:8000'
+DEFAULT_PATH = '/metrics/article/summary'
+DEFAULT_CONCURRENCY = 200
+DEFAULT_NUMBER_OF_REQUESTS = 5000
+
+
+class LoadBenchmarkResultTypedDict(TypedDict):
+    request_count: int
+    error_count: int
+    # the number of failed requests by the status code or the exception type
+    error_count_by_name: Mapping[str, int]
+    elapsed_seconds: float
+    requests_per_second: float
+    median_latency_ms: float
+    p95_latency_ms: float
+
+
+class LoadBenchmarkComparisonTypedDict(TypedDict):
+    baseline: LoadBenchmarkResultTypedDict
+    current: LoadBenchmarkResultTypedDict
+    requests_per_second_ratio: float
+    median_latency_ratio: float
+
+
+def get_load_benchmark_result(
+    latencies: Sequence[float],
+    error_count_by_name: Mapping[str, int],
+    elapsed_seconds: float
+) -> LoadBenchmarkResultTypedDict:
+    # the latencies include the failed requests
+    sorted_latencies = sorted(latencies)
+    p95_index = max(0, int(len(sorted_latencies) * 0.95) - 1)
+    return {
+        'request_count': len(latencies),
+        'error_count': sum(error_count_by_name.values()),
+        'error_count_by_name': dict(error_count_by_name),
+        'elapsed_seconds': elapsed_seconds,
+        'requests_per_second': len(latencies) / elapsed_seconds if elapsed_seconds else 0.0,
+        'median_latency_ms': (
+            statistics.median(sorted_latencies) * 1000 if sorted_latencies else 0.0
+        ),
+        'p95_latency_ms': sorted_latencies[p95_index] * 1000 if sorted_latencies else 0.0
+    }
+
+
+def get_load_benchmark_comparison(
+    baseline: LoadBenchmarkResultTypedDict,
+    current: LoadBenchmarkResultTypedDict
+) -> LoadBenchmarkComparisonTypedDict:
+    # a ratio above one means more requests per second, or a higher latency, than the baseline
+    return {
+        'baseline': baseline,
+        'current': current,
+        'requests_per_second_ratio': (
+            current['requests_per_second'] / baseline['requests_per_second']
+            if baseline['requests_per_second'] else 0.0
+        ),
+        'median_latency_ratio': (
+            current['median_latency_ms'] / baseline['median_latency_ms']
+            if baseline['median_latency_ms'] else 0.0
+        )
+    }
+
+
+async def run_load_benchmark(
+    base_url: str,
+    path: str,
+    concurrency: int,
+    number_of_requests: int,
+    *,
+    transport: Optional[httpx.AsyncBaseTransport] = None
+) -> LoadBenchmarkResultTypedDict:
+    latencies: list[float] = []
+    error_count_by_name: dict[str, int] = {}
+    remaining_request_count = number_of_requests
+
+    limits = httpx.Limits(max_connections=concurrency)
+    async with httpx.AsyncClient(
+        base_url=base_url,
+        limits=limits,
+        timeout=60,
+        transport=transport
+    ) as client:
+        async def worker():
+            nonlocal remaining_request_count
+            while remaining_request_count > 0:
+                remaining_request_count -= 1
+                start_time = time.perf_counter()
+                error_name: Optional[str] = None
+                try:
+                    response = await client.get(path)
+                    if response.is_error:
+                        error_name = str(response.status_code)
+                except httpx.HTTPError as exc:
+                    # e.g. a timeout or a refused connection, the other requests carry on
+                    error_name = type(exc).__name__
+                latencies.append(time.perf_counter() - start_time)
+                if error_name:
+                    error_count_by_name[error_name] = error_count_by_name.get(error_name, 0) + 1
+
+        start_time = time.perf_counter()
+        await asyncio.gather(*[worker() for _ in range(concurrency)])
+        elapsed_seconds = time.perf_counter() - start_time
+
+    return get_load_benchmark_result(
+        latencies=latencies,
+        error_count_by_name=error_count_by_name,
+        elapsed_seconds=elapsed_seconds
+    )
+
+
+def parse_args(vargs: Optional[Sequence[str]]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description='Sends concurrent requests to a running API and reports the throughput'
+    )
+    parser.add_argument('--base-url', default=DEFAULT_BASE_URL)
+    parser.add_argument(
+        '--baseline-base-url',
+        help='also run the benchmark against this server first (e.g. the previous version)'
+    )
+    parser.add_argument('--path', default=DEFAULT_PATH)
+    parser.add_argument('--concurrency', type=int, default=DEFAULT_CONCURRENCY)
+    parser.add_argument('--number-of-requests', type=int, default=DEFAULT_NUMBER_OF_REQUESTS)
+    return parser.parse_args(vargs)
+
+
+def run_load_benchmark_for_args(
+    args: argparse.Namespace,
+    base_url: str
+) -> LoadBenchmarkResultTypedDict:
+    LOGGER.info(
+        'Running load benchmark: url=%r, concurrency=%d, number_of_requests=%d',
+        base_url + args.path,
+        args.concurrency,
+        args.number_of_requests
+    )
+    result = asyncio.run(run_load_benchmark(
+        base_url=base_url,
+        path=args.path,
+        concurrency=args.concurrency,
+        number_of_requests=args.number_of_requests
+    ))
+    LOGGER.info('Load benchmark result: %r', result)
+    return result
+
+
+def main(vargs: Optional[Sequence[str]] = None):
+    args = parse_args(vargs)
+    baseline_result = (
+        run_load_benchmark_for_args(args, args.baseline_base_url)
+        if args.baseline_base_url
+        else None
+    )
+    result = run_load_benchmark_for_args(args, args.base_url)
+    if baseline_result is not None:
+        comparison = get_load_benchmark_comparison(baseline=baseline_result, current=result)
+        LOGGER.info(
+            'Load benchmark comparison: %.2fx requests per second, %.2fx median latency'
+            ' (baseline errors: %d, current errors: %d)',
+            comparison['requests_per_second_ratio'],
+            comparison['median_latency_ratio'],
+            baseline_result['error_count'],
+            result['error_count']
+        )
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    main()
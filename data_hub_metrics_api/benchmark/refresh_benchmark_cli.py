@@ -0,0 +1,171 @@
+import argparse
+import logging
+import time
+from typing import Iterable, Literal, Optional, Sequence, get_args
+
+from redis import Redis
+
+from data_hub_metrics_api.benchmark.command_packing_redis import CommandPackingRedis
+from data_hub_metrics_api.benchmark.fake_bigquery_result import (
+    FakeBigQueryResult,
+    get_fake_page_view_and_download_totals_rows
+)
+from data_hub_metrics_api.main import get_async_redis_client, get_redis_client
+from data_hub_metrics_api.page_views_and_downloads_provider import (
+    ARTICLE_IDS_INDEX_KEY,
+    BATCH_SIZE,
+    TOTALS_GENERATION_NAME,
+    TOTALS_KEY_PATTERNS,
+    PageViewsAndDownloadsProvider
+)
+from data_hub_metrics_api.utils.bigquery import (
+    iter_column_batch_from_bq_result_with_progress,
+    iter_dict_from_bq_result_with_progress
+)
+from data_hub_metrics_api.utils.collections import iter_batch_iterable
+from data_hub_metrics_api.utils.keyspace_generations import (
+    activate_generation,
+    create_generation,
+    get_generation_key_prefix
+)
+
+LOGGER = logging.getLogger(__name__)
+
+
+LoaderLiteral = Literal['rows', 'columns']
+
+DEFAULT_NUMBER_OF_ARTICLES = 1000000
+
+# the API and the refresh jobs use the default database (0),
+# the benchmark loads (and activates) its own totals generation in a separate database
+DEFAULT_REDIS_DB = 15
+
+
+def load_page_view_and_download_totals_row_by_row(
+    redis_client: Redis,
+    bq_result_iterable: Iterable[dict],
+    batch_size: int
+) -> int:
+    # the baseline: PageViewsAndDownloadsProvider.load_page_view_and_download_totals
+    # before it read column batches (unchanged, apart from taking the Redis client)
+    generation = create_generation()
+    key_prefix = get_generation_key_prefix(generation)
+    loaded_count = 0
+    with redis_client.pipeline() as pipe:
+        for batch in iter_batch_iterable(bq_result_iterable, batch_size=batch_size):
+            article_id_score_mapping: dict[str, float] = {}
+            for row in batch:
+                pipe.set(
+                    f'{key_prefix}article:{row['article_id']}:page_views',
+                    row['page_view_count']
+                )
+                pipe.set(
+                    f'{key_prefix}article:{row['article_id']}:downloads',
+                    row['download_count']
+                )
+                article_id_score_mapping[row['article_id']] = 0
+            pipe.zadd(key_prefix + ARTICLE_IDS_INDEX_KEY, article_id_score_mapping)
+            pipe.execute()
+            loaded_count += len(article_id_score_mapping)
+    activate_generation(
+        redis_client,
+        generation_name=TOTALS_GENERATION_NAME,
+        generation=generation,
+        key_patterns=TOTALS_KEY_PATTERNS
+    )
+    return loaded_count
+
+
+def parse_args(vargs: Optional[Sequence[str]]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description=(
+            'Loads fake page view and download totals into a separate Redis database'
+            ' and reports the throughput'
+        )
+    )
+    parser.add_argument('--number-of-articles', type=int, default=DEFAULT_NUMBER_OF_ARTICLES)
+    parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+    parser.add_argument(
+        '--loader',
+        choices=get_args(LoaderLiteral),
+        default='columns',
+        help='load column batches (the refresh jobs) or one row at a time (the baseline)'
+    )
+    parser.add_argument(
+        '--use-record-batches',
+        action='store_true',
+        help='read the fake result as record batches, like the BigQuery Storage Read API'
+    )
+    parser.add_argument(
+        '--redis-db',
+        type=int,
+        default=DEFAULT_REDIS_DB,
+        help='the Redis database to load the totals into (not the one of the API, 0)'
+    )
+    parser.add_argument(
+        '--without-redis',
+        action='store_true',
+        help='only build and encode the Redis commands, without sending them to Redis'
+    )
+    args = parser.parse_args(vargs)
+    if args.redis_db == 0:
+        parser.error('--redis-db must not be 0, the database used by the API and refresh jobs')
+    return args
+
+
+def get_benchmark_redis_client(args: argparse.Namespace) -> Redis:
+    if args.without_redis:
+        return CommandPackingRedis()
+    return get_redis_client(db=args.redis_db)
+
+
+def main(vargs: Optional[Sequence[str]] = None):
+    args = parse_args(vargs)
+    fake_bq_result = FakeBigQueryResult(
+        get_fake_page_view_and_download_totals_rows(args.number_of_articles),
+        record_batch_size=args.batch_size
+    )
+    redis_client = get_benchmark_redis_client(args)
+    start_time = time.perf_counter()
+    if args.loader == 'rows':
+        loaded_count = load_page_view_and_download_totals_row_by_row(
+            redis_client,
+            iter_dict_from_bq_result_with_progress(
+                fake_bq_result,
+                desc='Loading Redis',
+                use_record_batches=args.use_record_batches
+            ),
+            batch_size=args.batch_size
+        )
+    else:
+        loaded_count = PageViewsAndDownloadsProvider(
+            redis_client,
+            # not used to load the totals
+            async_redis_client=get_async_redis_client()
+        ).load_page_view_and_download_totals(
+            iter_column_batch_from_bq_result_with_progress(
+                fake_bq_result,
+                batch_size=args.batch_size,
+                desc='Loading Redis',
+                use_record_batches=args.use_record_batches
+            )
+        )
+    elapsed_seconds = time.perf_counter() - start_time
+    LOGGER.info(
+        'Loaded %d articles using %s loader in %.3f seconds (%.1f rows per second)',
+        loaded_count,
+        args.loader,
+        elapsed_seconds,
+        loaded_count / elapsed_seconds if elapsed_seconds else 0.0
+    )
+    if isinstance(redis_client, CommandPackingRedis):
+        LOGGER.info(
+            'Encoded %d commands (%d bytes), without sending them to Redis',
+            redis_client.stats.command_count,
+            redis_client.stats.byte_count
+        )
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    main()
@@ -1,7 +1,16 @@
 from abc import ABC, abstractmethod
+import asyncio
+import logging
+from typing import Awaitable, Callable, Sequence
 
 from data_hub_metrics_api.api_router_typing import CitationsSourceMetricTypedDict
 
+LOGGER = logging.getLogger(__name__)
+
+
+# a slow source should not hold up the citations of the other sources
+DEFAULT_CITATIONS_PROVIDER_TIMEOUT_SECONDS = 2.0
+
 
 class CitationsProvider(ABC):
     def __init__(self, name: str):
@@ -9,7 +18,7 @@ class CitationsProvider(ABC):
         self.name = name
 
     @abstractmethod
-    def get_citations_source_metric_for_article_id_and_version(
+    async def get_citations_source_metric_for_article_id_and_version(
         self,
         article_id: str,
         version_number: int
@@ -17,12 +26,21 @@ class CitationsProvider(ABC):
         pass
 
     @abstractmethod
-    def get_combined_citations_source_metric_for_article_id(
+    async def get_combined_citations_source_metric_for_article_id(
         self,
         article_id: str
     ) -> CitationsSourceMetricTypedDict:
         pass
 
+    def get_degraded_citations_source_metric(self) -> CitationsSourceMetricTypedDict:
+        # used in place of the citations of a source which timed out or failed
+        return {
+            'service': self.name,
+            'uri': '',
+            'citations': 0,
+            'unavailable': True
+        }
+
     def refresh_data(
         self
     ):
@@ -30,7 +48,7 @@ class CitationsProvider(ABC):
 
 
 class DummyCitationsProvider(CitationsProvider):
-    def get_citations_source_metric_for_article_id_and_version(
+    async def get_citations_source_metric_for_article_id_and_version(
         self,
         article_id: str,
         version_number: int
@@ -41,7 +59,7 @@ class DummyCitationsProvider(CitationsProvider):
             'citations': 0
         }
 
-    def get_combined_citations_source_metric_for_article_id(
+    async def get_combined_citations_source_metric_for_article_id(
         self,
         article_id: str
     ) -> CitationsSourceMetricTypedDict:
@@ -50,3 +68,55 @@ class DummyCitationsProvider(CitationsProvider):
             'uri': '',
             'citations': 0
         }
+
+
+async def get_citations_source_metric_or_degraded(
+    citations_provider: CitationsProvider,
+    get_citations_source_metric: Callable[
+        [CitationsProvider],
+        Awaitable[CitationsSourceMetricTypedDict]
+    ],
+    timeout_seconds: float = DEFAULT_CITATIONS_PROVIDER_TIMEOUT_SECONDS
+) -> CitationsSourceMetricTypedDict:
+    try:
+        return await asyncio.wait_for(
+            get_citations_source_metric(citations_provider),
+            timeout=timeout_seconds
+        )
+    except TimeoutError:
+        LOGGER.warning(
+            'Citations provider %r timed out after %r seconds',
+            citations_provider.name,
+            timeout_seconds
+        )
+    except Exception as exc:  # pylint: disable=broad-exception-caught
+        LOGGER.warning('Citations provider %r failed: %r', citations_provider.name, exc)
+    return citations_provider.get_degraded_citations_source_metric()
+
+
+async def get_citations_source_metrics_concurrently(
+    citations_provider_list: Sequence[CitationsProvider],
+    get_citations_source_metric: Callable[
+        [CitationsProvider],
+        Awaitable[CitationsSourceMetricTypedDict]
+    ],
+    timeout_seconds: float = DEFAULT_CITATIONS_PROVIDER_TIMEOUT_SECONDS
+) -> Sequence[CitationsSourceMetricTypedDict]:
+    # the results are in the order of the providers, including the unavailable providers
+    return await asyncio.gather(*[
+        get_citations_source_metric_or_degraded(
+            citations_provider,
+            get_citations_source_metric,
+            timeout_seconds=timeout_seconds
+        )
+        for citations_provider in citations_provider_list
+    ])
+
+
+def is_any_citations_source_unavailable(
+    citations_source_metrics: Sequence[CitationsSourceMetricTypedDict]
+) -> bool:
+    return any(
+        citations_source_metric.get('unavailable')
+        for citations_source_metric in citations_source_metrics
+    )
@@ -1,24 +1,52 @@
 import logging
 
-from typing import Iterable, Optional, TypedDict, cast, override
+from typing import Optional, Sequence, override
 
 from redis import Redis
+from redis.asyncio import Redis as AsyncRedis
 
 from data_hub_metrics_api.api_router_typing import CitationsSourceMetricTypedDict
 from data_hub_metrics_api.citations_provider import CitationsProvider
+from data_hub_metrics_api.prometheus_metrics import observe_provider_method
 from data_hub_metrics_api.sql import get_sql_query_from_file
 from data_hub_metrics_api.utils import bigquery
-from data_hub_metrics_api.utils.collections import iter_batch_iterable
+from data_hub_metrics_api.utils.keyspace_generations import (
+    KeyspaceGenerations,
+    create_generation,
+    loading_generation
+)
+from data_hub_metrics_api.utils.read_through_cache import (
+    ReadThroughCache,
+    get_disabled_read_through_cache
+)
 
 LOGGER = logging.getLogger(__name__)
 
+# used to label the metrics of the provider methods
+PROVIDER_NAME = 'crossref_citations'
+
 BATCH_SIZE = 1000
 
+CITATIONS_GENERATION_NAME = 'citations'
+CITATIONS_KEY_PATTERNS = ['article:*:crossref_citations']
+
 
-class BigQueryResultRow(TypedDict):
-    article_id: str
-    version_number: Optional[str]
-    citation_count: int
+def get_citations_by_version_by_key(
+    column_batch: bigquery.ColumnBatch,
+    key_prefix: str = ''
+) -> dict[str, dict[str, int]]:
+    # the columns are: article_id, version_number (optional) and citation_count
+    citations_by_version_by_key: dict[str, dict[str, int]] = {}
+    for article_id, version_number, citation_count in zip(
+        column_batch['article_id'],
+        column_batch['version_number'],
+        column_batch['citation_count']
+    ):
+        citations_by_version_by_key.setdefault(
+            f'{key_prefix}article:{article_id}:crossref_citations',
+            {}
+        )[version_number or ''] = citation_count
+    return citations_by_version_by_key
 
 
 class CrossrefCitationsProvider(CitationsProvider):
@@ -27,21 +55,50 @@ class CrossrefCitationsProvider(CitationsProvider):
         redis_client: Redis,
         name: str = 'Crossref',
         gcp_project_name: str = 'elife-data-pipeline',
+        *,
+        async_redis_client: AsyncRedis,
+        keyspace_generations: Optional[KeyspaceGenerations] = None,
+        read_through_cache: Optional[ReadThroughCache] = None
     ) -> None:
         super().__init__(name=name)
         self.redis_client = redis_client
+        self.async_redis_client = async_redis_client
         self.gcp_project_name = gcp_project_name
+        self.keyspace_generations = (
+            keyspace_generations or KeyspaceGenerations(async_redis_client)
+        )
+        self.read_through_cache = read_through_cache or get_disabled_read_through_cache()
         self.crossref_citations_query = get_sql_query_from_file('crossref_citations_query.sql')
 
-    def get_citations_source_metric_for_article_id_and_version(
+    async def get_citations_key_prefix(self) -> str:
+        return await self.keyspace_generations.get_key_prefix(CITATIONS_GENERATION_NAME)
+
+    @observe_provider_method(PROVIDER_NAME)
+    async def get_citations_source_metric_for_article_id_and_version(
         self,
         article_id: str,
         version_number: int
     ) -> CitationsSourceMetricTypedDict:
-        citation_count = int(self.redis_client.hget(
-            f'article:{article_id}:crossref_citations',
+        key_prefix = await self.get_citations_key_prefix()
+        return await self.read_through_cache.get_or_load(
+            ('crossref_citations', article_id, version_number, key_prefix),
+            lambda: self._load_citations_source_metric_for_article_id_and_version(
+                article_id,
+                version_number,
+                key_prefix=key_prefix
+            )
+        )
+
+    async def _load_citations_source_metric_for_article_id_and_version(
+        self,
+        article_id: str,
+        version_number: int,
+        key_prefix: str
+    ) -> CitationsSourceMetricTypedDict:
+        citation_count = int(await self.async_redis_client.hget(  # type: ignore[misc]
+            f'{key_prefix}article:{article_id}:crossref_citations',
             str(version_number)
-        ) or b'0')  # type: ignore[arg-type]
+        ) or b'0')
         LOGGER.debug(
             'Citations for article_id=%s, version_number=%d: %d',
             article_id,
@@ -54,15 +111,31 @@ class CrossrefCitationsProvider(CitationsProvider):
             'citations': citation_count
         }
 
-    def get_combined_citations_source_metric_for_article_id(
+    @observe_provider_method(PROVIDER_NAME)
+    async def get_combined_citations_source_metric_for_article_id(
         self,
         article_id: str
     ) -> CitationsSourceMetricTypedDict:
-        citation_count = sum(
-            int(count) for count in self.redis_client.hgetall(  # type: ignore[misc,union-attr]
-                f'article:{article_id}:crossref_citations'
-            ).values()
+        key_prefix = await self.get_citations_key_prefix()
+        return await self.read_through_cache.get_or_load(
+            ('combined_crossref_citations', article_id, key_prefix),
+            lambda: self._load_combined_citations_source_metric_for_article_id(
+                article_id,
+                key_prefix=key_prefix
+            )
+        )
+
+    async def _load_combined_citations_source_metric_for_article_id(
+        self,
+        article_id: str,
+        key_prefix: str
+    ) -> CitationsSourceMetricTypedDict:
+        citations_by_version: dict = (
+            await self.async_redis_client.hgetall(  # type: ignore[misc]
+                f'{key_prefix}article:{article_id}:crossref_citations'
+            )
         )
+        citation_count = sum(int(count) for count in citations_by_version.values())
         LOGGER.debug(
             'Combined citations for article_id=%s: %d',
             article_id,
@@ -74,31 +147,54 @@ class CrossrefCitationsProvider(CitationsProvider):
             'citations': citation_count
         }
 
+    @observe_provider_method(PROVIDER_NAME)
+    async def get_combined_citation_counts_for_article_ids(
+        self,
+        article_ids: Sequence[str]
+    ) -> Sequence[int]:
+        LOGGER.debug('Combined citations for article_ids=%r', article_ids)
+        key_prefix = await self.get_citations_key_prefix()
+        async with self.async_redis_client.pipeline(
+            transaction=False
+        ) as pipe:
+            for article_id in article_ids:
+                pipe.hgetall(f'{key_prefix}article:{article_id}:crossref_citations')
+            citations_by_version_list = await pipe.execute()
+        return [
+            sum(int(count) for count in citations_by_version.values())
+            for citations_by_version in citations_by_version_list
+        ]
+
     @override
     def refresh_data(
         self,
         batch_size: int = BATCH_SIZE
     ) -> None:
         LOGGER.info('Refreshing citation data from BigQuery...')
-        bq_result = cast(
-            Iterable[BigQueryResultRow],
-            bigquery.iter_dict_from_bq_query_with_progress(
-                project_name=self.gcp_project_name,
-                query=self.crossref_citations_query,
-                desc='Loading Redis'
-            )
+        column_batch_iterable = bigquery.iter_column_batch_from_bq_query_with_progress(
+            project_name=self.gcp_project_name,
+            query=self.crossref_citations_query,
+            batch_size=batch_size,
+            desc='Loading Redis'
         )
-        with self.redis_client.pipeline() as pipe:
+        with (
+            loading_generation(
+                self.redis_client,
+                generation_name=CITATIONS_GENERATION_NAME,
+                generation=create_generation(),
+                key_patterns=CITATIONS_KEY_PATTERNS
+            ) as key_prefix,
+            self.redis_client.pipeline() as pipe
+        ):
             LOGGER.debug('Redis pipeline %r', pipe)
-            for batch in iter_batch_iterable(bq_result, batch_size=batch_size):
+            for column_batch in column_batch_iterable:
                 LOGGER.debug('Processing batch...')
-                for row in batch:
-                    LOGGER.debug('Processing row in batch...')
-                    pipe.hset(
-                        f'article:{row["article_id"]}:crossref_citations',
-                        row.get('version_number') or '',
-                        row['citation_count']  # type: ignore[arg-type]
-                    )
+                # one multi-field HSET per article, rather than one HSET per version
+                for key, citations_by_version in get_citations_by_version_by_key(
+                    column_batch,
+                    key_prefix=key_prefix
+                ).items():
+                    pipe.hset(key, mapping=citations_by_version)
                 pipe.execute()
 
         LOGGER.info('Done: Refreshing citation data from BigQuery')
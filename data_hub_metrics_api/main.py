@@ -1,17 +1,34 @@
 import logging
 import os
-from typing import Sequence
+from typing import Any, Optional, Sequence
 
 from fastapi import FastAPI
 from fastapi.staticfiles import StaticFiles
-from redis import Redis
-
-from data_hub_metrics_api.api_router import create_api_router
-from data_hub_metrics_api.citations_provider import CitationsProvider, DummyCitationsProvider
+from redis import BlockingConnectionPool, Redis
+from redis.asyncio import BlockingConnectionPool as AsyncBlockingConnectionPool
+from redis.asyncio import Redis as AsyncRedis
+from redis.asyncio.retry import Retry as AsyncRetry
+from redis.backoff import ExponentialBackoff
+from redis.retry import Retry
+
+from data_hub_metrics_api.api_router import DEFAULT_MAX_SUMMARY_ARTICLE_IDS, create_api_router
+from data_hub_metrics_api.citations_provider import (
+    DEFAULT_CITATIONS_PROVIDER_TIMEOUT_SECONDS,
+    CitationsProvider,
+    DummyCitationsProvider
+)
 from data_hub_metrics_api.crossref_citations_provider import CrossrefCitationsProvider
 from data_hub_metrics_api.page_views_and_downloads_provider import PageViewsAndDownloadsProvider
 from data_hub_metrics_api.metric_summary_provider import MetricSummaryProvider
 from data_hub_metrics_api.non_article_page_views_provider import NonArticlePageViewsProvider
+from data_hub_metrics_api.prometheus_metrics import InstrumentedAsyncRedis, PrometheusMiddleware
+from data_hub_metrics_api.utils.keyspace_generations import KeyspaceGenerations
+from data_hub_metrics_api.utils.read_through_cache import (
+    DEFAULT_MAX_SIZE as DEFAULT_READ_THROUGH_CACHE_MAX_SIZE,
+    DEFAULT_TTL_SECONDS,
+    ReadThroughCache
+)
+from data_hub_metrics_api.utils.refresh_job_runs import RefreshJobRedis
 
 
 LOGGER = logging.getLogger(__name__)
@@ -20,21 +37,146 @@ LOGGER = logging.getLogger(__name__)
 class RedisEnvironmentVariables:
     HOST = 'REDIS_HOST'
     PORT = 'REDIS_PORT'
+    MAX_CONNECTIONS = 'REDIS_MAX_CONNECTIONS'
+    POOL_TIMEOUT_SECONDS = 'REDIS_POOL_TIMEOUT_SECONDS'
+    SOCKET_TIMEOUT_SECONDS = 'REDIS_SOCKET_TIMEOUT_SECONDS'
+    SOCKET_CONNECT_TIMEOUT_SECONDS = 'REDIS_SOCKET_CONNECT_TIMEOUT_SECONDS'
+    HEALTH_CHECK_INTERVAL_SECONDS = 'REDIS_HEALTH_CHECK_INTERVAL_SECONDS'
+    RETRY_ATTEMPTS = 'REDIS_RETRY_ATTEMPTS'
+    RETRY_BACKOFF_CAP_SECONDS = 'REDIS_RETRY_BACKOFF_CAP_SECONDS'
+
+
+class ReadThroughCacheEnvironmentVariables:
+    MAX_SIZE = 'READ_THROUGH_CACHE_MAX_SIZE'
+    TTL_SECONDS = 'READ_THROUGH_CACHE_TTL_SECONDS'
+
+
+class ApiEnvironmentVariables:
+    MAX_SUMMARY_ARTICLE_IDS = 'MAX_SUMMARY_ARTICLE_IDS'
+    CITATIONS_PROVIDER_TIMEOUT_SECONDS = 'CITATIONS_PROVIDER_TIMEOUT_SECONDS'
 
 
 DEFAULT_REDIS_HOST = 'localhost'
 DEFAULT_REDIS_PORT = 6379
+DEFAULT_REDIS_MAX_CONNECTIONS = 50
+DEFAULT_REDIS_POOL_TIMEOUT_SECONDS = 5.0
+DEFAULT_REDIS_SOCKET_TIMEOUT_SECONDS = 5.0
+DEFAULT_REDIS_SOCKET_CONNECT_TIMEOUT_SECONDS = 5.0
+DEFAULT_REDIS_HEALTH_CHECK_INTERVAL_SECONDS = 30
+DEFAULT_REDIS_RETRY_ATTEMPTS = 3
+DEFAULT_REDIS_RETRY_BACKOFF_CAP_SECONDS = 1.0
 
 
-def get_redis_client() -> Redis:
+def get_redis_host_and_port() -> tuple[str, int]:
     host = os.getenv(RedisEnvironmentVariables.HOST) or DEFAULT_REDIS_HOST
     port = int(os.getenv(RedisEnvironmentVariables.PORT) or DEFAULT_REDIS_PORT)
-    LOGGER.info('Connecting Redis to %s:%s', host, port)
-    redis_client = Redis(host=host, port=port)
+    return host, port
+
+
+def get_redis_connection_pool_kwargs() -> dict[str, Any]:
+    # used for the sync and the async pool, requests wait for a connection once all are in use
+    host, port = get_redis_host_and_port()
+    return {
+        'host': host,
+        'port': port,
+        'max_connections': int(
+            os.getenv(RedisEnvironmentVariables.MAX_CONNECTIONS)
+            or DEFAULT_REDIS_MAX_CONNECTIONS
+        ),
+        # the maximum number of seconds to wait for a connection of the pool
+        'timeout': float(
+            os.getenv(RedisEnvironmentVariables.POOL_TIMEOUT_SECONDS)
+            or DEFAULT_REDIS_POOL_TIMEOUT_SECONDS
+        ),
+        'socket_timeout': float(
+            os.getenv(RedisEnvironmentVariables.SOCKET_TIMEOUT_SECONDS)
+            or DEFAULT_REDIS_SOCKET_TIMEOUT_SECONDS
+        ),
+        'socket_connect_timeout': float(
+            os.getenv(RedisEnvironmentVariables.SOCKET_CONNECT_TIMEOUT_SECONDS)
+            or DEFAULT_REDIS_SOCKET_CONNECT_TIMEOUT_SECONDS
+        ),
+        'health_check_interval': int(
+            os.getenv(RedisEnvironmentVariables.HEALTH_CHECK_INTERVAL_SECONDS)
+            or DEFAULT_REDIS_HEALTH_CHECK_INTERVAL_SECONDS
+        )
+    }
+
+
+def get_redis_retry_attempts() -> int:
+    # zero disables retrying on connection errors and timeouts
+    retry_attempts = os.getenv(RedisEnvironmentVariables.RETRY_ATTEMPTS)
+    return int(retry_attempts) if retry_attempts else DEFAULT_REDIS_RETRY_ATTEMPTS
+
+
+def get_redis_retry_backoff() -> ExponentialBackoff:
+    return ExponentialBackoff(cap=float(
+        os.getenv(RedisEnvironmentVariables.RETRY_BACKOFF_CAP_SECONDS)
+        or DEFAULT_REDIS_RETRY_BACKOFF_CAP_SECONDS
+    ))
+
+
+def get_redis_client(db: Optional[int] = None) -> Redis:
+    # the database defaults to the one of the connection (0), e.g. benchmarks use another one
+    connection_pool_kwargs = get_redis_connection_pool_kwargs()
+    if db is not None:
+        connection_pool_kwargs['db'] = db
+    LOGGER.info(
+        'Connecting Redis to %s:%s (db=%r)',
+        connection_pool_kwargs['host'],
+        connection_pool_kwargs['port'],
+        db
+    )
+    # the commands are counted while a refresh job run is recorded (see refresh_job_runs)
+    redis_client = RefreshJobRedis(connection_pool=BlockingConnectionPool(
+        retry=Retry(get_redis_retry_backoff(), retries=get_redis_retry_attempts()),
+        **connection_pool_kwargs
+    ))
     redis_client.ping()
     return redis_client
 
 
+def get_read_through_cache() -> ReadThroughCache:
+    max_size = int(
+        os.getenv(ReadThroughCacheEnvironmentVariables.MAX_SIZE)
+        or DEFAULT_READ_THROUGH_CACHE_MAX_SIZE
+    )
+    ttl_seconds = float(
+        os.getenv(ReadThroughCacheEnvironmentVariables.TTL_SECONDS)
+        or DEFAULT_TTL_SECONDS
+    )
+    LOGGER.info('Read-through cache: max_size=%d, ttl_seconds=%r', max_size, ttl_seconds)
+    return ReadThroughCache(max_size=max_size, ttl_seconds=ttl_seconds)
+
+
+def get_max_summary_article_ids() -> int:
+    return int(
+        os.getenv(ApiEnvironmentVariables.MAX_SUMMARY_ARTICLE_IDS)
+        or DEFAULT_MAX_SUMMARY_ARTICLE_IDS
+    )
+
+
+def get_citations_provider_timeout_seconds() -> float:
+    return float(
+        os.getenv(ApiEnvironmentVariables.CITATIONS_PROVIDER_TIMEOUT_SECONDS)
+        or DEFAULT_CITATIONS_PROVIDER_TIMEOUT_SECONDS
+    )
+
+
+def get_async_redis_client() -> AsyncRedis:
+    # the async client connects lazily, on the first command (which are instrumented)
+    connection_pool_kwargs = get_redis_connection_pool_kwargs()
+    LOGGER.info(
+        'Using async Redis at %s:%s',
+        connection_pool_kwargs['host'],
+        connection_pool_kwargs['port']
+    )
+    return InstrumentedAsyncRedis(connection_pool=AsyncBlockingConnectionPool(
+        retry=AsyncRetry(get_redis_retry_backoff(), retries=get_redis_retry_attempts()),
+        **connection_pool_kwargs
+    ))
+
+
 def get_citations_provider_list(
     crossref_citations_provider: CrossrefCitationsProvider
 ) -> Sequence[CitationsProvider]:
@@ -47,25 +189,47 @@ def get_citations_provider_list(
 
 def create_app():
     app = FastAPI()
+    app.add_middleware(PrometheusMiddleware)
 
     redis_client = get_redis_client()
-
-    page_views_and_downloads_provider = PageViewsAndDownloadsProvider(redis_client)
+    async_redis_client = get_async_redis_client()
+    keyspace_generations = KeyspaceGenerations(async_redis_client)
+    read_through_cache = get_read_through_cache()
+
+    page_views_and_downloads_provider = PageViewsAndDownloadsProvider(
+        redis_client,
+        async_redis_client=async_redis_client,
+        keyspace_generations=keyspace_generations,
+        read_through_cache=read_through_cache
+    )
     crossref_citations_provider = CrossrefCitationsProvider(
         name='Crossref',
-        redis_client=redis_client
+        redis_client=redis_client,
+        async_redis_client=async_redis_client,
+        keyspace_generations=keyspace_generations,
+        read_through_cache=read_through_cache
     )
     citations_provider_list = get_citations_provider_list(crossref_citations_provider)
 
     app.include_router(create_api_router(
-        redis_client=redis_client,
+        async_redis_client=async_redis_client,
         citations_provider_list=citations_provider_list,
         page_views_and_downloads_provider=page_views_and_downloads_provider,
         metric_summary_provider=MetricSummaryProvider(
             page_views_and_downloads_provider=page_views_and_downloads_provider,
-            crossref_citations_provider=crossref_citations_provider
+            crossref_citations_provider=crossref_citations_provider,
+            redis_client=redis_client,
+            async_redis_client=async_redis_client,
+            keyspace_generations=keyspace_generations,
+            read_through_cache=read_through_cache
+        ),
+        non_article_page_views_provider=NonArticlePageViewsProvider(
+            redis_client,
+            async_redis_client=async_redis_client
         ),
-        non_article_page_views_provider=NonArticlePageViewsProvider(redis_client)
+        max_summary_article_ids=get_max_summary_article_ids(),
+        citations_provider_timeout_seconds=get_citations_provider_timeout_seconds(),
+        keyspace_generations=keyspace_generations
     ))
 
     app.mount('/', StaticFiles(directory='static', html=True), name='static')
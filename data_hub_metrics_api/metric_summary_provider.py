@@ -1,81 +1,584 @@
+import json
 import logging
+from typing import AsyncIterator, NotRequired, Optional, Sequence, TypedDict, get_args
+
+import orjson
+from redis import Redis
+from redis.asyncio import Redis as AsyncRedis
 
 from data_hub_metrics_api.api_router_typing import (
     MetricSummaryItemTypedDict,
-    MetricSummaryResponseTypedDict
+    MetricSummaryOrderLiteral
+)
+from data_hub_metrics_api.crossref_citations_provider import (
+    CITATIONS_GENERATION_NAME,
+    CrossrefCitationsProvider
 )
-from data_hub_metrics_api.crossref_citations_provider import CrossrefCitationsProvider
 from data_hub_metrics_api.page_views_and_downloads_provider import (
-    PageViewsAndDownloadsProvider
+    ARTICLE_IDS_INDEX_KEY,
+    TOTALS_GENERATION_NAME,
+    PageViewsAndDownloadsProvider,
+    get_metric_totals_key
+)
+from data_hub_metrics_api.prometheus_metrics import observe_provider_method
+from data_hub_metrics_api.utils.collections import iter_batch_iterable
+from data_hub_metrics_api.utils.cursors import get_cursor_for_article_id
+from data_hub_metrics_api.utils.keyspace_generations import (
+    KeyspaceGenerations,
+    create_generation,
+    get_active_generation_key_prefix,
+    loading_generation
+)
+from data_hub_metrics_api.utils.packed_metric_values import (
+    MetricTotalsTypedDict,
+    get_legacy_metric_total_keys,
+    get_metric_totals_for_legacy_values,
+    get_unpacked_metric_values
+)
+from data_hub_metrics_api.utils.read_through_cache import (
+    ReadThroughCache,
+    get_disabled_read_through_cache
 )
 
 LOGGER = logging.getLogger(__name__)
 
+# used to label the metrics of the provider methods
+PROVIDER_NAME = 'metric_summary'
+
+BATCH_SIZE = 1000
+
+# the number of articles read from Redis at once, while streaming the export of all articles
+EXPORT_BATCH_SIZE = 500
+
+SUMMARIES_GENERATION_NAME = 'summaries'
+SUMMARIES_KEY_PATTERNS = ['article:*:summary', 'index:article_ids:by_*']
+
+SUMMARY_ORDERS: Sequence[MetricSummaryOrderLiteral] = get_args(MetricSummaryOrderLiteral)
+
+
+class MetricSummaryJsonResponseTypedDict(TypedDict):
+    # the same as MetricSummaryResponseTypedDict, with the summary items as JSON,
+    # which the response splices in as they are (rather than decoding and encoding them)
+    total: int
+    items: Sequence[orjson.Fragment]
+    next: NotRequired[Optional[str]]
+
+
+def get_summary_order_index_key(order: MetricSummaryOrderLiteral) -> str:
+    # sorted set of the article ids, scored by the value of the summary item field
+    return f'index:article_ids:by_{order}'
+
+
+def get_summary_item(
+    article_id: str,
+    views: int,
+    downloads: int,
+    crossref: int
+) -> MetricSummaryItemTypedDict:
+    return {
+        'id': int(article_id),
+        'views': views,
+        'downloads': downloads,
+        'crossref': crossref,
+        'pubmed': 0,
+        'scopus': 0
+    }
+
+
+def get_summary_item_json(summary_item: MetricSummaryItemTypedDict) -> str:
+    return json.dumps(summary_item, separators=(',', ':'))
+
 
 class MetricSummaryProvider:
     def __init__(
         self,
         page_views_and_downloads_provider: PageViewsAndDownloadsProvider,
-        crossref_citations_provider: CrossrefCitationsProvider
+        crossref_citations_provider: CrossrefCitationsProvider,
+        redis_client: Optional[Redis] = None,
+        *,
+        async_redis_client: AsyncRedis,
+        keyspace_generations: Optional[KeyspaceGenerations] = None,
+        read_through_cache: Optional[ReadThroughCache] = None
     ):
         self.page_views_and_downloads_provider = page_views_and_downloads_provider
         self.crossref_citations_provider = crossref_citations_provider
+        # the summary items are precomputed by the refresh jobs (see refresh_article_summaries),
+        # articles without a precomputed summary item are calculated on request
+        self.redis_client = redis_client
+        self.async_redis_client = async_redis_client
+        self.read_through_cache = read_through_cache or get_disabled_read_through_cache()
+        self.keyspace_generations = (
+            keyspace_generations or KeyspaceGenerations(async_redis_client)
+        )
+
+    async def get_summaries_key_prefix(self) -> str:
+        return await self.keyspace_generations.get_key_prefix(SUMMARIES_GENERATION_NAME)
 
-    def get_summary_item_for_article_id(
+    async def get_cached_summary_key_prefixes(self) -> tuple[str, str, str]:
+        # summary items not yet precomputed are calculated from the totals and citations
+        return (
+            await self.get_summaries_key_prefix(),
+            await self.keyspace_generations.get_key_prefix(TOTALS_GENERATION_NAME),
+            await self.keyspace_generations.get_key_prefix(CITATIONS_GENERATION_NAME)
+        )
+
+    async def get_summary_item_json_for_article_id(
+        self,
+        article_id: str
+    ) -> orjson.Fragment:
+        key_prefix = await self.get_summaries_key_prefix()
+        summary_item_json = await self.async_redis_client.get(
+            f'{key_prefix}article:{article_id}:summary'
+        )
+        if summary_item_json:
+            return orjson.Fragment(summary_item_json)
+        return orjson.Fragment(orjson.dumps(
+            await self.get_calculated_summary_item_for_article_id(article_id)
+        ))
+
+    async def get_calculated_summary_item_for_article_id(
         self,
         article_id: str
     ) -> MetricSummaryItemTypedDict:
-        return {
-            'id': int(article_id),
-            'views': self.page_views_and_downloads_provider.get_metric_total_for_article_id(
-                article_id=article_id,
-                metric_name='page_views'
-            ),
-            'downloads': self.page_views_and_downloads_provider.get_metric_total_for_article_id(
+        crossref_citations_source_metric = (
+            await self
+            .crossref_citations_provider
+            .get_combined_citations_source_metric_for_article_id(
+                article_id=article_id
+            )
+        )
+        # both metric totals are read together
+        metric_totals = (
+            await self.page_views_and_downloads_provider.get_metric_totals_for_article_ids(
+                [article_id]
+            )
+        )[0]
+        return get_summary_item(
+            article_id=article_id,
+            views=metric_totals['page_views'],
+            downloads=metric_totals['downloads'],
+            crossref=crossref_citations_source_metric['citations']
+        )
+
+    async def get_summary_items_for_article_ids(
+        self,
+        article_ids: Sequence[str]
+    ) -> Sequence[MetricSummaryItemTypedDict]:
+        return [
+            orjson.loads(summary_item_json)
+            for summary_item_json in await self.get_summary_item_json_list_for_article_ids(
+                article_ids
+            )
+        ]
+
+    async def get_summary_item_json_fragments_for_article_ids(
+        self,
+        article_ids: Sequence[str]
+    ) -> Sequence[orjson.Fragment]:
+        return [
+            orjson.Fragment(summary_item_json)
+            for summary_item_json in await self.get_summary_item_json_list_for_article_ids(
+                article_ids
+            )
+        ]
+
+    async def get_summary_item_json_list_for_article_ids(
+        self,
+        article_ids: Sequence[str]
+    ) -> Sequence[bytes]:
+        # the precomputed summary items as stored, the missing ones are calculated and encoded
+        if not article_ids:
+            return []
+        key_prefix = await self.get_summaries_key_prefix()
+        summary_item_json_list: Sequence[Optional[bytes]] = (
+            await self.async_redis_client.mget([
+                f'{key_prefix}article:{article_id}:summary'
+                for article_id in article_ids
+            ])
+        )
+        missing_article_ids = [
+            article_id
+            for article_id, summary_item_json in zip(article_ids, summary_item_json_list)
+            if not summary_item_json
+        ]
+        calculated_summary_item_by_article_id: dict[str, MetricSummaryItemTypedDict] = {}
+        if missing_article_ids:
+            LOGGER.debug('summary: missing_article_ids=%r', missing_article_ids)
+            calculated_summary_item_by_article_id = dict(zip(
+                missing_article_ids,
+                await self.get_calculated_summary_items_for_article_ids(missing_article_ids)
+            ))
+        return [
+            summary_item_json if summary_item_json
+            else orjson.dumps(calculated_summary_item_by_article_id[article_id])
+            for article_id, summary_item_json in zip(article_ids, summary_item_json_list)
+        ]
+
+    async def get_calculated_summary_items_for_article_ids(
+        self,
+        article_ids: Sequence[str]
+    ) -> Sequence[MetricSummaryItemTypedDict]:
+        metric_totals_list = (
+            await self.page_views_and_downloads_provider.get_metric_totals_for_article_ids(
+                article_ids
+            )
+        )
+        crossref_citation_counts = (
+            await self.crossref_citations_provider.get_combined_citation_counts_for_article_ids(
+                article_ids
+            )
+        )
+        return [
+            get_summary_item(
                 article_id=article_id,
-                metric_name='downloads'
-            ),
-            'crossref': (
-                self
-                .crossref_citations_provider
-                .get_combined_citations_source_metric_for_article_id(
-                    article_id=article_id
-                )['citations']
-            ),
-            'pubmed': 0,
-            'scopus': 0
-        }
+                views=metric_totals['page_views'],
+                downloads=metric_totals['downloads'],
+                crossref=crossref_citation_count
+            )
+            for article_id, metric_totals, crossref_citation_count in zip(
+                article_ids,
+                metric_totals_list,
+                crossref_citation_counts
+            )
+        ]
 
-    def get_summary_for_article_id(
+    @observe_provider_method(PROVIDER_NAME)
+    async def get_summary_for_article_id(
         self,
         article_id: str
-    ) -> MetricSummaryResponseTypedDict:
+    ) -> MetricSummaryJsonResponseTypedDict:
+        return await self.read_through_cache.get_or_load(
+            ('summary', article_id, await self.get_cached_summary_key_prefixes()),
+            lambda: self._load_summary_for_article_id(article_id)
+        )
+
+    async def _load_summary_for_article_id(
+        self,
+        article_id: str
+    ) -> MetricSummaryJsonResponseTypedDict:
         return {
             'total': 1,
             'items': [
-                self.get_summary_item_for_article_id(article_id)
+                await self.get_summary_item_json_for_article_id(article_id)
             ]
         }
 
-    def get_summary_for_all_articles(
+    @observe_provider_method(PROVIDER_NAME)
+    async def get_summary_for_article_ids(
+        self,
+        article_ids: Sequence[str]
+    ) -> MetricSummaryJsonResponseTypedDict:
+        # the items are in the order of the requested article ids
+        LOGGER.info('summary: article_ids=%r', article_ids)
+        return await self.read_through_cache.get_or_load(
+            (
+                'summary_for_article_ids', tuple(article_ids),
+                await self.get_cached_summary_key_prefixes()
+            ),
+            lambda: self._load_summary_for_article_ids(article_ids)
+        )
+
+    async def _load_summary_for_article_ids(
+        self,
+        article_ids: Sequence[str]
+    ) -> MetricSummaryJsonResponseTypedDict:
+        return {
+            'total': len(article_ids),
+            'items': await self.get_summary_item_json_fragments_for_article_ids(article_ids)
+        }
+
+    @observe_provider_method(PROVIDER_NAME)
+    async def get_summary_for_all_articles(
         self,
         per_page: int = 20,
         page: int = 1
-    ) -> MetricSummaryResponseTypedDict:
+    ) -> MetricSummaryJsonResponseTypedDict:
         LOGGER.info('summary: per_page=%r, page=%r', per_page, page)
-        article_ids = self.page_views_and_downloads_provider.get_article_ids(
+        return await self.read_through_cache.get_or_load(
+            (
+                'summary_for_all_articles', per_page, page,
+                await self.get_cached_summary_key_prefixes()
+            ),
+            lambda: self._load_summary_for_all_articles(per_page=per_page, page=page)
+        )
+
+    async def _load_summary_for_all_articles(
+        self,
+        per_page: int,
+        page: int
+    ) -> MetricSummaryJsonResponseTypedDict:
+        article_ids = await self.page_views_and_downloads_provider.get_article_ids(
             per_page=per_page,
             page=page
         )
 
-        total = self.page_views_and_downloads_provider.get_total_article_count()
+        total = await self.page_views_and_downloads_provider.get_total_article_count()
         LOGGER.info('summary: total=%r', total)
         LOGGER.debug('summary: article_ids=%r', article_ids)
 
         return {
             'total': total,
-            'items': [
-                self.get_summary_item_for_article_id(article_id)
-                for article_id in article_ids
-            ]
+            'items': await self.get_summary_item_json_fragments_for_article_ids(article_ids)
+        }
+
+    async def is_summary_order_available(self) -> bool:
+        # the order indices are only created by the refresh of the article summaries
+        return (
+            await self.keyspace_generations.get_generation(SUMMARIES_GENERATION_NAME)
+            is not None
+        )
+
+    @observe_provider_method(PROVIDER_NAME)
+    async def get_summary_for_all_articles_by_order(
+        self,
+        order: MetricSummaryOrderLiteral,
+        descending: bool = False,
+        per_page: int = 20,
+        page: int = 1
+    ) -> MetricSummaryJsonResponseTypedDict:
+        LOGGER.info(
+            'summary: order=%r, descending=%r, per_page=%r, page=%r',
+            order, descending, per_page, page
+        )
+        return await self.read_through_cache.get_or_load(
+            (
+                'summary_for_all_articles_by_order', order, descending, per_page, page,
+                await self.get_cached_summary_key_prefixes()
+            ),
+            lambda: self._load_summary_for_all_articles_by_order(
+                order=order,
+                descending=descending,
+                per_page=per_page,
+                page=page
+            )
+        )
+
+    async def _load_summary_for_all_articles_by_order(
+        self,
+        order: MetricSummaryOrderLiteral,
+        descending: bool,
+        per_page: int,
+        page: int
+    ) -> MetricSummaryJsonResponseTypedDict:
+        # the order index is refreshed together with the precomputed summary items,
+        # i.e. a page is one range of the index followed by one MGET of the summary items
+        page_start_index = (page - 1) * per_page
+        order_index_key = (
+            await self.get_summaries_key_prefix()
+            + get_summary_order_index_key(order)
+        )
+        async with self.async_redis_client.pipeline(
+            transaction=False
+        ) as pipe:
+            pipe.zrange(
+                order_index_key,
+                page_start_index,
+                page_start_index + per_page - 1,  # the end index is inclusive in Redis
+                desc=descending
+            )
+            pipe.zcard(order_index_key)
+            article_id_values, total = await pipe.execute()
+        article_ids = [article_id.decode('utf-8') for article_id in article_id_values]
+        LOGGER.debug('summary: article_ids=%r', article_ids)
+        return {
+            'total': total,
+            'items': await self.get_summary_item_json_fragments_for_article_ids(article_ids)
+        }
+
+    async def get_article_ids_after_article_id(
+        self,
+        after_article_id: Optional[str],
+        count: int
+    ) -> Sequence[str]:
+        # the index members all have the same score, i.e. are ordered lexicographically,
+        # which allows the last article id of a page to be used as the (exclusive) cursor
+        # (unlike page offsets, the pages do not shift when articles are added by a refresh)
+        article_ids_index_key = (
+            await self.keyspace_generations.get_key_prefix(TOTALS_GENERATION_NAME)
+            + ARTICLE_IDS_INDEX_KEY
+        )
+        article_id_values: Sequence[bytes] = (
+            await self.async_redis_client.zrangebylex(
+                article_ids_index_key,
+                '-' if after_article_id is None else f'({after_article_id}',
+                '+',
+                start=0,
+                num=count
+            )
+        )
+        if not article_id_values and (
+            await self.page_views_and_downloads_provider.is_article_ids_index_missing()
+        ):
+            return [
+                article_id
+                for article_id in (
+                    await self.page_views_and_downloads_provider.get_legacy_article_ids()
+                )
+                if after_article_id is None or article_id > after_article_id
+            ][:count]
+        return [article_id.decode('utf-8') for article_id in article_id_values]
+
+    async def iter_article_id_batches(
+        self,
+        batch_size: int = EXPORT_BATCH_SIZE
+    ) -> AsyncIterator[Sequence[str]]:
+        after_article_id: Optional[str] = None
+        while True:
+            article_ids = await self.get_article_ids_after_article_id(
+                after_article_id,
+                count=batch_size
+            )
+            if article_ids:
+                yield article_ids
+            if len(article_ids) < batch_size:
+                return
+            after_article_id = article_ids[-1]
+
+    async def iter_summary_item_json_batches_for_all_articles(
+        self,
+        batch_size: int = EXPORT_BATCH_SIZE
+    ) -> AsyncIterator[Sequence[bytes]]:
+        # in the same order as the pages of the summary for all articles,
+        # without the read through cache (each batch is only read once),
+        # the summary items are returned as stored (i.e. encoded)
+        async for article_ids in self.iter_article_id_batches(batch_size=batch_size):
+            yield await self.get_summary_item_json_list_for_article_ids(article_ids)
+
+    @observe_provider_method(PROVIDER_NAME)
+    async def get_summary_for_all_articles_after_article_id(
+        self,
+        after_article_id: Optional[str],
+        per_page: int = 20
+    ) -> MetricSummaryJsonResponseTypedDict:
+        LOGGER.info('summary: after_article_id=%r, per_page=%r', after_article_id, per_page)
+        return await self.read_through_cache.get_or_load(
+            (
+                'summary_for_all_articles_after_article_id', after_article_id, per_page,
+                await self.get_cached_summary_key_prefixes()
+            ),
+            lambda: self._load_summary_for_all_articles_after_article_id(
+                after_article_id=after_article_id,
+                per_page=per_page
+            )
+        )
+
+    async def _load_summary_for_all_articles_after_article_id(
+        self,
+        after_article_id: Optional[str],
+        per_page: int
+    ) -> MetricSummaryJsonResponseTypedDict:
+        # one more article id than the page, to know whether there is a next page
+        article_ids = await self.get_article_ids_after_article_id(
+            after_article_id,
+            count=per_page + 1
+        )
+        page_article_ids = article_ids[:per_page]
+        return {
+            'total': await self.page_views_and_downloads_provider.get_total_article_count(),
+            'items': await self.get_summary_item_json_fragments_for_article_ids(page_article_ids),
+            'next': (
+                get_cursor_for_article_id(page_article_ids[-1])
+                if len(article_ids) > per_page
+                else None
+            )
         }
+
+    def _get_calculated_summary_items_for_refresh(
+        self,
+        article_ids: Sequence[str],
+        totals_key_prefix: str = '',
+        citations_key_prefix: str = ''
+    ) -> Sequence[MetricSummaryItemTypedDict]:
+        assert self.redis_client is not None
+        with self.redis_client.pipeline(transaction=False) as pipe:
+            for article_id in article_ids:
+                pipe.get(totals_key_prefix + get_metric_totals_key(article_id))
+                pipe.hgetall(f'{citations_key_prefix}article:{article_id}:crossref_citations')
+            redis_values = pipe.execute()
+        packed_metric_values_list = redis_values[0::2]
+        missing_article_ids = [
+            article_id
+            for article_id, packed_metric_values in zip(article_ids, packed_metric_values_list)
+            if packed_metric_values is None
+        ]
+        legacy_metric_totals_by_article_id: dict[str, MetricTotalsTypedDict] = {}
+        if missing_article_ids:
+            # the totals per metric, while the totals generation predates the packed values
+            legacy_redis_values = self.redis_client.mget(
+                get_legacy_metric_total_keys(missing_article_ids, totals_key_prefix)
+            )
+            legacy_metric_totals_by_article_id = dict(zip(
+                missing_article_ids,
+                get_metric_totals_for_legacy_values(legacy_redis_values)  # type: ignore[arg-type]
+            ))
+        metric_totals_list = [
+            get_unpacked_metric_values(packed_metric_values)
+            if packed_metric_values is not None
+            else legacy_metric_totals_by_article_id[article_id]
+            for article_id, packed_metric_values in zip(article_ids, packed_metric_values_list)
+        ]
+        return [
+            get_summary_item(
+                article_id=article_id,
+                views=metric_totals['page_views'],
+                downloads=metric_totals['downloads'],
+                crossref=sum(int(count) for count in citations_by_version.values())
+            )
+            for article_id, metric_totals, citations_by_version in zip(
+                article_ids,
+                metric_totals_list,
+                redis_values[1::2]
+            )
+        ]
+
+    def refresh_article_summaries(self, batch_size: int = BATCH_SIZE) -> None:
+        LOGGER.info('Refreshing article summaries...')
+        assert self.redis_client is not None
+        totals_key_prefix = get_active_generation_key_prefix(
+            self.redis_client,
+            TOTALS_GENERATION_NAME
+        )
+        citations_key_prefix = get_active_generation_key_prefix(
+            self.redis_client,
+            CITATIONS_GENERATION_NAME
+        )
+        article_id_iterable = (
+            article_id.decode('utf-8')
+            for article_id, _score in self.redis_client.zscan_iter(
+                totals_key_prefix + ARTICLE_IDS_INDEX_KEY,
+                count=batch_size
+            )
+        )
+        refreshed_count = 0
+        with (
+            loading_generation(
+                self.redis_client,
+                generation_name=SUMMARIES_GENERATION_NAME,
+                generation=create_generation(),
+                key_patterns=SUMMARIES_KEY_PATTERNS
+            ) as key_prefix,
+            self.redis_client.pipeline() as pipe
+        ):
+            for batch in iter_batch_iterable(article_id_iterable, batch_size=batch_size):
+                article_ids = list(batch)
+                summary_items = self._get_calculated_summary_items_for_refresh(
+                    article_ids,
+                    totals_key_prefix=totals_key_prefix,
+                    citations_key_prefix=citations_key_prefix
+                )
+                for article_id, summary_item in zip(article_ids, summary_items):
+                    pipe.set(
+                        f'{key_prefix}article:{article_id}:summary',
+                        get_summary_item_json(summary_item)
+                    )
+                for order in SUMMARY_ORDERS:
+                    pipe.zadd(
+                        key_prefix + get_summary_order_index_key(order),
+                        {
+                            article_id: summary_item[order]
+                            for article_id, summary_item in zip(article_ids, summary_items)
+                        }
+                    )
+                pipe.execute()
+                refreshed_count += len(article_ids)
+        LOGGER.info('Done: Refreshing article summaries (%d articles)', refreshed_count)
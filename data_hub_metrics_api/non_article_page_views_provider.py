@@ -3,32 +3,46 @@
 import logging
 from typing import Literal, Optional
 
+from redis.asyncio import Redis as AsyncRedis
+
 from data_hub_metrics_api.api_router_typing import (
     ContentTypeLiteral,
     MetricTimePeriodResponseTypedDict
 )
+from data_hub_metrics_api.prometheus_metrics import observe_provider_method
 from data_hub_metrics_api.sql import get_sql_query_from_file
 from data_hub_metrics_api.utils import bigquery
-from data_hub_metrics_api.utils.collections import iter_batch_iterable
+from data_hub_metrics_api.utils.bigquery import get_column_batch_row_count
+from data_hub_metrics_api.utils.keyspace_generations import bump_generation
 
 LOGGER = logging.getLogger(__name__)
 
+# used to label the metrics of the provider methods
+PROVIDER_NAME = 'non_article_page_views'
+
 BATCH_SIZE = 1000
 
+# the totals are updated in place, the generation identifies their version (e.g. for the ETag)
+NON_ARTICLE_PAGE_VIEWS_GENERATION_NAME = 'non_article_page_views'
+
 
 class NonArticlePageViewsProvider:
     def __init__(
         self,
         redis_client,
-        gcp_project_name: str = 'elife-data-pipeline'
+        gcp_project_name: str = 'elife-data-pipeline',
+        *,
+        async_redis_client: AsyncRedis
     ):
         self.redis_client = redis_client
+        self.async_redis_client = async_redis_client
         self.gcp_project_name = gcp_project_name
         self.non_article_page_view_totals_query = (
             get_sql_query_from_file('non_article_page_view_totals_query.sql')
         )
 
-    def get_page_views_by_content_type(
+    @observe_provider_method(PROVIDER_NAME)
+    async def get_page_views_by_content_type(
         self,
         content_type: ContentTypeLiteral,
         content_id: str,
@@ -40,7 +54,7 @@ class NonArticlePageViewsProvider:
             content_id,
             by
         )
-        redis_value: Optional[str] = self.redis_client.get(  # type: ignore[assignment]
+        redis_value: Optional[str] = await self.async_redis_client.get(
             f'non-article:{content_type}:{content_id}:page_views'
         )
         return {
@@ -51,17 +65,26 @@ class NonArticlePageViewsProvider:
 
     def refresh_non_article_page_view_totals(self, batch_size: int = BATCH_SIZE) -> None:
         LOGGER.info('Refreshing non-article page view totals data from BigQuery...')
-        bq_result_iterable = bigquery.iter_dict_from_bq_query_with_progress(
+        column_batch_iterable = bigquery.iter_column_batch_from_bq_query_with_progress(
             project_name=self.gcp_project_name,
             query=self.non_article_page_view_totals_query,
+            batch_size=batch_size,
             desc='Loading Redis'
         )
         with self.redis_client.pipeline() as pipe:
-            for batch in iter_batch_iterable(bq_result_iterable, batch_size=batch_size):
-                for row in batch:
-                    pipe.set(
-                        f'non-article:{row['content_type']}:{row['content_id']}:page_views',
-                        row['page_view_count']
-                    )
+            for column_batch in column_batch_iterable:
+                if not get_column_batch_row_count(column_batch):
+                    continue
+                pipe.mset(dict(zip(
+                    [
+                        f'non-article:{content_type}:{content_id}:page_views'
+                        for content_type, content_id in zip(
+                            column_batch['content_type'],
+                            column_batch['content_id']
+                        )
+                    ],
+                    column_batch['page_view_count']
+                )))
                 pipe.execute()
+        bump_generation(self.redis_client, NON_ARTICLE_PAGE_VIEWS_GENERATION_NAME)
         LOGGER.info('Done: Refreshing non-article page view totals data from BigQuery')
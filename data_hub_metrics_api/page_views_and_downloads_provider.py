@@ -1,23 +1,127 @@
+from collections import Counter
 from datetime import date, timedelta
 import logging
-import re
-from typing import Literal, Optional, Sequence, TypedDict
+from typing import Callable, Iterable, Literal, Optional, Sequence, TypedDict, get_args
 
 from redis import Redis
+from redis.asyncio import Redis as AsyncRedis
+from redis.client import Pipeline
 
 from data_hub_metrics_api.api_router_typing import MetricTimePeriodResponseTypedDict
 
+from data_hub_metrics_api.prometheus_metrics import observe_provider_method
 from data_hub_metrics_api.sql import get_sql_query_from_file
 from data_hub_metrics_api.utils import bigquery
 from data_hub_metrics_api.utils.collections import iter_batch_iterable
+from data_hub_metrics_api.utils.compact_daily_values import (
+    COMPACT_DAILY_YEAR_MONTHS_INDEX_KEY,
+    get_compact_daily_article_ids_index_key,
+    get_compact_daily_day_count,
+    get_compact_daily_day_counts_key,
+    get_compact_daily_value_bit_offset,
+    get_compact_daily_values_key,
+    get_compact_daily_values_offset,
+    get_empty_compact_daily_values,
+    get_encoded_compact_daily_values,
+    get_year_month_for_date,
+    get_year_months_for_page_window,
+    iter_compact_daily_article_id_batches,
+    iter_decoded_compact_daily_values
+)
+from data_hub_metrics_api.utils.keyspace_generations import (
+    KeyspaceGenerations,
+    bump_generation,
+    create_generation,
+    loading_generation
+)
+from data_hub_metrics_api.utils.packed_metric_values import (
+    MetricTotalsTypedDict,
+    RedisValue,
+    get_legacy_metric_total_keys,
+    get_metric_totals_for_legacy_values,
+    get_packed_metric_values,
+    get_unpacked_metric_values
+)
+from data_hub_metrics_api.utils.period_index import (
+    PeriodValueCell,
+    backfill_period_index,
+    get_changed_period_value_cells,
+    get_period_index_key,
+    get_period_score,
+    prune_periods_before,
+    prune_unindexed_hash_fields_before,
+    put_period_value_cells
+)
+from data_hub_metrics_api.utils.per_metric_period_hashes import (
+    iter_per_metric_period_values_from_hashes,
+    unlink_per_metric_period_hashes
+)
+from data_hub_metrics_api.utils.read_through_cache import (
+    ReadThroughCache,
+    get_disabled_read_through_cache
+)
+from data_hub_metrics_api.utils.refresh_job_runs import (
+    RefreshJobStageNames,
+    measure_refresh_job_stage
+)
+from data_hub_metrics_api.utils.storage_migrations import (
+    COMPACT_DAILY_VALUES_MIGRATION_NAME,
+    PACKED_MONTHLY_VALUES_MIGRATION_NAME,
+    get_completed_storage_migration_names,
+    get_period_index_backfill_migration_name,
+    is_storage_migration_completed,
+    set_storage_migration_completed
+)
 
 
 LOGGER = logging.getLogger(__name__)
 
+# used to label the metrics of the provider methods
+PROVIDER_NAME = 'page_views_and_downloads'
+
 
 MetricNameLiteral = Literal['page_views', 'downloads']
+
+# the daily values are either stored as a hash per article and metric,
+# or as one compact string per article and month (see compact_daily_values)
+DailyStorageLayoutLiteral = Literal['hash', 'compact']
+DEFAULT_DAILY_STORAGE_LAYOUT: DailyStorageLayoutLiteral = 'hash'
 BATCH_SIZE = 1000
 
+# all members are added with the same score, which makes Redis order them
+# lexicographically (i.e. the same as sorting the article id strings)
+ARTICLE_IDS_INDEX_KEY = 'index:article_ids'
+
+# the totals and the article ids index are replaced as one keyspace generation
+TOTALS_GENERATION_NAME = 'totals'
+TOTALS_KEY_PATTERNS = [
+    'article:*:metric_totals',
+    # the totals keys per metric, of generations loaded before the metric totals were combined
+    'article:*:page_views',
+    'article:*:downloads',
+    ARTICLE_IDS_INDEX_KEY
+]
+
+# the daily and monthly data is updated in place,
+# the generation is bumped after each refresh to invalidate cached reads
+PERIODS_GENERATION_NAME = 'periods'
+
+# the keys of the daily values stored as hashes, deleted after migrating to the compact layout
+DAILY_HASH_LAYOUT_KEY_PATTERNS = [
+    'article:*:page_views:by_date',
+    'article:*:downloads:by_date',
+    'article:*:page_views:by_date:period_index',
+    'article:*:downloads:by_date:period_index',
+    'index:by_date:*'
+]
+
+# the latest event date loaded by the daily refresh, used by the incremental refresh
+DAILY_REFRESH_LAST_EVENT_DATE_KEY = 'refresh:page_views_and_downloads_daily:last_event_date'
+
+# number of days before the last loaded event date that are queried again,
+# to pick up late arriving events
+DEFAULT_LATE_ARRIVAL_DAYS = 3
+
 
 class BigQueryResultRow(TypedDict):
     article_id: str
@@ -40,6 +144,96 @@ def get_query_with_replaced_number_of_months(
     return query.replace(r'{number_of_months}', str(number_of_months))
 
 
+def get_incremental_number_of_days(
+    last_event_date: Optional[date],
+    number_of_days: int,
+    late_arrival_days: int
+) -> int:
+    if last_event_date is None:
+        return number_of_days
+    number_of_days_since_last_event_date = (date.today() - last_event_date).days
+    return max(0, min(number_of_days, number_of_days_since_last_event_date + late_arrival_days))
+
+
+def get_metric_totals_key(article_id: str) -> str:
+    # the page views and downloads totals of an article, as one packed value
+    return f'article:{article_id}:metric_totals'
+
+
+def get_monthly_period_hash_key(article_id: str) -> str:
+    # the page views and downloads by month of an article, as packed values by year month
+    return f'article:{article_id}:by_month'
+
+
+def iter_daily_period_value_cells(
+    bq_result_iterable: Iterable[BigQueryResultRow]
+) -> Iterable[PeriodValueCell]:
+    for row in bq_result_iterable:
+        event_date_str = row['event_date'].isoformat()
+        yield (
+            f'article:{row['article_id']}:page_views:by_date',
+            event_date_str,
+            row['page_view_count']
+        )
+        yield (
+            f'article:{row['article_id']}:downloads:by_date',
+            event_date_str,
+            row['download_count']
+        )
+
+
+def iter_monthly_period_value_cells(
+    bq_result_iterable: Iterable[dict]
+) -> Iterable[PeriodValueCell]:
+    # one hash field per article and month, for both metrics
+    for row in bq_result_iterable:
+        yield (
+            get_monthly_period_hash_key(row['article_id']),
+            row['year_month'],
+            get_packed_metric_values(
+                page_views=row['page_view_count'],
+                downloads=row['download_count']
+            )
+        )
+
+
+def put_compact_daily_rows_batch(pipe: Pipeline, rows: Sequence[BigQueryResultRow]) -> None:
+    # the days without a value yet are added to the day counts of their months
+    for row in rows:
+        pipe.bitfield(get_compact_daily_values_key(
+            row['article_id'],
+            get_year_month_for_date(row['event_date'])
+        )).get('u32', get_compact_daily_value_bit_offset(row['event_date'])).execute()
+    existing_values_list = pipe.execute()
+    new_days: set[tuple[str, date]] = set()
+    article_ids_by_year_month: dict[str, set[str]] = {}
+    for row, existing_values in zip(rows, existing_values_list):
+        year_month = get_year_month_for_date(row['event_date'])
+        pipe.setrange(
+            get_compact_daily_values_key(row['article_id'], year_month),
+            get_compact_daily_values_offset(row['event_date']),
+            get_encoded_compact_daily_values(
+                page_views=row['page_view_count'],
+                downloads=row['download_count']
+            )
+        )
+        if not existing_values[0]:
+            new_days.add((row['article_id'], row['event_date']))
+        article_ids_by_year_month.setdefault(year_month, set()).add(row['article_id'])
+    for (article_id, year_month), new_day_count in Counter(
+        (article_id, get_year_month_for_date(event_date))
+        for article_id, event_date in new_days
+    ).items():
+        pipe.hincrby(get_compact_daily_day_counts_key(article_id), year_month, new_day_count)
+    for year_month, article_ids in article_ids_by_year_month.items():
+        pipe.sadd(get_compact_daily_article_ids_index_key(year_month), *article_ids)
+    pipe.zadd(COMPACT_DAILY_YEAR_MONTHS_INDEX_KEY, {
+        year_month: get_period_score(year_month)
+        for year_month in article_ids_by_year_month
+    })
+    pipe.execute()
+
+
 def get_year_month_months_ago(number_of_months: int) -> str:
     today = date.today()
     total_months = today.year * 12 + (today.month - 1) - number_of_months
@@ -47,20 +241,23 @@ def get_year_month_months_ago(number_of_months: int) -> str:
     return f'{year:04d}-{month_index + 1:02d}'
 
 
-def get_article_id_from_page_views_total_key(key: str) -> str:
-    match = re.match(r'article:(\d+):page_views', key)
-    if not match:
-        raise ValueError(f'Invalid key format: {key}')
-    return match.group(1)
-
-
-class PageViewsAndDownloadsProvider:
+class PageViewsAndDownloadsProvider:  # pylint: disable=too-many-instance-attributes
     def __init__(
         self,
         redis_client: Redis,
-        gcp_project_name: str = 'elife-data-pipeline'
+        gcp_project_name: str = 'elife-data-pipeline',
+        *,
+        async_redis_client: AsyncRedis,
+        keyspace_generations: Optional[KeyspaceGenerations] = None,
+        read_through_cache: Optional[ReadThroughCache] = None
     ):
+        # the sync client is used by the refresh jobs, the async client by the API
         self.redis_client = redis_client
+        self.async_redis_client = async_redis_client
+        self.keyspace_generations = (
+            keyspace_generations or KeyspaceGenerations(async_redis_client)
+        )
+        self.read_through_cache = read_through_cache or get_disabled_read_through_cache()
         self.gcp_project_name = gcp_project_name
         self.page_view_and_download_totals_query = (
             get_sql_query_from_file('page_view_and_download_totals_query.sql')
@@ -73,10 +270,77 @@ class PageViewsAndDownloadsProvider:
            get_sql_query_from_file('page_views_and_downloads_monthly_query.sql')
         )
 
-    def get_total_article_count(self) -> int:
-        return sum(1 for _ in self.redis_client.scan_iter(match='article:*:page_views'))
+    async def get_totals_key_prefix(self) -> str:
+        return await self.keyspace_generations.get_key_prefix(TOTALS_GENERATION_NAME)
+
+    async def get_metric_totals_key(self, article_id: str) -> str:
+        return await self.get_totals_key_prefix() + get_metric_totals_key(article_id)
+
+    async def _get_legacy_metric_totals_for_article_ids(
+        self,
+        article_ids: Sequence[str]
+    ) -> Sequence[MetricTotalsTypedDict]:
+        # reads the totals per metric, until the totals generation was loaded with packed values
+        # (can be removed once all of the deployed refresh jobs load the packed values)
+        return get_metric_totals_for_legacy_values(
+            await self.async_redis_client.mget(
+                get_legacy_metric_total_keys(article_ids, await self.get_totals_key_prefix())
+            )
+        )
 
-    def get_article_ids(
+    async def _get_metric_total_for_packed_value(
+        self,
+        article_id: str,
+        metric_name: MetricNameLiteral,
+        packed_value: RedisValue
+    ) -> int:
+        if packed_value is None:
+            return (
+                await self._get_legacy_metric_totals_for_article_ids([article_id])
+            )[0][metric_name]
+        return get_unpacked_metric_values(packed_value)[metric_name]
+
+    async def get_legacy_article_ids(self) -> Sequence[str]:
+        # the article ids of the totals per metric, if they were loaded before
+        # the article ids index was introduced (until the next totals refresh adds the index)
+        return await self.read_through_cache.get_or_load(
+            (
+                'legacy_article_ids',
+                await self.keyspace_generations.get_generation(TOTALS_GENERATION_NAME)
+            ),
+            self._load_legacy_article_ids
+        )
+
+    async def _load_legacy_article_ids(self) -> Sequence[str]:
+        LOGGER.warning('Article ids index not found, scanning the page views totals keys')
+        key_prefix = await self.get_totals_key_prefix()
+        return sorted([
+            key.decode('utf-8')[len(key_prefix):].split(':')[1]
+            async for key in self.async_redis_client.scan_iter(
+                match=key_prefix + 'article:*:page_views',
+                count=BATCH_SIZE
+            )
+        ])
+
+    async def is_article_ids_index_missing(self) -> bool:
+        # Redis removes empty sorted sets, i.e. a missing index has no members
+        return not await self.get_total_article_count_from_index()
+
+    async def get_total_article_count_from_index(self) -> int:
+        key_prefix = await self.get_totals_key_prefix()
+        return await self.async_redis_client.zcard(
+            key_prefix + ARTICLE_IDS_INDEX_KEY
+        )
+
+    @observe_provider_method(PROVIDER_NAME)
+    async def get_total_article_count(self) -> int:
+        total_article_count = await self.get_total_article_count_from_index()
+        if not total_article_count:
+            return len(await self.get_legacy_article_ids())
+        return total_article_count
+
+    @observe_provider_method(PROVIDER_NAME)
+    async def get_article_ids(
         self,
         per_page: int = 20,
         page: int = 1
@@ -84,23 +348,69 @@ class PageViewsAndDownloadsProvider:
         LOGGER.info('get_article_ids: per_page=%r, page=%r', per_page, page)
         page_start_index = (page - 1) * per_page
         page_end_index = page_start_index + per_page
-        return sorted([
-            get_article_id_from_page_views_total_key(key.decode('utf-8'))
-            for key in self.redis_client.scan_iter(match='article:*:page_views')
-        ])[page_start_index:page_end_index]
+        key_prefix = await self.get_totals_key_prefix()
+        article_ids = [
+            article_id.decode('utf-8')
+            for article_id in await self.async_redis_client.zrange(
+                key_prefix + ARTICLE_IDS_INDEX_KEY,
+                page_start_index,
+                page_end_index - 1  # the end index is inclusive in Redis
+            )
+        ]
+        if not article_ids and await self.is_article_ids_index_missing():
+            return (await self.get_legacy_article_ids())[page_start_index:page_end_index]
+        return article_ids
 
-    def get_metric_total_for_article_id(
+    @observe_provider_method(PROVIDER_NAME)
+    async def get_metric_total_for_article_id(
         self,
         article_id: str,
         metric_name: MetricNameLiteral
     ) -> int:
         LOGGER.debug('page-views: article_id=%r', article_id)
-        redis_value: Optional[str] = self.redis_client.get(  # type: ignore[assignment]
-            f'article:{article_id}:{metric_name}'
+        packed_value: RedisValue = await self.async_redis_client.get(
+            await self.get_metric_totals_key(article_id)
+        )
+        return await self._get_metric_total_for_packed_value(
+            article_id,
+            metric_name,
+            packed_value
+        )
+
+    @observe_provider_method(PROVIDER_NAME)
+    async def get_metric_totals_for_article_ids(
+        self,
+        article_ids: Sequence[str]
+    ) -> Sequence[MetricTotalsTypedDict]:
+        LOGGER.debug('metric totals: article_ids=%r', article_ids)
+        if not article_ids:
+            return []
+        key_prefix = await self.get_totals_key_prefix()
+        packed_values: Sequence[Optional[bytes]] = (
+            await self.async_redis_client.mget([
+                key_prefix + get_metric_totals_key(article_id)
+                for article_id in article_ids
+            ])
         )
-        return int(redis_value or 0)
+        missing_article_ids = [
+            article_id
+            for article_id, packed_value in zip(article_ids, packed_values)
+            if packed_value is None
+        ]
+        legacy_metric_totals_by_article_id: dict[str, MetricTotalsTypedDict] = {}
+        if missing_article_ids:
+            legacy_metric_totals_by_article_id = dict(zip(
+                missing_article_ids,
+                await self._get_legacy_metric_totals_for_article_ids(missing_article_ids)
+            ))
+        return [
+            get_unpacked_metric_values(packed_value) if packed_value is not None
+            else legacy_metric_totals_by_article_id[article_id]
+            for article_id, packed_value in zip(article_ids, packed_values)
+        ]
 
-    def get_metric_for_article_id_by_time_period(
+    @observe_provider_method(PROVIDER_NAME)
+    async def get_metric_for_article_id_by_time_period(
         self,
         article_id: str,
         *,
@@ -113,26 +423,222 @@ class PageViewsAndDownloadsProvider:
             'metric: article_id=%r, metric=%r, r, by=%r, per_page=%r, page=%r',
             metric_name, article_id, by, per_page, page
         )
-        page_views_by_period: dict
-        if by == 'month':
-            page_views_by_period = self.redis_client.hgetall(  # type: ignore[assignment]
-                f'article:{article_id}:{metric_name}:by_month'
+        return await self.read_through_cache.get_or_load(
+            (
+                'metric_by_time_period', article_id, metric_name, by, per_page, page,
+                await self.get_totals_key_prefix(),
+                await self.keyspace_generations.get_generation(PERIODS_GENERATION_NAME)
+            ),
+            lambda: self._load_metric_for_article_id_by_time_period(
+                article_id,
+                metric_name=metric_name,
+                by=by,
+                per_page=per_page,
+                page=page
             )
-        else:
-            page_views_by_period = self.redis_client.hgetall(  # type: ignore[assignment]
-                f'article:{article_id}:{metric_name}:by_date'
+        )
+
+    async def _load_metric_for_article_id_by_time_period(
+        self,
+        article_id: str,
+        *,
+        metric_name: MetricNameLiteral,
+        by: Literal['day', 'month'],
+        per_page: int,
+        page: int
+    ) -> MetricTimePeriodResponseTypedDict:
+        page_start_index = (page - 1) * per_page
+        page_end_index = page * per_page
+        completed_storage_migration_names = await self.get_completed_storage_migration_names()
+        if by == 'day' and COMPACT_DAILY_VALUES_MIGRATION_NAME in completed_storage_migration_names:
+            return await self._get_metric_for_article_id_by_date_from_compact_values(
+                article_id,
+                metric_name=metric_name,
+                page_start_index=page_start_index,
+                page_end_index=page_end_index
+            )
+        if by == 'month' and (
+            PACKED_MONTHLY_VALUES_MIGRATION_NAME in completed_storage_migration_names
+        ):
+            # the months of the hashes per metric were packed by the monthly refresh
+            return await self._get_metric_for_article_id_from_period_index(
+                article_id,
+                metric_name=metric_name,
+                period_hash_key=get_monthly_period_hash_key(article_id),
+                packed_values=True,
+                page_start_index=page_start_index,
+                page_end_index=page_end_index
+            ) or {
+                'totalPeriods': 0,
+                'totalValue': await self.get_metric_total_for_article_id(article_id, metric_name),
+                'periods': []
+            }
+        # the values per metric, for the daily hash layout
+        # (or the months loaded before the monthly values were packed)
+        period_suffix = 'by_month' if by == 'month' else 'by_date'
+        period_hash_key = f'article:{article_id}:{metric_name}:{period_suffix}'
+        # the period index only contains the periods loaded since it was introduced,
+        # until the refresh backfilled the periods loaded before
+        if get_period_index_backfill_migration_name(period_suffix) in (
+            completed_storage_migration_names
+        ):
+            result = await self._get_metric_for_article_id_from_period_index(
+                article_id,
+                metric_name=metric_name,
+                period_hash_key=period_hash_key,
+                packed_values=False,
+                page_start_index=page_start_index,
+                page_end_index=page_end_index
+            )
+            if result is not None:
+                return result
+        return await self._get_metric_for_article_id_by_time_period_from_hash(
+            period_hash_key=period_hash_key,
+            total_value=await self.get_metric_total_for_article_id(article_id, metric_name),
+            page_start_index=page_start_index,
+            page_end_index=page_end_index
+        )
+
+    async def _get_metric_for_article_id_from_period_index(
+        self,
+        article_id: str,
+        *,
+        metric_name: MetricNameLiteral,
+        period_hash_key: str,
+        packed_values: bool,
+        page_start_index: int,
+        page_end_index: int
+    ) -> Optional[MetricTimePeriodResponseTypedDict]:
+        # returns None if the period index is empty
+        get_value: Callable[[RedisValue], int] = (
+            (lambda value: get_unpacked_metric_values(value)[metric_name])
+            if packed_values
+            else (lambda value: int(value or 0))
+        )
+        period_index_key = get_period_index_key(period_hash_key)
+        async with self.async_redis_client.pipeline(
+            transaction=False
+        ) as pipe:
+            pipe.zcard(period_index_key)
+            # ZREVRANGE returns the newest periods first
+            pipe.zrevrange(period_index_key, page_start_index, page_end_index - 1)
+            pipe.get(await self.get_metric_totals_key(article_id))
+            total_periods, page_period_list, packed_total_value = await pipe.execute()
+        if not total_periods:
+            return None
+        page_value_list = (
+            await self.async_redis_client.hmget(  # type: ignore[misc]
+                period_hash_key,
+                page_period_list
+            )
+            if page_period_list
+            else []
+        )
+        return {
+            'totalPeriods': total_periods,
+            'totalValue': await self._get_metric_total_for_packed_value(
+                article_id,
+                metric_name,
+                packed_total_value
+            ),
+            'periods': [
+                {
+                    'period': period.decode('utf-8'),
+                    'value': get_value(value)
+                }
+                for period, value in zip(page_period_list, page_value_list)
+            ]
+        }
+
+    async def get_completed_storage_migration_names(self) -> frozenset[str]:
+        # the refresh bumps the periods generation after completing a migration
+        return await self.read_through_cache.get_or_load(
+            (
+                'completed_storage_migration_names',
+                await self.keyspace_generations.get_generation(PERIODS_GENERATION_NAME)
+            ),
+            lambda: get_completed_storage_migration_names(self.async_redis_client)
+        )
+
+    async def _get_metric_for_article_id_by_date_from_compact_values(
+        self,
+        article_id: str,
+        *,
+        metric_name: MetricNameLiteral,
+        page_start_index: int,
+        page_end_index: int
+    ) -> MetricTimePeriodResponseTypedDict:
+        # the day counts locate the months of the page, only those months are read
+        async with self.async_redis_client.pipeline(
+            transaction=False
+        ) as pipe:
+            pipe.hgetall(get_compact_daily_day_counts_key(article_id))
+            pipe.get(await self.get_metric_totals_key(article_id))
+            day_count_by_year_month_bytes, packed_total_value = await pipe.execute()
+        day_count_by_year_month = {
+            year_month.decode('utf-8'): int(day_count)
+            for year_month, day_count in day_count_by_year_month_bytes.items()
+        }
+        year_months, skipped_day_count = get_year_months_for_page_window(
+            day_count_by_year_month,
+            page_start_index=page_start_index,
+            page_end_index=page_end_index
+        )
+        encoded_values_list = (
+            await self.async_redis_client.mget([
+                get_compact_daily_values_key(article_id, year_month)
+                for year_month in year_months
+            ])
+            if year_months
+            else []
+        )
+        # the newest periods first
+        period_values = [
+            (event_date_str, page_views if metric_name == 'page_views' else downloads)
+            for year_month, encoded_values in zip(year_months, encoded_values_list)
+            for event_date_str, page_views, downloads in reversed(list(
+                iter_decoded_compact_daily_values(year_month, encoded_values)
+            ))
+        ]
+        return {
+            'totalPeriods': sum(day_count_by_year_month.values()),
+            'totalValue': await self._get_metric_total_for_packed_value(
+                article_id,
+                metric_name,
+                packed_total_value
+            ),
+            'periods': [
+                {
+                    'period': period_str,
+                    'value': value
+                }
+                for period_str, value in period_values[
+                    page_start_index - skipped_day_count:page_end_index - skipped_day_count
+                ]
+            ]
+        }
+
+    async def _get_metric_for_article_id_by_time_period_from_hash(
+        self,
+        period_hash_key: str,
+        total_value: int,
+        page_start_index: int,
+        page_end_index: int
+    ) -> MetricTimePeriodResponseTypedDict:
+        page_views_by_period: dict[bytes, bytes] = (
+            await self.async_redis_client.hgetall(  # type: ignore[misc]
+                period_hash_key
             )
+        )
+        # the client returns the fields as bytes, which the JSON response can not serialize
         sorted_page_views_by_period = sorted(
-            page_views_by_period.items(),
+            (
+                (period.decode('utf-8'), value)
+                for period, value in page_views_by_period.items()
+            ),
             key=lambda item: item[0],  # Sort by date string or year month
             reverse=True
         )
-        page_start_index = (page - 1) * per_page
-        page_end_index = page_start_index + per_page
-        total_value = self.get_metric_total_for_article_id(
-            article_id,
-            metric_name=metric_name
-        )
         return {
             'totalPeriods': len(page_views_by_period),
             'totalValue': total_value,
@@ -149,64 +655,148 @@ class PageViewsAndDownloadsProvider:
 
     def refresh_page_view_and_download_totals(self, batch_size: int = BATCH_SIZE) -> None:
         LOGGER.info('Refreshing page view and download totals data from BigQuery...')
-        bq_result_iterable = bigquery.iter_dict_from_bq_query_with_progress(
+        column_batch_iterable = bigquery.iter_column_batch_from_bq_query_with_progress(
             project_name=self.gcp_project_name,
             query=self.page_view_and_download_totals_query,
+            batch_size=batch_size,
             desc='Loading Redis'
         )
-        with self.redis_client.pipeline() as pipe:
-            for batch in iter_batch_iterable(bq_result_iterable, batch_size=batch_size):
-                for row in batch:
-                    pipe.set(
-                        f'article:{row['article_id']}:page_views',
-                        row['page_view_count']  # type: ignore[arg-type]
+        self.load_page_view_and_download_totals(column_batch_iterable)
+        LOGGER.info('Done: Refreshing page view and download totals data from BigQuery')
+
+    def load_page_view_and_download_totals(
+        self,
+        column_batch_iterable: Iterable[bigquery.ColumnBatch]
+    ) -> int:
+        loaded_count = 0
+        with (
+            loading_generation(
+                self.redis_client,
+                generation_name=TOTALS_GENERATION_NAME,
+                generation=create_generation(),
+                key_patterns=TOTALS_KEY_PATTERNS
+            ) as key_prefix,
+            self.redis_client.pipeline() as pipe
+        ):
+            for column_batch in column_batch_iterable:
+                article_ids = column_batch['article_id']
+                if not article_ids:
+                    continue
+                # one MSET and one ZADD per batch, rather than commands per row,
+                # with one key per article for both metrics
+                pipe.mset({
+                    key_prefix + get_metric_totals_key(article_id): get_packed_metric_values(
+                        page_views=page_view_count,
+                        downloads=download_count
                     )
-                    pipe.set(
-                        f'article:{row['article_id']}:downloads',
-                        row['download_count']  # type: ignore[arg-type]
+                    for article_id, page_view_count, download_count in zip(
+                        article_ids,
+                        column_batch['page_view_count'],
+                        column_batch['download_count']
                     )
+                })
+                pipe.zadd(
+                    key_prefix + ARTICLE_IDS_INDEX_KEY,
+                    dict.fromkeys(article_ids, 0)
+                )
                 pipe.execute()
-        LOGGER.info('Done: Refreshing page view and download totals data from BigQuery')
+                loaded_count += len(article_ids)
+        return loaded_count
+
+    def get_last_loaded_daily_event_date(self) -> Optional[date]:
+        redis_value: Optional[bytes] = self.redis_client.get(  # type: ignore[assignment]
+            DAILY_REFRESH_LAST_EVENT_DATE_KEY
+        )
+        if not redis_value:
+            return None
+        return date.fromisoformat(redis_value.decode('utf-8'))
+
+    def get_daily_storage_layout(self) -> DailyStorageLayoutLiteral:
+        if is_storage_migration_completed(self.redis_client, COMPACT_DAILY_VALUES_MIGRATION_NAME):
+            return 'compact'
+        return DEFAULT_DAILY_STORAGE_LAYOUT
 
     def refresh_page_views_and_downloads_daily(
         self,
         number_of_days: int,
-        batch_size: int = BATCH_SIZE
+        batch_size: int = BATCH_SIZE,
+        incremental: bool = False,
+        late_arrival_days: int = DEFAULT_LATE_ARRIVAL_DAYS,
+        prune_unindexed: bool = False,
+        *,
+        daily_storage_layout: Optional[DailyStorageLayoutLiteral] = None
     ) -> None:
+        # the layout is stored (by the compact migration), passing it only checks it
+        stored_daily_storage_layout = self.get_daily_storage_layout()
+        if daily_storage_layout not in {None, stored_daily_storage_layout}:
+            raise ValueError(
+                f'Daily storage layout {daily_storage_layout!r} does not match'
+                f' the stored layout {stored_daily_storage_layout!r}'
+                ' (the compact layout requires the compact_daily_migration_cli)'
+            )
         LOGGER.info('Refreshing page views and downloads daily from BigQuery...')
+        query_number_of_days = number_of_days
+        if incremental:
+            query_number_of_days = get_incremental_number_of_days(
+                last_event_date=self.get_last_loaded_daily_event_date(),
+                number_of_days=number_of_days,
+                late_arrival_days=late_arrival_days
+            )
+            LOGGER.info(
+                'Incremental refresh, querying %d of %d days',
+                query_number_of_days,
+                number_of_days
+            )
         bq_result_iterable = bigquery.iter_dict_from_bq_query_with_progress(
             project_name=self.gcp_project_name,
             query=get_query_with_replaced_number_of_days(
                 self.page_views_and_downloads_daily_query,
-                number_of_days=number_of_days
+                number_of_days=query_number_of_days
             ),
             desc='Loading Redis'
         )
-        with self.redis_client.pipeline() as pipe:
-            for batch in iter_batch_iterable(bq_result_iterable, batch_size=batch_size):
-                for row in batch:
-                    pipe.hset(
-                        f'article:{row['article_id']}:page_views:by_date',
-                        row['event_date'].isoformat(),
-                        row['page_view_count']  # type: ignore[arg-type]
-                    )
-                    pipe.hset(
-                        f'article:{row['article_id']}:downloads:by_date',
-                        row['event_date'].isoformat(),
-                        row['download_count']  # type: ignore[arg-type]
-                    )
-                pipe.execute()
+        if stored_daily_storage_layout == 'compact':
+            # writing both values of a day is a single SETRANGE, unchanged values are not skipped
+            last_event_date = self.put_compact_daily_rows(
+                bq_result_iterable,  # type: ignore[arg-type]
+                batch_size=batch_size
+            )
+        else:
+            self._backfill_daily_period_index_once()
+            last_event_date = self._put_daily_rows(
+                bq_result_iterable,  # type: ignore[arg-type]
+                batch_size=batch_size,
+                changed_only=incremental
+            )
+        if last_event_date:
+            self.redis_client.set(DAILY_REFRESH_LAST_EVENT_DATE_KEY, last_event_date.isoformat())
         cutoff_date = (date.today() - timedelta(days=number_of_days)).isoformat()
-        self._prune_hash_fields_before('article:*:page_views:by_date', cutoff_date)
-        self._prune_hash_fields_before('article:*:downloads:by_date', cutoff_date)
+        with measure_refresh_job_stage(RefreshJobStageNames.PRUNE):
+            if stored_daily_storage_layout == 'compact':
+                self._prune_compact_daily_values_before(date.fromisoformat(cutoff_date))
+            prune_periods_before(self.redis_client, 'by_date', cutoff_date)
+            if prune_unindexed:
+                prune_unindexed_hash_fields_before(
+                    self.redis_client,
+                    'article:*:page_views:by_date',
+                    cutoff_date
+                )
+                prune_unindexed_hash_fields_before(
+                    self.redis_client,
+                    'article:*:downloads:by_date',
+                    cutoff_date
+                )
+        bump_generation(self.redis_client, PERIODS_GENERATION_NAME)
         LOGGER.info('Done: Refreshing page views and dosnloads daily from BigQuery')
 
     def refresh_page_views_and_downloads_monthly(
         self,
         number_of_months: int,
-        batch_size: int = BATCH_SIZE
+        batch_size: int = BATCH_SIZE,
+        prune_unindexed: bool = False
     ) -> None:
         LOGGER.info('Refreshing monthly page views and downloads from BigQuery...')
+        self._pack_legacy_monthly_values_once(batch_size=batch_size)
         bq_result_iterable = bigquery.iter_dict_from_bq_query_with_progress(
             project_name=self.gcp_project_name,
             query=get_query_with_replaced_number_of_months(
@@ -217,50 +807,194 @@ class PageViewsAndDownloadsProvider:
         )
         with self.redis_client.pipeline() as pipe:
             for batch in iter_batch_iterable(bq_result_iterable, batch_size=batch_size):
-                for row in batch:
-                    pipe.hset(
-                        f'article:{row['article_id']}:page_views:by_month',
-                        row['year_month'],
-                        row['page_view_count']  # type: ignore[arg-type]
-                    )
-                    pipe.hset(
-                        f'article:{row['article_id']}:downloads:by_month',
-                        row['year_month'],
-                        row['download_count']  # type: ignore[arg-type]
-                    )
+                put_period_value_cells(pipe, iter_monthly_period_value_cells(batch))
                 pipe.execute()
         cutoff_month = get_year_month_months_ago(number_of_months)
-        self._prune_hash_fields_before('article:*:page_views:by_month', cutoff_month)
-        self._prune_hash_fields_before('article:*:downloads:by_month', cutoff_month)
+        with measure_refresh_job_stage(RefreshJobStageNames.PRUNE):
+            prune_periods_before(self.redis_client, 'by_month', cutoff_month)
+            if prune_unindexed:
+                prune_unindexed_hash_fields_before(
+                    self.redis_client,
+                    'article:*:page_views:by_month',
+                    cutoff_month
+                )
+                prune_unindexed_hash_fields_before(
+                    self.redis_client,
+                    'article:*:downloads:by_month',
+                    cutoff_month
+                )
+        bump_generation(self.redis_client, PERIODS_GENERATION_NAME)
         LOGGER.info('Done: Refreshing monthly page views and downloads from BigQuery')
 
-    def _prune_hash_fields_before(
+    def _pack_legacy_monthly_values_once(self, batch_size: int) -> None:
+        # the months loaded as a hash per metric (by earlier versions) are packed once
+        # (and the hashes per metric removed),
+        # including the months outside of the refreshed window (the prune removes the old ones),
+        # the API reads the packed monthly values after that (rather than the hashes per metric)
+        if is_storage_migration_completed(self.redis_client, PACKED_MONTHLY_VALUES_MIGRATION_NAME):
+            return
+        packed_cell_count = 0
+        with self.redis_client.pipeline() as pipe:
+            for batch in iter_batch_iterable(
+                iter_per_metric_period_values_from_hashes(
+                    self.redis_client,
+                    'by_month',
+                    batch_size=batch_size
+                ),
+                batch_size=batch_size
+            ):
+                per_metric_period_values = list(batch)
+                cells: list[PeriodValueCell] = [
+                    (
+                        get_monthly_period_hash_key(article_id),
+                        year_month,
+                        get_packed_metric_values(page_views=page_views, downloads=downloads)
+                    )
+                    for article_id, year_month, page_views, downloads in per_metric_period_values
+                ]
+                put_period_value_cells(pipe, cells)
+                # the packed values replace the hashes per metric (which were read already)
+                unlink_per_metric_period_hashes(pipe, per_metric_period_values, 'by_month')
+                pipe.execute()
+                packed_cell_count += len(cells)
+        LOGGER.info('Packed %d monthly values of the hashes per metric', packed_cell_count)
+        set_storage_migration_completed(self.redis_client, PACKED_MONTHLY_VALUES_MIGRATION_NAME)
+
+    def _backfill_daily_period_index_once(self) -> None:
+        # the dates loaded before the period index was introduced are added to it once,
+        # the API reads the daily period index after that (rather than the whole hashes)
+        migration_name = get_period_index_backfill_migration_name('by_date')
+        if is_storage_migration_completed(self.redis_client, migration_name):
+            return
+        for metric_name in get_args(MetricNameLiteral):
+            backfill_period_index(self.redis_client, f'article:*:{metric_name}:by_date')
+        set_storage_migration_completed(self.redis_client, migration_name)
+
+    def _put_daily_rows(
         self,
-        key_pattern: str,
-        cutoff: str,
+        bq_result_iterable: Iterable[BigQueryResultRow],
+        batch_size: int,
+        changed_only: bool
+    ) -> Optional[date]:
+        # returns the last event date of the rows
+        last_event_date: Optional[date] = None
+        put_cell_count = 0
+        with self.redis_client.pipeline() as pipe:
+            for batch in iter_batch_iterable(bq_result_iterable, batch_size=batch_size):
+                rows = list(batch)
+                batch_last_event_date = max(row['event_date'] for row in rows)
+                if last_event_date is None or batch_last_event_date > last_event_date:
+                    last_event_date = batch_last_event_date
+                cells = list(iter_daily_period_value_cells(rows))
+                if changed_only:
+                    cells = get_changed_period_value_cells(self.redis_client, cells)
+                put_period_value_cells(pipe, cells)
+                pipe.execute()
+                put_cell_count += len(cells)
+        LOGGER.info('Updated %d daily values', put_cell_count)
+        return last_event_date
+
+    def put_compact_daily_rows(
+        self,
+        bq_result_iterable: Iterable[BigQueryResultRow],
+        batch_size: int = BATCH_SIZE
+    ) -> Optional[date]:
+        # returns the last event date of the rows
+        last_event_date: Optional[date] = None
+        put_row_count = 0
+        with self.redis_client.pipeline() as pipe:
+            for batch in iter_batch_iterable(bq_result_iterable, batch_size=batch_size):
+                rows = list(batch)
+                batch_last_event_date = max(row['event_date'] for row in rows)
+                if last_event_date is None or batch_last_event_date > last_event_date:
+                    last_event_date = batch_last_event_date
+                put_compact_daily_rows_batch(pipe, rows)
+                put_row_count += len(rows)
+        LOGGER.info('Updated %d compact daily values', put_row_count)
+        return last_event_date
+
+    def iter_daily_rows_from_hashes(
+        self,
+        batch_size: int = BATCH_SIZE
+    ) -> Iterable[BigQueryResultRow]:
+        # the daily values of the hash layout, in the shape of the BigQuery rows
+        for article_id, event_date_str, page_views, downloads in (
+            iter_per_metric_period_values_from_hashes(
+                self.redis_client,
+                'by_date',
+                batch_size=batch_size
+            )
+        ):
+            yield {
+                'article_id': article_id,
+                'event_date': date.fromisoformat(event_date_str),
+                'page_view_count': page_views,
+                'download_count': downloads
+            }
+
+    def delete_daily_hashes(self, batch_size: int = BATCH_SIZE) -> int:
+        deleted_key_count = 0
+        for key_pattern in DAILY_HASH_LAYOUT_KEY_PATTERNS:
+            for batch in iter_batch_iterable(
+                self.redis_client.scan_iter(match=key_pattern, count=batch_size),
+                batch_size=batch_size
+            ):
+                keys = list(batch)
+                # UNLINK frees the memory in the background
+                self.redis_client.unlink(*keys)
+                deleted_key_count += len(keys)
+        LOGGER.info('Deleted %d keys of the daily hashes', deleted_key_count)
+        return deleted_key_count
+
+    def _prune_compact_daily_values_before(
+        self,
+        cutoff_date: date,
         batch_size: int = BATCH_SIZE
     ) -> None:
-        LOGGER.info('Pruning fields before %s for pattern %r', cutoff, key_pattern)
-        pruned_hash_count = 0
+        # deletes the months before the cutoff date,
+        # and clears the days before the cutoff date within its month (recounting its days)
+        cutoff_year_month = get_year_month_for_date(cutoff_date)
+        old_year_months = [
+            year_month.decode('utf-8')
+            for year_month in self.redis_client.zrangebyscore(  # type: ignore[union-attr]
+                COMPACT_DAILY_YEAR_MONTHS_INDEX_KEY,
+                '-inf',
+                f'({get_period_score(cutoff_year_month)}'
+            )
+        ]
+        LOGGER.info('Pruning %d compact daily months before %s', len(old_year_months), cutoff_date)
         with self.redis_client.pipeline() as pipe:
-            pending = 0
-            for key in self.redis_client.scan_iter(match=key_pattern, count=1000):
-                old_fields = [
-                    field for field in self.redis_client.hkeys(key)  # type: ignore[union-attr]
-                    if field.decode('utf-8') < cutoff
-                ]
-                if not old_fields:
-                    continue
-                pipe.hdel(key, *old_fields)
-                pruned_hash_count += 1
-                pending += 1
-                if pending >= batch_size:
+            for year_month in old_year_months:
+                for article_ids in iter_compact_daily_article_id_batches(
+                    self.redis_client,
+                    year_month,
+                    batch_size=batch_size
+                ):
+                    for article_id in article_ids:
+                        pipe.delete(get_compact_daily_values_key(article_id, year_month))
+                        pipe.hdel(get_compact_daily_day_counts_key(article_id), year_month)
                     pipe.execute()
-                    pending = 0
-            if pending:
+                pipe.delete(get_compact_daily_article_ids_index_key(year_month))
+                pipe.zrem(COMPACT_DAILY_YEAR_MONTHS_INDEX_KEY, year_month)
+                pipe.execute()
+            empty_values = get_empty_compact_daily_values(cutoff_date.day - 1)
+            if not empty_values:
+                return
+            for article_ids in iter_compact_daily_article_id_batches(
+                self.redis_client,
+                cutoff_year_month,
+                batch_size=batch_size
+            ):
+                for article_id in article_ids:
+                    compact_daily_values_key = get_compact_daily_values_key(
+                        article_id,
+                        cutoff_year_month
+                    )
+                    pipe.setrange(compact_daily_values_key, 0, empty_values)
+                    pipe.get(compact_daily_values_key)
+                encoded_values_list = pipe.execute()[1::2]
+                for article_id, encoded_values in zip(article_ids, encoded_values_list):
+                    pipe.hset(get_compact_daily_day_counts_key(article_id), mapping={
+                        cutoff_year_month: get_compact_daily_day_count(encoded_values)
+                    })
                 pipe.execute()
-        LOGGER.info(
-            'Pruned old fields from %d hashes for pattern %r',
-            pruned_hash_count,
-            key_pattern
-        )
@@ -0,0 +1,260 @@
+from contextvars import ContextVar
+import functools
+import logging
+import time
+from typing import Any, Callable, Coroutine, ParamSpec, TypeVar
+
+from prometheus_client import REGISTRY, Counter, Gauge, Histogram, generate_latest
+from redis.asyncio import Redis as AsyncRedis
+from redis.asyncio.client import Pipeline as AsyncPipeline
+from redis.observability.attributes import DB_CLIENT_CONNECTION_STATE
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from data_hub_metrics_api.utils.refresh_job_runs import get_last_refresh_job_runs
+
+LOGGER = logging.getLogger(__name__)
+
+
+P = ParamSpec('P')
+T = TypeVar('T')
+
+
+METRIC_NAME_PREFIX = 'data_hub_metrics_api_'
+
+# requests not matching any route are not labelled by path, to keep the number of series bounded
+UNMATCHED_ROUTE_LABEL = 'unmatched'
+
+PIPELINE_COMMAND_LABEL = 'PIPELINE'
+
+ASYNC_REDIS_POOL_LABEL = 'async'
+
+RESULT_SIZE_BUCKETS = (0, 1, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, float('inf'))
+
+
+REQUEST_DURATION_SECONDS = Histogram(
+    METRIC_NAME_PREFIX + 'request_duration_seconds',
+    'HTTP request latency by route template',
+    ['method', 'route', 'status_code']
+)
+
+PROVIDER_METHOD_DURATION_SECONDS = Histogram(
+    METRIC_NAME_PREFIX + 'provider_method_duration_seconds',
+    'Latency of provider methods, mostly spent waiting for Redis',
+    ['provider', 'method']
+)
+
+REDIS_ROUND_TRIP_DURATION_SECONDS = Histogram(
+    METRIC_NAME_PREFIX + 'redis_round_trip_duration_seconds',
+    'Latency of Redis round trips (a single command or a pipeline) by provider method',
+    ['command', 'provider_method']
+)
+
+REDIS_COMMANDS = Counter(
+    METRIC_NAME_PREFIX + 'redis_commands',
+    'Redis commands sent, including the ones within pipelines, by provider method',
+    ['command', 'provider_method']
+)
+
+RESULT_SIZE = Histogram(
+    METRIC_NAME_PREFIX + 'result_size',
+    'Number of items in results, e.g. periods of an article or items of a summary page',
+    ['result'],
+    buckets=RESULT_SIZE_BUCKETS
+)
+
+REDIS_POOL_CONNECTIONS = Gauge(
+    METRIC_NAME_PREFIX + 'redis_pool_connections',
+    'Connections of the Redis connection pool by state (idle or used)',
+    ['pool', 'state']
+)
+
+REDIS_POOL_MAX_CONNECTIONS = Gauge(
+    METRIC_NAME_PREFIX + 'redis_pool_max_connections',
+    'Maximum number of connections of the Redis connection pool',
+    ['pool']
+)
+
+REFRESH_JOB_LAST_STARTED_TIMESTAMP_SECONDS = Gauge(
+    METRIC_NAME_PREFIX + 'refresh_job_last_started_timestamp_seconds',
+    'Start time of the last run of the refresh job',
+    ['job']
+)
+
+REFRESH_JOB_LAST_DURATION_SECONDS = Gauge(
+    METRIC_NAME_PREFIX + 'refresh_job_last_duration_seconds',
+    'Duration of the last run of the refresh job',
+    ['job']
+)
+
+REFRESH_JOB_LAST_ROWS_LOADED = Gauge(
+    METRIC_NAME_PREFIX + 'refresh_job_last_rows_loaded',
+    'Rows loaded by the last run of the refresh job',
+    ['job']
+)
+
+REFRESH_JOB_LAST_STAGE_DURATION_SECONDS = Gauge(
+    METRIC_NAME_PREFIX + 'refresh_job_last_stage_duration_seconds',
+    'Duration of the stages (e.g. BigQuery query, Redis) of the last run of the refresh job',
+    ['job', 'stage']
+)
+
+REFRESH_JOB_LAST_SUCCEEDED = Gauge(
+    METRIC_NAME_PREFIX + 'refresh_job_last_succeeded',
+    'Whether the last run of the refresh job succeeded (1) or failed (0)',
+    ['job']
+)
+
+
+_CURRENT_PROVIDER_METHOD: ContextVar[str] = ContextVar('current_provider_method', default='')
+
+
+def get_current_provider_method() -> str:
+    return _CURRENT_PROVIDER_METHOD.get()
+
+
+def observe_result_size(result_name: str, size: int) -> None:
+    RESULT_SIZE.labels(result_name).observe(size)
+
+
+def observe_provider_method(
+    provider_name: str
+) -> Callable[[Callable[P, Coroutine[Any, Any, T]]], Callable[P, Coroutine[Any, Any, T]]]:
+    # the Redis commands sent while the method is running are labelled with it
+    def decorator(func: Callable[P, Coroutine[Any, Any, T]]) -> Callable[P, Coroutine[Any, Any, T]]:
+        provider_method = f'{provider_name}.{func.__name__}'
+
+        @functools.wraps(func)
+        async def wrapper(*args: P.args, **kwargs: P.kwargs) -> T:
+            token = _CURRENT_PROVIDER_METHOD.set(provider_method)
+            start_time = time.perf_counter()
+            try:
+                return await func(*args, **kwargs)
+            finally:
+                PROVIDER_METHOD_DURATION_SECONDS.labels(provider_name, func.__name__).observe(
+                    time.perf_counter() - start_time
+                )
+                _CURRENT_PROVIDER_METHOD.reset(token)
+
+        return wrapper
+    return decorator
+
+
+def get_command_label(command_args: tuple) -> str:
+    command = command_args[0] if command_args else ''
+    if isinstance(command, bytes):
+        command = command.decode('utf-8')
+    return str(command).upper()
+
+
+# pylint: disable-next=abstract-method,too-many-ancestors
+class InstrumentedAsyncPipeline(AsyncPipeline):
+    async def execute(self, raise_on_error: bool = True) -> list[Any]:
+        provider_method = get_current_provider_method()
+        for command_args, _options in self.command_stack:
+            REDIS_COMMANDS.labels(get_command_label(command_args), provider_method).inc()
+        start_time = time.perf_counter()
+        try:
+            return await super().execute(raise_on_error=raise_on_error)
+        finally:
+            REDIS_ROUND_TRIP_DURATION_SECONDS.labels(
+                PIPELINE_COMMAND_LABEL,
+                provider_method
+            ).observe(time.perf_counter() - start_time)
+
+
+# pylint: disable-next=abstract-method,too-many-ancestors
+class InstrumentedAsyncRedis(AsyncRedis):
+    async def execute_command(self, *args, **options):
+        command = get_command_label(args)
+        provider_method = get_current_provider_method()
+        REDIS_COMMANDS.labels(command, provider_method).inc()
+        start_time = time.perf_counter()
+        try:
+            return await super().execute_command(*args, **options)
+        finally:
+            REDIS_ROUND_TRIP_DURATION_SECONDS.labels(command, provider_method).observe(
+                time.perf_counter() - start_time
+            )
+
+    def pipeline(
+        self,
+        transaction: bool = True,
+        shard_hint: Any = None
+    ) -> InstrumentedAsyncPipeline:
+        return InstrumentedAsyncPipeline(
+            self.connection_pool,
+            self.response_callbacks,
+            transaction,
+            shard_hint
+        )
+
+
+def get_route_label(scope: Scope) -> str:
+    # the route template (e.g. /metrics/article/{article_id}/summary) set by the router
+    return getattr(scope.get('route'), 'path', None) or UNMATCHED_ROUTE_LABEL
+
+
+class PrometheusMiddleware:
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+        status_code = 500
+
+        async def send_and_remember_status_code(message: Message) -> None:
+            nonlocal status_code
+            if message['type'] == 'http.response.start':
+                status_code = message['status']
+            await send(message)
+
+        start_time = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_and_remember_status_code)
+        finally:
+            REQUEST_DURATION_SECONDS.labels(
+                scope['method'],
+                get_route_label(scope),
+                str(status_code)
+            ).observe(time.perf_counter() - start_time)
+
+
+def update_redis_pool_metrics(pool_name: str, connection_pool: Any) -> None:
+    # the connections used relative to the maximum, to size the pool
+    REDIS_POOL_MAX_CONNECTIONS.labels(pool_name).set(connection_pool.max_connections)
+    for connection_count, attributes in connection_pool.get_connection_count():
+        REDIS_POOL_CONNECTIONS.labels(pool_name, attributes[DB_CLIENT_CONNECTION_STATE]).set(
+            connection_count
+        )
+
+
+async def update_refresh_job_metrics(async_redis_client: AsyncRedis) -> None:
+    # the refresh jobs are separate processes, their last runs are stored in Redis
+    for refresh_job_run in await get_last_refresh_job_runs(async_redis_client):
+        job_name = refresh_job_run['job_name']
+        REFRESH_JOB_LAST_STARTED_TIMESTAMP_SECONDS.labels(job_name).set(
+            refresh_job_run['started_timestamp']
+        )
+        REFRESH_JOB_LAST_DURATION_SECONDS.labels(job_name).set(
+            refresh_job_run['duration_seconds']
+        )
+        REFRESH_JOB_LAST_ROWS_LOADED.labels(job_name).set(refresh_job_run['rows_loaded'])
+        # runs stored by previous versions of the refresh jobs do not have the stages
+        stage_duration_seconds = refresh_job_run.get('stage_duration_seconds', {})
+        for stage_name, duration_seconds in stage_duration_seconds.items():
+            REFRESH_JOB_LAST_STAGE_DURATION_SECONDS.labels(job_name, stage_name).set(
+                duration_seconds
+            )
+        REFRESH_JOB_LAST_SUCCEEDED.labels(job_name).set(int(refresh_job_run['succeeded']))
+
+
+async def get_prometheus_exposition(async_redis_client: AsyncRedis) -> bytes:
+    update_redis_pool_metrics(ASYNC_REDIS_POOL_LABEL, async_redis_client.connection_pool)
+    try:
+        await update_refresh_job_metrics(async_redis_client)
+    except Exception as exc:  # pylint: disable=broad-exception-caught
+        # the request metrics are still useful while Redis is unavailable
+        LOGGER.warning('Failed to update refresh job metrics: %r', exc)
+    return generate_latest(REGISTRY)
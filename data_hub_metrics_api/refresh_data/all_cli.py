@@ -0,0 +1,219 @@
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+import logging
+import time
+from typing import Callable, Mapping, Optional, Sequence, TypedDict
+
+from redis import Redis
+from redis.asyncio import Redis as AsyncRedis
+
+from data_hub_metrics_api.non_article_page_views_provider import NonArticlePageViewsProvider
+from data_hub_metrics_api.refresh_data import (
+    citations_cli,
+    non_article_page_view_totals_cli,
+    page_view_and_download_totals_cli,
+    page_views_and_downloads_daily_cli,
+    page_views_and_downloads_monthly_cli
+)
+from data_hub_metrics_api.refresh_data.cli_common import (
+    add_daily_refresh_arguments,
+    get_page_views_and_downloads_provider,
+    get_refresh_redis_clients,
+    refresh_article_summaries,
+    refresh_citations,
+    refresh_page_views_and_downloads_daily_for_args
+)
+from data_hub_metrics_api.utils.bigquery import limit_concurrent_bq_queries
+from data_hub_metrics_api.utils.refresh_job_runs import (
+    RefreshJobRun,
+    RefreshJobRunTypedDict,
+    get_run_report_path,
+    record_refresh_job_run,
+    write_run_report
+)
+
+LOGGER = logging.getLogger(__name__)
+
+
+ARTICLE_SUMMARIES_REFRESH_JOB_NAME = 'article_summaries'
+
+# the number of loaders, i.e. all of the loaders start straight away
+DEFAULT_MAX_WORKERS = 5
+
+# one query per loader, i.e. the queries are only limited if requested
+# (the other loaders then wait for a query to finish, while the finished queries load Redis)
+DEFAULT_MAX_CONCURRENT_QUERIES = DEFAULT_MAX_WORKERS
+
+
+# the result (if any) is not used
+RefreshJobFunction = Callable[[], object]
+
+
+class RefreshAllRunReportTypedDict(TypedDict):
+    duration_seconds: float
+    max_workers: int
+    max_concurrent_queries: int
+    succeeded: bool
+    refresh_job_runs: Sequence[RefreshJobRunTypedDict]
+
+
+def get_loader_refresh_job_function_by_name(
+    redis_client: Redis,
+    async_redis_client: AsyncRedis,
+    args: argparse.Namespace
+) -> Mapping[str, RefreshJobFunction]:
+    # each job uses its own providers, only the Redis connection pool is shared by the threads,
+    # the article summaries are refreshed once afterwards (rather than by each job)
+    return {
+        citations_cli.REFRESH_JOB_NAME: lambda: refresh_citations(
+            redis_client,
+            async_redis_client
+        ),
+        page_view_and_download_totals_cli.REFRESH_JOB_NAME: lambda: (
+            get_page_views_and_downloads_provider(redis_client, async_redis_client)
+            .refresh_page_view_and_download_totals()
+        ),
+        non_article_page_view_totals_cli.REFRESH_JOB_NAME: lambda: (
+            NonArticlePageViewsProvider(redis_client, async_redis_client=async_redis_client)
+            .refresh_non_article_page_view_totals()
+        ),
+        page_views_and_downloads_daily_cli.REFRESH_JOB_NAME: lambda: (
+            refresh_page_views_and_downloads_daily_for_args(
+                get_page_views_and_downloads_provider(redis_client, async_redis_client),
+                args
+            )
+        ),
+        page_views_and_downloads_monthly_cli.REFRESH_JOB_NAME: lambda: (
+            get_page_views_and_downloads_provider(redis_client, async_redis_client)
+            .refresh_page_views_and_downloads_monthly(
+                number_of_months=args.number_of_months,
+                prune_unindexed=args.prune_unindexed
+            )
+        )
+    }
+
+
+def run_refresh_job(
+    redis_client: Redis,
+    job_name: str,
+    refresh_job_function: RefreshJobFunction
+) -> RefreshJobRunTypedDict:
+    # a failed job does not stop the other jobs, the failure is part of the summary
+    # (the run report is combined, rather than written by each job)
+    refresh_job_run: Optional[RefreshJobRun] = None
+    try:
+        with record_refresh_job_run(
+            redis_client,
+            job_name,
+            run_report_path=''
+        ) as refresh_job_run:
+            refresh_job_function()
+    except Exception:  # pylint: disable=broad-exception-caught
+        LOGGER.exception('Refresh job failed: %r', job_name)
+    if refresh_job_run is None or refresh_job_run.completed_run_dict is None:
+        # the run could not be recorded (e.g. Redis was not available), it is reported as failed
+        LOGGER.error('Refresh job run was not recorded: %r', job_name)
+        return RefreshJobRun(job_name).to_dict(succeeded=False)
+    return refresh_job_run.completed_run_dict
+
+
+def run_refresh_jobs_concurrently(
+    redis_client: Redis,
+    refresh_job_function_by_name: Mapping[str, RefreshJobFunction],
+    max_workers: int
+) -> Sequence[RefreshJobRunTypedDict]:
+    # the jobs mostly wait for BigQuery or Redis, threads are sufficient
+    with ThreadPoolExecutor(
+        max_workers=max_workers,
+        thread_name_prefix='refresh_job'
+    ) as executor:
+        futures = [
+            executor.submit(run_refresh_job, redis_client, job_name, refresh_job_function)
+            for job_name, refresh_job_function in refresh_job_function_by_name.items()
+        ]
+        return [future.result() for future in futures]
+
+
+def log_run_report_summary(run_report: RefreshAllRunReportTypedDict) -> None:
+    for refresh_job_run in run_report['refresh_job_runs']:
+        LOGGER.info(
+            '%s: %s in %.1f seconds (%d rows, %.1f rows per second)',
+            refresh_job_run['job_name'],
+            'succeeded' if refresh_job_run['succeeded'] else 'FAILED',
+            refresh_job_run['duration_seconds'],
+            refresh_job_run['rows_loaded'],
+            refresh_job_run['rows_per_second']
+        )
+    LOGGER.info(
+        'All refresh jobs: %s in %.1f seconds'
+        ' (sum of the jobs: %.1f seconds, max workers: %d, max concurrent queries: %d)',
+        'succeeded' if run_report['succeeded'] else 'FAILED',
+        run_report['duration_seconds'],
+        sum(
+            refresh_job_run['duration_seconds']
+            for refresh_job_run in run_report['refresh_job_runs']
+        ),
+        run_report['max_workers'],
+        run_report['max_concurrent_queries']
+    )
+
+
+def parse_args(vargs: Optional[Sequence[str]]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description='Refreshes all of the data concurrently, followed by the article summaries'
+    )
+    parser.add_argument('--number-of-days', type=int, required=True)
+    parser.add_argument('--number-of-months', type=int, required=True)
+    # including --prune-unindexed, which also applies to the monthly refresh
+    add_daily_refresh_arguments(parser)
+    parser.add_argument(
+        '--max-workers',
+        type=int,
+        default=DEFAULT_MAX_WORKERS,
+        help='the maximum number of refresh jobs running at once'
+    )
+    parser.add_argument(
+        '--max-concurrent-queries',
+        type=int,
+        default=DEFAULT_MAX_CONCURRENT_QUERIES,
+        help='the maximum number of BigQuery queries running at once (across the refresh jobs)'
+    )
+    return parser.parse_args(vargs)
+
+
+def main(vargs: Optional[Sequence[str]] = None) -> RefreshAllRunReportTypedDict:
+    args = parse_args(vargs)
+    redis_client, async_redis_client = get_refresh_redis_clients()
+    start_time = time.perf_counter()
+    with limit_concurrent_bq_queries(args.max_concurrent_queries):
+        refresh_job_runs = list(run_refresh_jobs_concurrently(
+            redis_client,
+            get_loader_refresh_job_function_by_name(redis_client, async_redis_client, args),
+            max_workers=args.max_workers
+        ))
+    # the summaries combine the totals and citations, they are refreshed even if a loader
+    # failed (using the data of its previous run)
+    refresh_job_runs.append(run_refresh_job(
+        redis_client,
+        ARTICLE_SUMMARIES_REFRESH_JOB_NAME,
+        lambda: refresh_article_summaries(redis_client, async_redis_client)
+    ))
+    run_report: RefreshAllRunReportTypedDict = {
+        'duration_seconds': time.perf_counter() - start_time,
+        'max_workers': args.max_workers,
+        'max_concurrent_queries': args.max_concurrent_queries,
+        'succeeded': all(refresh_job_run['succeeded'] for refresh_job_run in refresh_job_runs),
+        'refresh_job_runs': refresh_job_runs
+    }
+    log_run_report_summary(run_report)
+    run_report_path = get_run_report_path()
+    if run_report_path:
+        write_run_report(run_report, run_report_path)
+    if not run_report['succeeded']:
+        raise RuntimeError('Some of the refresh jobs failed, see the summary above')
+    return run_report
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    main()
@@ -1,22 +1,25 @@
 import logging
 
-from data_hub_metrics_api.crossref_citations_provider import CrossrefCitationsProvider
-from data_hub_metrics_api.main import get_citations_provider_list, get_redis_client
+from data_hub_metrics_api.refresh_data.cli_common import (
+    refresh_article_summaries,
+    refresh_citations,
+    refresh_job_redis_clients
+)
 
 LOGGER = logging.getLogger(__name__)
 
 
+REFRESH_JOB_NAME = 'citations'
+
+
 def main():
-    redis_client = get_redis_client()
-    crossref_citations_provider = CrossrefCitationsProvider(
-        name='Crossref',
-        redis_client=redis_client
-    )
-    citations_provider_list = get_citations_provider_list(crossref_citations_provider)
-    LOGGER.info('Refreshing data from BigQuery...')
-    for provider in citations_provider_list:
-        provider.refresh_data()
-    LOGGER.info('Refreshing data from BigQuery completed.')
+    with refresh_job_redis_clients(REFRESH_JOB_NAME) as (redis_client, async_redis_client):
+        crossref_citations_provider = refresh_citations(redis_client, async_redis_client)
+        refresh_article_summaries(
+            redis_client,
+            async_redis_client,
+            crossref_citations_provider=crossref_citations_provider
+        )
 
 
 if __name__ == '__main__':
@@ -0,0 +1,132 @@
+import argparse
+from contextlib import contextmanager
+import logging
+from typing import Iterator, Optional, get_args
+
+from redis import Redis
+from redis.asyncio import Redis as AsyncRedis
+
+from data_hub_metrics_api.crossref_citations_provider import CrossrefCitationsProvider
+from data_hub_metrics_api.main import (
+    get_async_redis_client,
+    get_citations_provider_list,
+    get_redis_client
+)
+from data_hub_metrics_api.metric_summary_provider import MetricSummaryProvider
+from data_hub_metrics_api.page_views_and_downloads_provider import (
+    DEFAULT_LATE_ARRIVAL_DAYS,
+    DailyStorageLayoutLiteral,
+    PageViewsAndDownloadsProvider
+)
+from data_hub_metrics_api.utils.refresh_job_runs import record_refresh_job_run
+
+LOGGER = logging.getLogger(__name__)
+
+
+def get_refresh_redis_clients() -> tuple[Redis, AsyncRedis]:
+    # the providers also serve the API, the refresh jobs do not use the async client
+    # (it only connects on the first command)
+    return get_redis_client(), get_async_redis_client()
+
+
+@contextmanager
+def refresh_job_redis_clients(job_name: str) -> Iterator[tuple[Redis, AsyncRedis]]:
+    # the Redis clients for a single refresh job, while recording its run
+    redis_client, async_redis_client = get_refresh_redis_clients()
+    with record_refresh_job_run(redis_client, job_name):
+        yield redis_client, async_redis_client
+
+
+def get_page_views_and_downloads_provider(
+    redis_client: Redis,
+    async_redis_client: AsyncRedis
+) -> PageViewsAndDownloadsProvider:
+    return PageViewsAndDownloadsProvider(redis_client, async_redis_client=async_redis_client)
+
+
+def refresh_citations(
+    redis_client: Redis,
+    async_redis_client: AsyncRedis
+) -> CrossrefCitationsProvider:
+    # returns the Crossref provider, e.g. to refresh the article summaries with
+    crossref_citations_provider = CrossrefCitationsProvider(
+        name='Crossref',
+        redis_client=redis_client,
+        async_redis_client=async_redis_client
+    )
+    LOGGER.info('Refreshing data from BigQuery...')
+    for provider in get_citations_provider_list(crossref_citations_provider):
+        provider.refresh_data()
+    LOGGER.info('Refreshing data from BigQuery completed.')
+    return crossref_citations_provider
+
+
+def add_prune_unindexed_argument(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        '--prune-unindexed',
+        action='store_true',
+        help='also scan all keys for old periods that were loaded without the periods index'
+    )
+
+
+def add_daily_refresh_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        '--incremental',
+        action='store_true',
+        help='only query the days since the last daily refresh and only write changed values'
+    )
+    parser.add_argument(
+        '--late-arrival-days',
+        type=int,
+        default=DEFAULT_LATE_ARRIVAL_DAYS,
+        help='number of already loaded days to query again in incremental mode'
+    )
+    add_prune_unindexed_argument(parser)
+    parser.add_argument(
+        '--daily-storage-layout',
+        choices=get_args(DailyStorageLayoutLiteral),
+        default=None,
+        help=(
+            'the expected layout of the daily values, the refresh fails if it does not match'
+            ' the stored layout (compact after running compact_daily_migration_cli)'
+        )
+    )
+
+
+def refresh_page_views_and_downloads_daily_for_args(
+    page_views_and_downloads_provider: PageViewsAndDownloadsProvider,
+    args: argparse.Namespace
+) -> None:
+    # the arguments added by add_daily_refresh_arguments
+    page_views_and_downloads_provider.refresh_page_views_and_downloads_daily(
+        number_of_days=args.number_of_days,
+        incremental=args.incremental,
+        late_arrival_days=args.late_arrival_days,
+        prune_unindexed=args.prune_unindexed,
+        daily_storage_layout=args.daily_storage_layout
+    )
+
+
+def refresh_article_summaries(
+    redis_client: Redis,
+    async_redis_client: AsyncRedis,
+    *,
+    page_views_and_downloads_provider: Optional[PageViewsAndDownloadsProvider] = None,
+    crossref_citations_provider: Optional[CrossrefCitationsProvider] = None
+) -> None:
+    metric_summary_provider = MetricSummaryProvider(
+        page_views_and_downloads_provider=(
+            page_views_and_downloads_provider
+            or get_page_views_and_downloads_provider(redis_client, async_redis_client)
+        ),
+        crossref_citations_provider=(
+            crossref_citations_provider
+            or CrossrefCitationsProvider(
+                redis_client=redis_client,
+                async_redis_client=async_redis_client
+            )
+        ),
+        redis_client=redis_client,
+        async_redis_client=async_redis_client
+    )
+    metric_summary_provider.refresh_article_summaries()
@@ -0,0 +1,206 @@
+import argparse
+import logging
+from typing import Iterable, Optional, Sequence, TypedDict
+
+from redis import Redis
+
+from data_hub_metrics_api.page_views_and_downloads_provider import (
+    PERIODS_GENERATION_NAME,
+    BigQueryResultRow
+)
+from data_hub_metrics_api.refresh_data.cli_common import (
+    get_page_views_and_downloads_provider,
+    refresh_job_redis_clients
+)
+from data_hub_metrics_api.utils.compact_daily_values import (
+    COMPACT_DAILY_YEAR_MONTHS_INDEX_KEY,
+    get_compact_daily_day_counts_key,
+    get_compact_daily_values_key
+)
+from data_hub_metrics_api.utils.keyspace_generations import bump_generation
+from data_hub_metrics_api.utils.period_index import get_period_index_key
+from data_hub_metrics_api.utils.storage_migrations import (
+    COMPACT_DAILY_VALUES_MIGRATION_NAME,
+    set_storage_migration_completed
+)
+
+LOGGER = logging.getLogger(__name__)
+
+
+REFRESH_JOB_NAME = 'compact_daily_migration'
+
+DEFAULT_SAMPLE_SIZE = 100
+
+
+class DailyStorageMemoryReportTypedDict(TypedDict):
+    article_count: int
+    sampled_article_count: int
+    hash_layout_bytes_per_article: float
+    compact_layout_bytes_per_article: float
+    # the indices shared by all articles, e.g. the keys by date of the hash layout
+    hash_layout_index_bytes: int
+    compact_layout_index_bytes: int
+    estimated_hash_layout_bytes: float
+    estimated_compact_layout_bytes: float
+
+
+def get_memory_usage(redis_client: Redis, keys: Iterable[str]) -> int:
+    # MEMORY USAGE includes the overhead of the key (zero for missing keys)
+    with redis_client.pipeline(transaction=False) as pipe:
+        for key in keys:
+            pipe.memory_usage(key, samples=0)
+        return sum(memory_usage or 0 for memory_usage in pipe.execute())
+
+
+def get_memory_usage_for_key_pattern(redis_client: Redis, key_pattern: str) -> int:
+    return get_memory_usage(redis_client, [
+        key.decode('utf-8')
+        for key in redis_client.scan_iter(match=key_pattern, count=1000)
+    ])
+
+
+def get_hash_layout_keys(article_id: str) -> Sequence[str]:
+    period_hash_keys = [
+        f'article:{article_id}:page_views:by_date',
+        f'article:{article_id}:downloads:by_date'
+    ]
+    return period_hash_keys + [
+        get_period_index_key(period_hash_key)
+        for period_hash_key in period_hash_keys
+    ]
+
+
+def get_compact_layout_keys(article_id: str, year_months: Sequence[str]) -> Sequence[str]:
+    return [
+        get_compact_daily_values_key(article_id, year_month)
+        for year_month in year_months
+    ] + [get_compact_daily_day_counts_key(article_id)]
+
+
+def get_daily_storage_memory_report(
+    redis_client: Redis,
+    article_ids: Sequence[str],
+    sample_size: int = DEFAULT_SAMPLE_SIZE
+) -> DailyStorageMemoryReportTypedDict:
+    # compares both layouts of the same articles, i.e. while both are stored,
+    # the sampled articles are spread evenly over the (sorted) article ids
+    sampled_article_ids = article_ids[::max(1, len(article_ids) // max(1, sample_size))][
+        :sample_size
+    ]
+    year_months = [
+        year_month.decode('utf-8')
+        for year_month in redis_client.zrange(  # type: ignore[union-attr]
+            COMPACT_DAILY_YEAR_MONTHS_INDEX_KEY,
+            0,
+            -1
+        )
+    ]
+    hash_layout_sample_bytes = get_memory_usage(redis_client, [
+        key
+        for article_id in sampled_article_ids
+        for key in get_hash_layout_keys(article_id)
+    ])
+    compact_layout_sample_bytes = get_memory_usage(redis_client, [
+        key
+        for article_id in sampled_article_ids
+        for key in get_compact_layout_keys(article_id, year_months)
+    ])
+    sampled_article_count = max(1, len(sampled_article_ids))
+    hash_layout_bytes_per_article = hash_layout_sample_bytes / sampled_article_count
+    compact_layout_bytes_per_article = compact_layout_sample_bytes / sampled_article_count
+    hash_layout_index_bytes = get_memory_usage_for_key_pattern(redis_client, 'index:by_date:*')
+    compact_layout_index_bytes = get_memory_usage_for_key_pattern(
+        redis_client,
+        'index:compact_by_date:*'
+    )
+    return {
+        'article_count': len(article_ids),
+        'sampled_article_count': len(sampled_article_ids),
+        'hash_layout_bytes_per_article': hash_layout_bytes_per_article,
+        'compact_layout_bytes_per_article': compact_layout_bytes_per_article,
+        'hash_layout_index_bytes': hash_layout_index_bytes,
+        'compact_layout_index_bytes': compact_layout_index_bytes,
+        'estimated_hash_layout_bytes': (
+            hash_layout_bytes_per_article * len(article_ids) + hash_layout_index_bytes
+        ),
+        'estimated_compact_layout_bytes': (
+            compact_layout_bytes_per_article * len(article_ids) + compact_layout_index_bytes
+        )
+    }
+
+
+def log_daily_storage_memory_report(memory_report: DailyStorageMemoryReportTypedDict) -> None:
+    LOGGER.info(
+        'Daily values memory usage, hash layout: %.1f MB (%.0f bytes per article)',
+        memory_report['estimated_hash_layout_bytes'] / 1_000_000,
+        memory_report['hash_layout_bytes_per_article']
+    )
+    LOGGER.info(
+        'Daily values memory usage, compact layout: %.1f MB (%.0f bytes per article)',
+        memory_report['estimated_compact_layout_bytes'] / 1_000_000,
+        memory_report['compact_layout_bytes_per_article']
+    )
+    LOGGER.info(
+        'Estimated for %d articles, based on %d sampled articles',
+        memory_report['article_count'],
+        memory_report['sampled_article_count']
+    )
+
+
+def iter_rows_adding_article_ids(
+    rows: Iterable[BigQueryResultRow],
+    article_ids: set[str]
+) -> Iterable[BigQueryResultRow]:
+    for row in rows:
+        article_ids.add(row['article_id'])
+        yield row
+
+
+def parse_args(vargs: Optional[Sequence[str]]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description='Copies the daily values stored as hashes to the compact layout'
+    )
+    parser.add_argument(
+        '--sample-size',
+        type=int,
+        default=DEFAULT_SAMPLE_SIZE,
+        help='number of articles to compare the memory usage of both layouts for'
+    )
+    parser.add_argument(
+        '--delete-hashes',
+        action='store_true',
+        help='delete the daily values stored as hashes, after copying them and the memory report'
+    )
+    return parser.parse_args(vargs)
+
+
+def main(vargs: Optional[Sequence[str]] = None) -> DailyStorageMemoryReportTypedDict:
+    args = parse_args(vargs)
+    with refresh_job_redis_clients(REFRESH_JOB_NAME) as (redis_client, async_redis_client):
+        page_views_and_downloads_provider = get_page_views_and_downloads_provider(
+            redis_client,
+            async_redis_client
+        )
+        article_ids: set[str] = set()
+        page_views_and_downloads_provider.put_compact_daily_rows(iter_rows_adding_article_ids(
+            page_views_and_downloads_provider.iter_daily_rows_from_hashes(),
+            article_ids
+        ))
+        # the daily refresh and the API use the compact layout from now on
+        # (the API for the new periods generation)
+        set_storage_migration_completed(redis_client, COMPACT_DAILY_VALUES_MIGRATION_NAME)
+        bump_generation(redis_client, PERIODS_GENERATION_NAME)
+        memory_report = get_daily_storage_memory_report(
+            redis_client,
+            sorted(article_ids),
+            sample_size=args.sample_size
+        )
+        log_daily_storage_memory_report(memory_report)
+        if args.delete_hashes:
+            page_views_and_downloads_provider.delete_daily_hashes()
+    return memory_report
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    main()
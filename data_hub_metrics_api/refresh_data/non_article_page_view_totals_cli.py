@@ -1,15 +1,21 @@
 import logging
 
-from data_hub_metrics_api.main import get_redis_client
 from data_hub_metrics_api.non_article_page_views_provider import NonArticlePageViewsProvider
+from data_hub_metrics_api.refresh_data.cli_common import refresh_job_redis_clients
 
 LOGGER = logging.getLogger(__name__)
 
 
+REFRESH_JOB_NAME = 'non_article_page_view_totals'
+
+
 def main():
-    redis_client = get_redis_client()
-    non_article_page_views_provider = NonArticlePageViewsProvider(redis_client)
-    non_article_page_views_provider.refresh_non_article_page_view_totals()
+    with refresh_job_redis_clients(REFRESH_JOB_NAME) as (redis_client, async_redis_client):
+        non_article_page_views_provider = NonArticlePageViewsProvider(
+            redis_client,
+            async_redis_client=async_redis_client
+        )
+        non_article_page_views_provider.refresh_non_article_page_view_totals()
 
 
 if __name__ == '__main__':
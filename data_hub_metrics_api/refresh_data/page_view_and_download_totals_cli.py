@@ -1,15 +1,29 @@
 import logging
 
-from data_hub_metrics_api.main import get_redis_client
-from data_hub_metrics_api.page_views_and_downloads_provider import PageViewsAndDownloadsProvider
+from data_hub_metrics_api.refresh_data.cli_common import (
+    get_page_views_and_downloads_provider,
+    refresh_article_summaries,
+    refresh_job_redis_clients
+)
 
 LOGGER = logging.getLogger(__name__)
 
 
+REFRESH_JOB_NAME = 'page_view_and_download_totals'
+
+
 def main():
-    redis_client = get_redis_client()
-    page_views_and_downloads_provider = PageViewsAndDownloadsProvider(redis_client)
-    page_views_and_downloads_provider.refresh_page_view_and_download_totals()
+    with refresh_job_redis_clients(REFRESH_JOB_NAME) as (redis_client, async_redis_client):
+        page_views_and_downloads_provider = get_page_views_and_downloads_provider(
+            redis_client,
+            async_redis_client
+        )
+        page_views_and_downloads_provider.refresh_page_view_and_download_totals()
+        refresh_article_summaries(
+            redis_client,
+            async_redis_client,
+            page_views_and_downloads_provider=page_views_and_downloads_provider
+        )
 
 
 if __name__ == '__main__':
@@ -2,25 +2,33 @@ import argparse
 import logging
 from typing import Optional, Sequence
 
-from data_hub_metrics_api.main import get_redis_client
-from data_hub_metrics_api.page_views_and_downloads_provider import PageViewsAndDownloadsProvider
+from data_hub_metrics_api.refresh_data.cli_common import (
+    add_daily_refresh_arguments,
+    get_page_views_and_downloads_provider,
+    refresh_job_redis_clients,
+    refresh_page_views_and_downloads_daily_for_args
+)
 
 LOGGER = logging.getLogger(__name__)
 
 
+REFRESH_JOB_NAME = 'page_views_and_downloads_daily'
+
+
 def parse_args(vargs: Optional[Sequence[str]]) -> argparse.Namespace:
     parser = argparse.ArgumentParser()
     parser.add_argument('--number-of-days', type=int)
+    add_daily_refresh_arguments(parser)
     return parser.parse_args(vargs)
 
 
 def main(vargs: Optional[Sequence[str]] = None):
     args = parse_args(vargs)
-    redis_client = get_redis_client()
-    page_views_and_downloads_provider = PageViewsAndDownloadsProvider(redis_client)
-    page_views_and_downloads_provider.refresh_page_views_and_downloads_daily(
-        number_of_days=args.number_of_days
-    )
+    with refresh_job_redis_clients(REFRESH_JOB_NAME) as (redis_client, async_redis_client):
+        refresh_page_views_and_downloads_daily_for_args(
+            get_page_views_and_downloads_provider(redis_client, async_redis_client),
+            args
+        )
 
 
 if __name__ == '__main__':
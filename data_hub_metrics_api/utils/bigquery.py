@@ -1,18 +1,123 @@
+from contextlib import contextmanager
 import logging
-from typing import Any, Iterable, Optional, Sequence
+import os
+import threading
+from typing import Any, Iterable, Iterator, Mapping, Optional, Protocol, Sequence, TypeVar
 
 from google.cloud import bigquery
 from google.cloud.bigquery.table import RowIterator
 
-from data_hub_metrics_api.utils.progress_bar import iter_with_progress
+from data_hub_metrics_api.utils.collections import iter_batch_iterable
+from data_hub_metrics_api.utils.progress_bar import (
+    iter_batches_with_progress,
+    iter_with_progress
+)
+from data_hub_metrics_api.utils.refresh_job_runs import (
+    RefreshJobStageNames,
+    add_bytes_processed,
+    add_rows_loaded,
+    iter_measuring_refresh_job_stage,
+    measure_refresh_job_stage
+)
 
 LOGGER = logging.getLogger(__name__)
 
+T = TypeVar('T')
+
+
+BIGQUERY_STORAGE_API_ENABLED_ENV_NAME = 'BIGQUERY_STORAGE_API_ENABLED'
+BIGQUERY_STORAGE_MAX_STREAM_COUNT_ENV_NAME = 'BIGQUERY_STORAGE_MAX_STREAM_COUNT'
+
+
+# the values of a batch of rows by column name
+ColumnBatch = Mapping[str, Sequence[Any]]
+
+
+class BigQueryResultProtocol(Protocol):
+    # implemented by RowIterator, as well as the fake result used by the benchmark
+    @property
+    def total_rows(self) -> Optional[int]:
+        pass
+
+    def __iter__(self) -> Iterator[Any]:
+        pass
+
+    def to_arrow_iterable(
+        self,
+        *,
+        bqstorage_client: Any = None,
+        max_stream_count: Optional[int] = None
+    ) -> Iterator[Any]:
+        pass
+
+
+class BigQueryQueryBudget:
+    # limits the number of BigQuery queries running at once, across the threads of the
+    # refresh jobs running concurrently (unlimited unless set, e.g. by limit_concurrent_bq_queries)
+    def __init__(self):
+        self.semaphore: Optional[threading.BoundedSemaphore] = None
+
+    @contextmanager
+    def acquire(self) -> Iterator[None]:
+        semaphore = self.semaphore
+        if semaphore is None:
+            yield
+            return
+        with measure_refresh_job_stage(RefreshJobStageNames.BIGQUERY_QUERY_BUDGET):
+            semaphore.acquire()  # pylint: disable=consider-using-with
+        try:
+            yield
+        finally:
+            semaphore.release()
+
+
+BIGQUERY_QUERY_BUDGET = BigQueryQueryBudget()
+
+
+@contextmanager
+def limit_concurrent_bq_queries(max_concurrent_queries: int) -> Iterator[None]:
+    previous_semaphore = BIGQUERY_QUERY_BUDGET.semaphore
+    BIGQUERY_QUERY_BUDGET.semaphore = threading.BoundedSemaphore(max_concurrent_queries)
+    try:
+        yield
+    finally:
+        BIGQUERY_QUERY_BUDGET.semaphore = previous_semaphore
+
+
+def is_bq_storage_api_enabled() -> bool:
+    return os.getenv(BIGQUERY_STORAGE_API_ENABLED_ENV_NAME, '').lower() in ('1', 'true')
+
+
+def get_bq_storage_max_stream_count() -> Optional[int]:
+    # zero or unset lets BigQuery decide the number of streams
+    return int(os.getenv(BIGQUERY_STORAGE_MAX_STREAM_COUNT_ENV_NAME, '0')) or None
+
+
+def get_column_batch_row_count(column_batch: ColumnBatch) -> int:
+    return len(next(iter(column_batch.values()), []))
+
+
+def get_column_batch_from_rows(rows: Sequence[Any]) -> ColumnBatch:
+    # accepts BigQuery rows or dicts, both provide the keys and values in the same order
+    if not rows:
+        return {}
+    return dict(zip(
+        rows[0].keys(),
+        (list(column) for column in zip(*(row.values() for row in rows)))
+    ))
+
 
 def get_bq_client(project_name: str) -> bigquery.Client:
     return bigquery.Client(project=project_name)
 
 
+def get_bq_storage_client() -> Any:
+    # only required when the Storage Read API is enabled (see bqstorage extra)
+    # pylint: disable-next=import-outside-toplevel
+    from google.cloud import bigquery_storage  # type: ignore[attr-defined]
+    return bigquery_storage.BigQueryReadClient()
+
+
 def get_bq_result_from_bq_query(
     project_name: str,
     query: str,
@@ -20,9 +125,15 @@ def get_bq_result_from_bq_query(
 ) -> RowIterator:
     client = get_bq_client(project_name=project_name)
     job_config = bigquery.QueryJobConfig(query_parameters=query_parameters)
-    query_job = client.query(query, job_config=job_config)  # Make an API request.
-    bq_result = query_job.result()  # Waits for query to finish
+    # the budget is only held while the query runs, not while its results are downloaded
+    with (
+        BIGQUERY_QUERY_BUDGET.acquire(),
+        measure_refresh_job_stage(RefreshJobStageNames.BIGQUERY_QUERY)
+    ):
+        query_job = client.query(query, job_config=job_config)  # Make an API request.
+        bq_result = query_job.result()  # Waits for query to finish
     LOGGER.debug('bq_result: %r', bq_result)
+    add_bytes_processed(query_job.total_bytes_processed or 0)
     return bq_result
 
 
@@ -42,17 +153,140 @@ def iter_dict_from_bq_query(
         yield dict(row.items())
 
 
+def iter_counting_rows_loaded(rows: Iterable[T]) -> Iterable[T]:
+    # the rows are counted locally, for the recorded refresh job run (if any)
+    row_count = 0
+    try:
+        for row in rows:
+            yield row
+            row_count += 1
+    finally:
+        add_rows_loaded(row_count)
+
+
+def iter_dict_from_bq_result_record_batches(
+    bq_result: BigQueryResultProtocol,
+    bqstorage_client: Any,
+    max_stream_count: Optional[int] = None
+) -> Iterable[dict]:
+    # the streams are downloaded in parallel, one record batch is converted at a time
+    for record_batch in bq_result.to_arrow_iterable(
+        bqstorage_client=bqstorage_client,
+        max_stream_count=max_stream_count
+    ):
+        yield from record_batch.to_pylist()
+
+
+def iter_dict_from_bq_result_with_progress(
+    bq_result: BigQueryResultProtocol,
+    desc: str = 'Loading',
+    use_record_batches: bool = False,
+    bqstorage_client: Any = None,
+    max_stream_count: Optional[int] = None
+) -> Iterable[dict]:
+    total_rows: int = bq_result.total_rows  # type: ignore
+    LOGGER.info('Total rows from BigQuery: %d', total_rows)
+    if use_record_batches:
+        LOGGER.info('Using BigQuery Storage Read API (max_stream_count=%r)', max_stream_count)
+        yield from iter_counting_rows_loaded(iter_with_progress(
+            iter_measuring_refresh_job_stage(
+                iter_dict_from_bq_result_record_batches(
+                    bq_result,
+                    bqstorage_client=bqstorage_client,
+                    max_stream_count=max_stream_count
+                ),
+                RefreshJobStageNames.BIGQUERY_DOWNLOAD
+            ),
+            total=total_rows,
+            desc=desc
+        ))
+        return
+    for row in iter_counting_rows_loaded(iter_with_progress(
+        iter_measuring_refresh_job_stage(bq_result, RefreshJobStageNames.BIGQUERY_DOWNLOAD),
+        total=total_rows,
+        desc=desc
+    )):
+        LOGGER.debug('row: %r', row)
+        yield dict(row.items())
+
+
 def iter_dict_from_bq_query_with_progress(
     project_name: str,
     query: str,
-    desc: str = 'Loading'
+    desc: str = 'Loading',
+    use_bq_storage_api: Optional[bool] = None
 ) -> Iterable[dict]:
+    if use_bq_storage_api is None:
+        use_bq_storage_api = is_bq_storage_api_enabled()
     bq_result = get_bq_result_from_bq_query(
         project_name=project_name,
         query=query
     )
+    yield from iter_dict_from_bq_result_with_progress(
+        bq_result,
+        desc=desc,
+        use_record_batches=use_bq_storage_api,
+        bqstorage_client=get_bq_storage_client() if use_bq_storage_api else None,
+        max_stream_count=get_bq_storage_max_stream_count()
+    )
+
+
+def iter_column_batch_from_bq_result_with_progress(
+    bq_result: BigQueryResultProtocol,
+    batch_size: int,
+    desc: str = 'Loading',
+    use_record_batches: bool = False,
+    bqstorage_client: Any = None,
+    max_stream_count: Optional[int] = None
+) -> Iterable[ColumnBatch]:
     total_rows: int = bq_result.total_rows  # type: ignore
     LOGGER.info('Total rows from BigQuery: %d', total_rows)
-    for row in iter_with_progress(bq_result, total=total_rows, desc=desc):
-        LOGGER.debug('row: %r', row)
-        yield dict(row.items())
+    if use_record_batches:
+        LOGGER.info('Using BigQuery Storage Read API (max_stream_count=%r)', max_stream_count)
+        # the size of the record batches is decided by BigQuery
+        column_batch_iterable: Iterable[ColumnBatch] = (
+            record_batch.to_pydict()
+            for record_batch in bq_result.to_arrow_iterable(
+                bqstorage_client=bqstorage_client,
+                max_stream_count=max_stream_count
+            )
+        )
+    else:
+        column_batch_iterable = (
+            get_column_batch_from_rows(list(batch))
+            for batch in iter_batch_iterable(bq_result, batch_size=batch_size)
+        )
+    for column_batch in iter_batches_with_progress(
+        iter_measuring_refresh_job_stage(
+            column_batch_iterable,
+            RefreshJobStageNames.BIGQUERY_DOWNLOAD
+        ),
+        total=total_rows,
+        desc=desc,
+        get_batch_size=get_column_batch_row_count
+    ):
+        yield column_batch
+        add_rows_loaded(get_column_batch_row_count(column_batch))
+
+
+def iter_column_batch_from_bq_query_with_progress(
+    project_name: str,
+    query: str,
+    batch_size: int,
+    desc: str = 'Loading',
+    use_bq_storage_api: Optional[bool] = None
+) -> Iterable[ColumnBatch]:
+    if use_bq_storage_api is None:
+        use_bq_storage_api = is_bq_storage_api_enabled()
+    bq_result = get_bq_result_from_bq_query(
+        project_name=project_name,
+        query=query
+    )
+    yield from iter_column_batch_from_bq_result_with_progress(
+        bq_result,
+        batch_size=batch_size,
+        desc=desc,
+        use_record_batches=use_bq_storage_api,
+        bqstorage_client=get_bq_storage_client() if use_bq_storage_api else None,
+        max_stream_count=get_bq_storage_max_stream_count()
+    )
@@ -0,0 +1,118 @@
+from datetime import date
+import struct
+from typing import Iterable, Mapping, Optional, Sequence, Tuple
+
+from redis import Redis
+
+from data_hub_metrics_api.utils.collections import iter_batch_iterable
+
+# the compact layout stores the daily page views and downloads of an article
+# as one string per month, rather than as hash fields per day and metric:
+# for each day of the month (by offset), two little endian uint32 values (page views, downloads),
+# each stored as the count plus one, which leaves zero for days without a value.
+# a single SETRANGE writes both values of a day (Redis pads the string with zero bytes)
+DAILY_VALUES_STRUCT = struct.Struct('<II')
+
+# sorted set of the months with compact daily values, scored by the month ordinal
+COMPACT_DAILY_YEAR_MONTHS_INDEX_KEY = 'index:compact_by_date:year_months'
+
+
+# event date, page views and downloads
+CompactDailyValues = Tuple[str, int, int]
+
+
+def get_compact_daily_values_key(article_id: str, year_month: str) -> str:
+    return f'article:{article_id}:compact_by_date:{year_month}'
+
+
+def get_compact_daily_day_counts_key(article_id: str) -> str:
+    # hash of the number of days with a value per month, which locates a page of days
+    # (newest first) without reading the months before it
+    return f'article:{article_id}:compact_by_date:day_counts'
+
+
+def get_compact_daily_article_ids_index_key(year_month: str) -> str:
+    # set of the article ids with compact daily values for the month, used for pruning
+    return f'index:compact_by_date:{year_month}:article_ids'
+
+
+def iter_compact_daily_article_id_batches(
+    redis_client: Redis,
+    year_month: str,
+    batch_size: int
+) -> Iterable[Sequence[str]]:
+    for batch in iter_batch_iterable(
+        redis_client.sscan_iter(
+            get_compact_daily_article_ids_index_key(year_month),
+            count=batch_size
+        ),
+        batch_size=batch_size
+    ):
+        yield [article_id.decode('utf-8') for article_id in batch]
+
+
+def get_year_month_for_date(event_date: date) -> str:
+    return event_date.isoformat()[:len('YYYY-MM')]
+
+
+def get_compact_daily_values_offset(event_date: date) -> int:
+    return (event_date.day - 1) * DAILY_VALUES_STRUCT.size
+
+
+def get_encoded_compact_daily_values(page_views: int, downloads: int) -> bytes:
+    return DAILY_VALUES_STRUCT.pack(page_views + 1, downloads + 1)
+
+
+def get_empty_compact_daily_values(number_of_days: int) -> bytes:
+    # clears the values of the first days of a month, e.g. when pruning
+    return bytes(number_of_days * DAILY_VALUES_STRUCT.size)
+
+
+def get_compact_daily_value_bit_offset(event_date: date) -> int:
+    # the BITFIELD offset of the (encoded) page views of the day, zero if the day is empty
+    return get_compact_daily_values_offset(event_date) * 8
+
+
+def get_compact_daily_day_count(encoded_values: Optional[bytes]) -> int:
+    return sum(1 for _ in iter_decoded_compact_daily_values('', encoded_values))
+
+
+def get_year_months_for_page_window(
+    day_count_by_year_month: Mapping[str, int],
+    page_start_index: int,
+    page_end_index: int
+) -> tuple[Sequence[str], int]:
+    # the months containing the page of days (newest first),
+    # and the number of days in the newer months before them
+    year_months: list[str] = []
+    skipped_day_count = 0
+    day_count = 0
+    for year_month in sorted(day_count_by_year_month, reverse=True):
+        if day_count >= page_end_index:
+            break
+        month_day_count = day_count_by_year_month[year_month]
+        if day_count + month_day_count <= page_start_index:
+            skipped_day_count += month_day_count
+        elif month_day_count:
+            year_months.append(year_month)
+        day_count += month_day_count
+    return year_months, skipped_day_count
+
+
+def iter_decoded_compact_daily_values(
+    year_month: str,
+    encoded_values: Optional[bytes]
+) -> Iterable[CompactDailyValues]:
+    # in date order, days without a value are skipped
+    if not encoded_values:
+        return
+    for day_offset, (encoded_page_views, encoded_downloads) in enumerate(
+        DAILY_VALUES_STRUCT.iter_unpack(encoded_values)
+    ):
+        if not encoded_page_views and not encoded_downloads:
+            continue
+        yield (
+            f'{year_month}-{day_offset + 1:02d}',
+            max(0, encoded_page_views - 1),
+            max(0, encoded_downloads - 1)
+        )
@@ -0,0 +1,189 @@
+from datetime import datetime
+from email.utils import format_datetime, parsedate_to_datetime
+import logging
+from typing import Any, Callable, Coroutine, Mapping, Optional, Sequence
+
+from fastapi import Request, Response
+from fastapi.routing import APIRoute
+
+from data_hub_metrics_api.utils.keyspace_generations import (
+    KeyspaceGenerations,
+    get_generation_datetime
+)
+
+LOGGER = logging.getLogger(__name__)
+
+
+# the metrics only change when the data is refreshed, shared caches can keep them briefly
+DEFAULT_CACHE_CONTROL = 'public, max-age=60'
+
+
+class ResponseValidators:
+    def __init__(self, etag: str, last_modified: Optional[datetime] = None):
+        self.etag = etag
+        self.last_modified = last_modified
+
+    def get_headers(self) -> Mapping[str, str]:
+        headers = {'etag': self.etag}
+        if self.last_modified is not None:
+            headers['last-modified'] = format_datetime(self.last_modified, usegmt=True)
+        return headers
+
+
+class NotModifiedException(Exception):
+    # raised before the route handler reads any data
+    def __init__(self, response_validators: ResponseValidators):
+        super().__init__('Not modified')
+        self.response_validators = response_validators
+
+
+def get_etag_for_generations(generations: Sequence[str]) -> str:
+    # a weak validator: the periods are written in place (the generation is bumped afterwards),
+    # i.e. a response may change during a refresh while its generations remain the same
+    return 'W/"' + '.'.join(generations) + '"'
+
+
+def get_response_validators_for_generations(
+    generations: Sequence[Optional[str]]
+) -> Optional[ResponseValidators]:
+    # keys loaded before generations were introduced do not have a validator
+    if not all(generations):
+        return None
+    complete_generations = [generation for generation in generations if generation]
+    generation_datetimes = [
+        generation_datetime
+        for generation_datetime in map(get_generation_datetime, complete_generations)
+        if generation_datetime is not None
+    ]
+    return ResponseValidators(
+        etag=get_etag_for_generations(complete_generations),
+        last_modified=(
+            max(generation_datetimes)
+            if len(generation_datetimes) == len(complete_generations)
+            else None
+        )
+    )
+
+
+def get_opaque_tag(etag: str) -> str:
+    # weak validators only differ by the prefix, which "If-None-Match" compares weakly
+    return etag.strip().removeprefix('W/')
+
+
+def is_if_none_match_matching_etag(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == '*':
+        return True
+    return get_opaque_tag(etag) in {
+        get_opaque_tag(value)
+        for value in if_none_match.split(',')
+    }
+
+
+def is_if_modified_since_not_before_last_modified(
+    if_modified_since: Optional[str],
+    last_modified: Optional[datetime]
+) -> bool:
+    if not if_modified_since or last_modified is None:
+        return False
+    try:
+        if_modified_since_datetime = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+    if if_modified_since_datetime.tzinfo is None:
+        return False
+    # the HTTP date only has a precision of seconds
+    return if_modified_since_datetime >= last_modified.replace(microsecond=0)
+
+
+def is_not_modified(request: Request, response_validators: ResponseValidators) -> bool:
+    # "If-Modified-Since" is ignored when "If-None-Match" is present
+    if_none_match = request.headers.get('if-none-match')
+    if if_none_match:
+        return is_if_none_match_matching_etag(if_none_match, response_validators.etag)
+    return is_if_modified_since_not_before_last_modified(
+        request.headers.get('if-modified-since'),
+        response_validators.last_modified
+    )
+
+
+def get_generation_validators_dependency(
+    keyspace_generations: KeyspaceGenerations,
+    generation_names: Sequence[str]
+) -> Callable[[Request], Coroutine[Any, Any, None]]:
+    # the validators are derived from the generations the route reads,
+    # a matching conditional request is answered without calling the providers
+    async def check_generation_validators(request: Request) -> None:
+        if request.method not in {'GET', 'HEAD'}:
+            return
+        response_validators = get_response_validators_for_generations([
+            await keyspace_generations.get_generation(generation_name)
+            for generation_name in generation_names
+        ])
+        if response_validators is None:
+            return
+        request.state.response_validators = response_validators
+        if is_not_modified(request, response_validators):
+            LOGGER.debug(
+                'Not modified: %r (etag=%r)',
+                request.url.path,
+                response_validators.etag
+            )
+            raise NotModifiedException(response_validators)
+
+    return check_generation_validators
+
+
+def get_not_modified_response(
+    response_validators: ResponseValidators,
+    cache_control: str = DEFAULT_CACHE_CONTROL
+) -> Response:
+    return Response(
+        status_code=304,
+        headers={
+            **response_validators.get_headers(),
+            'cache-control': cache_control
+        }
+    )
+
+
+def get_conditional_response(
+    request: Request,
+    response: Response,
+    cache_control: str = DEFAULT_CACHE_CONTROL
+) -> Response:
+    # only responses with validators can be cached (and revalidated),
+    # responses setting their own cache control (e.g. the ping) are left unchanged
+    response_validators: Optional[ResponseValidators] = getattr(
+        request.state,
+        'response_validators',
+        None
+    )
+    if (
+        request.method not in {'GET', 'HEAD'}
+        or response.status_code != 200
+        or 'cache-control' in response.headers
+        or response_validators is None
+    ):
+        return response
+    response.headers['cache-control'] = cache_control
+    response.headers.update(response_validators.get_headers())
+    return response
+
+
+class ConditionalRequestRoute(APIRoute):
+    # adds the validators of the generations read by the route (see
+    # get_generation_validators_dependency), answering a matching "If-None-Match"
+    # or "If-Modified-Since" with "304 Not Modified" and without a body
+    def get_route_handler(self) -> Callable[[Request], Coroutine[Any, Any, Response]]:
+        route_handler = super().get_route_handler()
+
+        async def conditional_route_handler(request: Request) -> Response:
+            try:
+                response = await route_handler(request)
+            except NotModifiedException as exc:
+                return get_not_modified_response(exc.response_validators)
+            return get_conditional_response(request, response)
+
+        return conditional_route_handler
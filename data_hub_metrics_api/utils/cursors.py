@@ -0,0 +1,28 @@
+import base64
+import binascii
+from typing import Optional
+
+
+# the cursor of the first page, when walking all of the articles using cursors
+FIRST_PAGE_CURSOR = '*'
+
+
+def get_cursor_for_article_id(article_id: str) -> str:
+    # the cursor is opaque to clients, the article id ordering is an implementation detail
+    return base64.urlsafe_b64encode(article_id.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def get_article_id_for_cursor(cursor: str) -> Optional[str]:
+    # returns the last article id of the previous page (None for the first page),
+    # raises ValueError for cursors not returned by get_cursor_for_article_id
+    if cursor == FIRST_PAGE_CURSOR:
+        return None
+    try:
+        article_id = base64.urlsafe_b64decode(
+            cursor + '=' * (-len(cursor) % 4)
+        ).decode('utf-8')
+    except (binascii.Error, UnicodeDecodeError) as exc:
+        raise ValueError(f'Invalid cursor: {cursor!r}') from exc
+    if not article_id.isdigit():
+        raise ValueError(f'Invalid cursor: {cursor!r}')
+    return article_id
@@ -0,0 +1,211 @@
+from contextlib import contextmanager
+from datetime import datetime, timezone
+import logging
+import time
+from typing import Iterator, Optional, Sequence
+
+from redis import Redis
+from redis.asyncio import Redis as AsyncRedis
+
+from data_hub_metrics_api.utils.collections import iter_batch_iterable
+from data_hub_metrics_api.utils.refresh_job_runs import (
+    RefreshJobStageNames,
+    measure_refresh_job_stage
+)
+
+LOGGER = logging.getLogger(__name__)
+
+
+# how long a process keeps using a resolved generation before checking the pointer again
+DEFAULT_CACHE_TTL_SECONDS = 5.0
+
+# the keys of a replaced generation are expired rather than deleted straight away,
+# giving processes with a cached pointer time to switch to the new generation
+DEFAULT_OLD_GENERATION_EXPIRY_SECONDS = 60
+
+BATCH_SIZE = 1000
+
+GENERATION_DATETIME_FORMAT = '%Y%m%dT%H%M%S%f'
+
+
+def get_generation_pointer_key(generation_name: str) -> str:
+    return f'generation:{generation_name}'
+
+
+def get_generation_key_prefix(generation: Optional[str]) -> str:
+    # keys loaded before generations were introduced do not have a prefix
+    return f'gen:{generation}:' if generation else ''
+
+
+def create_generation() -> str:
+    return datetime.now(timezone.utc).strftime(GENERATION_DATETIME_FORMAT)
+
+
+def get_generation_datetime(generation: str) -> Optional[datetime]:
+    # the time the generation was created, i.e. when the refresh loaded or updated its data
+    try:
+        return datetime.strptime(generation, GENERATION_DATETIME_FORMAT).replace(
+            tzinfo=timezone.utc
+        )
+    except ValueError:
+        return None
+
+
+def get_active_generation_key_prefix(redis_client: Redis, generation_name: str) -> str:
+    generation: Optional[bytes] = redis_client.get(  # type: ignore[assignment]
+        get_generation_pointer_key(generation_name)
+    )
+    return get_generation_key_prefix(generation.decode('utf-8') if generation else None)
+
+
+def expire_generation_keys(
+    redis_client: Redis,
+    key_prefix: str,
+    key_patterns: Sequence[str],
+    expiry_seconds: int = DEFAULT_OLD_GENERATION_EXPIRY_SECONDS,
+    batch_size: int = BATCH_SIZE
+) -> int:
+    expired_key_count = 0
+    with (
+        measure_refresh_job_stage(RefreshJobStageNames.PRUNE),
+        redis_client.pipeline(transaction=False) as pipe
+    ):
+        for key_pattern in key_patterns:
+            for batch in iter_batch_iterable(
+                redis_client.scan_iter(match=key_prefix + key_pattern, count=batch_size),
+                batch_size=batch_size
+            ):
+                for key in batch:
+                    pipe.expire(key, expiry_seconds)
+                    expired_key_count += 1
+                pipe.execute()
+    return expired_key_count
+
+
+def bump_generation(redis_client: Redis, generation_name: str) -> str:
+    # for data updated in place, where the generation is only used to invalidate caches
+    generation = create_generation()
+    redis_client.set(get_generation_pointer_key(generation_name), generation)
+    LOGGER.info('Bumped %s generation to %r', generation_name, generation)
+    return generation
+
+
+def activate_generation(
+    redis_client: Redis,
+    generation_name: str,
+    generation: str,
+    key_patterns: Sequence[str],
+    old_generation_expiry_seconds: int = DEFAULT_OLD_GENERATION_EXPIRY_SECONDS
+) -> None:
+    # the pointer is replaced atomically, readers see either all of the old or the new keys
+    old_generation: Optional[bytes] = redis_client.set(  # type: ignore[assignment]
+        get_generation_pointer_key(generation_name),
+        generation,
+        get=True
+    )
+    LOGGER.info(
+        'Activated %s generation %r (was %r)',
+        generation_name,
+        generation,
+        old_generation
+    )
+    if old_generation and old_generation.decode('utf-8') == generation:
+        return
+    expired_key_count = expire_generation_keys(
+        redis_client,
+        key_prefix=get_generation_key_prefix(
+            old_generation.decode('utf-8') if old_generation else None
+        ),
+        key_patterns=key_patterns,
+        expiry_seconds=old_generation_expiry_seconds
+    )
+    LOGGER.info(
+        'Expiring %d keys of the old %s generation in %d seconds',
+        expired_key_count,
+        generation_name,
+        old_generation_expiry_seconds
+    )
+
+
+def unlink_generation_keys(
+    redis_client: Redis,
+    key_prefix: str,
+    key_patterns: Sequence[str],
+    batch_size: int = BATCH_SIZE
+) -> int:
+    # e.g. the keys of a generation that failed to load, which would never be activated
+    # (nor expired as an old generation)
+    assert key_prefix, 'only the keys of a generation can be unlinked'
+    unlinked_key_count = 0
+    for key_pattern in key_patterns:
+        for batch in iter_batch_iterable(
+            redis_client.scan_iter(match=key_prefix + key_pattern, count=batch_size),
+            batch_size=batch_size
+        ):
+            keys = list(batch)
+            redis_client.unlink(*keys)
+            unlinked_key_count += len(keys)
+    return unlinked_key_count
+
+
+@contextmanager
+def loading_generation(
+    redis_client: Redis,
+    generation_name: str,
+    generation: str,
+    key_patterns: Sequence[str]
+) -> Iterator[str]:
+    # yields the key prefix to load the keys of the new generation with,
+    # the generation is activated once the keys were loaded,
+    # or its keys are unlinked if loading them failed partway
+    key_prefix = get_generation_key_prefix(generation)
+    try:
+        yield key_prefix
+    except Exception:
+        unlinked_key_count = unlink_generation_keys(
+            redis_client,
+            key_prefix=key_prefix,
+            key_patterns=key_patterns
+        )
+        LOGGER.warning(
+            'Unlinked %d keys of the %s generation %r, which failed to load',
+            unlinked_key_count,
+            generation_name,
+            generation
+        )
+        raise
+    activate_generation(
+        redis_client,
+        generation_name=generation_name,
+        generation=generation,
+        key_patterns=key_patterns
+    )
+
+
+class KeyspaceGenerations:
+    def __init__(
+        self,
+        async_redis_client: AsyncRedis,
+        cache_ttl_seconds: float = DEFAULT_CACHE_TTL_SECONDS
+    ):
+        self.async_redis_client = async_redis_client
+        self.cache_ttl_seconds = cache_ttl_seconds
+        # generation name to the generation and the time it was resolved
+        self._generation_cache: dict[str, tuple[Optional[str], float]] = {}
+
+    async def get_generation(self, generation_name: str) -> Optional[str]:
+        cached = self._generation_cache.get(generation_name)
+        now = time.monotonic()
+        if cached is not None and now - cached[1] < self.cache_ttl_seconds:
+            return cached[0]
+        generation_value: Optional[bytes] = (
+            await self.async_redis_client.get(
+                get_generation_pointer_key(generation_name)
+            )
+        )
+        generation = generation_value.decode('utf-8') if generation_value else None
+        self._generation_cache[generation_name] = (generation, now)
+        return generation
+
+    async def get_key_prefix(self, generation_name: str) -> str:
+        return get_generation_key_prefix(await self.get_generation(generation_name))
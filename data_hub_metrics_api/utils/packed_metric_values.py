@@ -0,0 +1,54 @@
+from typing import Iterable, Optional, Sequence, TypedDict, Union
+
+# the page views and downloads of an article (or of a period) are stored together,
+# as one packed value (e.g. "123:45"), rather than as a key (or hash field) per metric
+PACKED_METRIC_VALUES_SEPARATOR = ':'
+
+
+RedisValue = Optional[Union[bytes, str]]
+
+
+class MetricTotalsTypedDict(TypedDict):
+    page_views: int
+    downloads: int
+
+
+def get_packed_metric_values(page_views: int, downloads: int) -> str:
+    return f'{page_views}{PACKED_METRIC_VALUES_SEPARATOR}{downloads}'
+
+
+def get_unpacked_metric_values(packed_value: RedisValue) -> MetricTotalsTypedDict:
+    if not packed_value:
+        return {'page_views': 0, 'downloads': 0}
+    if isinstance(packed_value, bytes):
+        packed_value = packed_value.decode('utf-8')
+    page_views_str, downloads_str = packed_value.split(PACKED_METRIC_VALUES_SEPARATOR)
+    return {'page_views': int(page_views_str), 'downloads': int(downloads_str)}
+
+
+def get_legacy_metric_total_keys(
+    article_ids: Iterable[str],
+    key_prefix: str = ''
+) -> Sequence[str]:
+    # the keys of the totals per metric, stored before the totals were packed
+    return [
+        f'{key_prefix}article:{article_id}:{metric_name}'
+        for article_id in article_ids
+        for metric_name in ('page_views', 'downloads')
+    ]
+
+
+def get_metric_totals_for_legacy_values(
+    redis_values: Sequence[RedisValue]
+) -> Sequence[MetricTotalsTypedDict]:
+    # the values of the keys returned by get_legacy_metric_total_keys
+    return [
+        {
+            'page_views': int(page_views_value or 0),
+            'downloads': int(downloads_value or 0)
+        }
+        for page_views_value, downloads_value in zip(
+            redis_values[0::2],
+            redis_values[1::2]
+        )
+    ]
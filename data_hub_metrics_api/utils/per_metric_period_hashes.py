@@ -0,0 +1,81 @@
+from typing import Iterable, Sequence, Tuple
+
+from redis import Redis
+from redis.client import Pipeline
+
+from data_hub_metrics_api.utils.collections import iter_batch_iterable
+from data_hub_metrics_api.utils.period_index import (
+    BATCH_SIZE,
+    PeriodSuffixLiteral,
+    get_period_hash_keys_index_key,
+    get_period_index_key
+)
+
+# earlier versions stored the page views and downloads by period as a hash per article and metric
+# (e.g. "article:123:page_views:by_month"), before they were packed (or compact)
+
+
+# article id, period (date or year month), page views and downloads
+PerMetricPeriodValues = Tuple[str, str, int, int]
+
+
+def get_per_metric_period_hash_keys(
+    article_id: str,
+    period_suffix: PeriodSuffixLiteral
+) -> list[str]:
+    return [
+        f'article:{article_id}:{metric_name}:{period_suffix}'
+        for metric_name in ('page_views', 'downloads')
+    ]
+
+
+def iter_per_metric_period_values_from_hashes(
+    redis_client: Redis,
+    period_suffix: PeriodSuffixLiteral,
+    batch_size: int = BATCH_SIZE
+) -> Iterable[PerMetricPeriodValues]:
+    # the values of both metrics by article and period, in period order (per article)
+    for batch in iter_batch_iterable(
+        redis_client.scan_iter(match=f'article:*:page_views:{period_suffix}', count=batch_size),
+        batch_size=batch_size
+    ):
+        page_views_hash_keys = [key.decode('utf-8') for key in batch]
+        with redis_client.pipeline(transaction=False) as pipe:
+            for page_views_hash_key in page_views_hash_keys:
+                pipe.hgetall(page_views_hash_key)
+                pipe.hgetall(page_views_hash_key.replace(':page_views:', ':downloads:'))
+            value_by_period_list = pipe.execute()
+        for page_views_hash_key, page_views_by_period, downloads_by_period in zip(
+            page_views_hash_keys,
+            value_by_period_list[0::2],
+            value_by_period_list[1::2]
+        ):
+            article_id = page_views_hash_key.split(':')[1]
+            for period in sorted(set(page_views_by_period) | set(downloads_by_period)):
+                yield (
+                    article_id,
+                    period.decode('utf-8'),
+                    int(page_views_by_period.get(period, 0)),
+                    int(downloads_by_period.get(period, 0))
+                )
+
+
+def unlink_per_metric_period_hashes(
+    pipe: Pipeline,
+    per_metric_period_values: Sequence[PerMetricPeriodValues],
+    period_suffix: PeriodSuffixLiteral
+) -> None:
+    # e.g. once the values were packed, removing the hashes of both metrics of the articles,
+    # with their period index (and their entries in the period hash keys index)
+    hash_keys_by_period: dict[str, set[str]] = {}
+    for article_id, period, _page_views, _downloads in per_metric_period_values:
+        hash_keys_by_period.setdefault(period, set()).update(
+            get_per_metric_period_hash_keys(article_id, period_suffix)
+        )
+    for period, hash_keys in hash_keys_by_period.items():
+        pipe.srem(get_period_hash_keys_index_key(period_suffix, period), *sorted(hash_keys))
+    unlinked_hash_keys = sorted(set().union(*hash_keys_by_period.values()))
+    if unlinked_hash_keys:
+        pipe.unlink(*unlinked_hash_keys, *[
+            get_period_index_key(hash_key) for hash_key in unlinked_hash_keys
+        ])
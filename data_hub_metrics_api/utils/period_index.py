@@ -0,0 +1,224 @@
+from datetime import date
+import logging
+from typing import Iterable, Literal, Sequence, Tuple, Union
+
+from redis import Redis
+from redis.client import Pipeline
+
+from data_hub_metrics_api.utils.collections import iter_batch_iterable
+from data_hub_metrics_api.utils.progress_bar import iter_with_progress
+
+LOGGER = logging.getLogger(__name__)
+
+
+PeriodSuffixLiteral = Literal['by_date', 'by_month']
+
+BATCH_SIZE = 1000
+
+# period hash key, period (date or year month) and value (or packed values)
+PeriodValueCell = Tuple[str, str, Union[int, str]]
+
+
+def get_value_by_period_by_hash_key(
+    cells: Iterable[PeriodValueCell]
+) -> dict[str, dict[str, Union[int, str]]]:
+    value_by_period_by_hash_key: dict[str, dict[str, Union[int, str]]] = {}
+    for period_hash_key, period_str, value in cells:
+        value_by_period_by_hash_key.setdefault(period_hash_key, {})[period_str] = value
+    return value_by_period_by_hash_key
+
+
+def get_period_score(period_str: str) -> int:
+    # the score orders the periods in the period index sorted set,
+    # either a 'YYYY-MM-DD' date ordinal or a 'YYYY-MM' month ordinal
+    if len(period_str) == len('YYYY-MM'):
+        year, month = period_str.split('-')
+        return int(year) * 12 + int(month) - 1
+    return date.fromisoformat(period_str).toordinal()
+
+
+def get_period_index_key(period_hash_key: str) -> str:
+    return f'{period_hash_key}:period_index'
+
+
+def get_periods_index_key(period_suffix: PeriodSuffixLiteral) -> str:
+    # sorted set of all loaded periods, scored by get_period_score
+    return f'index:{period_suffix}:periods'
+
+
+def get_period_hash_keys_index_key(period_suffix: PeriodSuffixLiteral, period_str: str) -> str:
+    # set of the period hash keys with a field for the period
+    return f'index:{period_suffix}:{period_str}:keys'
+
+
+def get_period_suffix_for_period_hash_key(period_hash_key: str) -> PeriodSuffixLiteral:
+    return 'by_month' if period_hash_key.endswith(':by_month') else 'by_date'
+
+
+def get_changed_period_value_cells(
+    redis_client: Redis,
+    cells: Sequence[PeriodValueCell]
+) -> list[PeriodValueCell]:
+    with redis_client.pipeline(transaction=False) as pipe:
+        for period_hash_key, period_str, _value in cells:
+            pipe.hget(period_hash_key, period_str)
+        existing_values = pipe.execute()
+    return [
+        cell
+        for cell, existing_value in zip(cells, existing_values)
+        if existing_value is None or int(existing_value) != cell[2]
+    ]
+
+
+def put_period_value_cells(
+    pipe: Pipeline,
+    cells: Iterable[PeriodValueCell]
+) -> None:
+    # grouped into one multi-field HSET and ZADD per hash (i.e. per article and metric),
+    # and one SADD per period, rather than four commands per cell
+    value_by_period_by_hash_key = get_value_by_period_by_hash_key(cells)
+    period_score_by_period: dict[str, int] = {}
+    hash_keys_by_suffix_and_period: dict[tuple[PeriodSuffixLiteral, str], list[str]] = {}
+    for period_hash_key, value_by_period in value_by_period_by_hash_key.items():
+        period_suffix = get_period_suffix_for_period_hash_key(period_hash_key)
+        for period_str in value_by_period:
+            if period_str not in period_score_by_period:
+                period_score_by_period[period_str] = get_period_score(period_str)
+            hash_keys_by_suffix_and_period.setdefault(
+                (period_suffix, period_str),
+                []
+            ).append(period_hash_key)
+        pipe.hset(period_hash_key, mapping=value_by_period)
+        pipe.zadd(get_period_index_key(period_hash_key), {
+            period_str: period_score_by_period[period_str]
+            for period_str in value_by_period
+        })
+    period_scores_by_suffix: dict[PeriodSuffixLiteral, dict[str, int]] = {}
+    for (period_suffix, period_str), hash_keys in hash_keys_by_suffix_and_period.items():
+        pipe.sadd(get_period_hash_keys_index_key(period_suffix, period_str), *hash_keys)
+        period_scores_by_suffix.setdefault(period_suffix, {})[period_str] = (
+            period_score_by_period[period_str]
+        )
+    for period_suffix, period_score_mapping in period_scores_by_suffix.items():
+        pipe.zadd(get_periods_index_key(period_suffix), period_score_mapping)
+
+
+def iter_period_value_cells_from_hashes(
+    redis_client: Redis,
+    key_pattern: str,
+    batch_size: int = BATCH_SIZE
+) -> Iterable[PeriodValueCell]:
+    # the fields of all hashes matching the pattern, e.g. the periods loaded without an index
+    for batch in iter_batch_iterable(
+        redis_client.scan_iter(match=key_pattern, count=batch_size),
+        batch_size=batch_size
+    ):
+        period_hash_keys = [key.decode('utf-8') for key in batch]
+        with redis_client.pipeline(transaction=False) as pipe:
+            for period_hash_key in period_hash_keys:
+                pipe.hgetall(period_hash_key)
+            value_by_period_list = pipe.execute()
+        for period_hash_key, value_by_period in zip(period_hash_keys, value_by_period_list):
+            for period, value in value_by_period.items():
+                yield period_hash_key, period.decode('utf-8'), int(value)
+
+
+def backfill_period_index(
+    redis_client: Redis,
+    key_pattern: str,
+    batch_size: int = BATCH_SIZE
+) -> int:
+    # adds the existing fields of the hashes to the period indices (rewriting the same values),
+    # returns the number of fields
+    backfilled_cell_count = 0
+    with redis_client.pipeline() as pipe:
+        for batch in iter_batch_iterable(
+            iter_period_value_cells_from_hashes(redis_client, key_pattern, batch_size=batch_size),
+            batch_size=batch_size
+        ):
+            cells = list(batch)
+            put_period_value_cells(pipe, cells)
+            pipe.execute()
+            backfilled_cell_count += len(cells)
+    LOGGER.info(
+        'Backfilled period index of %d fields for pattern %r',
+        backfilled_cell_count,
+        key_pattern
+    )
+    return backfilled_cell_count
+
+
+def prune_periods_before(
+    redis_client: Redis,
+    period_suffix: PeriodSuffixLiteral,
+    cutoff: str,
+    batch_size: int = BATCH_SIZE
+) -> None:
+    periods_index_key = get_periods_index_key(period_suffix)
+    old_periods = [
+        period.decode('utf-8')
+        for period in redis_client.zrangebyscore(  # type: ignore[union-attr]
+            periods_index_key,
+            '-inf',
+            f'({get_period_score(cutoff)}'  # exclusive, the cutoff period is kept
+        )
+    ]
+    LOGGER.info('Pruning %d %s periods before %s', len(old_periods), period_suffix, cutoff)
+    pruned_field_count = 0
+    with redis_client.pipeline() as pipe:
+        for period_str in iter_with_progress(
+            old_periods,
+            total=len(old_periods),
+            desc=f'Pruning {period_suffix}'
+        ):
+            period_hash_keys_index_key = get_period_hash_keys_index_key(
+                period_suffix,
+                period_str
+            )
+            for batch in iter_batch_iterable(
+                redis_client.sscan_iter(period_hash_keys_index_key, count=batch_size),
+                batch_size=batch_size
+            ):
+                for period_hash_key in batch:
+                    pipe.hdel(period_hash_key, period_str)
+                    pipe.zrem(get_period_index_key(period_hash_key.decode('utf-8')), period_str)
+                    pruned_field_count += 1
+                pipe.execute()
+            pipe.delete(period_hash_keys_index_key)
+            pipe.zrem(periods_index_key, period_str)
+            pipe.execute()
+    LOGGER.info('Pruned %d %s fields before %s', pruned_field_count, period_suffix, cutoff)
+
+
+def prune_unindexed_hash_fields_before(
+    redis_client: Redis,
+    key_pattern: str,
+    cutoff: str,
+    batch_size: int = BATCH_SIZE
+) -> None:
+    # scans all keys, for periods loaded before the periods index was introduced
+    LOGGER.info('Pruning fields before %s for pattern %r', cutoff, key_pattern)
+    pruned_hash_count = 0
+    with redis_client.pipeline() as pipe:
+        pending = 0
+        for key in redis_client.scan_iter(match=key_pattern, count=1000):
+            old_fields = [
+                field for field in redis_client.hkeys(key)  # type: ignore[union-attr]
+                if field.decode('utf-8') < cutoff
+            ]
+            if not old_fields:
+                continue
+            pipe.hdel(key, *old_fields)
+            pipe.zrem(get_period_index_key(key.decode('utf-8')), *old_fields)
+            pruned_hash_count += 1
+            pending += 1
+            if pending >= batch_size:
+                pipe.execute()
+                pending = 0
+        if pending:
+            pipe.execute()
+    LOGGER.info(
+        'Pruned old fields from %d hashes for pattern %r',
+        pruned_hash_count,
+        key_pattern
+    )
@@ -1,8 +1,21 @@
-from typing import Iterable, TypeVar
+from typing import Callable, Iterable, TypeVar
 from tqdm import tqdm
 
 T = TypeVar('T')
 
 
-def iter_with_progress(data: Iterable[T], total: int, desc: str) -> Iterable[dict]:
+def iter_with_progress(data: Iterable[T], total: int, desc: str) -> Iterable[T]:
     return tqdm(data, total=total, desc=desc)
+
+
+def iter_batches_with_progress(
+    batches: Iterable[T],
+    total: int,
+    desc: str,
+    get_batch_size: Callable[[T], int]
+) -> Iterable[T]:
+    # the total and the progress are counted in items rather than batches
+    with tqdm(total=total, desc=desc) as progress:
+        for batch in batches:
+            yield batch
+            progress.update(get_batch_size(batch))
@@ -0,0 +1,72 @@
+from collections import OrderedDict
+import logging
+import time
+from typing import Any, Awaitable, Callable, Hashable, TypeVar, TypedDict
+
+LOGGER = logging.getLogger(__name__)
+
+
+T = TypeVar('T')
+
+
+# the maximum number of API responses cached in each server process (zero disables the cache)
+DEFAULT_MAX_SIZE = 10000
+
+DEFAULT_TTL_SECONDS = 60.0
+
+
+class ReadThroughCacheStatsTypedDict(TypedDict):
+    size: int
+    max_size: int
+    hit_count: int
+    miss_count: int
+    eviction_count: int
+
+
+class ReadThroughCache:
+    # a bounded, least recently used cache of values loaded from Redis.
+    # the cache keys include the active refresh generations,
+    # which makes entries of replaced generations unreachable (they are then evicted)
+    def __init__(
+        self,
+        max_size: int = DEFAULT_MAX_SIZE,
+        ttl_seconds: float = DEFAULT_TTL_SECONDS
+    ):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        # cache key to the value and the time it expires
+        self._value_and_expiry_by_key: OrderedDict[Hashable, tuple[Any, float]] = OrderedDict()
+        self.hit_count = 0
+        self.miss_count = 0
+        self.eviction_count = 0
+
+    def get_stats(self) -> ReadThroughCacheStatsTypedDict:
+        return {
+            'size': len(self._value_and_expiry_by_key),
+            'max_size': self.max_size,
+            'hit_count': self.hit_count,
+            'miss_count': self.miss_count,
+            'eviction_count': self.eviction_count
+        }
+
+    async def get_or_load(self, key: Hashable, load: Callable[[], Awaitable[T]]) -> T:
+        if not self.max_size:
+            return await load()
+        value_and_expiry = self._value_and_expiry_by_key.get(key)
+        if value_and_expiry is not None and value_and_expiry[1] > time.monotonic():
+            self._value_and_expiry_by_key.move_to_end(key)
+            self.hit_count += 1
+            return value_and_expiry[0]
+        self.miss_count += 1
+        value = await load()
+        self._value_and_expiry_by_key[key] = (value, time.monotonic() + self.ttl_seconds)
+        self._value_and_expiry_by_key.move_to_end(key)
+        while len(self._value_and_expiry_by_key) > self.max_size:
+            self._value_and_expiry_by_key.popitem(last=False)
+            self.eviction_count += 1
+        return value
+
+
+def get_disabled_read_through_cache() -> ReadThroughCache:
+    # e.g. for the providers of the refresh jobs, unless a cache is passed in
+    return ReadThroughCache(max_size=0)
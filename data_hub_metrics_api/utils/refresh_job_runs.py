@@ -0,0 +1,237 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+import json
+import logging
+import os
+import sys
+import time
+from typing import Any, Iterable, Iterator, Mapping, Optional, TypeVar, TypedDict
+
+from redis import Redis
+from redis.asyncio import Redis as AsyncRedis
+from redis.client import Pipeline
+
+LOGGER = logging.getLogger(__name__)
+
+
+T = TypeVar('T')
+
+
+# hash of the job name to the last run of the refresh job (as JSON)
+REFRESH_JOB_LAST_RUN_KEY = 'refresh_jobs:last_run'
+
+# a file path, or "-" for stdout
+REFRESH_JOB_RUN_REPORT_PATH_ENV_NAME = 'REFRESH_JOB_RUN_REPORT_PATH'
+
+STDOUT_RUN_REPORT_PATH = '-'
+
+
+class RefreshJobStageNames:
+    # waiting for the BigQuery query job to finish
+    BIGQUERY_QUERY = 'bigquery_query'
+    # waiting for other jobs' BigQuery queries, when the number of queries at once is limited
+    BIGQUERY_QUERY_BUDGET = 'bigquery_query_budget'
+    # waiting for the next rows of the BigQuery results
+    BIGQUERY_DOWNLOAD = 'bigquery_download'
+    # waiting for Redis (mostly writes, including the writes of the prune stage)
+    REDIS = 'redis'
+    # removing old periods and expiring keys of replaced generations
+    PRUNE = 'prune'
+
+
+class RefreshJobRunTypedDict(TypedDict):
+    job_name: str
+    started_timestamp: float
+    duration_seconds: float
+    rows_loaded: int
+    rows_per_second: float
+    redis_command_count: int
+    bytes_processed: int
+    stage_duration_seconds: dict[str, float]
+    succeeded: bool
+
+
+class RefreshJobRun:
+    def __init__(self, job_name: str):
+        self.job_name = job_name
+        self.started_timestamp = time.time()
+        self._started_perf_counter = time.perf_counter()
+        self.rows_loaded = 0
+        self.redis_command_count = 0
+        self.bytes_processed = 0
+        self.stage_duration_seconds: dict[str, float] = {}
+        # set once the run completed (successfully or not)
+        self.completed_run_dict: Optional[RefreshJobRunTypedDict] = None
+
+    def get_duration_seconds(self) -> float:
+        return time.perf_counter() - self._started_perf_counter
+
+    def add_stage_duration(self, stage_name: str, duration_seconds: float) -> None:
+        self.stage_duration_seconds[stage_name] = (
+            self.stage_duration_seconds.get(stage_name, 0.0) + duration_seconds
+        )
+
+    def to_dict(self, succeeded: bool) -> RefreshJobRunTypedDict:
+        duration_seconds = self.get_duration_seconds()
+        return {
+            'job_name': self.job_name,
+            'started_timestamp': self.started_timestamp,
+            'duration_seconds': duration_seconds,
+            'rows_loaded': self.rows_loaded,
+            'rows_per_second': self.rows_loaded / duration_seconds if duration_seconds else 0.0,
+            'redis_command_count': self.redis_command_count,
+            'bytes_processed': self.bytes_processed,
+            'stage_duration_seconds': dict(self.stage_duration_seconds),
+            'succeeded': succeeded
+        }
+
+
+_CURRENT_REFRESH_JOB_RUN: ContextVar[Optional[RefreshJobRun]] = ContextVar(
+    'current_refresh_job_run',
+    default=None
+)
+
+
+def get_current_refresh_job_run() -> Optional[RefreshJobRun]:
+    # the loaders do not need to know whether a run is being recorded
+    return _CURRENT_REFRESH_JOB_RUN.get()
+
+
+def add_rows_loaded(row_count: int) -> None:
+    refresh_job_run = get_current_refresh_job_run()
+    if refresh_job_run is not None:
+        refresh_job_run.rows_loaded += row_count
+
+
+def add_bytes_processed(byte_count: int) -> None:
+    refresh_job_run = get_current_refresh_job_run()
+    if refresh_job_run is not None:
+        refresh_job_run.bytes_processed += byte_count
+
+
+def add_redis_commands(command_count: int, duration_seconds: float) -> None:
+    refresh_job_run = get_current_refresh_job_run()
+    if refresh_job_run is not None:
+        refresh_job_run.redis_command_count += command_count
+        refresh_job_run.add_stage_duration(RefreshJobStageNames.REDIS, duration_seconds)
+
+
+@contextmanager
+def measure_refresh_job_stage(stage_name: str) -> Iterator[None]:
+    # the durations of a stage are added up, e.g. for each prune
+    start_time = time.perf_counter()
+    try:
+        yield
+    finally:
+        refresh_job_run = get_current_refresh_job_run()
+        if refresh_job_run is not None:
+            refresh_job_run.add_stage_duration(stage_name, time.perf_counter() - start_time)
+
+
+def iter_measuring_refresh_job_stage(items: Iterable[T], stage_name: str) -> Iterable[T]:
+    # only the time spent retrieving the next item is measured, not processing it
+    iterator = iter(items)
+    duration_seconds = 0.0
+    try:
+        while True:
+            start_time = time.perf_counter()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+            finally:
+                duration_seconds += time.perf_counter() - start_time
+            yield item
+    finally:
+        refresh_job_run = get_current_refresh_job_run()
+        if refresh_job_run is not None:
+            refresh_job_run.add_stage_duration(stage_name, duration_seconds)
+
+
+class RefreshJobPipeline(Pipeline):
+    def execute(self, raise_on_error: bool = True) -> list[Any]:
+        command_count = len(self.command_stack)
+        start_time = time.perf_counter()
+        try:
+            return super().execute(raise_on_error=raise_on_error)
+        finally:
+            add_redis_commands(command_count, time.perf_counter() - start_time)
+
+
+# pylint: disable-next=abstract-method,too-many-ancestors
+class RefreshJobRedis(Redis):
+    # counts the commands and the time waiting for Redis, while a refresh job run is recorded
+    def execute_command(self, *args, **options):
+        start_time = time.perf_counter()
+        try:
+            return super().execute_command(*args, **options)
+        finally:
+            add_redis_commands(1, time.perf_counter() - start_time)
+
+    def pipeline(self, transaction=True, shard_hint=None) -> RefreshJobPipeline:
+        return RefreshJobPipeline(
+            self.connection_pool,
+            self.response_callbacks,
+            transaction,
+            shard_hint
+        )
+
+
+def get_run_report_path() -> Optional[str]:
+    return os.getenv(REFRESH_JOB_RUN_REPORT_PATH_ENV_NAME) or None
+
+
+def write_run_report(run_report: Mapping[str, Any], run_report_path: str):
+    run_report_json = json.dumps(run_report, indent=2)
+    if run_report_path == STDOUT_RUN_REPORT_PATH:
+        print(run_report_json, file=sys.stdout)
+        return
+    with open(run_report_path, 'w', encoding='utf-8') as run_report_file:
+        run_report_file.write(run_report_json)
+    LOGGER.info('Written run report to: %r', run_report_path)
+
+
+def put_refresh_job_run(redis_client: Redis, refresh_job_run_dict: RefreshJobRunTypedDict):
+    redis_client.hset(
+        REFRESH_JOB_LAST_RUN_KEY,
+        refresh_job_run_dict['job_name'],
+        json.dumps(refresh_job_run_dict)
+    )
+
+
+@contextmanager
+def record_refresh_job_run(
+    redis_client: Redis,
+    job_name: str,
+    run_report_path: Optional[str] = None
+) -> Iterator[RefreshJobRun]:
+    # the last run is stored in Redis, for the API to export it (the jobs are separate processes),
+    # an empty run report path disables the run report (e.g. when part of a combined report)
+    if run_report_path is None:
+        run_report_path = get_run_report_path()
+    refresh_job_run = RefreshJobRun(job_name)
+    token = _CURRENT_REFRESH_JOB_RUN.set(refresh_job_run)
+    succeeded = False
+    try:
+        yield refresh_job_run
+        succeeded = True
+    finally:
+        _CURRENT_REFRESH_JOB_RUN.reset(token)
+        refresh_job_run_dict = refresh_job_run.to_dict(succeeded=succeeded)
+        refresh_job_run.completed_run_dict = refresh_job_run_dict
+        LOGGER.info('Refresh job run: %r', refresh_job_run_dict)
+        if run_report_path:
+            write_run_report(refresh_job_run_dict, run_report_path)
+        put_refresh_job_run(redis_client, refresh_job_run_dict)
+
+
+async def get_last_refresh_job_runs(
+    async_redis_client: AsyncRedis
+) -> list[RefreshJobRunTypedDict]:
+    refresh_job_run_json_by_job_name: dict[bytes, bytes] = (
+        await async_redis_client.hgetall(REFRESH_JOB_LAST_RUN_KEY)  # type: ignore[misc]
+    )
+    return [
+        json.loads(refresh_job_run_json)
+        for refresh_job_run_json in refresh_job_run_json_by_job_name.values()
+    ]
@@ -0,0 +1,42 @@
+import logging
+
+from redis import Redis
+from redis.asyncio import Redis as AsyncRedis
+
+LOGGER = logging.getLogger(__name__)
+
+
+# set of the names of the completed storage migrations,
+# the API keeps reading the previous layout until the migration to a new layout has completed
+COMPLETED_STORAGE_MIGRATIONS_KEY = 'storage_migrations:completed'
+
+# the daily values were copied from the hashes to the compact layout (see compact_daily_values),
+# the daily refresh and the API use the compact layout from then on
+COMPACT_DAILY_VALUES_MIGRATION_NAME = 'compact_daily_values'
+
+# the monthly values stored as a hash per metric were packed (see packed_metric_values),
+# by the monthly refresh
+PACKED_MONTHLY_VALUES_MIGRATION_NAME = 'packed_monthly_values'
+
+
+def get_period_index_backfill_migration_name(period_suffix: str) -> str:
+    # the periods loaded before the period index was introduced were added to it
+    return f'period_index_backfill:{period_suffix}'
+
+
+def is_storage_migration_completed(redis_client: Redis, migration_name: str) -> bool:
+    return bool(redis_client.sismember(COMPLETED_STORAGE_MIGRATIONS_KEY, migration_name))
+
+
+def set_storage_migration_completed(redis_client: Redis, migration_name: str) -> None:
+    redis_client.sadd(COMPLETED_STORAGE_MIGRATIONS_KEY, migration_name)
+    LOGGER.info('Completed storage migration: %r', migration_name)
+
+
+async def get_completed_storage_migration_names(async_redis_client: AsyncRedis) -> frozenset[str]:
+    return frozenset(
+        migration_name.decode('utf-8')
+        for migration_name in await async_redis_client.smembers(  # type: ignore[misc]
+            COMPLETED_STORAGE_MIGRATIONS_KEY
+        )
+    )
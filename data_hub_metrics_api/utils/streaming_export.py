@@ -0,0 +1,50 @@
+import csv
+import io
+from typing import Any, AsyncIterable, AsyncIterator, Iterable, Literal, Mapping, Sequence
+
+import orjson
+
+
+ExportFormatLiteral = Literal['ndjson', 'csv']
+
+MEDIA_TYPE_BY_EXPORT_FORMAT: Mapping[ExportFormatLiteral, str] = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv; charset=utf-8'
+}
+
+
+def get_ndjson_bytes(row_json_list: Iterable[bytes]) -> bytes:
+    # the rows are already encoded (as JSON without line breaks)
+    return b''.join(row_json + b'\n' for row_json in row_json_list)
+
+
+def get_csv_bytes(
+    rows: Iterable[Mapping[str, Any]],
+    field_names: Sequence[str],
+    include_header: bool = False
+) -> bytes:
+    text_buffer = io.StringIO()
+    writer = csv.DictWriter(text_buffer, fieldnames=field_names)
+    if include_header:
+        writer.writeheader()
+    writer.writerows(rows)
+    return text_buffer.getvalue().encode('utf-8')
+
+
+async def iter_export_chunks(
+    row_json_batches: AsyncIterable[Sequence[bytes]],
+    export_format: ExportFormatLiteral,
+    field_names: Sequence[str]
+) -> AsyncIterator[bytes]:
+    # one chunk per batch of rows, i.e. only one batch is held in memory at a time,
+    # the rows are only decoded for the CSV
+    if export_format == 'csv':
+        yield get_csv_bytes([], field_names, include_header=True)
+    async for row_json_list in row_json_batches:
+        if export_format == 'csv':
+            yield get_csv_bytes(
+                [orjson.loads(row_json) for row_json in row_json_list],
+                field_names
+            )
+        else:
+            yield get_ndjson_bytes(row_json_list)
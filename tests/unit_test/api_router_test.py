@@ -1,12 +1,15 @@
-from typing import Sequence
-from unittest.mock import MagicMock
+import csv
+import io
+import json
+from typing import Any, AsyncIterator, Sequence, TypeVar
+from unittest.mock import AsyncMock, MagicMock
 from fastapi import FastAPI
 from fastapi.testclient import TestClient
 import pytest
 import redis
 import redis.exceptions
 
-from data_hub_metrics_api.api_router import create_api_router
+from data_hub_metrics_api.api_router import FastJsonResponse, create_api_router
 from data_hub_metrics_api.api_router_typing import (
     MetricSummaryResponseTypedDict,
     MetricTimePeriodResponseTypedDict
@@ -15,6 +18,10 @@ from data_hub_metrics_api.citations_provider import CitationsProvider
 from data_hub_metrics_api.page_views_and_downloads_provider import PageViewsAndDownloadsProvider
 from data_hub_metrics_api.metric_summary_provider import MetricSummaryProvider
 from data_hub_metrics_api.non_article_page_views_provider import NonArticlePageViewsProvider
+from data_hub_metrics_api.utils.cursors import get_cursor_for_article_id
+
+
+T = TypeVar('T')
 
 
 METRIC_TIME_PERIOD_RESPONSE_DICT_1: MetricTimePeriodResponseTypedDict = {
@@ -36,6 +43,22 @@ METRIC_SUMMARY_RESPONSE_DICT_1: MetricSummaryResponseTypedDict = {
 }
 
 
+LEGACY_DAILY_PAGE_VIEWS_HASH = {b'2023-10-01': b'5', b'2023-10-02': b'10', b'2023-10-03': b'15'}
+
+GENERATION_BY_NAME = {
+    'totals': '20240101T010000000000',
+    'periods': '20240102T020000000000',
+    'citations': '20240103T030000000000',
+    'summaries': '20240104T040000000000',
+    'non_article_page_views': '20240105T050000000000'
+}
+
+
+async def iter_async(items: Sequence[T]) -> AsyncIterator[T]:
+    for item in items:
+        yield item
+
+
 @pytest.fixture(name='citations_provider_mock')
 def _citations_provider_mock() -> MagicMock:
     return MagicMock(nam='citations_provider_mock', spec=CitationsProvider)
@@ -62,40 +85,51 @@ def _non_article_page_views_provider_mock() -> MagicMock:
     )
 
 
-def create_test_client(
-    redis_client: MagicMock,
-    citations_provider_list: Sequence[CitationsProvider],
-    page_views_and_downloads_provider: PageViewsAndDownloadsProvider,
-    metric_summary_provider: MetricSummaryProvider,
-    non_article_page_views_provider: NonArticlePageViewsProvider
-) -> TestClient:
+@pytest.fixture(name='keyspace_generations_mock')
+def _keyspace_generations_mock(keyspace_generations_mock: MagicMock) -> MagicMock:
+    keyspace_generations_mock.get_generation.side_effect = GENERATION_BY_NAME.get
+    return keyspace_generations_mock
+
+
+def create_test_client(**api_router_kwargs: Any) -> TestClient:
     app = FastAPI()
-    app.include_router(create_api_router(
-        redis_client=redis_client,
-        citations_provider_list=citations_provider_list,
-        page_views_and_downloads_provider=page_views_and_downloads_provider,
-        metric_summary_provider=metric_summary_provider,
-        non_article_page_views_provider=non_article_page_views_provider
-    ))
+    app.include_router(create_api_router(**api_router_kwargs))
     client = TestClient(app)
     return client
 
 
-@pytest.fixture(name='test_client')
-def _test_client(
-    redis_client_mock: MagicMock,
+@pytest.fixture(name='provider_kwargs')
+def _provider_kwargs(
+    async_redis_client_mock: AsyncMock,
     citations_provider_mock: MagicMock,
     page_views_and_downloads_provider_mock: MagicMock,
     metric_summary_provider_mock: MagicMock,
     non_article_page_views_provider_mock: MagicMock
+) -> dict[str, Any]:
+    return {
+        'async_redis_client': async_redis_client_mock,
+        'citations_provider_list': [citations_provider_mock],
+        'page_views_and_downloads_provider': page_views_and_downloads_provider_mock,
+        'metric_summary_provider': metric_summary_provider_mock,
+        'non_article_page_views_provider': non_article_page_views_provider_mock
+    }
+
+
+@pytest.fixture(name='test_client')
+def _test_client(
+    provider_kwargs: dict[str, Any],
+    keyspace_generations_mock: MagicMock
 ) -> TestClient:
-    return create_test_client(
-        redis_client=redis_client_mock,
-        citations_provider_list=[citations_provider_mock],
-        page_views_and_downloads_provider=page_views_and_downloads_provider_mock,
-        metric_summary_provider=metric_summary_provider_mock,
-        non_article_page_views_provider=non_article_page_views_provider_mock
-    )
+    return create_test_client(**provider_kwargs, keyspace_generations=keyspace_generations_mock)
+
+
+class TestFastJsonResponse:
+    def test_should_serialize_bytes_as_string(self):
+        assert FastJsonResponse({'period': b'2023-10'}).body == b'{"period":"2023-10"}'
+
+    def test_should_reject_other_unsupported_types(self):
+        with pytest.raises(TypeError):
+            FastJsonResponse({'value': object()})
 
 
 class TestProvideCitations:
@@ -165,6 +199,33 @@ class TestProvideCitations:
         expected_content_type = 'application/vnd.elife.metric-citations+json; version=1'
         assert response_headers['Content-Type'] == expected_content_type
 
+    def test_should_flag_failing_provider_as_unavailable_and_not_cache_response(
+        self,
+        test_client: TestClient,
+        citations_provider_mock: MagicMock
+    ):
+        citations_provider_mock.name = 'Crossref'
+        citations_provider_mock.get_degraded_citations_source_metric.side_effect = (
+            lambda: CitationsProvider.get_degraded_citations_source_metric(
+                citations_provider_mock
+            )
+        )
+        (
+            citations_provider_mock
+            .get_combined_citations_source_metric_for_article_id
+            .side_effect
+        ) = RuntimeError('failed')
+        response = test_client.get('/metrics/article/85111/citations')
+        response.raise_for_status()
+        assert response.json() == [{
+            'service': 'Crossref',
+            'uri': '',
+            'citations': 0,
+            'unavailable': True
+        }]
+        assert response.headers['Cache-Control'] == 'no-store'
+        assert 'ETag' not in response.headers
+
 
 class TestProvidePageViewsAndDownloads:
     def test_should_return_downloads_by_article_id_and_time_period(
@@ -219,6 +280,40 @@ class TestProvidePageViewsAndDownloads:
         actual_response_json = response.json()
         assert actual_response_json == METRIC_TIME_PERIOD_RESPONSE_DICT_1
 
+    def test_should_return_periods_of_legacy_hash_read_by_provider(
+        self,
+        provider_kwargs: dict[str, Any],
+        keyspace_generations_mock: MagicMock,
+        redis_client_mock: MagicMock,
+        async_redis_client_mock: AsyncMock,
+        async_redis_client_pipeline_mock: MagicMock
+    ):
+        # the daily values loaded before the period index, as returned by Redis
+        async_redis_client_mock.smembers.return_value = set()
+        async_redis_client_mock.hgetall.return_value = LEGACY_DAILY_PAGE_VIEWS_HASH
+        # the period index is empty, the total of 30 is packed with the count of 3 periods
+        async_redis_client_pipeline_mock.execute.return_value = [0, [], b'30:3']
+        async_redis_client_mock.get.return_value = b'30:3'
+        test_client = create_test_client(**{
+            **provider_kwargs,
+            'page_views_and_downloads_provider': PageViewsAndDownloadsProvider(
+                redis_client_mock,
+                async_redis_client=async_redis_client_mock,
+                keyspace_generations=keyspace_generations_mock
+            ),
+            'keyspace_generations': keyspace_generations_mock
+        })
+        response = test_client.get('/metrics/article/12345/page-views?per-page=2')
+        response.raise_for_status()
+        assert response.json() == {
+            'totalPeriods': 3,
+            'totalValue': 30,
+            'periods': [
+                {'period': '2023-10-03', 'value': 15},
+                {'period': '2023-10-02', 'value': 10}
+            ]
+        }
+
 
 class TestProvideSummary:
     def test_should_return_summary_for_article_id(
@@ -254,6 +349,228 @@ class TestProvideSummary:
         actual_response_json = response.json()
         assert actual_response_json == METRIC_SUMMARY_RESPONSE_DICT_1
 
+    def test_should_return_summary_for_first_page_cursor(
+        self,
+        test_client: TestClient,
+        metric_summary_provider_mock: MagicMock
+    ):
+        (
+            metric_summary_provider_mock
+            .get_summary_for_all_articles_after_article_id
+            .return_value
+        ) = {**METRIC_SUMMARY_RESPONSE_DICT_1, 'next': 'next-cursor'}
+        response = test_client.get('/metrics/article/summary?cursor=*&per-page=10')
+        response.raise_for_status()
+        (
+            metric_summary_provider_mock
+            .get_summary_for_all_articles_after_article_id
+            .assert_called_once_with(after_article_id=None, per_page=10)
+        )
+        metric_summary_provider_mock.get_summary_for_all_articles.assert_not_called()
+        assert response.json()['next'] == 'next-cursor'
+
+    def test_should_return_summary_after_article_id_of_cursor(
+        self,
+        test_client: TestClient,
+        metric_summary_provider_mock: MagicMock
+    ):
+        (
+            metric_summary_provider_mock
+            .get_summary_for_all_articles_after_article_id
+            .return_value
+        ) = {**METRIC_SUMMARY_RESPONSE_DICT_1, 'next': None}
+        response = test_client.get(
+            '/metrics/article/summary',
+            params={'cursor': get_cursor_for_article_id('12345')}
+        )
+        response.raise_for_status()
+        (
+            metric_summary_provider_mock
+            .get_summary_for_all_articles_after_article_id
+            .assert_called_once_with(after_article_id='12345', per_page=20)
+        )
+        assert response.json()['next'] is None
+
+    def test_should_reject_invalid_cursor(
+        self,
+        test_client: TestClient,
+        metric_summary_provider_mock: MagicMock
+    ):
+        response = test_client.get('/metrics/article/summary?cursor=invalid')
+        assert response.status_code == 422
+        (
+            metric_summary_provider_mock
+            .get_summary_for_all_articles_after_article_id
+            .assert_not_called()
+        )
+
+    def test_should_return_summary_for_all_articles_by_order(
+        self,
+        test_client: TestClient,
+        metric_summary_provider_mock: MagicMock
+    ):
+        metric_summary_provider_mock.get_summary_for_all_articles_by_order.return_value = (
+            METRIC_SUMMARY_RESPONSE_DICT_1
+        )
+        response = test_client.get('/metrics/article/summary?order=crossref&desc=true&per-page=10')
+        response.raise_for_status()
+        metric_summary_provider_mock.get_summary_for_all_articles_by_order.assert_called_once_with(
+            order='crossref',
+            descending=True,
+            per_page=10,
+            page=1
+        )
+        metric_summary_provider_mock.get_summary_for_all_articles.assert_not_called()
+        assert response.json() == METRIC_SUMMARY_RESPONSE_DICT_1
+
+    def test_should_reject_invalid_order(
+        self,
+        test_client: TestClient,
+        metric_summary_provider_mock: MagicMock
+    ):
+        response = test_client.get('/metrics/article/summary?order=pubmed')
+        assert response.status_code == 422
+        metric_summary_provider_mock.get_summary_for_all_articles_by_order.assert_not_called()
+
+    def test_should_reject_cursor_combined_with_order(
+        self,
+        test_client: TestClient,
+        metric_summary_provider_mock: MagicMock
+    ):
+        response = test_client.get('/metrics/article/summary?order=views&cursor=*')
+        assert response.status_code == 422
+        metric_summary_provider_mock.get_summary_for_all_articles_by_order.assert_not_called()
+
+    def test_should_reject_descending_without_order(
+        self,
+        test_client: TestClient,
+        metric_summary_provider_mock: MagicMock
+    ):
+        response = test_client.get('/metrics/article/summary?desc=true')
+        assert response.status_code == 422
+        metric_summary_provider_mock.get_summary_for_all_articles.assert_not_called()
+
+    def test_should_return_service_unavailable_for_order_until_summaries_were_refreshed(
+        self,
+        test_client: TestClient,
+        metric_summary_provider_mock: MagicMock
+    ):
+        metric_summary_provider_mock.is_summary_order_available.return_value = False
+        response = test_client.get('/metrics/article/summary?order=views')
+        assert response.status_code == 503
+        metric_summary_provider_mock.get_summary_for_all_articles_by_order.assert_not_called()
+
+    def test_should_return_summary_for_article_ids_in_query(
+        self,
+        test_client: TestClient,
+        metric_summary_provider_mock: MagicMock
+    ):
+        metric_summary_provider_mock.get_summary_for_article_ids.return_value = (
+            METRIC_SUMMARY_RESPONSE_DICT_1
+        )
+        response = test_client.get('/metrics/article/summary?ids=12345,12346&ids=12347')
+        response.raise_for_status()
+        metric_summary_provider_mock.get_summary_for_article_ids.assert_called_once_with(
+            article_ids=['12345', '12346', '12347']
+        )
+        metric_summary_provider_mock.get_summary_for_all_articles.assert_not_called()
+        assert response.json() == METRIC_SUMMARY_RESPONSE_DICT_1
+
+    def test_should_return_summary_for_article_ids_in_request_body(
+        self,
+        test_client: TestClient,
+        metric_summary_provider_mock: MagicMock
+    ):
+        metric_summary_provider_mock.get_summary_for_article_ids.return_value = (
+            METRIC_SUMMARY_RESPONSE_DICT_1
+        )
+        response = test_client.post('/metrics/article/summary', json={'ids': ['12346', '12345']})
+        response.raise_for_status()
+        metric_summary_provider_mock.get_summary_for_article_ids.assert_called_once_with(
+            article_ids=['12346', '12345']
+        )
+        assert response.json() == METRIC_SUMMARY_RESPONSE_DICT_1
+
+    def test_should_reject_more_article_ids_than_configured_limit(
+        self,
+        provider_kwargs: dict[str, Any],
+        keyspace_generations_mock: MagicMock,
+        metric_summary_provider_mock: MagicMock
+    ):
+        test_client = create_test_client(
+            **provider_kwargs,
+            keyspace_generations=keyspace_generations_mock,
+            max_summary_article_ids=2
+        )
+        response = test_client.get('/metrics/article/summary?ids=1,2,3')
+        assert response.status_code == 422
+        metric_summary_provider_mock.get_summary_for_article_ids.assert_not_called()
+
+    def test_should_reject_invalid_article_ids(
+        self,
+        test_client: TestClient,
+        metric_summary_provider_mock: MagicMock
+    ):
+        response = test_client.get('/metrics/article/summary?ids=12345,abc')
+        assert response.status_code == 422
+        metric_summary_provider_mock.get_summary_for_article_ids.assert_not_called()
+
+
+class TestProvideExport:
+    def test_should_stream_summary_items_as_ndjson(
+        self,
+        test_client: TestClient,
+        metric_summary_provider_mock: MagicMock
+    ):
+        (
+            metric_summary_provider_mock
+            .iter_summary_item_json_batches_for_all_articles
+            .side_effect
+        ) = lambda: iter_async([[
+            json.dumps(summary_item).encode('utf-8')
+            for summary_item in METRIC_SUMMARY_RESPONSE_DICT_1['items']
+        ]])
+        response = test_client.get('/metrics/article/export')
+        response.raise_for_status()
+        assert response.headers['content-type'] == 'application/x-ndjson'
+        assert response.headers['cache-control'] == 'no-store'
+        assert 'etag' not in response.headers
+        assert [json.loads(line) for line in response.text.splitlines()] == (
+            METRIC_SUMMARY_RESPONSE_DICT_1['items']
+        )
+
+    def test_should_stream_summary_items_as_csv(
+        self,
+        test_client: TestClient,
+        metric_summary_provider_mock: MagicMock
+    ):
+        (
+            metric_summary_provider_mock
+            .iter_summary_item_json_batches_for_all_articles
+            .side_effect
+        ) = lambda: iter_async([[
+            json.dumps(summary_item).encode('utf-8')
+            for summary_item in METRIC_SUMMARY_RESPONSE_DICT_1['items']
+        ]])
+        response = test_client.get('/metrics/article/export', params={'format': 'csv'})
+        response.raise_for_status()
+        assert response.headers['content-type'] == 'text/csv; charset=utf-8'
+        assert list(csv.DictReader(io.StringIO(response.text))) == [{
+            'id': '12345',
+            'views': '0',
+            'downloads': '0',
+            'crossref': '0',
+            'pubmed': '0',
+            'scopus': '0'
+        }]
+
+    def test_should_reject_unknown_export_format(
+        self,
+        test_client: TestClient
+    ):
+        response = test_client.get('/metrics/article/export', params={'format': 'xml'})
+        assert response.status_code == 422
+
 
 class TestProvidePageViewsByContentType:
     def test_should_return_page_views_by_content_type(
@@ -283,13 +600,168 @@ class TestProvidePageViewsByContentType:
         assert actual_response_json == METRIC_TIME_PERIOD_RESPONSE_DICT_1
 
 
+class TestConditionalRequests:
+    def test_should_return_etag_last_modified_and_cache_control(
+        self,
+        test_client: TestClient,
+        page_views_and_downloads_provider_mock: MagicMock
+    ):
+        (
+            page_views_and_downloads_provider_mock
+            .get_metric_for_article_id_by_time_period
+            .return_value
+        ) = METRIC_TIME_PERIOD_RESPONSE_DICT_1
+        response = test_client.get('/metrics/article/12345/page-views')
+        response.raise_for_status()
+        assert response.headers['ETag'] == (
+            f'W/"{GENERATION_BY_NAME["totals"]}.{GENERATION_BY_NAME["periods"]}"'
+        )
+        assert response.headers['Last-Modified'] == 'Tue, 02 Jan 2024 02:00:00 GMT'
+        assert response.headers['Cache-Control']
+
+    def test_should_return_not_modified_without_calling_provider_for_matching_etag(
+        self,
+        test_client: TestClient,
+        page_views_and_downloads_provider_mock: MagicMock
+    ):
+        (
+            page_views_and_downloads_provider_mock
+            .get_metric_for_article_id_by_time_period
+            .return_value
+        ) = METRIC_TIME_PERIOD_RESPONSE_DICT_1
+        etag = test_client.get('/metrics/article/12345/page-views').headers['ETag']
+        page_views_and_downloads_provider_mock.reset_mock()
+        response = test_client.get(
+            '/metrics/article/12345/page-views',
+            headers={'If-None-Match': etag}
+        )
+        assert response.status_code == 304
+        assert response.content == b''
+        assert response.headers['ETag'] == etag
+        assert response.headers['Cache-Control']
+        (
+            page_views_and_downloads_provider_mock
+            .get_metric_for_article_id_by_time_period
+            .assert_not_called()
+        )
+
+    def test_should_return_not_modified_if_not_modified_since_last_modified(
+        self,
+        test_client: TestClient,
+        metric_summary_provider_mock: MagicMock
+    ):
+        response = test_client.get(
+            '/metrics/article/12345/summary',
+            headers={'If-Modified-Since': 'Thu, 04 Jan 2024 04:00:00 GMT'}
+        )
+        assert response.status_code == 304
+        metric_summary_provider_mock.get_summary_for_article_id.assert_not_called()
+
+    def test_should_return_full_response_if_modified_since(
+        self,
+        test_client: TestClient,
+        metric_summary_provider_mock: MagicMock
+    ):
+        metric_summary_provider_mock.get_summary_for_article_id.return_value = (
+            METRIC_SUMMARY_RESPONSE_DICT_1
+        )
+        response = test_client.get(
+            '/metrics/article/12345/summary',
+            headers={'If-Modified-Since': 'Wed, 03 Jan 2024 03:00:00 GMT'}
+        )
+        assert response.status_code == 200
+        assert response.headers['Last-Modified'] == 'Thu, 04 Jan 2024 04:00:00 GMT'
+
+    def test_should_change_etag_when_a_read_generation_changes(
+        self,
+        test_client: TestClient,
+        keyspace_generations_mock: MagicMock,
+        citations_provider_mock: MagicMock
+    ):
+        citations_provider_mock.get_combined_citations_source_metric_for_article_id.return_value = {
+            'service': 'Crossref',
+            'uri': '',
+            'citations': 0
+        }
+        etag = test_client.get('/metrics/article/12345/citations').headers['ETag']
+        keyspace_generations_mock.get_generation.side_effect = {
+            **GENERATION_BY_NAME,
+            'citations': '20240201T000000000000'
+        }.get
+        response = test_client.get(
+            '/metrics/article/12345/citations',
+            headers={'If-None-Match': etag}
+        )
+        assert response.status_code == 200
+        assert response.headers['ETag'] != etag
+
+    def test_should_return_full_response_for_different_etag(
+        self,
+        test_client: TestClient,
+        page_views_and_downloads_provider_mock: MagicMock
+    ):
+        (
+            page_views_and_downloads_provider_mock
+            .get_metric_for_article_id_by_time_period
+            .return_value
+        ) = METRIC_TIME_PERIOD_RESPONSE_DICT_1
+        response = test_client.get(
+            '/metrics/article/12345/page-views',
+            headers={'If-None-Match': '"other"'}
+        )
+        assert response.status_code == 200
+        assert response.json() == METRIC_TIME_PERIOD_RESPONSE_DICT_1
+
+    def test_should_not_add_etag_without_generation(
+        self,
+        test_client: TestClient,
+        keyspace_generations_mock: MagicMock,
+        non_article_page_views_provider_mock: MagicMock
+    ):
+        keyspace_generations_mock.get_generation.side_effect = None
+        keyspace_generations_mock.get_generation.return_value = None
+        (
+            non_article_page_views_provider_mock
+            .get_page_views_by_content_type
+            .return_value
+        ) = METRIC_TIME_PERIOD_RESPONSE_DICT_1
+        response = test_client.get('/metrics/blog-article/12345abc/page-views')
+        response.raise_for_status()
+        assert 'ETag' not in response.headers
+        assert 'Cache-Control' not in response.headers
+
+    def test_should_not_add_etag_to_ping(
+        self,
+        test_client: TestClient,
+        async_redis_client_mock: AsyncMock
+    ):
+        async_redis_client_mock.ping.return_value = True
+        response = test_client.get('/ping/metrics')
+        assert 'ETag' not in response.headers
+        assert response.headers['Cache-Control'] == 'no-store'
+
+
+class TestProvidePrometheusMetrics:
+    def test_should_return_prometheus_exposition(
+        self,
+        test_client: TestClient,
+        async_redis_client_mock: AsyncMock
+    ):
+        async_redis_client_mock.hgetall.return_value = {}
+        response = test_client.get('/metrics/internal/prometheus')
+        response.raise_for_status()
+        assert response.headers['Content-Type'].startswith('text/plain')
+        assert 'data_hub_metrics_api_request_duration_seconds' in response.text
+        assert 'ETag' not in response.headers
+
+
 class TestPingPong:
     def test_should_return_pong(
         self,
         test_client: TestClient,
-        redis_client_mock: MagicMock
+        async_redis_client_mock: AsyncMock
     ):
-        redis_client_mock.ping.return_value = True
+        async_redis_client_mock.ping.return_value = True
         response = test_client.get('/ping/metrics')
         response.raise_for_status()
         actual_response_text = response.content.decode('utf-8')
@@ -298,9 +770,9 @@ class TestPingPong:
     def test_should_return_no_pong_available_if_redis_ping_returns_false(
         self,
         test_client: TestClient,
-        redis_client_mock: MagicMock
+        async_redis_client_mock: AsyncMock
     ):
-        redis_client_mock.ping.return_value = False
+        async_redis_client_mock.ping.return_value = False
         response = test_client.get('/ping/metrics')
         assert response.status_code == 500
         actual_response_text = response.content.decode('utf-8')
@@ -309,9 +781,9 @@ class TestPingPong:
     def test_should_return_no_pong_available_if_redis_ping_raises_error(
         self,
         test_client: TestClient,
-        redis_client_mock: MagicMock
+        async_redis_client_mock: AsyncMock
     ):
-        redis_client_mock.ping.side_effect = redis.exceptions.ConnectionError()
+        async_redis_client_mock.ping.side_effect = redis.exceptions.ConnectionError()
         response = test_client.get('/ping/metrics')
         assert response.status_code == 500
         actual_response_text = response.content.decode('utf-8')
@@ -0,0 +1,16 @@
+from data_hub_metrics_api.benchmark.command_packing_redis import CommandPackingRedis
+
+
+class TestCommandPackingRedis:
+    def test_should_count_commands_sent_directly_and_in_pipeline(self):
+        redis_client = CommandPackingRedis()
+        redis_client.set('key1', 'value1')
+        with redis_client.pipeline() as pipe:
+            pipe.mset({'key2': 'value2', 'key3': 'value3'})
+            pipe.zadd('index', {'1': 0})
+            assert pipe.execute() == [None, None]
+        assert redis_client.stats.command_count == 3
+        assert redis_client.stats.byte_count > 0
+
+    def test_should_not_return_any_keys_for_scan(self):
+        assert not list(CommandPackingRedis().scan_iter(match='gen:*'))
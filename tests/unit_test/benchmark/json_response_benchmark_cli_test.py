@@ -0,0 +1,34 @@
+from fastapi.testclient import TestClient
+
+from data_hub_metrics_api.benchmark.json_response_benchmark_cli import (
+    BENCHMARK_PATH,
+    create_benchmark_app,
+    get_fake_summary_response,
+    main
+)
+
+
+class TestGetFakeSummaryResponse:
+    def test_should_return_requested_number_of_items(self):
+        summary_response = get_fake_summary_response(3)
+        assert summary_response['total'] == 3
+        assert len(summary_response['items']) == 3
+
+
+class TestCreateBenchmarkApp:
+    def test_should_return_same_json_for_both_response_paths(self):
+        summary_response = get_fake_summary_response(3)
+        default_response = TestClient(
+            create_benchmark_app(summary_response, 'default')
+        ).get(BENCHMARK_PATH)
+        fast_response = TestClient(
+            create_benchmark_app(summary_response, 'fast')
+        ).get(BENCHMARK_PATH)
+        assert fast_response.json() == default_response.json() == summary_response
+        assert fast_response.headers['Content-Type'] == default_response.headers['Content-Type']
+
+
+class TestMain:
+    def test_should_return_cpu_seconds_for_both_response_paths(self):
+        cpu_seconds_by_response_path = main(['--number-of-items=2', '--number-of-requests=2'])
+        assert set(cpu_seconds_by_response_path.keys()) == {'default', 'fast'}
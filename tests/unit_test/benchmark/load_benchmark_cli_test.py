@@ -0,0 +1,89 @@
+import httpx
+
+from data_hub_metrics_api.benchmark.load_benchmark_cli import (
+    get_load_benchmark_comparison,
+    get_load_benchmark_result,
+    run_load_benchmark
+)
+
+
+class TestGetLoadBenchmarkResult:
+    def test_should_calculate_requests_per_second(self):
+        result = get_load_benchmark_result(
+            latencies=[0.1, 0.2, 0.3, 0.4],
+            error_count_by_name={},
+            elapsed_seconds=2.0
+        )
+        assert result['request_count'] == 4
+        assert result['requests_per_second'] == 2.0
+
+    def test_should_calculate_median_and_p95_latency_in_milliseconds(self):
+        result = get_load_benchmark_result(
+            latencies=[0.001 * value for value in range(1, 101)],
+            error_count_by_name={},
+            elapsed_seconds=1.0
+        )
+        assert round(result['median_latency_ms'], 3) == 50.5
+        assert round(result['p95_latency_ms'], 3) == 95.0
+
+    def test_should_return_zero_values_without_any_requests(self):
+        result = get_load_benchmark_result(
+            latencies=[],
+            error_count_by_name={},
+            elapsed_seconds=0.0
+        )
+        assert result['requests_per_second'] == 0.0
+        assert result['median_latency_ms'] == 0.0
+        assert result['p95_latency_ms'] == 0.0
+
+    def test_should_sum_error_counts(self):
+        result = get_load_benchmark_result(
+            latencies=[0.1, 0.2, 0.3],
+            error_count_by_name={'500': 1, 'ReadTimeout': 1},
+            elapsed_seconds=1.0
+        )
+        assert result['error_count'] == 2
+        assert result['error_count_by_name'] == {'500': 1, 'ReadTimeout': 1}
+
+
+class TestGetLoadBenchmarkComparison:
+    def test_should_calculate_ratios_relative_to_baseline(self):
+        comparison = get_load_benchmark_comparison(
+            baseline=get_load_benchmark_result(
+                latencies=[0.2, 0.2],
+                error_count_by_name={},
+                elapsed_seconds=2.0
+            ),
+            current=get_load_benchmark_result(
+                latencies=[0.1, 0.1],
+                error_count_by_name={},
+                elapsed_seconds=1.0
+            )
+        )
+        assert comparison['requests_per_second_ratio'] == 2.0
+        assert comparison['median_latency_ratio'] == 0.5
+
+
+class TestRunLoadBenchmark:
+    async def test_should_record_failed_requests_and_continue(self):
+        request_count = 0
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            nonlocal request_count
+            request_count += 1
+            if request_count == 1:
+                raise httpx.ConnectError('refused', request=request)
+            if request_count == 2:
+                return httpx.Response(500)
+            return httpx.Response(200, json={})
+
+        result = await run_load_benchmark(
+            base_url='http://test',
+            path='/metrics',
+            concurrency=1,
+            number_of_requests=4,
+            transport=httpx.MockTransport(handler)
+        )
+        assert result['request_count'] == 4
+        assert result['error_count'] == 2
+        assert result['error_count_by_name'] == {'ConnectError': 1, '500': 1}
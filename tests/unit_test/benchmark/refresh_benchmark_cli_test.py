@@ -0,0 +1,53 @@
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from data_hub_metrics_api.benchmark.fake_bigquery_result import (
+    get_fake_page_view_and_download_totals_rows
+)
+from data_hub_metrics_api.benchmark import refresh_benchmark_cli as refresh_benchmark_cli_module
+from data_hub_metrics_api.benchmark.refresh_benchmark_cli import main
+
+
+class TestGetFakePageViewAndDownloadTotalsRows:
+    def test_should_return_rows_with_unique_article_ids(self):
+        rows = get_fake_page_view_and_download_totals_rows(3)
+        assert len(rows) == 3
+        assert len({row['article_id'] for row in rows}) == 3
+        assert set(rows[0].keys()) == {'article_id', 'page_view_count', 'download_count'}
+
+
+class TestMain:
+    def test_should_load_fake_totals_into_redis_using_column_batches(
+        self,
+        redis_client_pipeline_mock: MagicMock
+    ):
+        main(['--number-of-articles=3', '--batch-size=2', '--use-record-batches'])
+        assert redis_client_pipeline_mock.mset.call_count == 2
+        assert redis_client_pipeline_mock.execute.call_count == 2
+
+    def test_should_load_fake_totals_into_redis_row_by_row(
+        self,
+        redis_client_pipeline_mock: MagicMock
+    ):
+        main(['--number-of-articles=3', '--batch-size=2', '--loader=rows'])
+        assert redis_client_pipeline_mock.set.call_count == 6
+        assert redis_client_pipeline_mock.execute.call_count == 2
+
+    def test_should_connect_to_separate_redis_db(self):
+        with patch.object(
+            refresh_benchmark_cli_module, 'get_redis_client'
+        ) as get_redis_client_mock:
+            main(['--number-of-articles=3', '--redis-db=14'])
+        get_redis_client_mock.assert_called_once_with(db=14)
+
+    def test_should_reject_redis_db_of_api(self):
+        with pytest.raises(SystemExit):
+            main(['--number-of-articles=3', '--redis-db=0'])
+
+    def test_should_only_encode_commands_without_redis(
+        self,
+        redis_client_pipeline_mock: MagicMock
+    ):
+        main(['--number-of-articles=3', '--batch-size=2', '--loader=rows', '--without-redis'])
+        redis_client_pipeline_mock.set.assert_not_called()
@@ -0,0 +1,83 @@
+import asyncio
+
+from data_hub_metrics_api.api_router_typing import CitationsSourceMetricTypedDict
+from data_hub_metrics_api.citations_provider import (
+    CitationsProvider,
+    DummyCitationsProvider,
+    get_citations_source_metrics_concurrently
+)
+
+
+def get_citations_source_metric(name: str, citations: int) -> CitationsSourceMetricTypedDict:
+    return {'service': name, 'uri': f'https://{name}', 'citations': citations}
+
+
+class SlowCitationsProvider(DummyCitationsProvider):
+    def __init__(self, name: str, delay_seconds: float):
+        super().__init__(name=name)
+        self.delay_seconds = delay_seconds
+
+    async def get_combined_citations_source_metric_for_article_id(
+        self,
+        article_id: str
+    ) -> CitationsSourceMetricTypedDict:
+        await asyncio.sleep(self.delay_seconds)
+        return get_citations_source_metric(self.name, 1)
+
+
+class FailingCitationsProvider(DummyCitationsProvider):
+    async def get_combined_citations_source_metric_for_article_id(
+        self,
+        article_id: str
+    ) -> CitationsSourceMetricTypedDict:
+        raise RuntimeError('error')
+
+
+async def get_combined_citations_source_metric(
+    citations_provider: CitationsProvider
+) -> CitationsSourceMetricTypedDict:
+    return await citations_provider.get_combined_citations_source_metric_for_article_id(
+        article_id='12345'
+    )
+
+
+class TestGetCitationsSourceMetricsConcurrently:
+    async def test_should_return_citations_in_order_of_providers(self):
+        result = await get_citations_source_metrics_concurrently(
+            [SlowCitationsProvider('source1', 0.02), SlowCitationsProvider('source2', 0)],
+            get_combined_citations_source_metric
+        )
+        assert result == [
+            get_citations_source_metric('source1', 1),
+            get_citations_source_metric('source2', 1)
+        ]
+
+    async def test_should_request_providers_concurrently(self):
+        loop = asyncio.get_running_loop()
+        start_time = loop.time()
+        await get_citations_source_metrics_concurrently(
+            [SlowCitationsProvider(f'source{index}', 0.1) for index in range(5)],
+            get_combined_citations_source_metric
+        )
+        assert loop.time() - start_time < 0.4
+
+    async def test_should_return_degraded_citations_for_provider_timing_out(self):
+        result = await get_citations_source_metrics_concurrently(
+            [SlowCitationsProvider('slow', 10), SlowCitationsProvider('fast', 0)],
+            get_combined_citations_source_metric,
+            timeout_seconds=0.01
+        )
+        assert result == [
+            {'service': 'slow', 'uri': '', 'citations': 0, 'unavailable': True},
+            get_citations_source_metric('fast', 1)
+        ]
+
+    async def test_should_return_degraded_citations_for_failing_provider(self):
+        result = await get_citations_source_metrics_concurrently(
+            [FailingCitationsProvider('failing'), SlowCitationsProvider('fast', 0)],
+            get_combined_citations_source_metric
+        )
+        assert result == [
+            {'service': 'failing', 'uri': '', 'citations': 0, 'unavailable': True},
+            get_citations_source_metric('fast', 1)
+        ]
@@ -1,11 +1,12 @@
 import logging
 from typing import Iterator
-from unittest.mock import MagicMock, patch
+from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
 
 from data_hub_metrics_api import main as main_module
 from data_hub_metrics_api.utils import bigquery as bigquery_module
+from data_hub_metrics_api.utils.keyspace_generations import KeyspaceGenerations
 
 
 @pytest.fixture(scope='session', autouse=True)
@@ -37,9 +38,18 @@ def iter_dict_from_bq_query_with_progress_mock() -> Iterator[MagicMock]:
         yield mock
 
 
+@pytest.fixture(autouse=True)
+def iter_column_batch_from_bq_query_with_progress_mock() -> Iterator[MagicMock]:
+    with patch.object(
+        bigquery_module,
+        'iter_column_batch_from_bq_query_with_progress'
+    ) as mock:
+        yield mock
+
+
 @pytest.fixture(name='redis_client_mock', autouse=True)
 def _redis_client_mock() -> Iterator[MagicMock]:
-    with patch.object(main_module, 'Redis') as mock:
+    with patch.object(main_module, 'RefreshJobRedis') as mock:
         yield mock.return_value
 
 
@@ -51,3 +61,35 @@ def _redis_client_pipeline_mock(redis_client_mock: MagicMock) -> MagicMock:
 @pytest.fixture(name='redis_client_set_mock')
 def _redis_client_set_mock(redis_client_mock: MagicMock) -> MagicMock:
     return redis_client_mock.set
+
+
+@pytest.fixture(name='async_redis_client_mock', autouse=True)
+def _async_redis_client_mock() -> Iterator[AsyncMock]:
+    with patch.object(main_module, 'InstrumentedAsyncRedis') as mock:
+        async_redis_client_mock = AsyncMock(name='async_redis_client_mock')
+        # creating a pipeline is not a coroutine, only entering and executing it is
+        async_redis_client_mock.pipeline = MagicMock(name='async_redis_client_pipeline')
+        # the connection pool is not async either
+        async_redis_client_mock.connection_pool = MagicMock(name='async_redis_connection_pool')
+        mock.return_value = async_redis_client_mock
+        yield async_redis_client_mock
+
+
+@pytest.fixture(name='async_redis_client_pipeline_mock')
+def _async_redis_client_pipeline_mock(async_redis_client_mock: AsyncMock) -> MagicMock:
+    pipeline_mock = MagicMock(name='async_redis_client_pipeline_mock')
+    pipeline_mock.execute = AsyncMock(name='async_redis_client_pipeline_mock.execute')
+    async_redis_client_mock.pipeline.return_value.__aenter__.return_value = pipeline_mock
+    return pipeline_mock
+
+
+@pytest.fixture(name='keyspace_generations_mock')
+def _keyspace_generations_mock() -> MagicMock:
+    keyspace_generations_mock = MagicMock(
+        name='keyspace_generations_mock',
+        spec=KeyspaceGenerations
+    )
+    # the legacy keys without a generation prefix
+    keyspace_generations_mock.get_generation.return_value = None
+    keyspace_generations_mock.get_key_prefix.return_value = ''
+    return keyspace_generations_mock
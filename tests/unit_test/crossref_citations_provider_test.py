@@ -1,17 +1,46 @@
-from typing import Iterable
-from unittest.mock import MagicMock
+from typing import Iterator
+from unittest.mock import AsyncMock, MagicMock, call, patch
 
+import pytest
+
+from data_hub_metrics_api import crossref_citations_provider as crossref_citations_provider_module
 from data_hub_metrics_api.crossref_citations_provider import (
-    BigQueryResultRow,
-    CrossrefCitationsProvider
+    CrossrefCitationsProvider,
+    get_citations_by_version_by_key
 )
 
 
+@pytest.fixture(name='create_generation_mock', autouse=True)
+def _create_generation_mock() -> Iterator[MagicMock]:
+    with patch.object(crossref_citations_provider_module, 'create_generation') as mock:
+        mock.return_value = 'generation1'
+        yield mock
+
+
+@pytest.fixture(name='crossref_citations_provider')
+def _crossref_citations_provider(
+    redis_client_mock: MagicMock,
+    async_redis_client_mock: AsyncMock,
+    keyspace_generations_mock: MagicMock
+) -> CrossrefCitationsProvider:
+    return CrossrefCitationsProvider(
+        redis_client=redis_client_mock,
+        async_redis_client=async_redis_client_mock,
+        keyspace_generations=keyspace_generations_mock
+    )
+
+
 class TestCrossrefCitationsProvider:
-    def test_happy_path(self, redis_client_mock: MagicMock):
-        redis_client_mock.hget.return_value = b'0'
-        citation_provider = CrossrefCitationsProvider(redis_client=redis_client_mock)
-        result = citation_provider.get_citations_source_metric_for_article_id_and_version('1234', 1)
+    async def test_happy_path(
+        self,
+        crossref_citations_provider: CrossrefCitationsProvider,
+        async_redis_client_mock: AsyncMock
+    ):
+        async_redis_client_mock.hget.return_value = b'0'
+        result = (
+            await crossref_citations_provider
+            .get_citations_source_metric_for_article_id_and_version('1234', 1)
+        )
         assert result == {
             'service': 'Crossref',
             'uri': 'https://doi.org/10.7554/eLife.1234.1',
@@ -20,34 +49,77 @@ class TestCrossrefCitationsProvider:
 
     def test_should_put_data_in_redis(
         self,
-        iter_dict_from_bq_query_with_progress_mock: MagicMock,
+        iter_column_batch_from_bq_query_with_progress_mock: MagicMock,
         redis_client_pipeline_mock: MagicMock,
-        redis_client_mock: MagicMock
+        redis_client_mock: MagicMock,
+        async_redis_client_mock: AsyncMock
     ):
-        bq_result: Iterable[BigQueryResultRow] = [
-            {'article_id': '12345', 'version_number': '1', 'citation_count': 10},
-        ]
-        iter_dict_from_bq_query_with_progress_mock.return_value = bq_result
-        citation_provider = CrossrefCitationsProvider(redis_client=redis_client_mock)
+        iter_column_batch_from_bq_query_with_progress_mock.return_value = [{
+            'article_id': ['12345'],
+            'version_number': ['1'],
+            'citation_count': [10]
+        }]
+        citation_provider = CrossrefCitationsProvider(
+            redis_client=redis_client_mock,
+            async_redis_client=async_redis_client_mock
+        )
         citation_provider.refresh_data()
         print('Redis pipeline mock in test: %r', redis_client_pipeline_mock)
         redis_client_pipeline_mock.hset.assert_called_once_with(
-            'article:12345:crossref_citations',
-            '1',
-            10
+            'gen:generation1:article:12345:crossref_citations',
+            mapping={'1': 10}
+        )
+        redis_client_pipeline_mock.execute.assert_called_once()
+        redis_client_mock.set.assert_called_once_with(
+            'generation:citations',
+            'generation1',
+            get=True
+        )
+
+    def test_should_unlink_keys_of_new_generation_if_refresh_fails_partway(
+        self,
+        iter_column_batch_from_bq_query_with_progress_mock: MagicMock,
+        redis_client_pipeline_mock: MagicMock,
+        redis_client_mock: MagicMock,
+        crossref_citations_provider: CrossrefCitationsProvider
+    ):
+        def iter_column_batches_failing_after_first_batch():
+            yield {
+                'article_id': ['12345'],
+                'version_number': ['1'],
+                'citation_count': [10]
+            }
+            raise RuntimeError('BigQuery failed')
+
+        iter_column_batch_from_bq_query_with_progress_mock.return_value = (
+            iter_column_batches_failing_after_first_batch()
         )
+        redis_client_mock.scan_iter.return_value = iter([
+            b'gen:generation1:article:12345:crossref_citations'
+        ])
+        with pytest.raises(RuntimeError):
+            crossref_citations_provider.refresh_data()
         redis_client_pipeline_mock.execute.assert_called_once()
+        redis_client_mock.scan_iter.assert_called_once_with(
+            match='gen:generation1:article:*:crossref_citations',
+            count=1000
+        )
+        redis_client_mock.unlink.assert_called_once_with(
+            b'gen:generation1:article:12345:crossref_citations'
+        )
+        redis_client_mock.set.assert_not_called()
 
-    def test_should_get_data_from_redis_by_version(
+    async def test_should_get_data_from_redis_by_version(
         self,
-        redis_client_mock: MagicMock
+        crossref_citations_provider: CrossrefCitationsProvider,
+        async_redis_client_mock: AsyncMock
     ):
-        redis_client_mock.hget.return_value = b'10'
-        citation_provider = CrossrefCitationsProvider(redis_client=redis_client_mock)
+        async_redis_client_mock.hget.return_value = b'10'
         result = (
-            citation_provider.get_citations_source_metric_for_article_id_and_version('12345', 1)
+            await crossref_citations_provider
+            .get_citations_source_metric_for_article_id_and_version('12345', 1)
         )
-        redis_client_mock.hget.assert_called_once_with(
+        async_redis_client_mock.hget.assert_called_once_with(
             'article:12345:crossref_citations',
             '1'
         )
@@ -57,40 +129,80 @@ class TestCrossrefCitationsProvider:
             'citations': 10
         }
 
-    def test_should_return_zero_for_no_citations_by_version(
+    async def test_should_return_zero_for_no_citations_by_version(
         self,
-        redis_client_mock: MagicMock
+        crossref_citations_provider: CrossrefCitationsProvider,
+        async_redis_client_mock: AsyncMock
     ):
-        redis_client_mock.hget.return_value = None
-        citation_provider = CrossrefCitationsProvider(redis_client=redis_client_mock)
+        async_redis_client_mock.hget.return_value = None
         result = (
-            citation_provider.get_citations_source_metric_for_article_id_and_version('12345', 1)
+            await crossref_citations_provider
+            .get_citations_source_metric_for_article_id_and_version('12345', 1)
         )
         assert result['citations'] == 0
 
-    def test_should_get_data_from_redis_by_article_id(
+    async def test_should_get_data_from_redis_by_article_id(
         self,
-        redis_client_mock: MagicMock
+        crossref_citations_provider: CrossrefCitationsProvider,
+        async_redis_client_mock: AsyncMock
     ):
-        redis_client_mock.hgetall.return_value = {b'1': b'12', b'2': b'8', b'': b'43', b'3': b'3'}
-        citation_provider = CrossrefCitationsProvider(redis_client=redis_client_mock)
+        async_redis_client_mock.hgetall.return_value = {
+            b'1': b'12', b'2': b'8', b'': b'43', b'3': b'3'
+        }
         result = (
-            citation_provider.get_combined_citations_source_metric_for_article_id('12345')
+            await crossref_citations_provider
+            .get_combined_citations_source_metric_for_article_id('12345')
+        )
+        async_redis_client_mock.hgetall.assert_called_once_with(
+            'article:12345:crossref_citations'
         )
-        redis_client_mock.hgetall.assert_called_once_with('article:12345:crossref_citations')
         assert result == {
             'service': 'Crossref',
             'uri': 'https://doi.org/10.7554/eLife.12345',
             'citations': 12 + 8 + 43 + 3
         }
 
-    def test_should_return_zero_for_no_citations_by_article_id(
+    async def test_should_return_zero_for_no_citations_by_article_id(
         self,
-        redis_client_mock: MagicMock
+        crossref_citations_provider: CrossrefCitationsProvider,
+        async_redis_client_mock: AsyncMock
     ):
-        redis_client_mock.hgetall.return_value = {}
-        citation_provider = CrossrefCitationsProvider(redis_client=redis_client_mock)
+        async_redis_client_mock.hgetall.return_value = {}
         result = (
-            citation_provider.get_combined_citations_source_metric_for_article_id('12345')
+            await crossref_citations_provider
+            .get_combined_citations_source_metric_for_article_id('12345')
         )
         assert result['citations'] == 0
+
+    async def test_should_get_combined_citation_counts_for_article_ids_using_pipeline(
+        self,
+        crossref_citations_provider: CrossrefCitationsProvider,
+        async_redis_client_mock: AsyncMock,
+        async_redis_client_pipeline_mock: MagicMock
+    ):
+        async_redis_client_pipeline_mock.execute.return_value = [
+            {b'1': b'12', b'2': b'8'},
+            {}
+        ]
+        result = await crossref_citations_provider.get_combined_citation_counts_for_article_ids(
+            ['12345', '12346']
+        )
+        assert result == [20, 0]
+        async_redis_client_pipeline_mock.hgetall.assert_has_calls([
+            call('article:12345:crossref_citations'),
+            call('article:12346:crossref_citations')
+        ])
+        async_redis_client_pipeline_mock.execute.assert_called_once()
+        async_redis_client_mock.hgetall.assert_not_called()
+
+
+class TestGetCitationsByVersionByKey:
+    def test_should_group_versions_by_article(self):
+        assert get_citations_by_version_by_key({
+            'article_id': ['12345', '12345', '12346'],
+            'version_number': ['1', '2', None],
+            'citation_count': [10, 11, 12]
+        }, key_prefix='prefix:') == {
+            'prefix:article:12345:crossref_citations': {'1': 10, '2': 11},
+            'prefix:article:12346:crossref_citations': {'': 12}
+        }
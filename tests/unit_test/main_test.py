@@ -3,24 +3,43 @@ from unittest.mock import MagicMock, patch
 
 from fastapi.testclient import TestClient
 import pytest
+from redis import BlockingConnectionPool
+from redis.asyncio import BlockingConnectionPool as AsyncBlockingConnectionPool
 
 from data_hub_metrics_api import main as main_module
-from data_hub_metrics_api.main import RedisEnvironmentVariables, create_app, get_redis_client
+from data_hub_metrics_api.api_router import DEFAULT_MAX_SUMMARY_ARTICLE_IDS
+from data_hub_metrics_api.citations_provider import DEFAULT_CITATIONS_PROVIDER_TIMEOUT_SECONDS
+from data_hub_metrics_api.main import (
+    ApiEnvironmentVariables,
+    DEFAULT_READ_THROUGH_CACHE_MAX_SIZE,
+    DEFAULT_REDIS_MAX_CONNECTIONS,
+    DEFAULT_REDIS_RETRY_ATTEMPTS,
+    DEFAULT_REDIS_SOCKET_TIMEOUT_SECONDS,
+    ReadThroughCacheEnvironmentVariables,
+    RedisEnvironmentVariables,
+    create_app,
+    get_async_redis_client,
+    get_citations_provider_timeout_seconds,
+    get_max_summary_article_ids,
+    get_read_through_cache,
+    get_redis_client,
+    get_redis_connection_pool_kwargs,
+    get_redis_retry_attempts
+)
 
 
 @pytest.fixture(name='redis_class_mock', autouse=True)
 def _redis_class_mock() -> Iterator[MagicMock]:
-    with patch.object(main_module, 'Redis') as redis_class_mock:
+    with patch.object(main_module, 'RefreshJobRedis') as redis_class_mock:
         yield redis_class_mock
 
 
 class TestGetRedisClient:
     def test_should_use_localhost_by_default(self, redis_class_mock: MagicMock):
         get_redis_client()
-        redis_class_mock.assert_called_with(
-            host='localhost',
-            port=6379
-        )
+        connection_pool = redis_class_mock.call_args.kwargs['connection_pool']
+        assert connection_pool.connection_kwargs['host'] == 'localhost'
+        assert connection_pool.connection_kwargs['port'] == 6379
 
     def test_should_read_host_and_port_from_env_variable(
         self,
@@ -30,10 +49,100 @@ class TestGetRedisClient:
         mock_env[RedisEnvironmentVariables.HOST] = 'redis_host'
         mock_env[RedisEnvironmentVariables.PORT] = '12345'
         get_redis_client()
-        redis_class_mock.assert_called_with(
-            host='redis_host',
-            port=12345
+        connection_pool = redis_class_mock.call_args.kwargs['connection_pool']
+        assert connection_pool.connection_kwargs['host'] == 'redis_host'
+        assert connection_pool.connection_kwargs['port'] == 12345
+
+    def test_should_use_passed_in_db(self, redis_class_mock: MagicMock):
+        get_redis_client(db=15)
+        connection_pool = redis_class_mock.call_args.kwargs['connection_pool']
+        assert connection_pool.connection_kwargs['db'] == 15
+
+    def test_should_use_bounded_blocking_connection_pool_with_timeouts(
+        self,
+        redis_class_mock: MagicMock
+    ):
+        get_redis_client()
+        connection_pool = redis_class_mock.call_args.kwargs['connection_pool']
+        assert isinstance(connection_pool, BlockingConnectionPool)
+        assert connection_pool.max_connections == DEFAULT_REDIS_MAX_CONNECTIONS
+        assert connection_pool.connection_kwargs['socket_timeout'] == (
+            DEFAULT_REDIS_SOCKET_TIMEOUT_SECONDS
         )
+        assert connection_pool.connection_kwargs['retry'].get_retries() == (
+            DEFAULT_REDIS_RETRY_ATTEMPTS
+        )
+
+
+class TestGetRedisConnectionPoolKwargs:
+    def test_should_read_pool_settings_from_env_variables(self, mock_env: dict):
+        mock_env[RedisEnvironmentVariables.MAX_CONNECTIONS] = '10'
+        mock_env[RedisEnvironmentVariables.POOL_TIMEOUT_SECONDS] = '1.5'
+        mock_env[RedisEnvironmentVariables.SOCKET_TIMEOUT_SECONDS] = '2.5'
+        mock_env[RedisEnvironmentVariables.SOCKET_CONNECT_TIMEOUT_SECONDS] = '3.5'
+        mock_env[RedisEnvironmentVariables.HEALTH_CHECK_INTERVAL_SECONDS] = '15'
+        assert get_redis_connection_pool_kwargs() == {
+            'host': 'localhost',
+            'port': 6379,
+            'max_connections': 10,
+            'timeout': 1.5,
+            'socket_timeout': 2.5,
+            'socket_connect_timeout': 3.5,
+            'health_check_interval': 15
+        }
+
+
+class TestGetRedisRetryAttempts:
+    def test_should_allow_disabling_retries(self, mock_env: dict):
+        mock_env[RedisEnvironmentVariables.RETRY_ATTEMPTS] = '0'
+        assert get_redis_retry_attempts() == 0
+
+
+class TestGetAsyncRedisClient:
+    def test_should_read_host_and_port_from_env_variable(
+        self,
+        mock_env: dict
+    ):
+        mock_env[RedisEnvironmentVariables.HOST] = 'redis_host'
+        mock_env[RedisEnvironmentVariables.PORT] = '12345'
+        with patch.object(main_module, 'InstrumentedAsyncRedis') as async_redis_class_mock:
+            get_async_redis_client()
+        connection_pool = async_redis_class_mock.call_args.kwargs['connection_pool']
+        assert isinstance(connection_pool, AsyncBlockingConnectionPool)
+        assert connection_pool.connection_kwargs['host'] == 'redis_host'
+        assert connection_pool.connection_kwargs['port'] == 12345
+
+
+class TestGetReadThroughCache:
+    def test_should_use_default_max_size(self):
+        assert get_read_through_cache().max_size == DEFAULT_READ_THROUGH_CACHE_MAX_SIZE
+
+    def test_should_read_max_size_and_ttl_from_env_variable(self, mock_env: dict):
+        mock_env[ReadThroughCacheEnvironmentVariables.MAX_SIZE] = '0'
+        mock_env[ReadThroughCacheEnvironmentVariables.TTL_SECONDS] = '12.5'
+        read_through_cache = get_read_through_cache()
+        assert read_through_cache.max_size == 0
+        assert read_through_cache.ttl_seconds == 12.5
+
+
+class TestGetMaxSummaryArticleIds:
+    def test_should_use_default_limit(self):
+        assert get_max_summary_article_ids() == DEFAULT_MAX_SUMMARY_ARTICLE_IDS
+
+    def test_should_read_limit_from_env_variable(self, mock_env: dict):
+        mock_env[ApiEnvironmentVariables.MAX_SUMMARY_ARTICLE_IDS] = '50'
+        assert get_max_summary_article_ids() == 50
+
+
+class TestGetCitationsProviderTimeoutSeconds:
+    def test_should_use_default_timeout(self):
+        assert get_citations_provider_timeout_seconds() == (
+            DEFAULT_CITATIONS_PROVIDER_TIMEOUT_SECONDS
+        )
+
+    def test_should_read_timeout_from_env_variable(self, mock_env: dict):
+        mock_env[ApiEnvironmentVariables.CITATIONS_PROVIDER_TIMEOUT_SECONDS] = '0.5'
+        assert get_citations_provider_timeout_seconds() == 0.5
 
 
 def test_read_main():
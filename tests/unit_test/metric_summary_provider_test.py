@@ -1,79 +1,138 @@
-from unittest.mock import MagicMock, call
+import json
+from typing import Any, Iterator
+from unittest.mock import AsyncMock, MagicMock, call, patch
+import orjson
 import pytest
 
+from data_hub_metrics_api import metric_summary_provider as metric_summary_provider_module
+
+from data_hub_metrics_api.api_router_typing import MetricSummaryItemTypedDict
 from data_hub_metrics_api.crossref_citations_provider import CrossrefCitationsProvider
 from data_hub_metrics_api.metric_summary_provider import (
+    MetricSummaryJsonResponseTypedDict,
     MetricSummaryProvider
 )
 from data_hub_metrics_api.page_views_and_downloads_provider import (
+    ARTICLE_IDS_INDEX_KEY,
     PageViewsAndDownloadsProvider
 )
+from data_hub_metrics_api.utils.cursors import get_cursor_for_article_id
+
+
+SUMMARY_ITEM_1: MetricSummaryItemTypedDict = {
+    'id': 10001,
+    'views': 123,
+    'downloads': 12,
+    'crossref': 5,
+    'pubmed': 0,
+    'scopus': 0
+}
+
+
+def get_decoded_summary(summary: MetricSummaryJsonResponseTypedDict) -> dict[str, Any]:
+    # the summary items are JSON fragments, as they are written to the response
+    return orjson.loads(orjson.dumps(summary))
+
+
+@pytest.fixture(name='async_redis_client_mock', autouse=True)
+def _async_redis_client_mock(async_redis_client_mock: AsyncMock) -> AsyncMock:
+    # by default there are no precomputed summary items
+    async_redis_client_mock.get.return_value = None
+    async_redis_client_mock.mget.side_effect = lambda keys: [None] * len(keys)
+    return async_redis_client_mock
+
+
+@pytest.fixture(name='create_generation_mock', autouse=True)
+def _create_generation_mock() -> Iterator[MagicMock]:
+    with patch.object(metric_summary_provider_module, 'create_generation') as mock:
+        mock.return_value = 'generation1'
+        yield mock
+
+
+@pytest.fixture(name='redis_client_mock')
+def _redis_client_mock(redis_client_mock: MagicMock) -> MagicMock:
+    # by default there are no active generations (the legacy keys without a prefix)
+    redis_client_mock.get.return_value = None
+    return redis_client_mock
 
 
 @pytest.fixture(name='page_views_and_downloads_provider_mock')
 def _page_views_and_downloads_provider_mock() -> MagicMock:
-    return MagicMock(
+    page_views_and_downloads_provider_mock = MagicMock(
         name='page_views_and_downloads_provider_mock',
         spec=PageViewsAndDownloadsProvider
     )
+    page_views_and_downloads_provider_mock.get_total_article_count.return_value = 0
+    page_views_and_downloads_provider_mock.get_metric_totals_for_article_ids.return_value = [
+        {'page_views': 0, 'downloads': 0}
+    ]
+    return page_views_and_downloads_provider_mock
 
 
 @pytest.fixture(name='crossref_citations_provider_mock')
 def _crossref_citations_provider_mock() -> MagicMock:
-    return MagicMock(
+    crossref_citations_provider_mock = MagicMock(
         name='crossref_citations_provider_mock',
         spec=CrossrefCitationsProvider
     )
+    (
+        crossref_citations_provider_mock
+        .get_combined_citations_source_metric_for_article_id
+        .return_value
+    ) = {'service': 'Crossref', 'uri': '', 'citations': 0}
+    return crossref_citations_provider_mock
 
 
 @pytest.fixture(name='metric_summary_provider')
 def _metric_summary_provider(
     page_views_and_downloads_provider_mock: MagicMock,
-    crossref_citations_provider_mock: MagicMock
+    crossref_citations_provider_mock: MagicMock,
+    redis_client_mock: MagicMock,
+    async_redis_client_mock: AsyncMock,
+    keyspace_generations_mock: MagicMock
 ) -> MetricSummaryProvider:
     return MetricSummaryProvider(
         page_views_and_downloads_provider=page_views_and_downloads_provider_mock,
-        crossref_citations_provider=crossref_citations_provider_mock
+        crossref_citations_provider=crossref_citations_provider_mock,
+        redis_client=redis_client_mock,
+        async_redis_client=async_redis_client_mock,
+        keyspace_generations=keyspace_generations_mock
     )
 
 
 class TestMetricSummaryProviderByArticleId:
-    def test_should_return_one_item(
+    async def test_should_return_one_item(
         self,
         metric_summary_provider: MetricSummaryProvider
     ):
-        summary_dict = metric_summary_provider.get_summary_for_article_id(
+        summary_json = await metric_summary_provider.get_summary_for_article_id(
             article_id='12345'
         )
+        summary_dict = get_decoded_summary(summary_json)
         assert summary_dict['total'] == 1
         assert len(summary_dict['items']) == 1
 
-    def test_should_return_views_and_downloads(
+    async def test_should_return_views_and_downloads(
         self,
         metric_summary_provider: MetricSummaryProvider,
         page_views_and_downloads_provider_mock: MagicMock
     ):
-        page_views_and_downloads_provider_mock.get_metric_total_for_article_id.side_effect = (
-            lambda article_id, metric_name: (
-                123 if metric_name == 'page_views'
-                else 12
-            )
-        )
-        summary_dict = metric_summary_provider.get_summary_for_article_id(
+        page_views_and_downloads_provider_mock.get_metric_totals_for_article_ids.return_value = [
+            {'page_views': 123, 'downloads': 12}
+        ]
+        summary_json = await metric_summary_provider.get_summary_for_article_id(
             article_id='12345'
         )
+        summary_dict = get_decoded_summary(summary_json)
         assert summary_dict['items'][0]['views'] == 123
         assert summary_dict['items'][0]['downloads'] == 12
         (
             page_views_and_downloads_provider_mock
-            .get_metric_total_for_article_id
-            .assert_has_calls([
-                call(article_id='12345', metric_name='page_views'),
-                call(article_id='12345', metric_name='downloads')
-            ])
+            .get_metric_totals_for_article_ids
+            .assert_called_once_with(['12345'])
         )
 
-    def test_should_return_citations_for_crossref(
+    async def test_should_return_citations_for_crossref(
         self,
         metric_summary_provider: MetricSummaryProvider,
         crossref_citations_provider_mock: MagicMock
@@ -87,9 +146,10 @@ class TestMetricSummaryProviderByArticleId:
             'uri': '',
             'citations': 5
         }
-        summary_dict = metric_summary_provider.get_summary_for_article_id(
+        summary_json = await metric_summary_provider.get_summary_for_article_id(
             article_id='12345'
         )
+        summary_dict = get_decoded_summary(summary_json)
         assert summary_dict['items'][0]['crossref'] == 5
         (
             crossref_citations_provider_mock
@@ -97,22 +157,198 @@ class TestMetricSummaryProviderByArticleId:
             .assert_called_once_with(article_id='12345')
         )
 
+    async def test_should_return_precomputed_summary_item_without_calculating_it(
+        self,
+        metric_summary_provider: MetricSummaryProvider,
+        page_views_and_downloads_provider_mock: MagicMock,
+        async_redis_client_mock: AsyncMock
+    ):
+        async_redis_client_mock.get.return_value = json.dumps(SUMMARY_ITEM_1).encode('utf-8')
+        summary_json = await metric_summary_provider.get_summary_for_article_id(
+            article_id='10001'
+        )
+        summary_dict = get_decoded_summary(summary_json)
+        assert summary_dict['items'] == [SUMMARY_ITEM_1]
+        async_redis_client_mock.get.assert_called_once_with('article:10001:summary')
+        (
+            page_views_and_downloads_provider_mock
+            .get_metric_totals_for_article_ids
+            .assert_not_called()
+        )
+
+
+class TestMetricSummaryProviderByArticleIds:
+    async def test_should_return_summary_items_in_order_of_article_ids(
+        self,
+        metric_summary_provider: MetricSummaryProvider,
+        page_views_and_downloads_provider_mock: MagicMock,
+        crossref_citations_provider_mock: MagicMock
+    ):
+        page_views_and_downloads_provider_mock.get_metric_totals_for_article_ids.return_value = [
+            {'page_views': 123, 'downloads': 12},
+            {'page_views': 456, 'downloads': 45}
+        ]
+        (
+            crossref_citations_provider_mock
+            .get_combined_citation_counts_for_article_ids
+            .return_value
+        ) = [5, 6]
+        summary_items = await metric_summary_provider.get_summary_items_for_article_ids(
+            ['10001', '10002']
+        )
+        assert summary_items == [{
+            'id': 10001,
+            'views': 123,
+            'downloads': 12,
+            'crossref': 5,
+            'pubmed': 0,
+            'scopus': 0
+        }, {
+            'id': 10002,
+            'views': 456,
+            'downloads': 45,
+            'crossref': 6,
+            'pubmed': 0,
+            'scopus': 0
+        }]
+
+    async def test_should_fetch_all_article_ids_using_bulk_methods(
+        self,
+        metric_summary_provider: MetricSummaryProvider,
+        page_views_and_downloads_provider_mock: MagicMock,
+        crossref_citations_provider_mock: MagicMock
+    ):
+        page_views_and_downloads_provider_mock.get_metric_totals_for_article_ids.return_value = [
+            {'page_views': 0, 'downloads': 0},
+            {'page_views': 0, 'downloads': 0}
+        ]
+        (
+            crossref_citations_provider_mock
+            .get_combined_citation_counts_for_article_ids
+            .return_value
+        ) = [0, 0]
+        await metric_summary_provider.get_summary_items_for_article_ids(['10001', '10002'])
+        (
+            page_views_and_downloads_provider_mock
+            .get_metric_totals_for_article_ids
+            .assert_called_once_with(['10001', '10002'])
+        )
+        (
+            crossref_citations_provider_mock
+            .get_combined_citation_counts_for_article_ids
+            .assert_called_once_with(['10001', '10002'])
+        )
+        (
+            page_views_and_downloads_provider_mock
+            .get_metric_total_for_article_id
+            .assert_not_called()
+        )
+
+    async def test_should_return_precomputed_summary_items_and_calculate_missing_ones(
+        self,
+        metric_summary_provider: MetricSummaryProvider,
+        page_views_and_downloads_provider_mock: MagicMock,
+        crossref_citations_provider_mock: MagicMock,
+        async_redis_client_mock: AsyncMock
+    ):
+        async_redis_client_mock.mget.side_effect = None
+        async_redis_client_mock.mget.return_value = [
+            json.dumps(SUMMARY_ITEM_1).encode('utf-8'),
+            None
+        ]
+        page_views_and_downloads_provider_mock.get_metric_totals_for_article_ids.return_value = [
+            {'page_views': 456, 'downloads': 45}
+        ]
+        (
+            crossref_citations_provider_mock
+            .get_combined_citation_counts_for_article_ids
+            .return_value
+        ) = [6]
+        summary_items = await metric_summary_provider.get_summary_items_for_article_ids(
+            ['10001', '10002']
+        )
+        assert [summary_item['id'] for summary_item in summary_items] == [10001, 10002]
+        assert summary_items[0] == SUMMARY_ITEM_1
+        assert summary_items[1]['views'] == 456
+        async_redis_client_mock.mget.assert_called_once_with([
+            'article:10001:summary',
+            'article:10002:summary'
+        ])
+        (
+            page_views_and_downloads_provider_mock
+            .get_metric_totals_for_article_ids
+            .assert_called_once_with(['10002'])
+        )
+
+    async def test_should_not_call_redis_for_no_article_ids(
+        self,
+        metric_summary_provider: MetricSummaryProvider,
+        async_redis_client_mock: AsyncMock
+    ):
+        assert await metric_summary_provider.get_summary_items_for_article_ids([]) == []
+        async_redis_client_mock.mget.assert_not_called()
+
+
+class TestMetricSummaryProviderBySelectedArticleIds:
+    async def test_should_return_precomputed_summary_items_with_total(
+        self,
+        metric_summary_provider: MetricSummaryProvider,
+        async_redis_client_mock: AsyncMock
+    ):
+        summary_item_2 = {**SUMMARY_ITEM_1, 'id': 10002}
+        async_redis_client_mock.mget.side_effect = None
+        async_redis_client_mock.mget.return_value = [
+            json.dumps(summary_item_2).encode(),
+            json.dumps(SUMMARY_ITEM_1).encode()
+        ]
+        summary_json = await metric_summary_provider.get_summary_for_article_ids(['10002', '10001'])
+        summary = get_decoded_summary(summary_json)
+        assert summary == {'total': 2, 'items': [summary_item_2, SUMMARY_ITEM_1]}
+        async_redis_client_mock.mget.assert_called_once_with([
+            'article:10002:summary',
+            'article:10001:summary'
+        ])
+
+    async def test_should_splice_precomputed_summary_items_without_decoding_them(
+        self,
+        metric_summary_provider: MetricSummaryProvider,
+        async_redis_client_mock: AsyncMock
+    ):
+        summary_item_json = json.dumps(SUMMARY_ITEM_1).encode()
+        async_redis_client_mock.mget.side_effect = None
+        async_redis_client_mock.mget.return_value = [summary_item_json]
+        summary = await metric_summary_provider.get_summary_for_article_ids(['10001'])
+        assert orjson.dumps(summary) == (
+            b'{"total":1,"items":[' + summary_item_json + b']}'
+        )
+
 
 class TestMetricSummaryProviderByAllArticles:
-    def test_should_return_paginated_summary_for_all_articles(
+    async def test_should_return_paginated_summary_for_all_articles(
         self,
         metric_summary_provider: MetricSummaryProvider,
-        page_views_and_downloads_provider_mock: MagicMock
+        page_views_and_downloads_provider_mock: MagicMock,
+        crossref_citations_provider_mock: MagicMock
     ):
         (
             page_views_and_downloads_provider_mock
             .get_article_ids
             .return_value
         ) = ['10001', '10002']
-        summary_dict = metric_summary_provider.get_summary_for_all_articles(
+        page_views_and_downloads_provider_mock.get_metric_totals_for_article_ids.return_value = [
+            {'page_views': 0, 'downloads': 0},
+            {'page_views': 0, 'downloads': 0}
+        ]
+        (
+            crossref_citations_provider_mock
+            .get_combined_citation_counts_for_article_ids
+            .return_value
+        ) = [0, 0]
+        summary_json = await metric_summary_provider.get_summary_for_all_articles(
             per_page=10,
             page=1
         )
+        summary_dict = get_decoded_summary(summary_json)
         assert (
             [summary_item['id'] for summary_item in summary_dict['items']]
             == [10001, 10002]
@@ -123,16 +359,311 @@ class TestMetricSummaryProviderByAllArticles:
             .assert_called_once_with(per_page=10, page=1)
         )
 
-    def test_should_return_count_of_articles_as_total(
+    async def test_should_return_count_of_articles_as_total(
         self,
         metric_summary_provider: MetricSummaryProvider,
-        page_views_and_downloads_provider_mock: MagicMock
+        page_views_and_downloads_provider_mock: MagicMock,
+        crossref_citations_provider_mock: MagicMock
     ):
         page_views_and_downloads_provider_mock.get_article_ids.return_value = ['10001', '10002']
         page_views_and_downloads_provider_mock.get_total_article_count.return_value = 3
-        summary_dict = metric_summary_provider.get_summary_for_all_articles(
+        page_views_and_downloads_provider_mock.get_metric_totals_for_article_ids.return_value = [
+            {'page_views': 0, 'downloads': 0},
+            {'page_views': 0, 'downloads': 0}
+        ]
+        (
+            crossref_citations_provider_mock
+            .get_combined_citation_counts_for_article_ids
+            .return_value
+        ) = [0, 0]
+        summary_json = await metric_summary_provider.get_summary_for_all_articles(
             per_page=2,
             page=1
         )
+        summary_dict = get_decoded_summary(summary_json)
         assert summary_dict['total'] == 3
         assert len(summary_dict['items']) == 2
+
+
+class TestMetricSummaryProviderByAllArticlesAfterArticleId:
+    async def test_should_return_first_page_and_next_cursor(
+        self,
+        metric_summary_provider: MetricSummaryProvider,
+        page_views_and_downloads_provider_mock: MagicMock,
+        async_redis_client_mock: AsyncMock
+    ):
+        async_redis_client_mock.zrangebylex.return_value = [b'10001', b'10002', b'10003']
+        page_views_and_downloads_provider_mock.get_total_article_count.return_value = 3
+        async_redis_client_mock.mget.side_effect = None
+        async_redis_client_mock.mget.return_value = [
+            json.dumps({**SUMMARY_ITEM_1, 'id': 10001}).encode('utf-8'),
+            json.dumps({**SUMMARY_ITEM_1, 'id': 10002}).encode('utf-8')
+        ]
+        summary_json = await (
+            metric_summary_provider.get_summary_for_all_articles_after_article_id(
+                after_article_id=None,
+                per_page=2
+            )
+        )
+        summary_dict = get_decoded_summary(summary_json)
+        assert [summary_item['id'] for summary_item in summary_dict['items']] == [10001, 10002]
+        assert summary_dict['total'] == 3
+        assert summary_dict['next'] == get_cursor_for_article_id('10002')
+        async_redis_client_mock.zrangebylex.assert_called_once_with(
+            ARTICLE_IDS_INDEX_KEY, '-', '+', start=0, num=3
+        )
+
+    async def test_should_start_after_article_id_and_return_no_next_cursor_on_last_page(
+        self,
+        metric_summary_provider: MetricSummaryProvider,
+        async_redis_client_mock: AsyncMock
+    ):
+        async_redis_client_mock.zrangebylex.return_value = [b'10003']
+        async_redis_client_mock.mget.side_effect = None
+        async_redis_client_mock.mget.return_value = [
+            json.dumps({**SUMMARY_ITEM_1, 'id': 10003}).encode('utf-8')
+        ]
+        summary_json = await (
+            metric_summary_provider.get_summary_for_all_articles_after_article_id(
+                after_article_id='10002',
+                per_page=2
+            )
+        )
+        summary_dict = get_decoded_summary(summary_json)
+        assert [summary_item['id'] for summary_item in summary_dict['items']] == [10003]
+        assert summary_dict['next'] is None
+        async_redis_client_mock.zrangebylex.assert_called_once_with(
+            ARTICLE_IDS_INDEX_KEY, '(10002', '+', start=0, num=3
+        )
+
+    async def test_should_page_legacy_article_ids_if_article_ids_index_is_missing(
+        self,
+        metric_summary_provider: MetricSummaryProvider,
+        page_views_and_downloads_provider_mock: MagicMock,
+        async_redis_client_mock: AsyncMock
+    ):
+        async_redis_client_mock.zrangebylex.return_value = []
+        page_views_and_downloads_provider_mock.is_article_ids_index_missing.return_value = True
+        page_views_and_downloads_provider_mock.get_legacy_article_ids.return_value = [
+            '10001', '10002', '10003', '10004'
+        ]
+        assert await metric_summary_provider.get_article_ids_after_article_id(
+            '10001',
+            count=2
+        ) == ['10002', '10003']
+
+
+class TestMetricSummaryProviderByAllArticlesByOrder:
+    async def test_should_not_be_available_until_summaries_were_refreshed(
+        self,
+        metric_summary_provider: MetricSummaryProvider,
+        keyspace_generations_mock: MagicMock
+    ):
+        keyspace_generations_mock.get_generation.return_value = None
+        assert not await metric_summary_provider.is_summary_order_available()
+        keyspace_generations_mock.get_generation.assert_called_once_with('summaries')
+
+    async def test_should_be_available_after_summaries_were_refreshed(
+        self,
+        metric_summary_provider: MetricSummaryProvider,
+        keyspace_generations_mock: MagicMock
+    ):
+        keyspace_generations_mock.get_generation.return_value = 'generation1'
+        assert await metric_summary_provider.is_summary_order_available()
+
+    async def test_should_return_page_of_order_index_with_precomputed_summary_items(
+        self,
+        metric_summary_provider: MetricSummaryProvider,
+        async_redis_client_mock: AsyncMock,
+        async_redis_client_pipeline_mock: MagicMock
+    ):
+        async_redis_client_pipeline_mock.execute.return_value = [[b'10001'], 3]
+        async_redis_client_mock.mget.side_effect = None
+        async_redis_client_mock.mget.return_value = [
+            json.dumps(SUMMARY_ITEM_1).encode('utf-8')
+        ]
+        summary_json = await metric_summary_provider.get_summary_for_all_articles_by_order(
+            order='views',
+            descending=True,
+            per_page=2,
+            page=2
+        )
+        summary_dict = get_decoded_summary(summary_json)
+        assert summary_dict == {'total': 3, 'items': [SUMMARY_ITEM_1]}
+        async_redis_client_pipeline_mock.zrange.assert_called_once_with(
+            'index:article_ids:by_views', 2, 3, desc=True
+        )
+        async_redis_client_pipeline_mock.zcard.assert_called_once_with(
+            'index:article_ids:by_views'
+        )
+        async_redis_client_mock.mget.assert_called_once_with(['article:10001:summary'])
+
+
+class TestIterSummaryItemBatchesForAllArticles:
+    async def test_should_walk_article_ids_index_using_last_article_id_as_cursor(
+        self,
+        metric_summary_provider: MetricSummaryProvider,
+        async_redis_client_mock: AsyncMock
+    ):
+        async_redis_client_mock.zrangebylex.side_effect = [
+            [b'10001', b'10002'],
+            [b'10003']
+        ]
+        article_id_batches = [
+            article_ids
+            async for article_ids in metric_summary_provider.iter_article_id_batches(
+                batch_size=2
+            )
+        ]
+        assert article_id_batches == [['10001', '10002'], ['10003']]
+        assert async_redis_client_mock.zrangebylex.call_args_list == [
+            call(ARTICLE_IDS_INDEX_KEY, '-', '+', start=0, num=2),
+            call(ARTICLE_IDS_INDEX_KEY, '(10002', '+', start=0, num=2)
+        ]
+
+    async def test_should_stop_after_empty_batch(
+        self,
+        metric_summary_provider: MetricSummaryProvider,
+        async_redis_client_mock: AsyncMock
+    ):
+        async_redis_client_mock.zrangebylex.side_effect = [
+            [b'10001', b'10002'],
+            []
+        ]
+        article_id_batches = [
+            article_ids
+            async for article_ids in metric_summary_provider.iter_article_id_batches(
+                batch_size=2
+            )
+        ]
+        assert article_id_batches == [['10001', '10002']]
+
+    async def test_should_return_precomputed_summary_item_json_for_each_batch(
+        self,
+        metric_summary_provider: MetricSummaryProvider,
+        async_redis_client_mock: AsyncMock
+    ):
+        async_redis_client_mock.zrangebylex.return_value = [b'10001']
+        async_redis_client_mock.mget.side_effect = None
+        async_redis_client_mock.mget.return_value = [
+            json.dumps(SUMMARY_ITEM_1).encode('utf-8')
+        ]
+        summary_item_json_batches = [
+            summary_item_json_list
+            async for summary_item_json_list in (
+                metric_summary_provider.iter_summary_item_json_batches_for_all_articles()
+            )
+        ]
+        assert summary_item_json_batches == [[json.dumps(SUMMARY_ITEM_1).encode('utf-8')]]
+        async_redis_client_mock.mget.assert_called_once_with(['article:10001:summary'])
+
+
+class TestRefreshArticleSummaries:
+    def test_should_put_summary_item_json_for_indexed_articles_in_redis(
+        self,
+        metric_summary_provider: MetricSummaryProvider,
+        redis_client_mock: MagicMock,
+        redis_client_pipeline_mock: MagicMock
+    ):
+        redis_client_mock.zscan_iter.return_value = iter([(b'10001', 0)])
+        redis_client_pipeline_mock.execute.side_effect = [
+            [b'123:12', {b'1': b'2', b'2': b'3'}],
+            []
+        ]
+        metric_summary_provider.refresh_article_summaries()
+        redis_client_mock.zscan_iter.assert_called_once_with(ARTICLE_IDS_INDEX_KEY, count=1000)
+        redis_client_pipeline_mock.set.assert_called_once_with(
+            'gen:generation1:article:10001:summary',
+            json.dumps(SUMMARY_ITEM_1, separators=(',', ':'))
+        )
+        redis_client_mock.set.assert_called_once_with(
+            'generation:summaries',
+            'generation1',
+            get=True
+        )
+
+    def test_should_put_article_ids_scored_by_summary_item_fields_in_order_indices(
+        self,
+        metric_summary_provider: MetricSummaryProvider,
+        redis_client_mock: MagicMock,
+        redis_client_pipeline_mock: MagicMock
+    ):
+        redis_client_mock.zscan_iter.return_value = iter([(b'10001', 0)])
+        redis_client_pipeline_mock.execute.side_effect = [
+            [b'123:12', {b'1': b'2', b'2': b'3'}],
+            []
+        ]
+        metric_summary_provider.refresh_article_summaries()
+        assert redis_client_pipeline_mock.zadd.call_args_list == [
+            call('gen:generation1:index:article_ids:by_views', {'10001': 123}),
+            call('gen:generation1:index:article_ids:by_downloads', {'10001': 12}),
+            call('gen:generation1:index:article_ids:by_crossref', {'10001': 5})
+        ]
+
+    def test_should_read_from_active_totals_and_citations_generations(
+        self,
+        metric_summary_provider: MetricSummaryProvider,
+        redis_client_mock: MagicMock,
+        redis_client_pipeline_mock: MagicMock
+    ):
+        redis_client_mock.get.side_effect = {
+            'generation:totals': b'totals1',
+            'generation:citations': b'citations1'
+        }.get
+        redis_client_mock.zscan_iter.return_value = iter([(b'10001', 0)])
+        redis_client_pipeline_mock.execute.side_effect = [
+            [b'123:12', {b'1': b'2', b'2': b'3'}],
+            []
+        ]
+        metric_summary_provider.refresh_article_summaries()
+        redis_client_mock.zscan_iter.assert_called_once_with(
+            'gen:totals1:' + ARTICLE_IDS_INDEX_KEY,
+            count=1000
+        )
+        redis_client_pipeline_mock.get.assert_called_once_with(
+            'gen:totals1:article:10001:metric_totals'
+        )
+        redis_client_pipeline_mock.hgetall.assert_called_once_with(
+            'gen:citations1:article:10001:crossref_citations'
+        )
+
+    def test_should_use_zero_for_missing_values(
+        self,
+        metric_summary_provider: MetricSummaryProvider,
+        redis_client_mock: MagicMock,
+        redis_client_pipeline_mock: MagicMock
+    ):
+        redis_client_mock.zscan_iter.return_value = iter([(b'10001', 0)])
+        redis_client_pipeline_mock.execute.side_effect = [
+            [None, {}],
+            []
+        ]
+        redis_client_mock.mget.return_value = [None, None]
+        metric_summary_provider.refresh_article_summaries()
+        _key, summary_item_json = redis_client_pipeline_mock.set.call_args.args
+        assert json.loads(summary_item_json) == {
+            **SUMMARY_ITEM_1,
+            'views': 0,
+            'downloads': 0,
+            'crossref': 0
+        }
+
+    def test_should_fall_back_to_legacy_totals_per_metric(
+        self,
+        metric_summary_provider: MetricSummaryProvider,
+        redis_client_mock: MagicMock,
+        redis_client_pipeline_mock: MagicMock
+    ):
+        redis_client_mock.zscan_iter.return_value = iter([(b'10001', 0)])
+        redis_client_pipeline_mock.execute.side_effect = [
+            [None, {b'1': b'2', b'2': b'3'}],
+            []
+        ]
+        redis_client_mock.mget.return_value = [b'123', b'12']
+        metric_summary_provider.refresh_article_summaries()
+        redis_client_mock.mget.assert_called_once_with([
+            'article:10001:page_views',
+            'article:10001:downloads'
+        ])
+        _key, summary_item_json = redis_client_pipeline_mock.set.call_args.args
+        assert json.loads(summary_item_json) == SUMMARY_ITEM_1
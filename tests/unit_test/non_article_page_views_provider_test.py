@@ -1,4 +1,4 @@
-from unittest.mock import ANY, MagicMock
+from unittest.mock import ANY, AsyncMock, MagicMock
 
 import pytest
 
@@ -12,25 +12,29 @@ CONTENT_ID_1 = 'content_id_1'
 
 
 @pytest.fixture(name='redis_client_get_mock')
-def _redis_client_get_mock(redis_client_mock: MagicMock) -> MagicMock:
-    return redis_client_mock.get
+def _redis_client_get_mock(async_redis_client_mock: AsyncMock) -> AsyncMock:
+    return async_redis_client_mock.get
 
 
 @pytest.fixture(name='non_article_page_views_provider')
 def _non_article_page_views_provider(
-    redis_client_mock: MagicMock
+    redis_client_mock: MagicMock,
+    async_redis_client_mock: AsyncMock
 ) -> NonArticlePageViewsProvider:
-    return NonArticlePageViewsProvider(redis_client_mock)
+    return NonArticlePageViewsProvider(
+        redis_client_mock,
+        async_redis_client=async_redis_client_mock
+    )
 
 
 class TestNonArticlePageViewsProvider:
-    def test_should_always_return_empty_periods(
+    async def test_should_always_return_empty_periods(
         self,
         non_article_page_views_provider: NonArticlePageViewsProvider,
-        redis_client_get_mock: MagicMock
+        redis_client_get_mock: AsyncMock
     ):
         redis_client_get_mock.return_value = None
-        response = non_article_page_views_provider.get_page_views_by_content_type(
+        response = await non_article_page_views_provider.get_page_views_by_content_type(
             content_type='blog-article',
             content_id=CONTENT_ID_1
         )
@@ -40,25 +44,25 @@ class TestNonArticlePageViewsProvider:
             'periods': []
         }
 
-    def test_should_return_zero_total_value_if_not_in_redis(
+    async def test_should_return_zero_total_value_if_not_in_redis(
         self,
         non_article_page_views_provider: NonArticlePageViewsProvider,
-        redis_client_get_mock: MagicMock
+        redis_client_get_mock: AsyncMock
     ):
         redis_client_get_mock.return_value = None
-        response = non_article_page_views_provider.get_page_views_by_content_type(
+        response = await non_article_page_views_provider.get_page_views_by_content_type(
             content_type='blog-article',
             content_id=CONTENT_ID_1
         )
         assert response['totalValue'] == 0
 
-    def test_should_return_non_article_page_views_value_from_redis(
+    async def test_should_return_non_article_page_views_value_from_redis(
         self,
         non_article_page_views_provider: NonArticlePageViewsProvider,
-        redis_client_get_mock: MagicMock
+        redis_client_get_mock: AsyncMock
     ):
         redis_client_get_mock.return_value = '123'
-        response = non_article_page_views_provider.get_page_views_by_content_type(
+        response = await non_article_page_views_provider.get_page_views_by_content_type(
             content_type=CONTENT_TYPE_1,
             content_id=CONTENT_ID_1
         )
@@ -69,23 +73,33 @@ class TestNonArticlePageViewsProvider:
 
     def test_should_put_page_view_total_in_redis(
         self,
-        iter_dict_from_bq_query_with_progress_mock: MagicMock,
+        iter_column_batch_from_bq_query_with_progress_mock: MagicMock,
         non_article_page_views_provider: NonArticlePageViewsProvider,
         redis_client_pipeline_mock: MagicMock
     ):
-        iter_dict_from_bq_query_with_progress_mock.return_value = iter([{
-            'content_type': CONTENT_TYPE_1,
-            'content_id': CONTENT_ID_1,
-            'page_view_count': 123
+        iter_column_batch_from_bq_query_with_progress_mock.return_value = iter([{
+            'content_type': [CONTENT_TYPE_1],
+            'content_id': [CONTENT_ID_1],
+            'page_view_count': [123]
         }])
         non_article_page_views_provider.refresh_non_article_page_view_totals()
-        iter_dict_from_bq_query_with_progress_mock.assert_called_with(
+        iter_column_batch_from_bq_query_with_progress_mock.assert_called_with(
             project_name=non_article_page_views_provider.gcp_project_name,
             query=non_article_page_views_provider.non_article_page_view_totals_query,
+            batch_size=ANY,
             desc=ANY
         )
-        redis_client_pipeline_mock.set.assert_called_once_with(
-            f'non-article:{CONTENT_TYPE_1}:{CONTENT_ID_1}:page_views',
-            123
-        )
+        redis_client_pipeline_mock.mset.assert_called_once_with({
+            f'non-article:{CONTENT_TYPE_1}:{CONTENT_ID_1}:page_views': 123
+        })
         redis_client_pipeline_mock.execute.assert_called_once()
+
+    def test_should_bump_generation_after_refresh(
+        self,
+        iter_column_batch_from_bq_query_with_progress_mock: MagicMock,
+        non_article_page_views_provider: NonArticlePageViewsProvider,
+        redis_client_mock: MagicMock
+    ):
+        iter_column_batch_from_bq_query_with_progress_mock.return_value = iter([])
+        non_article_page_views_provider.refresh_non_article_page_view_totals()
+        redis_client_mock.set.assert_called_once_with('generation:non_article_page_views', ANY)
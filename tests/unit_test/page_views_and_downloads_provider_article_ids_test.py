@@ -0,0 +1,157 @@
+# pylint: disable=duplicate-code
+from typing import AsyncIterator, Iterator
+from unittest.mock import AsyncMock, MagicMock, patch
+import pytest
+
+from data_hub_metrics_api import page_views_and_downloads_provider as provider_module
+from data_hub_metrics_api.page_views_and_downloads_provider import (
+    ARTICLE_IDS_INDEX_KEY,
+    PageViewsAndDownloadsProvider
+)
+
+
+async def iter_async(values: list) -> AsyncIterator:
+    for value in values:
+        yield value
+
+
+@pytest.fixture(name='redis_client_zrange_mock')
+def _redis_client_zrange_mock(async_redis_client_mock: AsyncMock) -> AsyncMock:
+    return async_redis_client_mock.zrange
+
+
+@pytest.fixture(name='create_generation_mock', autouse=True)
+def _create_generation_mock() -> Iterator[MagicMock]:
+    with patch.object(provider_module, 'create_generation') as mock:
+        mock.return_value = 'generation1'
+        yield mock
+
+
+@pytest.fixture(name='page_views_and_downloads_provider')
+def _page_views_and_downloads_provider(
+    redis_client_mock: MagicMock,
+    async_redis_client_mock: AsyncMock,
+    keyspace_generations_mock: MagicMock
+) -> PageViewsAndDownloadsProvider:
+    return PageViewsAndDownloadsProvider(
+        redis_client_mock,
+        async_redis_client=async_redis_client_mock,
+        keyspace_generations=keyspace_generations_mock
+    )
+
+
+class TestGetTotalArticleCount:
+    async def test_should_return_size_of_article_ids_index(
+        self,
+        page_views_and_downloads_provider: PageViewsAndDownloadsProvider,
+        async_redis_client_mock: AsyncMock
+    ):
+        async_redis_client_mock.zcard.return_value = 3
+        assert await page_views_and_downloads_provider.get_total_article_count() == 3
+        async_redis_client_mock.zcard.assert_called_once_with(ARTICLE_IDS_INDEX_KEY)
+
+    async def test_should_use_active_totals_generation(
+        self,
+        page_views_and_downloads_provider: PageViewsAndDownloadsProvider,
+        async_redis_client_mock: AsyncMock,
+        keyspace_generations_mock: MagicMock
+    ):
+        keyspace_generations_mock.get_key_prefix.return_value = 'gen:generation1:'
+        async_redis_client_mock.zcard.return_value = 3
+        assert await page_views_and_downloads_provider.get_total_article_count() == 3
+        keyspace_generations_mock.get_key_prefix.assert_called_once_with('totals')
+        async_redis_client_mock.zcard.assert_called_once_with(
+            'gen:generation1:' + ARTICLE_IDS_INDEX_KEY
+        )
+
+    async def test_should_count_legacy_page_views_keys_if_article_ids_index_is_missing(
+        self,
+        page_views_and_downloads_provider: PageViewsAndDownloadsProvider,
+        async_redis_client_mock: AsyncMock
+    ):
+        async_redis_client_mock.zcard.return_value = 0
+        async_redis_client_mock.scan_iter = MagicMock(return_value=iter_async([
+            b'article:10002:page_views',
+            b'article:10001:page_views'
+        ]))
+        assert await page_views_and_downloads_provider.get_total_article_count() == 2
+        async_redis_client_mock.scan_iter.assert_called_once_with(
+            match='article:*:page_views',
+            count=1000
+        )
+
+
+class TestGetArticleIds:
+    async def test_should_return_empty_article_ids_if_redis_is_empty(
+        self,
+        page_views_and_downloads_provider: PageViewsAndDownloadsProvider,
+        redis_client_zrange_mock: AsyncMock
+    ):
+        redis_client_zrange_mock.return_value = []
+        assert await page_views_and_downloads_provider.get_article_ids(
+            per_page=10,
+            page=1
+        ) == []
+
+    async def test_should_return_decoded_article_ids_from_index(
+        self,
+        page_views_and_downloads_provider: PageViewsAndDownloadsProvider,
+        redis_client_zrange_mock: AsyncMock
+    ):
+        redis_client_zrange_mock.return_value = [b'10001', b'10002', b'10003']
+        assert await page_views_and_downloads_provider.get_article_ids(
+            per_page=10,
+            page=1
+        ) == ['10001', '10002', '10003']
+
+    async def test_should_request_first_page_from_index(
+        self,
+        page_views_and_downloads_provider: PageViewsAndDownloadsProvider,
+        redis_client_zrange_mock: AsyncMock
+    ):
+        await page_views_and_downloads_provider.get_article_ids(
+            per_page=2,
+            page=1
+        )
+        redis_client_zrange_mock.assert_called_once_with(ARTICLE_IDS_INDEX_KEY, 0, 1)
+
+    async def test_should_request_selected_page_from_index(
+        self,
+        page_views_and_downloads_provider: PageViewsAndDownloadsProvider,
+        redis_client_zrange_mock: AsyncMock
+    ):
+        await page_views_and_downloads_provider.get_article_ids(
+            per_page=2,
+            page=3
+        )
+        redis_client_zrange_mock.assert_called_once_with(ARTICLE_IDS_INDEX_KEY, 4, 5)
+
+    async def test_should_not_scan_keyspace(
+        self,
+        page_views_and_downloads_provider: PageViewsAndDownloadsProvider,
+        async_redis_client_mock: AsyncMock
+    ):
+        await page_views_and_downloads_provider.get_article_ids(
+            per_page=2,
+            page=1
+        )
+        await page_views_and_downloads_provider.get_total_article_count()
+        async_redis_client_mock.scan_iter.assert_not_called()
+
+    async def test_should_page_sorted_legacy_article_ids_if_article_ids_index_is_missing(
+        self,
+        page_views_and_downloads_provider: PageViewsAndDownloadsProvider,
+        redis_client_zrange_mock: AsyncMock,
+        async_redis_client_mock: AsyncMock
+    ):
+        redis_client_zrange_mock.return_value = []
+        async_redis_client_mock.zcard.return_value = 0
+        async_redis_client_mock.scan_iter = MagicMock(return_value=iter_async([
+            b'article:10003:page_views',
+            b'article:10001:page_views',
+            b'article:10002:page_views'
+        ]))
+        assert await page_views_and_downloads_provider.get_article_ids(
+            per_page=2,
+            page=1
+        ) == ['10001', '10002']
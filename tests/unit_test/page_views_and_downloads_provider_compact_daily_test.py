@@ -0,0 +1,302 @@
+# pylint: disable=duplicate-code
+from datetime import date
+from typing import Iterator
+from unittest.mock import AsyncMock, MagicMock, call, patch
+import pytest
+
+from data_hub_metrics_api import page_views_and_downloads_provider as provider_module
+from data_hub_metrics_api.page_views_and_downloads_provider import (
+    DAILY_REFRESH_LAST_EVENT_DATE_KEY,
+    BigQueryResultRow,
+    PageViewsAndDownloadsProvider
+)
+from data_hub_metrics_api.utils.compact_daily_values import (
+    COMPACT_DAILY_YEAR_MONTHS_INDEX_KEY,
+    get_empty_compact_daily_values,
+    get_encoded_compact_daily_values
+)
+from data_hub_metrics_api.utils.period_index import get_period_score
+from data_hub_metrics_api.utils.storage_migrations import (
+    COMPACT_DAILY_VALUES_MIGRATION_NAME,
+    PACKED_MONTHLY_VALUES_MIGRATION_NAME
+)
+
+
+DAILY_ROW_1: BigQueryResultRow = {
+    'article_id': '12345',
+    'event_date': date(2023, 10, 2),
+    'page_view_count': 5,
+    'download_count': 2
+}
+
+DAILY_VALUES_OF_DAY_3 = get_encoded_compact_daily_values(page_views=7, downloads=2)
+
+
+@pytest.fixture(name='completed_storage_migration_names', autouse=True)
+def _completed_storage_migration_names(
+    redis_client_mock: MagicMock,
+    async_redis_client_mock: AsyncMock
+) -> set[str]:
+    # the daily values were migrated to the compact layout, unless a test states otherwise
+    completed_storage_migration_names = {
+        COMPACT_DAILY_VALUES_MIGRATION_NAME,
+        PACKED_MONTHLY_VALUES_MIGRATION_NAME
+    }
+    redis_client_mock.sismember.side_effect = (
+        lambda _key, migration_name: migration_name in completed_storage_migration_names
+    )
+    async_redis_client_mock.smembers.side_effect = lambda _key: {
+        migration_name.encode('utf-8')
+        for migration_name in completed_storage_migration_names
+    }
+    return completed_storage_migration_names
+
+
+@pytest.fixture(name='create_generation_mock', autouse=True)
+def _create_generation_mock() -> Iterator[MagicMock]:
+    with patch.object(provider_module, 'create_generation') as mock:
+        mock.return_value = 'generation1'
+        yield mock
+
+
+@pytest.fixture(name='page_views_and_downloads_provider')
+def _page_views_and_downloads_provider(
+    redis_client_mock: MagicMock,
+    async_redis_client_mock: AsyncMock,
+    keyspace_generations_mock: MagicMock
+) -> PageViewsAndDownloadsProvider:
+    return PageViewsAndDownloadsProvider(
+        redis_client_mock,
+        async_redis_client=async_redis_client_mock,
+        keyspace_generations=keyspace_generations_mock
+    )
+
+
+class TestCompactDailyValues:
+    async def test_should_only_read_compact_values_of_months_in_page_window(
+        self,
+        page_views_and_downloads_provider: PageViewsAndDownloadsProvider,
+        async_redis_client_mock: AsyncMock,
+        async_redis_client_pipeline_mock: MagicMock
+    ):
+        async_redis_client_pipeline_mock.execute.return_value = [
+            {b'2023-08': b'3', b'2023-09': b'1', b'2023-10': b'1'},
+            b'30:3'
+        ]
+        async_redis_client_mock.mget.return_value = [
+            get_encoded_compact_daily_values(page_views=5, downloads=1)
+        ]
+        result = await page_views_and_downloads_provider.get_metric_for_article_id_by_time_period(
+            article_id='12345',
+            metric_name='page_views',
+            by='day',
+            per_page=1,
+            page=2
+        )
+        async_redis_client_pipeline_mock.hgetall.assert_called_once_with(
+            'article:12345:compact_by_date:day_counts'
+        )
+        async_redis_client_mock.mget.assert_called_once_with([
+            'article:12345:compact_by_date:2023-09'
+        ])
+        async_redis_client_pipeline_mock.zcard.assert_not_called()
+        assert result == {
+            'totalPeriods': 5,
+            'totalValue': 30,
+            'periods': [{'period': '2023-09-01', 'value': 5}]
+        }
+
+    async def test_should_read_daily_hashes_until_migrated_to_compact_values(
+        self,
+        page_views_and_downloads_provider: PageViewsAndDownloadsProvider,
+        async_redis_client_mock: AsyncMock,
+        completed_storage_migration_names: set[str]
+    ):
+        completed_storage_migration_names.clear()
+        async_redis_client_mock.hgetall.return_value = {b'2023-10-01': b'5'}
+        async_redis_client_mock.get.return_value = b'30:3'
+        result = await page_views_and_downloads_provider.get_metric_for_article_id_by_time_period(
+            article_id='12345',
+            metric_name='page_views',
+            by='day',
+            per_page=1,
+            page=1
+        )
+        async_redis_client_mock.hgetall.assert_called_once_with(
+            'article:12345:page_views:by_date'
+        )
+        async_redis_client_mock.mget.assert_not_called()
+        assert result['periods'] == [{'period': '2023-10-01', 'value': 5}]
+
+    async def test_should_read_monthly_periods_from_period_index_with_compact_values(
+        self,
+        page_views_and_downloads_provider: PageViewsAndDownloadsProvider,
+        async_redis_client_mock: AsyncMock,
+        async_redis_client_pipeline_mock: MagicMock
+    ):
+        async_redis_client_pipeline_mock.execute.return_value = [1, [b'2023-10'], b'30:3']
+        async_redis_client_mock.hmget.return_value = [b'30:3']
+        await page_views_and_downloads_provider.get_metric_for_article_id_by_time_period(
+            article_id='12345',
+            metric_name='page_views',
+            by='month',
+            per_page=1,
+            page=1
+        )
+        async_redis_client_mock.mget.assert_not_called()
+        async_redis_client_pipeline_mock.zcard.assert_called_once_with(
+            'article:12345:by_month:period_index'
+        )
+
+    def test_should_put_both_daily_values_with_one_setrange_if_compact(
+        self,
+        page_views_and_downloads_provider: PageViewsAndDownloadsProvider,
+        redis_client_mock: MagicMock,
+        redis_client_pipeline_mock: MagicMock,
+        iter_dict_from_bq_query_with_progress_mock: MagicMock
+    ):
+        redis_client_mock.zrangebyscore.return_value = []
+        iter_dict_from_bq_query_with_progress_mock.return_value = iter([DAILY_ROW_1])
+        # the day did not have a value yet
+        redis_client_pipeline_mock.execute.side_effect = [[[0]], []]
+        page_views_and_downloads_provider.refresh_page_views_and_downloads_daily(
+            number_of_days=3
+        )
+        redis_client_pipeline_mock.bitfield.assert_called_once_with(
+            'article:12345:compact_by_date:2023-10'
+        )
+        redis_client_pipeline_mock.bitfield.return_value.get.assert_called_once_with('u32', 64)
+        redis_client_pipeline_mock.setrange.assert_called_once_with(
+            'article:12345:compact_by_date:2023-10',
+            8,
+            get_encoded_compact_daily_values(page_views=5, downloads=2)
+        )
+        redis_client_pipeline_mock.hincrby.assert_called_once_with(
+            'article:12345:compact_by_date:day_counts',
+            '2023-10',
+            1
+        )
+        redis_client_pipeline_mock.hset.assert_not_called()
+        redis_client_pipeline_mock.sadd.assert_called_once_with(
+            'index:compact_by_date:2023-10:article_ids',
+            '12345'
+        )
+        redis_client_pipeline_mock.zadd.assert_called_once_with(
+            COMPACT_DAILY_YEAR_MONTHS_INDEX_KEY,
+            {'2023-10': get_period_score('2023-10')}
+        )
+        redis_client_mock.set.assert_any_call(DAILY_REFRESH_LAST_EVENT_DATE_KEY, '2023-10-02')
+
+    def test_should_not_count_day_again_if_it_already_had_a_compact_value(
+        self,
+        page_views_and_downloads_provider: PageViewsAndDownloadsProvider,
+        redis_client_pipeline_mock: MagicMock
+    ):
+        redis_client_pipeline_mock.execute.side_effect = [[[6]], []]
+        page_views_and_downloads_provider.put_compact_daily_rows([DAILY_ROW_1])
+        redis_client_pipeline_mock.setrange.assert_called_once()
+        redis_client_pipeline_mock.hincrby.assert_not_called()
+
+    def test_should_refuse_daily_refresh_if_layout_does_not_match_stored_layout(
+        self,
+        page_views_and_downloads_provider: PageViewsAndDownloadsProvider,
+        iter_dict_from_bq_query_with_progress_mock: MagicMock,
+        completed_storage_migration_names: set[str]
+    ):
+        completed_storage_migration_names.clear()
+        with pytest.raises(ValueError):
+            page_views_and_downloads_provider.refresh_page_views_and_downloads_daily(
+                number_of_days=3,
+                daily_storage_layout='compact'
+            )
+        iter_dict_from_bq_query_with_progress_mock.assert_not_called()
+
+    def test_should_prune_compact_months_and_days_before_the_number_of_days_window(
+        self,
+        page_views_and_downloads_provider: PageViewsAndDownloadsProvider,
+        redis_client_mock: MagicMock,
+        redis_client_pipeline_mock: MagicMock
+    ):
+        redis_client_mock.zrangebyscore.side_effect = [[b'2023-08'], []]
+        redis_client_mock.sscan_iter.side_effect = [iter([b'12345']), iter([b'12345'])]
+        # the old month, its index, the cleared cutoff month and its day count
+        redis_client_pipeline_mock.execute.side_effect = [
+            [],
+            [],
+            [8, get_empty_compact_daily_values(2) + DAILY_VALUES_OF_DAY_3],
+            []
+        ]
+        with patch.object(provider_module, 'date') as date_mock:
+            date_mock.today.return_value = date(2023, 10, 3)
+            date_mock.fromisoformat = date.fromisoformat
+            page_views_and_downloads_provider.refresh_page_views_and_downloads_daily(
+                number_of_days=30,
+                daily_storage_layout='compact'
+            )
+        # cutoff = 2023-10-03 minus 30 days = 2023-09-03
+        redis_client_mock.zrangebyscore.assert_any_call(
+            COMPACT_DAILY_YEAR_MONTHS_INDEX_KEY,
+            '-inf',
+            f'({get_period_score('2023-09')}'
+        )
+        redis_client_pipeline_mock.delete.assert_has_calls([
+            call('article:12345:compact_by_date:2023-08'),
+            call('index:compact_by_date:2023-08:article_ids')
+        ])
+        redis_client_pipeline_mock.zrem.assert_called_once_with(
+            COMPACT_DAILY_YEAR_MONTHS_INDEX_KEY,
+            '2023-08'
+        )
+        redis_client_pipeline_mock.setrange.assert_called_once_with(
+            'article:12345:compact_by_date:2023-09',
+            0,
+            get_empty_compact_daily_values(2)
+        )
+        redis_client_pipeline_mock.hdel.assert_called_once_with(
+            'article:12345:compact_by_date:day_counts',
+            '2023-08'
+        )
+        redis_client_pipeline_mock.hset.assert_called_once_with(
+            'article:12345:compact_by_date:day_counts',
+            mapping={'2023-09': 1}
+        )
+
+    def test_should_iter_daily_rows_from_hashes(
+        self,
+        page_views_and_downloads_provider: PageViewsAndDownloadsProvider,
+        redis_client_mock: MagicMock,
+        redis_client_pipeline_mock: MagicMock
+    ):
+        redis_client_mock.scan_iter.return_value = iter([b'article:12345:page_views:by_date'])
+        redis_client_pipeline_mock.execute.return_value = [
+            {b'2023-10-01': b'5', b'2023-10-02': b'6'},
+            {b'2023-10-01': b'2'}
+        ]
+        assert list(page_views_and_downloads_provider.iter_daily_rows_from_hashes()) == [{
+            'article_id': '12345',
+            'event_date': date(2023, 10, 1),
+            'page_view_count': 5,
+            'download_count': 2
+        }, {
+            'article_id': '12345',
+            'event_date': date(2023, 10, 2),
+            'page_view_count': 6,
+            'download_count': 0
+        }]
+        redis_client_pipeline_mock.hgetall.assert_has_calls([
+            call('article:12345:page_views:by_date'),
+            call('article:12345:downloads:by_date')
+        ])
+
+    def test_should_unlink_keys_of_daily_hashes(
+        self,
+        page_views_and_downloads_provider: PageViewsAndDownloadsProvider,
+        redis_client_mock: MagicMock
+    ):
+        redis_client_mock.scan_iter.side_effect = lambda match, count: (
+            iter([b'article:12345:page_views:by_date'])
+            if match == 'article:*:page_views:by_date'
+            else iter([])
+        )
+        assert page_views_and_downloads_provider.delete_daily_hashes() == 1
+        redis_client_mock.unlink.assert_called_once_with(b'article:12345:page_views:by_date')
@@ -1,31 +1,66 @@
 from datetime import date
-from unittest.mock import ANY, MagicMock, call, patch
+from typing import Iterator
+from unittest.mock import ANY, AsyncMock, MagicMock, call, patch
 import pytest
 
 from data_hub_metrics_api import page_views_and_downloads_provider as provider_module
 from data_hub_metrics_api.page_views_and_downloads_provider import (
+    ARTICLE_IDS_INDEX_KEY,
+    DAILY_REFRESH_LAST_EVENT_DATE_KEY,
     MetricNameLiteral,
     PageViewsAndDownloadsProvider,
+    get_incremental_number_of_days,
     get_query_with_replaced_number_of_days,
     get_query_with_replaced_number_of_months,
     get_year_month_months_ago
 )
+from data_hub_metrics_api.utils.period_index import get_period_score
+from data_hub_metrics_api.utils.read_through_cache import ReadThroughCache
 
 
 # Note: this could be any of the valid metric names
 METRIC_NAME_1: MetricNameLiteral = 'page_views'
 
 
-@pytest.fixture(name='redis_client_scan_iter_mock')
-def _redis_client_scan_iter_mock(redis_client_mock: MagicMock) -> MagicMock:
-    return redis_client_mock.scan_iter
+@pytest.fixture(name='async_redis_client_smembers_mock', autouse=True)
+def _async_redis_client_smembers_mock(async_redis_client_mock: AsyncMock) -> AsyncMock:
+    # the daily period index has been backfilled and the monthly values were packed,
+    # unless a test states otherwise
+    async_redis_client_mock.smembers.return_value = {
+        b'period_index_backfill:by_date',
+        b'packed_monthly_values'
+    }
+    return async_redis_client_mock.smembers
+
+
+@pytest.fixture(name='completed_storage_migration_names', autouse=True)
+def _completed_storage_migration_names(redis_client_mock: MagicMock) -> set[str]:
+    # the same for the refresh, the daily values are stored as hashes
+    completed_storage_migration_names = {'period_index_backfill:by_date', 'packed_monthly_values'}
+    redis_client_mock.sismember.side_effect = (
+        lambda _key, migration_name: migration_name in completed_storage_migration_names
+    )
+    return completed_storage_migration_names
+
+
+@pytest.fixture(name='create_generation_mock', autouse=True)
+def _create_generation_mock() -> Iterator[MagicMock]:
+    with patch.object(provider_module, 'create_generation') as mock:
+        mock.return_value = 'generation1'
+        yield mock
 
 
 @pytest.fixture(name='page_views_and_downloads_provider')
 def _page_views_and_downloads_provider(
-    redis_client_mock: MagicMock
+    redis_client_mock: MagicMock,
+    async_redis_client_mock: AsyncMock,
+    keyspace_generations_mock: MagicMock
 ) -> PageViewsAndDownloadsProvider:
-    return PageViewsAndDownloadsProvider(redis_client_mock)
+    return PageViewsAndDownloadsProvider(
+        redis_client_mock,
+        async_redis_client=async_redis_client_mock,
+        keyspace_generations=keyspace_generations_mock
+    )
 
 
 class TestGetQueryWithReplacedNumberOfDays:
@@ -56,268 +91,449 @@ class TestGetYearMonthMonthsAgo:
             assert get_year_month_months_ago(3) == '2025-10'
 
 
-class TestGetArticleIds:
-    def test_should_return_empty_article_ids_if_redis_is_empty(
+class TestGetMetricTotalForArticleId:
+    async def test_should_return_zero_for_total_metric_value_if_no_metric_value(
         self,
         page_views_and_downloads_provider: PageViewsAndDownloadsProvider,
-        redis_client_scan_iter_mock: MagicMock
+        async_redis_client_mock: AsyncMock
     ):
-        redis_client_scan_iter_mock.return_value = iter([])
-        assert page_views_and_downloads_provider.get_article_ids(
-            per_page=10,
-            page=1
-        ) == []
+        async_redis_client_mock.get.return_value = None
+        async_redis_client_mock.mget.return_value = [None, None]
+        assert await page_views_and_downloads_provider.get_metric_total_for_article_id(
+            article_id='12345',
+            metric_name=METRIC_NAME_1
+        ) == 0
 
-    def test_should_return_all_article_ids_if_less_than_a_page(
+    async def test_should_return_total_metric_value_from_packed_metric_totals(
         self,
         page_views_and_downloads_provider: PageViewsAndDownloadsProvider,
-        redis_client_scan_iter_mock: MagicMock
+        async_redis_client_mock: AsyncMock
     ):
-        redis_client_scan_iter_mock.return_value = iter([
-            b'article:10001:page_views',
-            b'article:10002:page_views',
-            b'article:10003:page_views',
-        ])
-        assert page_views_and_downloads_provider.get_article_ids(
-            per_page=10,
-            page=1
-        ) == ['10001', '10002', '10003']
-        redis_client_scan_iter_mock.assert_called_once_with(
-            match='article:*:page_views'
-        )
+        async_redis_client_mock.get.return_value = b'123:45'
+        assert await page_views_and_downloads_provider.get_metric_total_for_article_id(
+            article_id='12345',
+            metric_name='downloads'
+        ) == 45
+        async_redis_client_mock.get.assert_called_with('article:12345:metric_totals')
+        async_redis_client_mock.mget.assert_not_called()
 
-    def test_should_not_return_article_ids_more_than_per_page_items(
+    async def test_should_fall_back_to_legacy_total_metric_value(
         self,
         page_views_and_downloads_provider: PageViewsAndDownloadsProvider,
-        redis_client_scan_iter_mock: MagicMock
+        async_redis_client_mock: AsyncMock
     ):
-        redis_client_scan_iter_mock.return_value = iter([
-            b'article:10001:page_views',
-            b'article:10002:page_views',
-            b'article:10003:page_views'
+        async_redis_client_mock.get.return_value = None
+        async_redis_client_mock.mget.return_value = [b'123', b'45']
+        assert await page_views_and_downloads_provider.get_metric_total_for_article_id(
+            article_id='12345',
+            metric_name='page_views'
+        ) == 123
+        async_redis_client_mock.mget.assert_called_once_with([
+            'article:12345:page_views',
+            'article:12345:downloads'
         ])
-        assert page_views_and_downloads_provider.get_article_ids(
-            per_page=2,
-            page=1
-        ) == ['10001', '10002']
-        redis_client_scan_iter_mock.assert_called_once_with(
-            match='article:*:page_views'
-        )
 
-    def test_should_return_article_ids_from_selected_page_number(
+
+class TestGetMetricTotalsForArticleIds:
+    async def test_should_return_empty_list_without_calling_redis_for_no_article_ids(
         self,
         page_views_and_downloads_provider: PageViewsAndDownloadsProvider,
-        redis_client_scan_iter_mock: MagicMock
+        async_redis_client_mock: AsyncMock
     ):
-        redis_client_scan_iter_mock.return_value = iter([
-            b'article:10001:page_views',
-            b'article:10002:page_views',
-            b'article:10003:page_views'
-        ])
-        assert page_views_and_downloads_provider.get_article_ids(
-            per_page=2,
-            page=2
-        ) == ['10003']
-        redis_client_scan_iter_mock.assert_called_once_with(
-            match='article:*:page_views'
-        )
+        assert await page_views_and_downloads_provider.get_metric_totals_for_article_ids([]) == []
+        async_redis_client_mock.mget.assert_not_called()
 
-    def test_should_return_empty_article_ids_list_if_selected_page_does_not_exist(
+    async def test_should_get_page_views_and_downloads_using_single_mget(
         self,
         page_views_and_downloads_provider: PageViewsAndDownloadsProvider,
-        redis_client_scan_iter_mock: MagicMock
+        async_redis_client_mock: AsyncMock
     ):
-        redis_client_scan_iter_mock.return_value = iter([
-            b'article:10001:page_views',
-            b'article:10002:page_views',
-            b'article:10003:page_views'
+        async_redis_client_mock.mget.return_value = [b'123:12', b'0:4']
+        assert await page_views_and_downloads_provider.get_metric_totals_for_article_ids(
+            ['10001', '10002']
+        ) == [
+            {'page_views': 123, 'downloads': 12},
+            {'page_views': 0, 'downloads': 4}
+        ]
+        async_redis_client_mock.mget.assert_called_once_with([
+            'article:10001:metric_totals',
+            'article:10002:metric_totals'
         ])
-        assert page_views_and_downloads_provider.get_article_ids(
-            per_page=2,
-            page=3
-        ) == []
-
 
-class TestGetMetricTotalForArticleId:
-    def test_should_return_zero_for_total_metric_value_if_no_metric_value(
+    async def test_should_read_legacy_totals_only_for_missing_packed_metric_totals(
         self,
         page_views_and_downloads_provider: PageViewsAndDownloadsProvider,
-        redis_client_mock: MagicMock
+        async_redis_client_mock: AsyncMock
     ):
-        redis_client_mock.get.return_value = None
-        assert page_views_and_downloads_provider.get_metric_total_for_article_id(
-            article_id='12345',
-            metric_name=METRIC_NAME_1
-        ) == 0
+        async_redis_client_mock.mget.side_effect = [
+            [b'123:12', None],
+            [None, b'4']
+        ]
+        assert await page_views_and_downloads_provider.get_metric_totals_for_article_ids(
+            ['10001', '10002']
+        ) == [
+            {'page_views': 123, 'downloads': 12},
+            {'page_views': 0, 'downloads': 4}
+        ]
+        async_redis_client_mock.mget.assert_called_with([
+            'article:10002:page_views',
+            'article:10002:downloads'
+        ])
 
-    def test_should_return_total_metric_value_from_redis(
-        self,
-        page_views_and_downloads_provider: PageViewsAndDownloadsProvider,
-        redis_client_mock: MagicMock
-    ):
-        redis_client_mock.get.return_value = '123'
-        assert page_views_and_downloads_provider.get_metric_total_for_article_id(
-            article_id='12345',
-            metric_name=METRIC_NAME_1
-        ) == 123
-        redis_client_mock.get.assert_called_with(f'article:12345:{METRIC_NAME_1}')
+
+class TestGetIncrementalNumberOfDays:
+    def test_should_return_number_of_days_without_last_event_date(self):
+        assert get_incremental_number_of_days(
+            last_event_date=None,
+            number_of_days=30,
+            late_arrival_days=3
+        ) == 30
+
+    def test_should_return_days_since_last_event_date_plus_late_arrival_days(self):
+        with patch.object(provider_module, 'date') as date_mock:
+            date_mock.today.return_value = date(2023, 10, 3)
+            assert get_incremental_number_of_days(
+                last_event_date=date(2023, 10, 1),
+                number_of_days=30,
+                late_arrival_days=3
+            ) == 5
+
+    def test_should_not_return_more_than_number_of_days(self):
+        with patch.object(provider_module, 'date') as date_mock:
+            date_mock.today.return_value = date(2023, 10, 3)
+            assert get_incremental_number_of_days(
+                last_event_date=date(2023, 1, 1),
+                number_of_days=30,
+                late_arrival_days=3
+            ) == 30
 
 
 class TestGetMetricForArticleIdByTimePeriod:
-    def test_should_return_total_metric_value_as_total_value(
+    async def test_should_return_total_metric_value_as_total_value(
         self,
         page_views_and_downloads_provider: PageViewsAndDownloadsProvider,
-        redis_client_mock: MagicMock
+        async_redis_client_pipeline_mock: MagicMock,
+        async_redis_client_mock: AsyncMock
     ):
-        redis_client_mock.get.return_value = '123'
-        result = page_views_and_downloads_provider.get_metric_for_article_id_by_time_period(
+        async_redis_client_pipeline_mock.execute.return_value = [1, [b'2023-10-01'], b'123:45']
+        async_redis_client_mock.hmget.return_value = [b'5']
+        result = await page_views_and_downloads_provider.get_metric_for_article_id_by_time_period(
             article_id='12345',
-            metric_name=METRIC_NAME_1,
+            metric_name='page_views',
             by='day',
             per_page=10,
             page=1
         )
         assert result['totalValue'] == 123
+        async_redis_client_pipeline_mock.get.assert_called_once_with(
+            'article:12345:metric_totals'
+        )
 
-    def test_should_read_metric_periods_from_redis(
+    async def test_should_read_page_of_metric_periods_from_period_index(
         self,
         page_views_and_downloads_provider: PageViewsAndDownloadsProvider,
-        redis_client_mock: MagicMock
+        async_redis_client_pipeline_mock: MagicMock,
+        async_redis_client_mock: AsyncMock
     ):
-        redis_client_mock.hgetall.return_value = {
-            '2023-10-01': '5',
-            '2023-10-02': '10'
-        }
-        result = page_views_and_downloads_provider.get_metric_for_article_id_by_time_period(
+        async_redis_client_pipeline_mock.execute.return_value = [
+            3,
+            [b'2023-10-03', b'2023-10-02'],
+            b'30:3'
+        ]
+        async_redis_client_mock.hmget.return_value = [b'15', b'10']
+        result = await page_views_and_downloads_provider.get_metric_for_article_id_by_time_period(
             article_id='12345',
             metric_name=METRIC_NAME_1,
             by='day',
-            per_page=10,
+            per_page=2,
             page=1
         )
-        redis_client_mock.hgetall.assert_called_once_with(f'article:12345:{METRIC_NAME_1}:by_date')
+        async_redis_client_pipeline_mock.zcard.assert_called_once_with(
+            f'article:12345:{METRIC_NAME_1}:by_date:period_index'
+        )
+        async_redis_client_pipeline_mock.zrevrange.assert_called_once_with(
+            f'article:12345:{METRIC_NAME_1}:by_date:period_index', 0, 1
+        )
+        async_redis_client_mock.hmget.assert_called_once_with(
+            f'article:12345:{METRIC_NAME_1}:by_date',
+            [b'2023-10-03', b'2023-10-02']
+        )
+        async_redis_client_mock.hgetall.assert_not_called()
         assert result == {
-            'totalPeriods': 2,
-            'totalValue': ANY,
+            'totalPeriods': 3,
+            'totalValue': 30,
             'periods': [{
+                'period': '2023-10-03',
+                'value': 15
+            }, {
                 'period': '2023-10-02',
                 'value': 10
-            }, {
-                'period': '2023-10-01',
-                'value': 5
             }]
         }
 
-    def test_should_not_return_metric_periods_more_than_per_page_items(
+    async def test_should_return_cached_metric_periods_for_same_generations(
+        self,
+        redis_client_mock: MagicMock,
+        async_redis_client_mock: AsyncMock,
+        async_redis_client_pipeline_mock: MagicMock,
+        keyspace_generations_mock: MagicMock
+    ):
+        provider = PageViewsAndDownloadsProvider(
+            redis_client_mock,
+            async_redis_client=async_redis_client_mock,
+            keyspace_generations=keyspace_generations_mock,
+            read_through_cache=ReadThroughCache(max_size=10)
+        )
+        async_redis_client_pipeline_mock.execute.return_value = [1, [b'2023-10-01'], b'5:1']
+        async_redis_client_mock.hmget.return_value = [b'5']
+        kwargs: dict = {'metric_name': METRIC_NAME_1, 'by': 'day', 'per_page': 2, 'page': 1}
+        result_1 = await provider.get_metric_for_article_id_by_time_period('12345', **kwargs)
+        result_2 = await provider.get_metric_for_article_id_by_time_period('12345', **kwargs)
+        assert result_2 == result_1
+        async_redis_client_pipeline_mock.execute.assert_called_once()
+
+        keyspace_generations_mock.get_generation.return_value = 'generation2'
+        await provider.get_metric_for_article_id_by_time_period('12345', **kwargs)
+        assert async_redis_client_pipeline_mock.execute.call_count == 2
+
+    async def test_should_request_selected_page_number_from_period_index(
         self,
         page_views_and_downloads_provider: PageViewsAndDownloadsProvider,
-        redis_client_mock: MagicMock
+        async_redis_client_pipeline_mock: MagicMock,
+        async_redis_client_mock: AsyncMock
     ):
-        redis_client_mock.hgetall.return_value = {
-            '2023-10-01': '5',
-            '2023-10-02': '10',
-            '2023-10-03': '15'
-        }
-
-        result = page_views_and_downloads_provider.get_metric_for_article_id_by_time_period(
+        async_redis_client_pipeline_mock.execute.return_value = [3, [b'2023-10-01'], b'30:3']
+        async_redis_client_mock.hmget.return_value = [b'5']
+        result = await page_views_and_downloads_provider.get_metric_for_article_id_by_time_period(
             article_id='12345',
             metric_name=METRIC_NAME_1,
             by='day',
             per_page=2,
-            page=1
+            page=2
         )
+        async_redis_client_pipeline_mock.zrevrange.assert_called_once_with(
+            f'article:12345:{METRIC_NAME_1}:by_date:period_index', 2, 3
+        )
+        assert result['periods'] == [{
+            'period': '2023-10-01',
+            'value': 5
+        }]
 
+    async def test_should_read_monthly_period_index_by_month(
+        self,
+        page_views_and_downloads_provider: PageViewsAndDownloadsProvider,
+        async_redis_client_pipeline_mock: MagicMock,
+        async_redis_client_mock: AsyncMock
+    ):
+        async_redis_client_pipeline_mock.execute.return_value = [1, [b'2023-10'], b'30:3']
+        async_redis_client_mock.hmget.return_value = [b'30:3']
+        result = await page_views_and_downloads_provider.get_metric_for_article_id_by_time_period(
+            article_id='12345',
+            metric_name='downloads',
+            by='month',
+            per_page=2,
+            page=1
+        )
+        async_redis_client_pipeline_mock.zrevrange.assert_called_once_with(
+            'article:12345:by_month:period_index', 0, 1
+        )
+        async_redis_client_mock.hmget.assert_called_once_with(
+            'article:12345:by_month',
+            [b'2023-10']
+        )
         assert result == {
-            'totalPeriods': 3,
-            'totalValue': ANY,
-            'periods': [{
-                'period': '2023-10-03',
-                'value': 15
-            }, {
-                'period': '2023-10-02',
-                'value': 10
-            }]
+            'totalPeriods': 1,
+            'totalValue': 3,
+            'periods': [{'period': '2023-10', 'value': 3}]
         }
 
-    def test_should_return_metric_periods_from_selected_page_number(
+    async def test_should_read_monthly_hash_per_metric_until_monthly_values_were_packed(
         self,
         page_views_and_downloads_provider: PageViewsAndDownloadsProvider,
-        redis_client_mock: MagicMock
+        async_redis_client_smembers_mock: AsyncMock,
+        async_redis_client_pipeline_mock: MagicMock,
+        async_redis_client_mock: AsyncMock
     ):
-        redis_client_mock.hgetall.return_value = {
-            '2023-10-01': '5',
-            '2023-10-02': '10',
-            '2023-10-03': '15'
-        }
+        async_redis_client_smembers_mock.return_value = {b'period_index_backfill:by_date'}
+        async_redis_client_mock.get.return_value = b'30:3'
+        async_redis_client_mock.hgetall.return_value = {b'2023-10': b'30', b'2020-01': b'20'}
+        result = await page_views_and_downloads_provider.get_metric_for_article_id_by_time_period(
+            article_id='12345',
+            metric_name='page_views',
+            by='month',
+            per_page=2,
+            page=1
+        )
+        async_redis_client_pipeline_mock.zrevrange.assert_not_called()
+        async_redis_client_mock.hgetall.assert_called_once_with(
+            'article:12345:page_views:by_month'
+        )
+        assert result['periods'] == [
+            {'period': '2023-10', 'value': 30},
+            {'period': '2020-01', 'value': 20}
+        ]
+
+    async def test_should_not_read_monthly_hash_per_metric_after_monthly_values_were_packed(
+        self,
+        page_views_and_downloads_provider: PageViewsAndDownloadsProvider,
+        async_redis_client_pipeline_mock: MagicMock,
+        async_redis_client_mock: AsyncMock
+    ):
+        async_redis_client_pipeline_mock.execute.return_value = [0, [], b'30:3']
+        async_redis_client_mock.get.return_value = b'30:3'
+        result = await page_views_and_downloads_provider.get_metric_for_article_id_by_time_period(
+            article_id='12345',
+            metric_name='page_views',
+            by='month',
+            per_page=2,
+            page=1
+        )
+        async_redis_client_mock.hgetall.assert_not_called()
+        assert result == {'totalPeriods': 0, 'totalValue': 30, 'periods': []}
 
-        result = page_views_and_downloads_provider.get_metric_for_article_id_by_time_period(
+    async def test_should_return_empty_metric_periods_if_selected_page_does_not_exist(
+        self,
+        page_views_and_downloads_provider: PageViewsAndDownloadsProvider,
+        async_redis_client_pipeline_mock: MagicMock,
+        async_redis_client_mock: AsyncMock
+    ):
+        async_redis_client_pipeline_mock.execute.return_value = [3, [], b'30:3']
+        result = await page_views_and_downloads_provider.get_metric_for_article_id_by_time_period(
             article_id='12345',
             metric_name=METRIC_NAME_1,
             by='day',
             per_page=2,
-            page=2
+            page=3
         )
-
         assert result == {
             'totalPeriods': 3,
-            'totalValue': ANY,
-            'periods': [{
-                'period': '2023-10-01',
-                'value': 5
-            }]
+            'totalValue': 30,
+            'periods': []
         }
+        async_redis_client_mock.hmget.assert_not_called()
 
-    def test_should_return_empty_metric_periods_if_selected_page_does_not_exist(
+    async def test_should_sort_and_page_hash_if_period_index_is_empty(
         self,
         page_views_and_downloads_provider: PageViewsAndDownloadsProvider,
-        redis_client_mock: MagicMock
+        async_redis_client_pipeline_mock: MagicMock,
+        async_redis_client_mock: AsyncMock
     ):
-        redis_client_mock.hgetall.return_value = {
-            '2023-10-01': '5',
-            '2023-10-02': '10',
-            '2023-10-03': '15'
+        async_redis_client_pipeline_mock.execute.return_value = [0, [], b'30:3']
+        async_redis_client_mock.get.return_value = b'30:3'
+        async_redis_client_mock.hgetall.return_value = {
+            b'2023-10-01': b'5',
+            b'2023-10-02': b'10',
+            b'2023-10-03': b'15'
         }
-
-        result = page_views_and_downloads_provider.get_metric_for_article_id_by_time_period(
+        result = await page_views_and_downloads_provider.get_metric_for_article_id_by_time_period(
             article_id='12345',
             metric_name=METRIC_NAME_1,
             by='day',
             per_page=2,
-            page=3
+            page=1
+        )
+        async_redis_client_mock.hgetall.assert_called_once_with(
+            f'article:12345:{METRIC_NAME_1}:by_date'
         )
-
         assert result == {
             'totalPeriods': 3,
-            'totalValue': ANY,
-            'periods': []
+            'totalValue': 30,
+            'periods': [{
+                'period': '2023-10-03',
+                'value': 15
+            }, {
+                'period': '2023-10-02',
+                'value': 10
+            }]
         }
 
+    async def test_should_read_hash_rather_than_period_index_until_it_was_backfilled(
+        self,
+        page_views_and_downloads_provider: PageViewsAndDownloadsProvider,
+        async_redis_client_smembers_mock: AsyncMock,
+        async_redis_client_pipeline_mock: MagicMock,
+        async_redis_client_mock: AsyncMock
+    ):
+        # an incremental refresh indexed the latest date only,
+        # the older dates were loaded before the period index was introduced
+        async_redis_client_smembers_mock.return_value = set()
+        async_redis_client_pipeline_mock.execute.return_value = [1, [b'2023-10-03'], b'30:3']
+        async_redis_client_mock.get.return_value = b'30:3'
+        async_redis_client_mock.hgetall.return_value = {
+            b'2023-10-01': b'5',
+            b'2023-10-02': b'10',
+            b'2023-10-03': b'15'
+        }
+        result = await page_views_and_downloads_provider.get_metric_for_article_id_by_time_period(
+            article_id='12345',
+            metric_name=METRIC_NAME_1,
+            by='day',
+            per_page=10,
+            page=1
+        )
+        async_redis_client_pipeline_mock.zrevrange.assert_not_called()
+        assert result['totalPeriods'] == 3
+        assert [period['period'] for period in result['periods']] == [
+            '2023-10-03', '2023-10-02', '2023-10-01'
+        ]
+
 
 class TestPageViewsAndDownloadsProvider:
     def test_should_put_page_view_and_download_totals_in_redis(
         self,
-        iter_dict_from_bq_query_with_progress_mock: MagicMock,
+        iter_column_batch_from_bq_query_with_progress_mock: MagicMock,
         page_views_and_downloads_provider: PageViewsAndDownloadsProvider,
         redis_client_pipeline_mock: MagicMock
     ):
-        iter_dict_from_bq_query_with_progress_mock.return_value = iter([{
-            'article_id': '12345',
-            'page_view_count': 5,
-            'download_count': 2
+        iter_column_batch_from_bq_query_with_progress_mock.return_value = iter([{
+            'article_id': ['12345'],
+            'page_view_count': [5],
+            'download_count': [2]
         }])
         page_views_and_downloads_provider.refresh_page_view_and_download_totals()
-        iter_dict_from_bq_query_with_progress_mock.assert_called_with(
+        iter_column_batch_from_bq_query_with_progress_mock.assert_called_with(
             project_name=page_views_and_downloads_provider.gcp_project_name,
             query=page_views_and_downloads_provider.page_view_and_download_totals_query,
+            batch_size=ANY,
             desc=ANY
         )
 
-        redis_client_pipeline_mock.set.assert_has_calls([
-            call('article:12345:page_views', 5),
-            call('article:12345:downloads', 2)
-        ])
+        redis_client_pipeline_mock.mset.assert_called_once_with({
+            'gen:generation1:article:12345:metric_totals': '5:2'
+        })
         redis_client_pipeline_mock.execute.assert_called_once()
 
+    def test_should_activate_totals_generation_after_loading(
+        self,
+        iter_column_batch_from_bq_query_with_progress_mock: MagicMock,
+        page_views_and_downloads_provider: PageViewsAndDownloadsProvider,
+        redis_client_mock: MagicMock
+    ):
+        iter_column_batch_from_bq_query_with_progress_mock.return_value = iter([])
+        page_views_and_downloads_provider.refresh_page_view_and_download_totals()
+        redis_client_mock.set.assert_called_once_with(
+            'generation:totals',
+            'generation1',
+            get=True
+        )
+
+    def test_should_add_article_ids_to_index_with_same_score(
+        self,
+        iter_column_batch_from_bq_query_with_progress_mock: MagicMock,
+        page_views_and_downloads_provider: PageViewsAndDownloadsProvider,
+        redis_client_pipeline_mock: MagicMock
+    ):
+        iter_column_batch_from_bq_query_with_progress_mock.return_value = iter([{
+            'article_id': ['12345', '12346'],
+            'page_view_count': [5, 3],
+            'download_count': [2, 1]
+        }])
+        page_views_and_downloads_provider.refresh_page_view_and_download_totals()
+        redis_client_pipeline_mock.zadd.assert_called_once_with(
+            'gen:generation1:' + ARTICLE_IDS_INDEX_KEY,
+            {'12345': 0, '12346': 0}
+        )
+
     def test_should_replace_number_of_days_in_query(
         self,
         iter_dict_from_bq_query_with_progress_mock: MagicMock,
@@ -347,11 +563,207 @@ class TestPageViewsAndDownloadsProvider:
         }])
         page_views_and_downloads_provider.refresh_page_views_and_downloads_daily(number_of_days=3)
         redis_client_pipeline_mock.hset.assert_has_calls([
-            call('article:12345:page_views:by_date', '2023-10-01', 5),
-            call('article:12345:downloads:by_date', '2023-10-01', 2)
+            call('article:12345:page_views:by_date', mapping={'2023-10-01': 5}),
+            call('article:12345:downloads:by_date', mapping={'2023-10-01': 2})
         ])
         redis_client_pipeline_mock.execute.assert_called_once()
 
+    def test_should_put_all_daily_values_of_article_with_one_hset_per_metric(
+        self,
+        iter_dict_from_bq_query_with_progress_mock: MagicMock,
+        page_views_and_downloads_provider: PageViewsAndDownloadsProvider,
+        redis_client_pipeline_mock: MagicMock
+    ):
+        iter_dict_from_bq_query_with_progress_mock.return_value = iter([{
+            'article_id': '12345',
+            'event_date': date.fromisoformat('2023-10-01'),
+            'page_view_count': 5,
+            'download_count': 2
+        }, {
+            'article_id': '12345',
+            'event_date': date.fromisoformat('2023-10-02'),
+            'page_view_count': 6,
+            'download_count': 3
+        }])
+        page_views_and_downloads_provider.refresh_page_views_and_downloads_daily(number_of_days=3)
+        assert redis_client_pipeline_mock.hset.call_args_list == [
+            call('article:12345:page_views:by_date', mapping={'2023-10-01': 5, '2023-10-02': 6}),
+            call('article:12345:downloads:by_date', mapping={'2023-10-01': 2, '2023-10-02': 3})
+        ]
+        redis_client_pipeline_mock.zadd.assert_any_call(
+            'index:by_date:periods',
+            {
+                '2023-10-01': get_period_score('2023-10-01'),
+                '2023-10-02': get_period_score('2023-10-02')
+            }
+        )
+
+    def test_should_add_dates_to_daily_period_index(
+        self,
+        iter_dict_from_bq_query_with_progress_mock: MagicMock,
+        page_views_and_downloads_provider: PageViewsAndDownloadsProvider,
+        redis_client_pipeline_mock: MagicMock
+    ):
+        iter_dict_from_bq_query_with_progress_mock.return_value = iter([{
+            'article_id': '12345',
+            'event_date': date.fromisoformat('2023-10-01'),
+            'page_view_count': 5,
+            'download_count': 2
+        }])
+        page_views_and_downloads_provider.refresh_page_views_and_downloads_daily(number_of_days=3)
+        redis_client_pipeline_mock.zadd.assert_any_call(
+            'article:12345:page_views:by_date:period_index',
+            {'2023-10-01': get_period_score('2023-10-01')}
+        )
+        redis_client_pipeline_mock.zadd.assert_any_call(
+            'article:12345:downloads:by_date:period_index',
+            {'2023-10-01': get_period_score('2023-10-01')}
+        )
+        redis_client_pipeline_mock.zadd.assert_any_call(
+            'index:by_date:periods',
+            {'2023-10-01': get_period_score('2023-10-01')}
+        )
+        redis_client_pipeline_mock.sadd.assert_called_once_with(
+            'index:by_date:2023-10-01:keys',
+            'article:12345:page_views:by_date',
+            'article:12345:downloads:by_date'
+        )
+
+    def test_should_store_last_loaded_event_date(
+        self,
+        iter_dict_from_bq_query_with_progress_mock: MagicMock,
+        page_views_and_downloads_provider: PageViewsAndDownloadsProvider,
+        redis_client_mock: MagicMock
+    ):
+        iter_dict_from_bq_query_with_progress_mock.return_value = iter([{
+            'article_id': '12345',
+            'event_date': date.fromisoformat('2023-10-02'),
+            'page_view_count': 5,
+            'download_count': 2
+        }, {
+            'article_id': '12345',
+            'event_date': date.fromisoformat('2023-10-01'),
+            'page_view_count': 5,
+            'download_count': 2
+        }])
+        page_views_and_downloads_provider.refresh_page_views_and_downloads_daily(number_of_days=3)
+        redis_client_mock.set.assert_any_call(
+            DAILY_REFRESH_LAST_EVENT_DATE_KEY,
+            '2023-10-02'
+        )
+
+    def test_should_backfill_daily_period_index_once_before_daily_refresh(
+        self,
+        iter_dict_from_bq_query_with_progress_mock: MagicMock,
+        page_views_and_downloads_provider: PageViewsAndDownloadsProvider,
+        redis_client_mock: MagicMock,
+        redis_client_pipeline_mock: MagicMock,
+        completed_storage_migration_names: set[str]
+    ):
+        iter_dict_from_bq_query_with_progress_mock.return_value = iter([])
+        completed_storage_migration_names.clear()
+        redis_client_mock.zrangebyscore.return_value = []
+        redis_client_mock.scan_iter.side_effect = [
+            iter([b'article:12345:page_views:by_date']),
+            iter([])
+        ]
+        redis_client_pipeline_mock.execute.return_value = [{b'2023-09-01': b'5'}]
+        page_views_and_downloads_provider.refresh_page_views_and_downloads_daily(number_of_days=3)
+        redis_client_mock.scan_iter.assert_has_calls([
+            call(match='article:*:page_views:by_date', count=1000),
+            call(match='article:*:downloads:by_date', count=1000)
+        ])
+        redis_client_pipeline_mock.zadd.assert_any_call(
+            'article:12345:page_views:by_date:period_index',
+            {'2023-09-01': get_period_score('2023-09-01')}
+        )
+        redis_client_mock.sadd.assert_called_once_with(
+            'storage_migrations:completed',
+            'period_index_backfill:by_date'
+        )
+
+    def test_should_not_backfill_daily_period_index_again(
+        self,
+        iter_dict_from_bq_query_with_progress_mock: MagicMock,
+        page_views_and_downloads_provider: PageViewsAndDownloadsProvider,
+        redis_client_mock: MagicMock
+    ):
+        iter_dict_from_bq_query_with_progress_mock.return_value = iter([])
+        redis_client_mock.zrangebyscore.return_value = []
+        page_views_and_downloads_provider.refresh_page_views_and_downloads_daily(number_of_days=3)
+        redis_client_mock.sismember.assert_any_call(
+            'storage_migrations:completed',
+            'period_index_backfill:by_date'
+        )
+        redis_client_mock.scan_iter.assert_not_called()
+        redis_client_mock.sadd.assert_not_called()
+
+    def test_should_bump_periods_generation_after_daily_refresh(
+        self,
+        iter_dict_from_bq_query_with_progress_mock: MagicMock,
+        page_views_and_downloads_provider: PageViewsAndDownloadsProvider,
+        redis_client_mock: MagicMock
+    ):
+        iter_dict_from_bq_query_with_progress_mock.return_value = iter([])
+        page_views_and_downloads_provider.refresh_page_views_and_downloads_daily(number_of_days=3)
+        redis_client_mock.set.assert_called_once_with('generation:periods', ANY)
+
+    def test_should_only_query_days_since_last_loaded_event_date_if_incremental(
+        self,
+        iter_dict_from_bq_query_with_progress_mock: MagicMock,
+        page_views_and_downloads_provider: PageViewsAndDownloadsProvider,
+        redis_client_mock: MagicMock
+    ):
+        redis_client_mock.get.return_value = b'2023-10-01'
+        with patch.object(provider_module, 'date') as date_mock:
+            date_mock.today.return_value = date(2023, 10, 3)
+            date_mock.fromisoformat = date.fromisoformat
+            page_views_and_downloads_provider.refresh_page_views_and_downloads_daily(
+                number_of_days=30,
+                incremental=True,
+                late_arrival_days=3
+            )
+        redis_client_mock.get.assert_called_once_with(DAILY_REFRESH_LAST_EVENT_DATE_KEY)
+        iter_dict_from_bq_query_with_progress_mock.assert_called_with(
+            project_name=page_views_and_downloads_provider.gcp_project_name,
+            query=get_query_with_replaced_number_of_days(
+                page_views_and_downloads_provider.page_views_and_downloads_daily_query,
+                number_of_days=5
+            ),
+            desc=ANY
+        )
+
+    def test_should_only_put_changed_daily_values_if_incremental(
+        self,
+        iter_dict_from_bq_query_with_progress_mock: MagicMock,
+        page_views_and_downloads_provider: PageViewsAndDownloadsProvider,
+        redis_client_mock: MagicMock,
+        redis_client_pipeline_mock: MagicMock
+    ):
+        redis_client_mock.get.return_value = None
+        iter_dict_from_bq_query_with_progress_mock.return_value = iter([{
+            'article_id': '12345',
+            'event_date': date.fromisoformat('2023-10-01'),
+            'page_view_count': 5,
+            'download_count': 2
+        }])
+        redis_client_pipeline_mock.execute.side_effect = [
+            # existing page views and downloads values
+            [b'5', b'1'],
+            []
+        ]
+        page_views_and_downloads_provider.refresh_page_views_and_downloads_daily(
+            number_of_days=3,
+            incremental=True
+        )
+        redis_client_pipeline_mock.hget.assert_has_calls([
+            call('article:12345:page_views:by_date', '2023-10-01'),
+            call('article:12345:downloads:by_date', '2023-10-01')
+        ])
+        redis_client_pipeline_mock.hset.assert_called_once_with(
+            'article:12345:downloads:by_date', mapping={'2023-10-01': 2}
+        )
+
     def test_should_replace_number_of_months_in_query(
         self,
         iter_dict_from_bq_query_with_progress_mock: MagicMock,
@@ -369,7 +781,7 @@ class TestPageViewsAndDownloadsProvider:
             desc=ANY
         )
 
-    def test_should_put_data_in_redis_for_monthly_page_views_and_downloads(
+    def test_should_put_monthly_page_views_and_downloads_in_one_hash_field(
         self,
         iter_dict_from_bq_query_with_progress_mock: MagicMock,
         page_views_and_downloads_provider: PageViewsAndDownloadsProvider,
@@ -384,98 +796,191 @@ class TestPageViewsAndDownloadsProvider:
         page_views_and_downloads_provider.refresh_page_views_and_downloads_monthly(
             number_of_months=3
         )
-        redis_client_pipeline_mock.hset.assert_has_calls([
-            call('article:12345:page_views:by_month', '2023-10', 5),
-            call('article:12345:downloads:by_month', '2023-10', 2)
-        ])
+        redis_client_pipeline_mock.hset.assert_called_once_with(
+            'article:12345:by_month',
+            mapping={'2023-10': '5:2'}
+        )
         redis_client_pipeline_mock.execute.assert_called_once()
 
-    def test_should_prune_daily_fields_older_than_the_number_of_days_window(
+    def test_should_add_year_months_to_monthly_period_index(
         self,
         iter_dict_from_bq_query_with_progress_mock: MagicMock,
         page_views_and_downloads_provider: PageViewsAndDownloadsProvider,
-        redis_client_mock: MagicMock,
         redis_client_pipeline_mock: MagicMock
     ):
         iter_dict_from_bq_query_with_progress_mock.return_value = iter([{
             'article_id': '12345',
-            'event_date': date.fromisoformat('2023-10-01'),
+            'year_month': '2023-10',
             'page_view_count': 5,
             'download_count': 2
         }])
-        redis_client_mock.scan_iter.side_effect = [
-            iter([b'article:12345:page_views:by_date']),
-            iter([b'article:12345:downloads:by_date'])
+        page_views_and_downloads_provider.refresh_page_views_and_downloads_monthly(
+            number_of_months=3
+        )
+        redis_client_pipeline_mock.zadd.assert_any_call(
+            'article:12345:by_month:period_index',
+            {'2023-10': get_period_score('2023-10')}
+        )
+        redis_client_pipeline_mock.zadd.assert_any_call(
+            'index:by_month:periods',
+            {'2023-10': get_period_score('2023-10')}
+        )
+        redis_client_pipeline_mock.sadd.assert_called_once_with(
+            'index:by_month:2023-10:keys',
+            'article:12345:by_month'
+        )
+
+    def test_should_pack_monthly_hashes_per_metric_once_before_monthly_refresh(
+        self,
+        page_views_and_downloads_provider: PageViewsAndDownloadsProvider,
+        redis_client_mock: MagicMock,
+        redis_client_pipeline_mock: MagicMock,
+        completed_storage_migration_names: set[str]
+    ):
+        completed_storage_migration_names.remove('packed_monthly_values')
+        redis_client_mock.zrangebyscore.return_value = []
+        redis_client_mock.scan_iter.return_value = iter([b'article:12345:page_views:by_month'])
+        redis_client_pipeline_mock.execute.side_effect = [
+            [{b'2020-01': b'5'}, {b'2020-01': b'2'}],
+            []
         ]
-        redis_client_mock.hkeys.return_value = [b'2023-09-01', b'2023-10-01']
+        page_views_and_downloads_provider.refresh_page_views_and_downloads_monthly(
+            number_of_months=3
+        )
+        redis_client_mock.scan_iter.assert_called_once_with(
+            match='article:*:page_views:by_month',
+            count=1000
+        )
+        redis_client_pipeline_mock.hset.assert_called_once_with(
+            'article:12345:by_month',
+            mapping={'2020-01': '5:2'}
+        )
+        redis_client_pipeline_mock.unlink.assert_called_once_with(
+            'article:12345:downloads:by_month',
+            'article:12345:page_views:by_month',
+            'article:12345:downloads:by_month:period_index',
+            'article:12345:page_views:by_month:period_index'
+        )
+        redis_client_mock.sadd.assert_called_once_with(
+            'storage_migrations:completed',
+            'packed_monthly_values'
+        )
+
+    def test_should_not_pack_monthly_hashes_per_metric_again(
+        self,
+        page_views_and_downloads_provider: PageViewsAndDownloadsProvider,
+        redis_client_mock: MagicMock
+    ):
+        redis_client_mock.zrangebyscore.return_value = []
+        page_views_and_downloads_provider.refresh_page_views_and_downloads_monthly(
+            number_of_months=3
+        )
+        redis_client_mock.scan_iter.assert_not_called()
+        redis_client_mock.sadd.assert_not_called()
+
+    def test_should_prune_daily_fields_of_indexed_dates_before_the_number_of_days_window(
+        self,
+        page_views_and_downloads_provider: PageViewsAndDownloadsProvider,
+        redis_client_mock: MagicMock,
+        redis_client_pipeline_mock: MagicMock
+    ):
+        redis_client_mock.zrangebyscore.return_value = [b'2023-09-01']
+        redis_client_mock.sscan_iter.return_value = iter([
+            b'article:12345:page_views:by_date',
+            b'article:12345:downloads:by_date'
+        ])
         with patch.object(provider_module, 'date') as date_mock:
             date_mock.today.return_value = date(2023, 10, 3)
+            date_mock.fromisoformat = date.fromisoformat
             page_views_and_downloads_provider.refresh_page_views_and_downloads_daily(
                 number_of_days=3
             )
-        # cutoff = 2023-10-03 minus 3 days = 2023-09-30: '2023-09-01' is dropped, '2023-10-01' kept
-        redis_client_mock.scan_iter.assert_any_call(
-            match='article:*:page_views:by_date', count=1000
+        # cutoff = 2023-10-03 minus 3 days = 2023-09-30
+        redis_client_mock.zrangebyscore.assert_called_once_with(
+            'index:by_date:periods',
+            '-inf',
+            f'({get_period_score('2023-09-30')}'
         )
-        redis_client_pipeline_mock.hdel.assert_any_call(
-            b'article:12345:page_views:by_date', b'2023-09-01'
+        redis_client_mock.sscan_iter.assert_called_once_with(
+            'index:by_date:2023-09-01:keys',
+            count=1000
         )
-        redis_client_pipeline_mock.hdel.assert_any_call(
-            b'article:12345:downloads:by_date', b'2023-09-01'
+        redis_client_pipeline_mock.hdel.assert_has_calls([
+            call(b'article:12345:page_views:by_date', '2023-09-01'),
+            call(b'article:12345:downloads:by_date', '2023-09-01')
+        ])
+        redis_client_pipeline_mock.zrem.assert_any_call(
+            'article:12345:page_views:by_date:period_index', '2023-09-01'
         )
+        redis_client_pipeline_mock.delete.assert_called_once_with('index:by_date:2023-09-01:keys')
+        redis_client_pipeline_mock.zrem.assert_any_call('index:by_date:periods', '2023-09-01')
 
-    def test_should_not_prune_daily_fields_within_the_number_of_days_window(
+    def test_should_not_scan_keyspace_when_pruning_by_default(
         self,
-        iter_dict_from_bq_query_with_progress_mock: MagicMock,
         page_views_and_downloads_provider: PageViewsAndDownloadsProvider,
         redis_client_mock: MagicMock,
         redis_client_pipeline_mock: MagicMock
     ):
-        iter_dict_from_bq_query_with_progress_mock.return_value = iter([{
-            'article_id': '12345',
-            'event_date': date.fromisoformat('2023-10-01'),
-            'page_view_count': 5,
-            'download_count': 2
-        }])
-        redis_client_mock.scan_iter.side_effect = [
-            iter([b'article:12345:page_views:by_date']),
-            iter([b'article:12345:downloads:by_date'])
-        ]
-        redis_client_mock.hkeys.return_value = [b'2023-10-01', b'2023-10-02']
+        redis_client_mock.zrangebyscore.return_value = []
+        page_views_and_downloads_provider.refresh_page_views_and_downloads_daily(
+            number_of_days=3
+        )
+        redis_client_mock.scan_iter.assert_not_called()
+        redis_client_mock.hkeys.assert_not_called()
+        redis_client_pipeline_mock.hdel.assert_not_called()
+
+    def test_should_prune_monthly_fields_of_indexed_months_before_the_number_of_months_window(
+        self,
+        page_views_and_downloads_provider: PageViewsAndDownloadsProvider,
+        redis_client_mock: MagicMock,
+        redis_client_pipeline_mock: MagicMock
+    ):
+        redis_client_mock.zrangebyscore.return_value = [b'2020-01']
+        redis_client_mock.sscan_iter.return_value = iter([
+            b'article:12345:page_views:by_month'
+        ])
         with patch.object(provider_module, 'date') as date_mock:
             date_mock.today.return_value = date(2023, 10, 3)
-            page_views_and_downloads_provider.refresh_page_views_and_downloads_daily(
-                number_of_days=30
+            page_views_and_downloads_provider.refresh_page_views_and_downloads_monthly(
+                number_of_months=3
             )
-        redis_client_pipeline_mock.hdel.assert_not_called()
+        # cutoff month = 2023-07
+        redis_client_mock.zrangebyscore.assert_called_once_with(
+            'index:by_month:periods',
+            '-inf',
+            f'({get_period_score('2023-07')}'
+        )
+        redis_client_pipeline_mock.hdel.assert_called_once_with(
+            b'article:12345:page_views:by_month', '2020-01'
+        )
 
-    def test_should_prune_monthly_fields_older_than_the_number_of_months_window(
+    def test_should_prune_unindexed_daily_fields_older_than_the_number_of_days_window(
         self,
         iter_dict_from_bq_query_with_progress_mock: MagicMock,
         page_views_and_downloads_provider: PageViewsAndDownloadsProvider,
         redis_client_mock: MagicMock,
         redis_client_pipeline_mock: MagicMock
     ):
-        iter_dict_from_bq_query_with_progress_mock.return_value = iter([{
-            'article_id': '12345',
-            'year_month': '2023-10',
-            'page_view_count': 5,
-            'download_count': 2
-        }])
+        iter_dict_from_bq_query_with_progress_mock.return_value = iter([])
+        redis_client_mock.zrangebyscore.return_value = []
         redis_client_mock.scan_iter.side_effect = [
-            iter([b'article:12345:page_views:by_month']),
-            iter([b'article:12345:downloads:by_month'])
+            iter([b'article:12345:page_views:by_date']),
+            iter([b'article:12345:downloads:by_date'])
         ]
-        redis_client_mock.hkeys.return_value = [b'2020-01', b'2023-10']
+        redis_client_mock.hkeys.return_value = [b'2023-09-01', b'2023-10-01']
         with patch.object(provider_module, 'date') as date_mock:
             date_mock.today.return_value = date(2023, 10, 3)
-            page_views_and_downloads_provider.refresh_page_views_and_downloads_monthly(
-                number_of_months=3
+            date_mock.fromisoformat = date.fromisoformat
+            page_views_and_downloads_provider.refresh_page_views_and_downloads_daily(
+                number_of_days=3,
+                prune_unindexed=True
             )
-        # cutoff month = 2023-07: '2020-01' is dropped, '2023-10' kept
         redis_client_mock.scan_iter.assert_any_call(
-            match='article:*:page_views:by_month', count=1000
+            match='article:*:page_views:by_date', count=1000
         )
         redis_client_pipeline_mock.hdel.assert_any_call(
-            b'article:12345:page_views:by_month', b'2020-01'
+            b'article:12345:page_views:by_date', b'2023-09-01'
+        )
+        redis_client_pipeline_mock.hdel.assert_any_call(
+            b'article:12345:downloads:by_date', b'2023-09-01'
         )
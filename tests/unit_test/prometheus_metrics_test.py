@@ -0,0 +1,174 @@
+import json
+from typing import Optional
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+from redis.asyncio import BlockingConnectionPool as AsyncBlockingConnectionPool
+from redis.asyncio import Redis as AsyncRedis
+from redis.asyncio.client import Pipeline as AsyncPipeline
+
+from data_hub_metrics_api.prometheus_metrics import (
+    METRIC_NAME_PREFIX,
+    UNMATCHED_ROUTE_LABEL,
+    InstrumentedAsyncRedis,
+    PrometheusMiddleware,
+    get_current_provider_method,
+    get_prometheus_exposition,
+    observe_provider_method,
+    observe_result_size,
+    update_redis_pool_metrics
+)
+from data_hub_metrics_api.utils.refresh_job_runs import RefreshJobRunTypedDict
+
+
+REFRESH_JOB_RUN_DICT_1: RefreshJobRunTypedDict = {
+    'job_name': 'job1',
+    'started_timestamp': 2000.0,
+    'duration_seconds': 12.5,
+    'rows_loaded': 100,
+    'rows_per_second': 8.0,
+    'stage_duration_seconds': {'bigquery_query': 2.5, 'redis': 5.0},
+    'redis_command_count': 20,
+    'bytes_processed': 2000,
+    'succeeded': True
+}
+
+
+def get_sample_value(name: str, labels: dict[str, str]) -> float:
+    value: Optional[float] = REGISTRY.get_sample_value(METRIC_NAME_PREFIX + name, labels)
+    return value or 0
+
+
+def get_async_redis_client_mock() -> AsyncMock:
+    async_redis_client_mock = AsyncMock(name='async_redis_client_mock')
+    async_redis_client_mock.connection_pool = MagicMock(name='async_redis_connection_pool')
+    return async_redis_client_mock
+
+
+class TestObserveProviderMethod:
+    async def test_should_label_calls_within_method_and_observe_duration(self):
+        labels = {'provider': 'provider1', 'method': 'get_value'}
+        previous_count = get_sample_value('provider_method_duration_seconds_count', labels)
+
+        @observe_provider_method('provider1')
+        async def get_value() -> str:
+            return get_current_provider_method()
+
+        assert await get_value() == 'provider1.get_value'
+        assert get_current_provider_method() == ''
+        assert get_sample_value(
+            'provider_method_duration_seconds_count',
+            labels
+        ) == previous_count + 1
+
+
+class TestInstrumentedAsyncRedis:
+    async def test_should_count_commands_by_provider_method(self):
+        labels = {'command': 'GET', 'provider_method': 'provider1.get_value'}
+        previous_count = get_sample_value('redis_commands_total', labels)
+        async_redis_client = InstrumentedAsyncRedis()
+
+        @observe_provider_method('provider1')
+        async def get_value():
+            return await async_redis_client.get('key1')
+
+        with patch.object(AsyncRedis, 'execute_command', AsyncMock(return_value=b'value1')):
+            assert await get_value() == b'value1'
+        assert get_sample_value('redis_commands_total', labels) == previous_count + 1
+        assert get_sample_value('redis_round_trip_duration_seconds_count', labels) >= 1
+
+    async def test_should_count_commands_of_pipeline_and_observe_one_round_trip(self):
+        labels = {'command': 'HGET', 'provider_method': ''}
+        pipeline_labels = {'command': 'PIPELINE', 'provider_method': ''}
+        previous_count = get_sample_value('redis_commands_total', labels)
+        previous_round_trip_count = get_sample_value(
+            'redis_round_trip_duration_seconds_count',
+            pipeline_labels
+        )
+        pipeline = InstrumentedAsyncRedis().pipeline()
+        pipeline.hget('key1', 'field1')
+        pipeline.hget('key2', 'field1')
+        with patch.object(AsyncPipeline, 'execute', AsyncMock(return_value=[b'1', b'2'])):
+            assert await pipeline.execute() == [b'1', b'2']
+        assert get_sample_value('redis_commands_total', labels) == previous_count + 2
+        assert get_sample_value(
+            'redis_round_trip_duration_seconds_count',
+            pipeline_labels
+        ) == previous_round_trip_count + 1
+
+
+class TestPrometheusMiddleware:
+    def test_should_observe_request_duration_by_route_template(self):
+        app = FastAPI()
+        app.add_middleware(PrometheusMiddleware)
+
+        @app.get('/test/{item_id}/value')
+        async def provide_value(item_id: str) -> str:
+            return item_id
+
+        labels = {'method': 'GET', 'route': '/test/{item_id}/value', 'status_code': '200'}
+        unmatched_labels = {'method': 'GET', 'route': UNMATCHED_ROUTE_LABEL, 'status_code': '404'}
+        previous_count = get_sample_value('request_duration_seconds_count', labels)
+        previous_unmatched_count = get_sample_value(
+            'request_duration_seconds_count',
+            unmatched_labels
+        )
+        client = TestClient(app)
+        client.get('/test/1/value')
+        client.get('/test/2/value')
+        client.get('/other')
+        assert get_sample_value(
+            'request_duration_seconds_count',
+            labels
+        ) == previous_count + 2
+        assert get_sample_value(
+            'request_duration_seconds_count',
+            unmatched_labels
+        ) == previous_unmatched_count + 1
+
+
+class TestObserveResultSize:
+    def test_should_observe_result_size(self):
+        labels = {'result': 'result1'}
+        previous_sum = get_sample_value('result_size_sum', labels)
+        observe_result_size('result1', 20)
+        assert get_sample_value('result_size_sum', labels) == previous_sum + 20
+
+
+class TestUpdateRedisPoolMetrics:
+    def test_should_set_max_and_used_connections_of_pool(self):
+        update_redis_pool_metrics(
+            'pool1',
+            AsyncBlockingConnectionPool(max_connections=12)
+        )
+        assert get_sample_value('redis_pool_max_connections', {'pool': 'pool1'}) == 12
+        assert REGISTRY.get_sample_value(
+            METRIC_NAME_PREFIX + 'redis_pool_connections',
+            {'pool': 'pool1', 'state': 'used'}
+        ) == 0
+
+
+class TestGetPrometheusExposition:
+    async def test_should_include_last_refresh_job_runs(self):
+        async_redis_client_mock = get_async_redis_client_mock()
+        async_redis_client_mock.hgetall.return_value = {
+            b'job1': json.dumps(REFRESH_JOB_RUN_DICT_1).encode()
+        }
+        exposition = (await get_prometheus_exposition(async_redis_client_mock)).decode('utf-8')
+        assert (
+            METRIC_NAME_PREFIX + 'refresh_job_last_duration_seconds{job="job1"} 12.5'
+        ) in exposition
+        assert METRIC_NAME_PREFIX + 'refresh_job_last_rows_loaded{job="job1"} 100.0' in exposition
+        assert METRIC_NAME_PREFIX + 'refresh_job_last_succeeded{job="job1"} 1.0' in exposition
+        assert (
+            METRIC_NAME_PREFIX
+            + 'refresh_job_last_stage_duration_seconds{job="job1",stage="bigquery_query"} 2.5'
+        ) in exposition
+
+    async def test_should_return_exposition_if_redis_fails(self):
+        async_redis_client_mock = get_async_redis_client_mock()
+        async_redis_client_mock.hgetall.side_effect = ConnectionError()
+        exposition = (await get_prometheus_exposition(async_redis_client_mock)).decode('utf-8')
+        assert METRIC_NAME_PREFIX + 'request_duration_seconds' in exposition
@@ -0,0 +1,189 @@
+# pylint: disable=duplicate-code
+import json
+from pathlib import Path
+from typing import Iterator
+from unittest.mock import MagicMock, patch
+import pytest
+from data_hub_metrics_api.page_views_and_downloads_provider import (
+    DEFAULT_LATE_ARRIVAL_DAYS
+)
+from data_hub_metrics_api.refresh_data import (
+    citations_cli,
+    page_views_and_downloads_daily_cli
+)
+from data_hub_metrics_api.refresh_data.all_cli import (
+    ARTICLE_SUMMARIES_REFRESH_JOB_NAME,
+    DEFAULT_MAX_CONCURRENT_QUERIES,
+    main,
+    run_refresh_job
+)
+from data_hub_metrics_api.utils.refresh_job_runs import (
+    REFRESH_JOB_LAST_RUN_KEY,
+    REFRESH_JOB_RUN_REPORT_PATH_ENV_NAME
+)
+
+import data_hub_metrics_api.refresh_data.cli_common as cli_common_module
+import data_hub_metrics_api.refresh_data.all_cli as cli_module
+
+
+ARGS = ['--number-of-days=123', '--number-of-months=12']
+
+
+@pytest.fixture(name='get_citations_provider_list_mock', autouse=True)
+def _get_citations_provider_list_mock() -> Iterator[MagicMock]:
+    with patch.object(cli_common_module, 'get_citations_provider_list') as mock:
+        yield mock
+
+
+@pytest.fixture(name='page_views_and_downloads_provider_class_mock', autouse=True)
+def _page_views_and_downloads_provider_class_mock() -> Iterator[MagicMock]:
+    with patch.object(cli_common_module, 'PageViewsAndDownloadsProvider') as mock:
+        yield mock
+
+
+@pytest.fixture(name='non_article_page_views_provider_class_mock', autouse=True)
+def _non_article_page_views_provider_class_mock() -> Iterator[MagicMock]:
+    with patch.object(cli_module, 'NonArticlePageViewsProvider') as mock:
+        yield mock
+
+
+@pytest.fixture(name='metric_summary_provider_class_mock', autouse=True)
+def _metric_summary_provider_class_mock() -> Iterator[MagicMock]:
+    with patch.object(cli_common_module, 'MetricSummaryProvider') as mock:
+        yield mock
+
+
+class TestMain:
+    def test_should_call_all_loaders(
+        self,
+        get_citations_provider_list_mock: MagicMock,
+        page_views_and_downloads_provider_class_mock: MagicMock,
+        non_article_page_views_provider_class_mock: MagicMock
+    ):
+        provider = MagicMock(name='provider_1')
+        get_citations_provider_list_mock.return_value = [provider]
+        main(ARGS)
+        provider.refresh_data.assert_called_once()
+        page_views_and_downloads_provider_mock = (
+            page_views_and_downloads_provider_class_mock.return_value
+        )
+        (
+            page_views_and_downloads_provider_mock
+            .refresh_page_view_and_download_totals
+            .assert_called_once_with()
+        )
+        (
+            page_views_and_downloads_provider_mock
+            .refresh_page_views_and_downloads_daily
+            .assert_called_once_with(
+                number_of_days=123,
+                incremental=False,
+                late_arrival_days=DEFAULT_LATE_ARRIVAL_DAYS,
+                prune_unindexed=False,
+                daily_storage_layout=None
+            )
+        )
+        (
+            page_views_and_downloads_provider_mock
+            .refresh_page_views_and_downloads_monthly
+            .assert_called_once_with(
+                number_of_months=12,
+                prune_unindexed=False
+            )
+        )
+        (
+            non_article_page_views_provider_class_mock.return_value
+            .refresh_non_article_page_view_totals
+            .assert_called_once_with()
+        )
+
+    def test_should_refresh_article_summaries_once(
+        self,
+        metric_summary_provider_class_mock: MagicMock
+    ):
+        main(ARGS)
+        (
+            metric_summary_provider_class_mock.return_value
+            .refresh_article_summaries
+            .assert_called_once_with()
+        )
+
+    def test_should_record_refresh_job_run_for_each_job(
+        self,
+        redis_client_mock: MagicMock
+    ):
+        run_report = main(ARGS)
+        recorded_job_names = {
+            call.args[1]
+            for call in redis_client_mock.hset.call_args_list
+            if call.args[0] == REFRESH_JOB_LAST_RUN_KEY
+        }
+        assert recorded_job_names == {
+            refresh_job_run['job_name']
+            for refresh_job_run in run_report['refresh_job_runs']
+        }
+        assert len(recorded_job_names) == 6
+        assert run_report['refresh_job_runs'][-1]['job_name'] == (
+            ARTICLE_SUMMARIES_REFRESH_JOB_NAME
+        )
+        assert run_report['succeeded'] is True
+
+    def test_should_run_other_jobs_and_fail_if_one_job_failed(
+        self,
+        get_citations_provider_list_mock: MagicMock,
+        page_views_and_downloads_provider_class_mock: MagicMock,
+        metric_summary_provider_class_mock: MagicMock
+    ):
+        get_citations_provider_list_mock.side_effect = RuntimeError('error')
+        with pytest.raises(RuntimeError):
+            main(ARGS)
+        (
+            page_views_and_downloads_provider_class_mock.return_value
+            .refresh_page_views_and_downloads_daily
+            .assert_called_once()
+        )
+        (
+            metric_summary_provider_class_mock.return_value
+            .refresh_article_summaries
+            .assert_called_once()
+        )
+
+    def test_should_write_combined_run_report(
+        self,
+        mock_env: dict,
+        tmp_path: Path
+    ):
+        run_report_path = tmp_path / 'run_report.json'
+        mock_env[REFRESH_JOB_RUN_REPORT_PATH_ENV_NAME] = str(run_report_path)
+        main(ARGS + ['--max-workers=2'])
+        run_report_dict = json.loads(run_report_path.read_text(encoding='utf-8'))
+        assert run_report_dict['max_workers'] == 2
+        assert run_report_dict['max_concurrent_queries'] == DEFAULT_MAX_CONCURRENT_QUERIES
+        assert {
+            refresh_job_run['job_name']
+            for refresh_job_run in run_report_dict['refresh_job_runs']
+        } >= {citations_cli.REFRESH_JOB_NAME, page_views_and_downloads_daily_cli.REFRESH_JOB_NAME}
+
+    def test_should_not_limit_concurrent_queries_below_number_of_loaders_by_default(self):
+        run_report = main(ARGS)
+        assert run_report['max_concurrent_queries'] >= (
+            len(run_report['refresh_job_runs']) - 1  # without the article summaries
+        )
+
+
+class TestRunRefreshJob:
+    def test_should_report_job_as_failed_if_run_could_not_be_recorded(
+        self,
+        redis_client_mock: MagicMock
+    ):
+        refresh_job_function = MagicMock(name='refresh_job_function')
+        with patch.object(cli_module, 'record_refresh_job_run') as record_refresh_job_run_mock:
+            record_refresh_job_run_mock.side_effect = RuntimeError('Redis not available')
+            refresh_job_run_dict = run_refresh_job(
+                redis_client_mock,
+                'job1',
+                refresh_job_function
+            )
+        assert refresh_job_run_dict['job_name'] == 'job1'
+        assert refresh_job_run_dict['succeeded'] is False
+        refresh_job_function.assert_not_called()
@@ -3,12 +3,18 @@ from unittest.mock import MagicMock, patch
 import pytest
 from data_hub_metrics_api.refresh_data.citations_cli import main
 
-import data_hub_metrics_api.refresh_data.citations_cli as cli_module
+import data_hub_metrics_api.refresh_data.cli_common as cli_common_module
 
 
 @pytest.fixture(name='get_citations_provider_list_mock', autouse=True)
 def _get_citations_provider_list_mock() -> Iterator[MagicMock]:
-    with patch.object(cli_module, 'get_citations_provider_list') as mock:
+    with patch.object(cli_common_module, 'get_citations_provider_list') as mock:
+        yield mock
+
+
+@pytest.fixture(name='metric_summary_provider_class_mock', autouse=True)
+def _metric_summary_provider_class_mock() -> Iterator[MagicMock]:
+    with patch.object(cli_common_module, 'MetricSummaryProvider') as mock:
         yield mock
 
 
@@ -21,3 +27,14 @@ class TestMain:
         get_citations_provider_list_mock.return_value = [provider]
         main()
         provider.refresh_data.assert_called_once()
+
+    def test_should_refresh_article_summaries_after_citations(
+        self,
+        metric_summary_provider_class_mock: MagicMock
+    ):
+        main()
+        (
+            metric_summary_provider_class_mock.return_value
+            .refresh_article_summaries
+            .assert_called_once_with()
+        )
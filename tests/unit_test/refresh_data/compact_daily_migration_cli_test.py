@@ -0,0 +1,135 @@
+# pylint: disable=duplicate-code
+from datetime import date
+from typing import Iterator
+from unittest.mock import MagicMock, patch
+import pytest
+from data_hub_metrics_api.page_views_and_downloads_provider import BigQueryResultRow
+from data_hub_metrics_api.refresh_data.compact_daily_migration_cli import (
+    REFRESH_JOB_NAME,
+    get_daily_storage_memory_report,
+    main
+)
+from data_hub_metrics_api.utils.refresh_job_runs import REFRESH_JOB_LAST_RUN_KEY
+from data_hub_metrics_api.utils.storage_migrations import (
+    COMPACT_DAILY_VALUES_MIGRATION_NAME,
+    COMPLETED_STORAGE_MIGRATIONS_KEY
+)
+
+import data_hub_metrics_api.refresh_data.cli_common as cli_common_module
+
+
+DAILY_ROW_1: BigQueryResultRow = {
+    'article_id': '12345',
+    'event_date': date(2023, 10, 1),
+    'page_view_count': 5,
+    'download_count': 2
+}
+
+
+@pytest.fixture(name='page_views_and_downloads_provider_class_mock', autouse=True)
+def _page_views_and_downloads_provider_class_mock() -> Iterator[MagicMock]:
+    with patch.object(cli_common_module, 'PageViewsAndDownloadsProvider') as mock:
+        yield mock
+
+
+@pytest.fixture(name='page_views_and_downloads_provider_mock')
+def _page_views_and_downloads_provider_mock(
+    page_views_and_downloads_provider_class_mock: MagicMock
+) -> MagicMock:
+    provider_mock = page_views_and_downloads_provider_class_mock.return_value
+    provider_mock.iter_daily_rows_from_hashes.return_value = iter([DAILY_ROW_1])
+    # consumes the rows, like the provider
+    provider_mock.put_compact_daily_rows.side_effect = list
+    return provider_mock
+
+
+class TestGetDailyStorageMemoryReport:
+    def test_should_estimate_memory_usage_of_both_layouts(
+        self,
+        redis_client_mock: MagicMock,
+        redis_client_pipeline_mock: MagicMock
+    ):
+        redis_client_mock.zrange.return_value = [b'2023-09', b'2023-10']
+        redis_client_mock.scan_iter.side_effect = lambda match, count: iter([
+            f'{match}:key'.encode('utf-8')
+        ])
+        # hash layout sample, compact layout sample, hash index, compact index
+        redis_client_pipeline_mock.execute.side_effect = [
+            [400, 200, 100, 100],
+            [50, 50, 20],
+            [1000],
+            [10]
+        ]
+        memory_report = get_daily_storage_memory_report(
+            redis_client_mock,
+            ['12345', '12346', '12347', '12348'],
+            sample_size=1
+        )
+        redis_client_pipeline_mock.memory_usage.assert_any_call(
+            'article:12345:compact_by_date:2023-10',
+            samples=0
+        )
+        redis_client_pipeline_mock.memory_usage.assert_any_call(
+            'article:12345:compact_by_date:day_counts',
+            samples=0
+        )
+        assert memory_report == {
+            'article_count': 4,
+            'sampled_article_count': 1,
+            'hash_layout_bytes_per_article': 800.0,
+            'compact_layout_bytes_per_article': 120.0,
+            'hash_layout_index_bytes': 1000,
+            'compact_layout_index_bytes': 10,
+            'estimated_hash_layout_bytes': 4200.0,
+            'estimated_compact_layout_bytes': 490.0
+        }
+
+
+class TestMain:
+    def test_should_copy_daily_rows_from_hashes_to_compact_layout(
+        self,
+        page_views_and_downloads_provider_mock: MagicMock
+    ):
+        main([])
+        page_views_and_downloads_provider_mock.put_compact_daily_rows.assert_called_once()
+        page_views_and_downloads_provider_mock.delete_daily_hashes.assert_not_called()
+
+    def test_should_set_compact_daily_values_migration_completed(
+        self,
+        page_views_and_downloads_provider_mock: MagicMock,
+        redis_client_mock: MagicMock
+    ):
+        main([])
+        page_views_and_downloads_provider_mock.put_compact_daily_rows.assert_called_once()
+        redis_client_mock.sadd.assert_called_once_with(
+            COMPLETED_STORAGE_MIGRATIONS_KEY,
+            COMPACT_DAILY_VALUES_MIGRATION_NAME
+        )
+
+    def test_should_report_memory_usage_for_copied_articles(
+        self,
+        page_views_and_downloads_provider_mock: MagicMock,
+        redis_client_pipeline_mock: MagicMock
+    ):
+        redis_client_pipeline_mock.execute.return_value = []
+        memory_report = main(['--sample-size=10'])
+        page_views_and_downloads_provider_mock.put_compact_daily_rows.assert_called_once()
+        assert memory_report['article_count'] == 1
+        assert memory_report['sampled_article_count'] == 1
+
+    def test_should_delete_daily_hashes_if_enabled(
+        self,
+        page_views_and_downloads_provider_mock: MagicMock
+    ):
+        main(['--delete-hashes'])
+        page_views_and_downloads_provider_mock.delete_daily_hashes.assert_called_once()
+
+    def test_should_record_refresh_job_run(
+        self,
+        redis_client_mock: MagicMock
+    ):
+        main([])
+        assert any(
+            call.args[:2] == (REFRESH_JOB_LAST_RUN_KEY, REFRESH_JOB_NAME)
+            for call in redis_client_mock.hset.call_args_list
+        )
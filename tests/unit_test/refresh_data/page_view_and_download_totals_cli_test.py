@@ -4,12 +4,12 @@ from unittest.mock import MagicMock, patch
 import pytest
 
 from data_hub_metrics_api.refresh_data.page_view_and_download_totals_cli import main
-import data_hub_metrics_api.refresh_data.page_view_and_download_totals_cli as cli_module
+import data_hub_metrics_api.refresh_data.cli_common as cli_common_module
 
 
 @pytest.fixture(name='page_views_and_downloads_provider_class_mock', autouse=True)
 def _page_views_and_downloads_provider_class_mock() -> Iterator[MagicMock]:
-    with patch.object(cli_module, 'PageViewsAndDownloadsProvider') as mock:
+    with patch.object(cli_common_module, 'PageViewsAndDownloadsProvider') as mock:
         yield mock
 
 
@@ -20,6 +20,12 @@ def _page_views_and_downloads_provider_mock(
     return page_views_and_downloads_provider_class_mock.return_value
 
 
+@pytest.fixture(name='metric_summary_provider_class_mock', autouse=True)
+def _metric_summary_provider_class_mock() -> Iterator[MagicMock]:
+    with patch.object(cli_common_module, 'MetricSummaryProvider') as mock:
+        yield mock
+
+
 class TestMain:
     def test_should_call_refresh_page_view_and_download_totals_on_the_provider(
         self,
@@ -31,3 +37,14 @@ class TestMain:
             .refresh_page_view_and_download_totals
             .assert_called_with()
         )
+
+    def test_should_refresh_article_summaries_after_totals(
+        self,
+        metric_summary_provider_class_mock: MagicMock
+    ):
+        main()
+        (
+            metric_summary_provider_class_mock.return_value
+            .refresh_article_summaries
+            .assert_called_once_with()
+        )
@@ -2,14 +2,21 @@
 from typing import Iterator
 from unittest.mock import MagicMock, patch
 import pytest
-from data_hub_metrics_api.refresh_data.page_views_and_downloads_daily_cli import main
+from data_hub_metrics_api.page_views_and_downloads_provider import (
+    DEFAULT_LATE_ARRIVAL_DAYS
+)
+from data_hub_metrics_api.refresh_data.page_views_and_downloads_daily_cli import (
+    REFRESH_JOB_NAME,
+    main
+)
+from data_hub_metrics_api.utils.refresh_job_runs import REFRESH_JOB_LAST_RUN_KEY
 
-import data_hub_metrics_api.refresh_data.page_views_and_downloads_daily_cli as cli_module
+import data_hub_metrics_api.refresh_data.cli_common as cli_common_module
 
 
 @pytest.fixture(name='page_views_and_downloads_provider_class_mock', autouse=True)
 def _page_views_and_downloads_provider_class_mock() -> Iterator[MagicMock]:
-    with patch.object(cli_module, 'PageViewsAndDownloadsProvider') as mock:
+    with patch.object(cli_common_module, 'PageViewsAndDownloadsProvider') as mock:
         yield mock
 
 
@@ -29,5 +36,63 @@ class TestMain:
         (
             page_views_and_downloads_provider_mock
             .refresh_page_views_and_downloads_daily
-            .assert_called_with(number_of_days=123)
+            .assert_called_with(
+                number_of_days=123,
+                incremental=False,
+                late_arrival_days=DEFAULT_LATE_ARRIVAL_DAYS,
+                prune_unindexed=False,
+                daily_storage_layout=None
+            )
+        )
+
+    def test_should_pass_incremental_options_to_provider(
+        self,
+        page_views_and_downloads_provider_mock: MagicMock,
+    ):
+        main(['--number-of-days=123', '--incremental', '--late-arrival-days=5'])
+        (
+            page_views_and_downloads_provider_mock
+            .refresh_page_views_and_downloads_daily
+            .assert_called_with(
+                number_of_days=123,
+                incremental=True,
+                late_arrival_days=5,
+                prune_unindexed=False,
+                daily_storage_layout=None
+            )
+        )
+
+    def test_should_pass_prune_unindexed_option_to_provider(
+        self,
+        page_views_and_downloads_provider_mock: MagicMock,
+    ):
+        main(['--number-of-days=123', '--prune-unindexed'])
+        _, kwargs = (
+            page_views_and_downloads_provider_mock
+            .refresh_page_views_and_downloads_daily
+            .call_args
+        )
+        assert kwargs['prune_unindexed'] is True
+
+    def test_should_pass_daily_storage_layout_to_provider(
+        self,
+        page_views_and_downloads_provider_mock: MagicMock,
+    ):
+        main(['--number-of-days=123', '--daily-storage-layout=compact'])
+        _, kwargs = (
+            page_views_and_downloads_provider_mock
+            .refresh_page_views_and_downloads_daily
+            .call_args
+        )
+        assert kwargs['daily_storage_layout'] == 'compact'
+
+    def test_should_record_refresh_job_run(
+        self,
+        redis_client_mock: MagicMock
+    ):
+        main(['--number-of-days=123'])
+        redis_client_mock.hset.assert_called_once()
+        assert redis_client_mock.hset.call_args.args[:2] == (
+            REFRESH_JOB_LAST_RUN_KEY,
+            REFRESH_JOB_NAME
         )
@@ -5,12 +5,12 @@ from unittest.mock import MagicMock, patch
 import pytest
 
 from data_hub_metrics_api.refresh_data.page_views_and_downloads_monthly_cli import main
-import data_hub_metrics_api.refresh_data.page_views_and_downloads_monthly_cli as cli_module
+import data_hub_metrics_api.refresh_data.cli_common as cli_common_module
 
 
 @pytest.fixture(name='page_views_and_downloads_provider_class_mock', autouse=True)
 def _page_views_and_downloads_provider_class_mock() -> Iterator[MagicMock]:
-    with patch.object(cli_module, 'PageViewsAndDownloadsProvider') as mock:
+    with patch.object(cli_common_module, 'PageViewsAndDownloadsProvider') as mock:
         yield mock
 
 
@@ -30,5 +30,16 @@ class TestMain:
         (
             page_views_and_downloads_provider_mock
             .refresh_page_views_and_downloads_monthly
-            .assert_called_with(number_of_months=12)
+            .assert_called_with(number_of_months=12, prune_unindexed=False)
+        )
+
+    def test_should_pass_prune_unindexed_option_to_provider(
+        self,
+        page_views_and_downloads_provider_mock: MagicMock,
+    ):
+        main(['--number-of-months=12', '--prune-unindexed'])
+        (
+            page_views_and_downloads_provider_mock
+            .refresh_page_views_and_downloads_monthly
+            .assert_called_with(number_of_months=12, prune_unindexed=True)
         )
@@ -1,10 +1,30 @@
-from unittest.mock import MagicMock
+from concurrent.futures import ThreadPoolExecutor
+import threading
+import time
+from unittest.mock import MagicMock, patch
 
 import pytest
 
 from google.cloud.bigquery.table import Row
 
-from data_hub_metrics_api.utils.bigquery import iter_dict_from_bq_query
+from data_hub_metrics_api.benchmark.fake_bigquery_result import (
+    FakeBigQueryResult,
+    FakeRecordBatch
+)
+from data_hub_metrics_api.utils import bigquery as bigquery_module
+from data_hub_metrics_api.utils.bigquery import (
+    BIGQUERY_QUERY_BUDGET,
+    BIGQUERY_STORAGE_API_ENABLED_ENV_NAME,
+    BIGQUERY_STORAGE_MAX_STREAM_COUNT_ENV_NAME,
+    get_bq_result_from_bq_query,
+    get_column_batch_from_rows,
+    iter_column_batch_from_bq_result_with_progress,
+    iter_dict_from_bq_query,
+    iter_dict_from_bq_query_with_progress,
+    iter_dict_from_bq_result_with_progress,
+    limit_concurrent_bq_queries
+)
+from data_hub_metrics_api.utils.refresh_job_runs import record_refresh_job_run
 
 
 class RowIteratorMock:
@@ -35,3 +55,151 @@ class TestIterDictFromBqQuery:
             'key1': 'value1',
             'key2': 'value2'
         }]
+
+
+class TestLimitConcurrentBqQueries:
+    def test_should_limit_number_of_queries_running_at_once(self, bq_client_mock: MagicMock):
+        lock = threading.Lock()
+        running_query_counts: list[int] = [0]
+        max_running_query_counts: list[int] = [0]
+
+        def _result():
+            with lock:
+                running_query_counts[0] += 1
+                max_running_query_counts[0] = max(
+                    max_running_query_counts[0],
+                    running_query_counts[0]
+                )
+            time.sleep(0.02)
+            with lock:
+                running_query_counts[0] -= 1
+            return RowIteratorMock([])
+
+        bq_client_mock.return_value.query.return_value.result.side_effect = _result
+        bq_client_mock.return_value.query.return_value.total_bytes_processed = 0
+        with limit_concurrent_bq_queries(2), ThreadPoolExecutor(max_workers=4) as executor:
+            list(executor.map(
+                lambda index: get_bq_result_from_bq_query('project1', f'query{index}'),
+                range(4)
+            ))
+        assert max_running_query_counts[0] == 2
+
+    def test_should_remove_limit_afterwards(self):
+        with limit_concurrent_bq_queries(1):
+            assert BIGQUERY_QUERY_BUDGET.semaphore is not None
+        assert BIGQUERY_QUERY_BUDGET.semaphore is None
+
+
+class TestIterDictFromBqResultWithProgress:
+    def test_should_return_dict_for_row(self):
+        result = list(iter_dict_from_bq_result_with_progress(
+            FakeBigQueryResult([{'key1': 'value1'}])
+        ))
+        assert result == [{'key1': 'value1'}]
+
+    def test_should_return_dict_for_rows_of_record_batches(self):
+        fake_bq_result = FakeBigQueryResult(
+            [{'key1': 'value1'}, {'key1': 'value2'}, {'key1': 'value3'}],
+            record_batch_size=2
+        )
+        result = list(iter_dict_from_bq_result_with_progress(
+            fake_bq_result,
+            use_record_batches=True
+        ))
+        assert result == [{'key1': 'value1'}, {'key1': 'value2'}, {'key1': 'value3'}]
+
+    def test_should_add_rows_to_recorded_refresh_job_run(self):
+        with record_refresh_job_run(MagicMock(name='redis_client'), 'job1') as refresh_job_run:
+            list(iter_dict_from_bq_result_with_progress(
+                FakeBigQueryResult([{'key1': 'value1'}, {'key1': 'value2'}])
+            ))
+        assert refresh_job_run.rows_loaded == 2
+
+
+class TestIterDictFromBqQueryWithProgress:
+    def test_should_not_use_bq_storage_api_by_default(
+        self,
+        bq_client_mock: MagicMock,
+        mock_env: dict  # pylint: disable=unused-argument
+    ):
+        mock_query_job = bq_client_mock.return_value.query.return_value
+        mock_query_job.result.return_value = RowIteratorMock([
+            Row(['value1'], {'key1': 0})
+        ])
+        with patch.object(bigquery_module, 'get_bq_storage_client') as get_bq_storage_client_mock:
+            result = list(iter_dict_from_bq_query_with_progress(
+                project_name='project1',
+                query='query1'
+            ))
+            get_bq_storage_client_mock.assert_not_called()
+        assert result == [{'key1': 'value1'}]
+
+    def test_should_read_record_batches_using_bq_storage_api_if_enabled(
+        self,
+        bq_client_mock: MagicMock,
+        mock_env: dict
+    ):
+        mock_env[BIGQUERY_STORAGE_API_ENABLED_ENV_NAME] = 'true'
+        mock_env[BIGQUERY_STORAGE_MAX_STREAM_COUNT_ENV_NAME] = '4'
+        bq_result_mock = MagicMock(name='bq_result_mock')
+        bq_result_mock.total_rows = 1
+        bq_result_mock.to_arrow_iterable.return_value = iter([
+            FakeRecordBatch([{'key1': 'value1'}])
+        ])
+        bq_client_mock.return_value.query.return_value.result.return_value = bq_result_mock
+        with patch.object(bigquery_module, 'get_bq_storage_client') as get_bq_storage_client_mock:
+            result = list(iter_dict_from_bq_query_with_progress(
+                project_name='project1',
+                query='query1'
+            ))
+            bq_result_mock.to_arrow_iterable.assert_called_once_with(
+                bqstorage_client=get_bq_storage_client_mock.return_value,
+                max_stream_count=4
+            )
+        assert result == [{'key1': 'value1'}]
+
+
+class TestGetColumnBatchFromRows:
+    def test_should_return_values_by_column_for_rows(self):
+        assert get_column_batch_from_rows([
+            Row(['value1', 'value2'], {'key1': 0, 'key2': 1}),
+            Row(['value3', 'value4'], {'key1': 0, 'key2': 1})
+        ]) == {
+            'key1': ['value1', 'value3'],
+            'key2': ['value2', 'value4']
+        }
+
+    def test_should_return_empty_dict_without_rows(self):
+        assert not get_column_batch_from_rows([])
+
+
+class TestIterColumnBatchFromBqResultWithProgress:
+    def test_should_return_column_batches_of_batch_size(self):
+        fake_bq_result = FakeBigQueryResult(
+            [{'key1': 'value1'}, {'key1': 'value2'}, {'key1': 'value3'}]
+        )
+        result = list(iter_column_batch_from_bq_result_with_progress(
+            fake_bq_result,
+            batch_size=2
+        ))
+        assert result == [{'key1': ['value1', 'value2']}, {'key1': ['value3']}]
+
+    def test_should_return_column_batch_for_each_record_batch(self):
+        fake_bq_result = FakeBigQueryResult(
+            [{'key1': 'value1'}, {'key1': 'value2'}, {'key1': 'value3'}],
+            record_batch_size=1
+        )
+        result = list(iter_column_batch_from_bq_result_with_progress(
+            fake_bq_result,
+            batch_size=2,
+            use_record_batches=True
+        ))
+        assert result == [{'key1': ['value1']}, {'key1': ['value2']}, {'key1': ['value3']}]
+
+    def test_should_add_rows_of_column_batches_to_recorded_refresh_job_run(self):
+        with record_refresh_job_run(MagicMock(name='redis_client'), 'job1') as refresh_job_run:
+            list(iter_column_batch_from_bq_result_with_progress(
+                FakeBigQueryResult([{'key1': 'value1'}, {'key1': 'value2'}, {'key1': 'value3'}]),
+                batch_size=2
+            ))
+        assert refresh_job_run.rows_loaded == 3
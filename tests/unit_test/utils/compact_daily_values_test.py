@@ -0,0 +1,92 @@
+from datetime import date
+
+from data_hub_metrics_api.utils.compact_daily_values import (
+    get_compact_daily_day_count,
+    get_compact_daily_values_offset,
+    get_empty_compact_daily_values,
+    get_encoded_compact_daily_values,
+    get_year_month_for_date,
+    get_year_months_for_page_window,
+    iter_decoded_compact_daily_values
+)
+
+
+def get_encoded_values_for_days(values_by_day: dict[int, tuple[int, int]]) -> bytes:
+    # similar to SETRANGE, which pads the string with zero bytes
+    encoded_values = bytearray()
+    for day, (page_views, downloads) in values_by_day.items():
+        offset = get_compact_daily_values_offset(date(2023, 10, day))
+        encoded_day_values = get_encoded_compact_daily_values(page_views, downloads)
+        encoded_values.extend(bytes(max(0, offset + len(encoded_day_values) - len(encoded_values))))
+        encoded_values[offset:offset + len(encoded_day_values)] = encoded_day_values
+    return bytes(encoded_values)
+
+
+class TestGetYearMonthForDate:
+    def test_should_return_year_month(self):
+        assert get_year_month_for_date(date(2023, 1, 31)) == '2023-01'
+
+
+class TestIterDecodedCompactDailyValues:
+    def test_should_return_nothing_for_missing_values(self):
+        assert not list(iter_decoded_compact_daily_values('2023-10', None))
+
+    def test_should_decode_values_of_days_in_date_order(self):
+        encoded_values = get_encoded_values_for_days({1: (10, 1), 31: (20, 2)})
+        assert list(iter_decoded_compact_daily_values('2023-10', encoded_values)) == [
+            ('2023-10-01', 10, 1),
+            ('2023-10-31', 20, 2)
+        ]
+
+    def test_should_keep_days_with_zero_values(self):
+        encoded_values = get_encoded_values_for_days({2: (0, 0)})
+        assert list(iter_decoded_compact_daily_values('2023-10', encoded_values)) == [
+            ('2023-10-02', 0, 0)
+        ]
+
+    def test_should_skip_cleared_days(self):
+        encoded_values = get_encoded_values_for_days({1: (10, 1), 2: (20, 2), 3: (30, 3)})
+        empty_values = get_empty_compact_daily_values(2)
+        encoded_values = empty_values + encoded_values[len(empty_values):]
+        assert list(iter_decoded_compact_daily_values('2023-10', encoded_values)) == [
+            ('2023-10-03', 30, 3)
+        ]
+
+
+class TestGetCompactDailyDayCount:
+    def test_should_return_zero_for_missing_values(self):
+        assert get_compact_daily_day_count(None) == 0
+
+    def test_should_count_days_with_values(self):
+        encoded_values = get_encoded_values_for_days({1: (10, 1), 3: (0, 0), 31: (20, 2)})
+        assert get_compact_daily_day_count(encoded_values) == 3
+
+
+class TestGetYearMonthsForPageWindow:
+    def test_should_return_newest_months_of_first_page(self):
+        assert get_year_months_for_page_window(
+            {'2023-08': 31, '2023-09': 30, '2023-10': 3},
+            page_start_index=0,
+            page_end_index=10
+        ) == (['2023-10', '2023-09'], 0)
+
+    def test_should_skip_newer_months_before_page(self):
+        assert get_year_months_for_page_window(
+            {'2023-08': 31, '2023-09': 30, '2023-10': 3},
+            page_start_index=40,
+            page_end_index=50
+        ) == (['2023-08'], 33)
+
+    def test_should_skip_months_without_days(self):
+        assert get_year_months_for_page_window(
+            {'2023-09': 0, '2023-10': 3},
+            page_start_index=0,
+            page_end_index=10
+        ) == (['2023-10'], 0)
+
+    def test_should_return_no_months_after_last_page(self):
+        assert get_year_months_for_page_window(
+            {'2023-10': 3},
+            page_start_index=10,
+            page_end_index=20
+        ) == ([], 3)
@@ -0,0 +1,146 @@
+from datetime import datetime, timezone
+from typing import Optional
+
+from fastapi import Request, Response
+
+from data_hub_metrics_api.utils.conditional_requests import (
+    ResponseValidators,
+    get_conditional_response,
+    get_response_validators_for_generations,
+    is_if_modified_since_not_before_last_modified,
+    is_if_none_match_matching_etag
+)
+
+
+ETAG_1 = '"etag1"'
+
+GENERATION_1 = '20240101T010203456789'
+GENERATION_2 = '20240202T010203000000'
+
+DATETIME_1 = datetime(2024, 1, 1, 1, 2, 3, 456789, tzinfo=timezone.utc)
+
+
+def get_request(
+    method: str = 'GET',
+    headers: Optional[dict[str, str]] = None,
+    response_validators: Optional[ResponseValidators] = None
+) -> Request:
+    request = Request({
+        'type': 'http',
+        'method': method,
+        'path': '/metrics',
+        'headers': [
+            (name.lower().encode('latin-1'), value.encode('latin-1'))
+            for name, value in (headers or {}).items()
+        ]
+    })
+    if response_validators is not None:
+        request.state.response_validators = response_validators
+    return request
+
+
+class TestGetResponseValidatorsForGenerations:
+    def test_should_combine_generations_into_etag(self):
+        response_validators = get_response_validators_for_generations([
+            GENERATION_1,
+            GENERATION_2
+        ])
+        assert response_validators is not None
+        assert response_validators.etag == f'W/"{GENERATION_1}.{GENERATION_2}"'
+
+    def test_should_use_latest_generation_as_last_modified(self):
+        response_validators = get_response_validators_for_generations([
+            GENERATION_2,
+            GENERATION_1
+        ])
+        assert response_validators is not None
+        assert response_validators.last_modified == datetime(
+            2024, 2, 2, 1, 2, 3, tzinfo=timezone.utc
+        )
+
+    def test_should_not_return_validators_without_generation(self):
+        assert get_response_validators_for_generations([GENERATION_1, None]) is None
+
+    def test_should_not_return_last_modified_for_other_generation_format(self):
+        response_validators = get_response_validators_for_generations(['generation1'])
+        assert response_validators is not None
+        assert response_validators.last_modified is None
+
+
+class TestIsIfNoneMatchMatchingEtag:
+    def test_should_not_match_without_if_none_match(self):
+        assert not is_if_none_match_matching_etag(None, ETAG_1)
+
+    def test_should_match_same_etag(self):
+        assert is_if_none_match_matching_etag(ETAG_1, ETAG_1)
+
+    def test_should_match_etag_within_list(self):
+        assert is_if_none_match_matching_etag(f'"other", {ETAG_1}', ETAG_1)
+
+    def test_should_match_weak_etag(self):
+        assert is_if_none_match_matching_etag(f'W/{ETAG_1}', ETAG_1)
+
+    def test_should_match_any_etag(self):
+        assert is_if_none_match_matching_etag('*', ETAG_1)
+
+    def test_should_not_match_other_etag(self):
+        assert not is_if_none_match_matching_etag('"other"', ETAG_1)
+
+
+class TestIsIfModifiedSinceNotBeforeLastModified:
+    def test_should_match_same_second(self):
+        assert is_if_modified_since_not_before_last_modified(
+            'Mon, 01 Jan 2024 01:02:03 GMT',
+            DATETIME_1
+        )
+
+    def test_should_not_match_earlier_date(self):
+        assert not is_if_modified_since_not_before_last_modified(
+            'Mon, 01 Jan 2024 01:02:02 GMT',
+            DATETIME_1
+        )
+
+    def test_should_not_match_invalid_date(self):
+        assert not is_if_modified_since_not_before_last_modified('invalid', DATETIME_1)
+
+    def test_should_not_match_without_last_modified(self):
+        assert not is_if_modified_since_not_before_last_modified(
+            'Mon, 01 Jan 2024 01:02:03 GMT',
+            None
+        )
+
+
+class TestGetConditionalResponse:
+    def test_should_add_validators_and_cache_control(self):
+        response = get_conditional_response(
+            get_request(response_validators=ResponseValidators(
+                etag=ETAG_1,
+                last_modified=DATETIME_1
+            )),
+            Response(b'body1'),
+            cache_control='public, max-age=1'
+        )
+        assert response.status_code == 200
+        assert response.headers['etag'] == ETAG_1
+        assert response.headers['last-modified'] == 'Mon, 01 Jan 2024 01:02:03 GMT'
+        assert response.headers['cache-control'] == 'public, max-age=1'
+
+    def test_should_not_add_cache_control_without_validators(self):
+        response = get_conditional_response(get_request(), Response(b'body1'))
+        assert 'etag' not in response.headers
+        assert 'cache-control' not in response.headers
+
+    def test_should_not_change_error_response(self):
+        response = get_conditional_response(
+            get_request(response_validators=ResponseValidators(etag=ETAG_1)),
+            Response(b'error', status_code=500)
+        )
+        assert 'etag' not in response.headers
+
+    def test_should_not_change_response_with_own_cache_control(self):
+        response = get_conditional_response(
+            get_request(response_validators=ResponseValidators(etag=ETAG_1)),
+            Response(b'body1', headers={'Cache-Control': 'no-store'})
+        )
+        assert 'etag' not in response.headers
+        assert response.headers['cache-control'] == 'no-store'
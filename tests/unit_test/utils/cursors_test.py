@@ -0,0 +1,25 @@
+import pytest
+
+from data_hub_metrics_api.utils.cursors import (
+    FIRST_PAGE_CURSOR,
+    get_article_id_for_cursor,
+    get_cursor_for_article_id
+)
+
+
+class TestGetArticleIdForCursor:
+    def test_should_return_none_for_first_page_cursor(self):
+        assert get_article_id_for_cursor(FIRST_PAGE_CURSOR) is None
+
+    def test_should_return_article_id_of_cursor(self):
+        assert get_article_id_for_cursor(get_cursor_for_article_id('12345')) == '12345'
+
+    def test_should_not_expose_article_id_or_padding_in_cursor(self):
+        cursor = get_cursor_for_article_id('12345')
+        assert '12345' not in cursor
+        assert '=' not in cursor
+
+    @pytest.mark.parametrize('cursor', ['', 'a', '!!!', get_cursor_for_article_id('abc')])
+    def test_should_reject_invalid_cursor(self, cursor: str):
+        with pytest.raises(ValueError):
+            get_article_id_for_cursor(cursor)
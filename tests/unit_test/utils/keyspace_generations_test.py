@@ -0,0 +1,201 @@
+from datetime import datetime, timezone
+from unittest.mock import AsyncMock, MagicMock, call
+
+import pytest
+
+from data_hub_metrics_api.utils.keyspace_generations import (
+    KeyspaceGenerations,
+    activate_generation,
+    bump_generation,
+    create_generation,
+    get_active_generation_key_prefix,
+    get_generation_datetime,
+    get_generation_key_prefix,
+    loading_generation,
+    unlink_generation_keys
+)
+
+
+class TestGetGenerationKeyPrefix:
+    def test_should_return_prefix_for_generation(self):
+        assert get_generation_key_prefix('generation1') == 'gen:generation1:'
+
+    def test_should_return_empty_prefix_without_generation(self):
+        assert get_generation_key_prefix(None) == ''
+
+
+class TestGetActiveGenerationKeyPrefix:
+    def test_should_return_prefix_of_active_generation(self):
+        redis_client_mock = MagicMock(name='redis_client_mock')
+        redis_client_mock.get.return_value = b'generation1'
+        assert get_active_generation_key_prefix(
+            redis_client_mock,
+            'totals'
+        ) == 'gen:generation1:'
+        redis_client_mock.get.assert_called_once_with('generation:totals')
+
+    def test_should_return_empty_prefix_without_active_generation(self):
+        redis_client_mock = MagicMock(name='redis_client_mock')
+        redis_client_mock.get.return_value = None
+        assert get_active_generation_key_prefix(redis_client_mock, 'totals') == ''
+
+
+class TestActivateGeneration:
+    def test_should_set_pointer_and_expire_keys_of_old_generation(self):
+        redis_client_mock = MagicMock(name='redis_client_mock')
+        redis_client_mock.set.return_value = b'generation1'
+        redis_client_mock.scan_iter.return_value = iter([b'gen:generation1:article:1:summary'])
+        pipeline_mock = redis_client_mock.pipeline.return_value.__enter__.return_value
+        activate_generation(
+            redis_client_mock,
+            generation_name='summaries',
+            generation='generation2',
+            key_patterns=['article:*:summary'],
+            old_generation_expiry_seconds=60
+        )
+        redis_client_mock.set.assert_called_once_with(
+            'generation:summaries',
+            'generation2',
+            get=True
+        )
+        redis_client_mock.scan_iter.assert_called_once_with(
+            match='gen:generation1:article:*:summary',
+            count=1000
+        )
+        pipeline_mock.expire.assert_has_calls([
+            call(b'gen:generation1:article:1:summary', 60)
+        ])
+
+    def test_should_expire_legacy_keys_without_previous_generation(self):
+        redis_client_mock = MagicMock(name='redis_client_mock')
+        redis_client_mock.set.return_value = None
+        redis_client_mock.scan_iter.return_value = iter([])
+        activate_generation(
+            redis_client_mock,
+            generation_name='summaries',
+            generation='generation1',
+            key_patterns=['article:*:summary']
+        )
+        redis_client_mock.scan_iter.assert_called_once_with(
+            match='article:*:summary',
+            count=1000
+        )
+
+
+class TestUnlinkGenerationKeys:
+    def test_should_unlink_keys_matching_patterns_with_prefix(self):
+        redis_client_mock = MagicMock(name='redis_client_mock')
+        redis_client_mock.scan_iter.return_value = iter([b'gen:generation1:article:1:summary'])
+        assert unlink_generation_keys(
+            redis_client_mock,
+            key_prefix='gen:generation1:',
+            key_patterns=['article:*:summary']
+        ) == 1
+        redis_client_mock.scan_iter.assert_called_once_with(
+            match='gen:generation1:article:*:summary',
+            count=1000
+        )
+        redis_client_mock.unlink.assert_called_once_with(b'gen:generation1:article:1:summary')
+
+    def test_should_not_unlink_legacy_keys_without_prefix(self):
+        redis_client_mock = MagicMock(name='redis_client_mock')
+        with pytest.raises(AssertionError):
+            unlink_generation_keys(
+                redis_client_mock,
+                key_prefix='',
+                key_patterns=['article:*:summary']
+            )
+        redis_client_mock.unlink.assert_not_called()
+
+
+class TestLoadingGeneration:
+    def test_should_activate_generation_after_loading_keys(self):
+        redis_client_mock = MagicMock(name='redis_client_mock')
+        redis_client_mock.set.return_value = None
+        redis_client_mock.scan_iter.return_value = iter([])
+        with loading_generation(
+            redis_client_mock,
+            generation_name='summaries',
+            generation='generation1',
+            key_patterns=['article:*:summary']
+        ) as key_prefix:
+            assert key_prefix == 'gen:generation1:'
+            redis_client_mock.set.assert_not_called()
+        redis_client_mock.set.assert_called_once_with(
+            'generation:summaries',
+            'generation1',
+            get=True
+        )
+        redis_client_mock.unlink.assert_not_called()
+
+    def test_should_unlink_keys_and_not_activate_generation_if_loading_fails(self):
+        redis_client_mock = MagicMock(name='redis_client_mock')
+        redis_client_mock.scan_iter.return_value = iter([b'gen:generation1:article:1:summary'])
+        with pytest.raises(RuntimeError):
+            with loading_generation(
+                redis_client_mock,
+                generation_name='summaries',
+                generation='generation1',
+                key_patterns=['article:*:summary']
+            ):
+                raise RuntimeError('failed partway')
+        redis_client_mock.unlink.assert_called_once_with(b'gen:generation1:article:1:summary')
+        redis_client_mock.set.assert_not_called()
+
+
+class TestGetGenerationDatetime:
+    def test_should_return_creation_datetime_of_generation(self):
+        assert get_generation_datetime('20240102T030405000006') == datetime(
+            2024, 1, 2, 3, 4, 5, 6, tzinfo=timezone.utc
+        )
+
+    def test_should_parse_created_generation(self):
+        assert get_generation_datetime(create_generation()) is not None
+
+    def test_should_return_none_for_other_generation_format(self):
+        assert get_generation_datetime('generation1') is None
+
+
+class TestBumpGeneration:
+    def test_should_set_pointer_to_new_generation(self):
+        redis_client_mock = MagicMock(name='redis_client_mock')
+        generation = bump_generation(redis_client_mock, 'periods')
+        redis_client_mock.set.assert_called_once_with('generation:periods', generation)
+
+
+class TestKeyspaceGenerations:
+    async def test_should_return_active_generation(self):
+        async_redis_client_mock = AsyncMock(name='async_redis_client_mock')
+        async_redis_client_mock.get.return_value = b'generation1'
+        keyspace_generations = KeyspaceGenerations(async_redis_client_mock)
+        assert await keyspace_generations.get_generation('periods') == 'generation1'
+
+    async def test_should_return_none_without_active_generation(self):
+        async_redis_client_mock = AsyncMock(name='async_redis_client_mock')
+        async_redis_client_mock.get.return_value = None
+        keyspace_generations = KeyspaceGenerations(async_redis_client_mock)
+        assert await keyspace_generations.get_generation('periods') is None
+
+    async def test_should_return_prefix_of_active_generation(self):
+        async_redis_client_mock = AsyncMock(name='async_redis_client_mock')
+        async_redis_client_mock.get.return_value = b'generation1'
+        keyspace_generations = KeyspaceGenerations(async_redis_client_mock)
+        assert await keyspace_generations.get_key_prefix('totals') == 'gen:generation1:'
+        async_redis_client_mock.get.assert_called_once_with('generation:totals')
+
+    async def test_should_cache_prefix_within_ttl(self):
+        async_redis_client_mock = AsyncMock(name='async_redis_client_mock')
+        async_redis_client_mock.get.return_value = b'generation1'
+        keyspace_generations = KeyspaceGenerations(async_redis_client_mock, cache_ttl_seconds=60)
+        await keyspace_generations.get_key_prefix('totals')
+        async_redis_client_mock.get.return_value = b'generation2'
+        assert await keyspace_generations.get_key_prefix('totals') == 'gen:generation1:'
+        async_redis_client_mock.get.assert_called_once()
+
+    async def test_should_resolve_prefix_again_after_ttl(self):
+        async_redis_client_mock = AsyncMock(name='async_redis_client_mock')
+        async_redis_client_mock.get.return_value = b'generation1'
+        keyspace_generations = KeyspaceGenerations(async_redis_client_mock, cache_ttl_seconds=0)
+        await keyspace_generations.get_key_prefix('totals')
+        async_redis_client_mock.get.return_value = b'generation2'
+        assert await keyspace_generations.get_key_prefix('totals') == 'gen:generation2:'
@@ -0,0 +1,32 @@
+from data_hub_metrics_api.utils.packed_metric_values import (
+    get_legacy_metric_total_keys,
+    get_metric_totals_for_legacy_values,
+    get_packed_metric_values,
+    get_unpacked_metric_values
+)
+
+
+class TestGetUnpackedMetricValues:
+    def test_should_return_zero_values_for_missing_value(self):
+        assert get_unpacked_metric_values(None) == {'page_views': 0, 'downloads': 0}
+
+    def test_should_unpack_packed_metric_values(self):
+        packed_value = get_packed_metric_values(page_views=123, downloads=45)
+        assert get_unpacked_metric_values(packed_value) == {'page_views': 123, 'downloads': 45}
+
+    def test_should_unpack_bytes(self):
+        assert get_unpacked_metric_values(b'123:45') == {'page_views': 123, 'downloads': 45}
+
+
+class TestGetMetricTotalsForLegacyValues:
+    def test_should_return_metric_totals_in_order_of_legacy_keys(self):
+        assert get_legacy_metric_total_keys(['10001', '10002'], 'gen:totals1:') == [
+            'gen:totals1:article:10001:page_views',
+            'gen:totals1:article:10001:downloads',
+            'gen:totals1:article:10002:page_views',
+            'gen:totals1:article:10002:downloads'
+        ]
+        assert get_metric_totals_for_legacy_values([b'123', b'12', None, b'4']) == [
+            {'page_views': 123, 'downloads': 12},
+            {'page_views': 0, 'downloads': 4}
+        ]
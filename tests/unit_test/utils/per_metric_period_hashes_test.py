@@ -0,0 +1,62 @@
+from unittest.mock import MagicMock, call
+
+from data_hub_metrics_api.utils.per_metric_period_hashes import (
+    iter_per_metric_period_values_from_hashes,
+    unlink_per_metric_period_hashes
+)
+
+
+class TestIterPerMetricPeriodValuesFromHashes:
+    def test_should_combine_values_of_both_metrics_by_period(self):
+        redis_client_mock = MagicMock(name='redis_client_mock')
+        redis_client_mock.scan_iter.return_value = iter([b'article:12345:page_views:by_month'])
+        pipeline_mock = redis_client_mock.pipeline.return_value.__enter__.return_value
+        pipeline_mock.execute.return_value = [
+            {b'2023-10': b'5', b'2023-09': b'6'},
+            {b'2023-10': b'2'}
+        ]
+        assert list(iter_per_metric_period_values_from_hashes(redis_client_mock, 'by_month')) == [
+            ('12345', '2023-09', 6, 0),
+            ('12345', '2023-10', 5, 2)
+        ]
+        redis_client_mock.scan_iter.assert_called_once_with(
+            match='article:*:page_views:by_month',
+            count=1000
+        )
+        pipeline_mock.hgetall.assert_has_calls([
+            call('article:12345:page_views:by_month'),
+            call('article:12345:downloads:by_month')
+        ])
+
+
+class TestUnlinkPerMetricPeriodHashes:
+    def test_should_unlink_hashes_of_both_metrics_with_their_period_index(self):
+        pipeline_mock = MagicMock(name='pipeline_mock')
+        unlink_per_metric_period_hashes(
+            pipeline_mock,
+            [('12345', '2023-09', 6, 0), ('12345', '2023-10', 5, 2)],
+            'by_month'
+        )
+        pipeline_mock.srem.assert_has_calls([
+            call(
+                'index:by_month:2023-09:keys',
+                'article:12345:downloads:by_month',
+                'article:12345:page_views:by_month'
+            ),
+            call(
+                'index:by_month:2023-10:keys',
+                'article:12345:downloads:by_month',
+                'article:12345:page_views:by_month'
+            )
+        ])
+        pipeline_mock.unlink.assert_called_once_with(
+            'article:12345:downloads:by_month',
+            'article:12345:page_views:by_month',
+            'article:12345:downloads:by_month:period_index',
+            'article:12345:page_views:by_month:period_index'
+        )
+
+    def test_should_not_unlink_anything_without_values(self):
+        pipeline_mock = MagicMock(name='pipeline_mock')
+        unlink_per_metric_period_hashes(pipeline_mock, [], 'by_month')
+        pipeline_mock.unlink.assert_not_called()
@@ -0,0 +1,64 @@
+from unittest.mock import MagicMock
+
+from data_hub_metrics_api.utils.period_index import (
+    backfill_period_index,
+    get_period_score
+)
+
+
+class TestGetPeriodScore:
+    def test_should_order_dates_by_date(self):
+        assert (
+            get_period_score('2023-09-30')
+            < get_period_score('2023-10-01')
+            < get_period_score('2024-01-01')
+        )
+
+    def test_should_order_year_months_by_month(self):
+        assert (
+            get_period_score('2023-09')
+            < get_period_score('2023-10')
+            < get_period_score('2024-01')
+        )
+
+    def test_should_use_consecutive_scores_for_consecutive_months(self):
+        assert get_period_score('2024-01') - get_period_score('2023-12') == 1
+
+
+class TestBackfillPeriodIndex:
+    def test_should_add_existing_hash_fields_to_period_indices(self):
+        redis_client_mock = MagicMock(name='redis_client_mock')
+        pipeline_mock = redis_client_mock.pipeline.return_value.__enter__.return_value
+        redis_client_mock.scan_iter.return_value = iter([b'article:12345:page_views:by_date'])
+        pipeline_mock.execute.return_value = [{b'2023-09-01': b'5', b'2023-09-02': b'6'}]
+        backfilled_cell_count = backfill_period_index(
+            redis_client_mock,
+            'article:*:page_views:by_date'
+        )
+        assert backfilled_cell_count == 2
+        redis_client_mock.scan_iter.assert_called_once_with(
+            match='article:*:page_views:by_date',
+            count=1000
+        )
+        pipeline_mock.hset.assert_called_once_with(
+            'article:12345:page_views:by_date',
+            mapping={'2023-09-01': 5, '2023-09-02': 6}
+        )
+        pipeline_mock.zadd.assert_any_call(
+            'article:12345:page_views:by_date:period_index',
+            {
+                '2023-09-01': get_period_score('2023-09-01'),
+                '2023-09-02': get_period_score('2023-09-02')
+            }
+        )
+        pipeline_mock.sadd.assert_any_call(
+            'index:by_date:2023-09-01:keys',
+            'article:12345:page_views:by_date'
+        )
+
+    def test_should_not_write_anything_without_matching_hashes(self):
+        redis_client_mock = MagicMock(name='redis_client_mock')
+        pipeline_mock = redis_client_mock.pipeline.return_value.__enter__.return_value
+        redis_client_mock.scan_iter.return_value = iter([])
+        assert backfill_period_index(redis_client_mock, 'article:*:page_views:by_date') == 0
+        pipeline_mock.hset.assert_not_called()
@@ -1,4 +1,4 @@
-from data_hub_metrics_api.utils.progress_bar import iter_with_progress
+from data_hub_metrics_api.utils.progress_bar import iter_batches_with_progress, iter_with_progress
 
 
 def test_should_return_all_items():
@@ -8,3 +8,9 @@ def test_should_return_all_items():
 
     result = list(iter_with_progress(data, total, desc))
     assert result == data
+
+
+def test_should_return_all_batches():
+    batches = [[1, 2], [3]]
+    result = list(iter_batches_with_progress(batches, 3, 'Test Progress', get_batch_size=len))
+    assert result == batches
@@ -0,0 +1,49 @@
+from unittest.mock import AsyncMock, patch
+
+from data_hub_metrics_api.utils import read_through_cache as read_through_cache_module
+from data_hub_metrics_api.utils.read_through_cache import ReadThroughCache
+
+
+class TestReadThroughCache:
+    async def test_should_load_value_on_miss_and_return_cached_value_on_hit(self):
+        load_mock = AsyncMock(name='load', return_value='value1')
+        cache = ReadThroughCache(max_size=10)
+        assert await cache.get_or_load('key1', load_mock) == 'value1'
+        assert await cache.get_or_load('key1', load_mock) == 'value1'
+        load_mock.assert_awaited_once()
+        assert cache.get_stats() == {
+            'size': 1,
+            'max_size': 10,
+            'hit_count': 1,
+            'miss_count': 1,
+            'eviction_count': 0
+        }
+
+    async def test_should_always_load_value_if_disabled(self):
+        load_mock = AsyncMock(name='load', return_value='value1')
+        cache = ReadThroughCache(max_size=0)
+        await cache.get_or_load('key1', load_mock)
+        await cache.get_or_load('key1', load_mock)
+        assert load_mock.await_count == 2
+        assert cache.get_stats()['size'] == 0
+
+    async def test_should_evict_least_recently_used_value(self):
+        cache = ReadThroughCache(max_size=2)
+        await cache.get_or_load('key1', AsyncMock(return_value='value1'))
+        await cache.get_or_load('key2', AsyncMock(return_value='value2'))
+        # key1 becomes the most recently used key
+        await cache.get_or_load('key1', AsyncMock(return_value='other'))
+        await cache.get_or_load('key3', AsyncMock(return_value='value3'))
+        assert cache.get_stats()['eviction_count'] == 1
+        assert await cache.get_or_load('key1', AsyncMock(return_value='other')) == 'value1'
+        assert await cache.get_or_load('key2', AsyncMock(return_value='other')) == 'other'
+
+    async def test_should_load_value_again_after_ttl(self):
+        load_mock = AsyncMock(name='load', return_value='value1')
+        cache = ReadThroughCache(max_size=10, ttl_seconds=60)
+        with patch.object(read_through_cache_module, 'time') as time_mock:
+            time_mock.monotonic.return_value = 1000
+            await cache.get_or_load('key1', load_mock)
+            time_mock.monotonic.return_value = 1061
+            await cache.get_or_load('key1', load_mock)
+        assert load_mock.await_count == 2
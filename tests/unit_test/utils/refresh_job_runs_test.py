@@ -0,0 +1,148 @@
+import json
+from pathlib import Path
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from redis.client import Pipeline
+
+from data_hub_metrics_api.utils.refresh_job_runs import (
+    REFRESH_JOB_LAST_RUN_KEY,
+    REFRESH_JOB_RUN_REPORT_PATH_ENV_NAME,
+    STDOUT_RUN_REPORT_PATH,
+    RefreshJobRedis,
+    RefreshJobRunTypedDict,
+    RefreshJobStageNames,
+    add_bytes_processed,
+    add_rows_loaded,
+    get_last_refresh_job_runs,
+    iter_measuring_refresh_job_stage,
+    measure_refresh_job_stage,
+    record_refresh_job_run
+)
+
+
+REFRESH_JOB_RUN_DICT_1: RefreshJobRunTypedDict = {
+    'job_name': 'job1',
+    'started_timestamp': 1000.0,
+    'duration_seconds': 12.5,
+    'rows_loaded': 100,
+    'rows_per_second': 8.0,
+    'redis_command_count': 10,
+    'bytes_processed': 1000,
+    'stage_duration_seconds': {'bigquery_query': 2.5, 'redis': 5.0},
+    'succeeded': True
+}
+
+
+def get_stored_refresh_job_run_dict(redis_client_mock: MagicMock) -> dict:
+    redis_client_mock.hset.assert_called_once()
+    key, job_name, refresh_job_run_json = redis_client_mock.hset.call_args.args
+    assert key == REFRESH_JOB_LAST_RUN_KEY
+    refresh_job_run_dict = json.loads(refresh_job_run_json)
+    assert refresh_job_run_dict['job_name'] == job_name
+    return refresh_job_run_dict
+
+
+class TestRecordRefreshJobRun:
+    def test_should_store_successful_run_with_rows_loaded(self):
+        redis_client_mock = MagicMock(name='redis_client_mock')
+        with record_refresh_job_run(redis_client_mock, 'job1'):
+            add_rows_loaded(10)
+            add_rows_loaded(5)
+        refresh_job_run_dict = get_stored_refresh_job_run_dict(redis_client_mock)
+        assert refresh_job_run_dict['job_name'] == 'job1'
+        assert refresh_job_run_dict['rows_loaded'] == 15
+        assert refresh_job_run_dict['succeeded'] is True
+        assert refresh_job_run_dict['duration_seconds'] >= 0
+
+    def test_should_store_failed_run_and_reraise_error(self):
+        redis_client_mock = MagicMock(name='redis_client_mock')
+        with pytest.raises(RuntimeError):
+            with record_refresh_job_run(redis_client_mock, 'job1'):
+                raise RuntimeError('error')
+        assert get_stored_refresh_job_run_dict(redis_client_mock)['succeeded'] is False
+
+    def test_should_ignore_rows_loaded_outside_of_recorded_run(self):
+        redis_client_mock = MagicMock(name='redis_client_mock')
+        add_rows_loaded(10)
+        with record_refresh_job_run(redis_client_mock, 'job1') as refresh_job_run:
+            pass
+        add_rows_loaded(10)
+        assert refresh_job_run.rows_loaded == 0
+
+    def test_should_store_bytes_processed_and_rows_per_second(self):
+        redis_client_mock = MagicMock(name='redis_client_mock')
+        with record_refresh_job_run(redis_client_mock, 'job1'):
+            add_bytes_processed(1000)
+            add_rows_loaded(10)
+        refresh_job_run_dict = get_stored_refresh_job_run_dict(redis_client_mock)
+        assert refresh_job_run_dict['bytes_processed'] == 1000
+        assert refresh_job_run_dict['rows_per_second'] > 0
+
+    def test_should_add_up_durations_of_measured_stage(self):
+        with record_refresh_job_run(MagicMock(name='redis_client_mock'), 'job1') as refresh_job_run:
+            with measure_refresh_job_stage(RefreshJobStageNames.PRUNE):
+                pass
+            with measure_refresh_job_stage(RefreshJobStageNames.PRUNE):
+                pass
+        assert list(refresh_job_run.stage_duration_seconds.keys()) == [RefreshJobStageNames.PRUNE]
+        assert refresh_job_run.stage_duration_seconds[RefreshJobStageNames.PRUNE] >= 0
+
+    def test_should_measure_stage_of_iterable(self):
+        with record_refresh_job_run(MagicMock(name='redis_client_mock'), 'job1') as refresh_job_run:
+            assert list(iter_measuring_refresh_job_stage(
+                [1, 2, 3],
+                RefreshJobStageNames.BIGQUERY_DOWNLOAD
+            )) == [1, 2, 3]
+        assert RefreshJobStageNames.BIGQUERY_DOWNLOAD in refresh_job_run.stage_duration_seconds
+
+    def test_should_write_run_report_to_file(self, tmp_path: Path):
+        run_report_path = tmp_path / 'run_report.json'
+        with record_refresh_job_run(
+            MagicMock(name='redis_client_mock'),
+            'job1',
+            run_report_path=str(run_report_path)
+        ):
+            add_rows_loaded(10)
+        run_report_dict = json.loads(run_report_path.read_text(encoding='utf-8'))
+        assert run_report_dict['job_name'] == 'job1'
+        assert run_report_dict['rows_loaded'] == 10
+
+    def test_should_write_run_report_to_stdout_configured_by_env(
+        self,
+        capsys: pytest.CaptureFixture
+    ):
+        with patch.dict(
+            'os.environ',
+            {REFRESH_JOB_RUN_REPORT_PATH_ENV_NAME: STDOUT_RUN_REPORT_PATH}
+        ):
+            with record_refresh_job_run(MagicMock(name='redis_client_mock'), 'job1'):
+                pass
+        assert json.loads(capsys.readouterr().out)['job_name'] == 'job1'
+
+
+class TestRefreshJobRedis:
+    def test_should_count_commands_and_redis_stage_of_pipeline(self):
+        redis_client = RefreshJobRedis()
+        with patch.object(Pipeline, 'execute') as execute_mock:
+            execute_mock.return_value = []
+            with record_refresh_job_run(MagicMock(name='redis_client_mock'), 'job1') as run:
+                with redis_client.pipeline() as pipe:
+                    pipe.set('key1', 'value1')
+                    pipe.set('key2', 'value2')
+                    pipe.execute()
+        assert run.redis_command_count == 2
+        assert RefreshJobStageNames.REDIS in run.stage_duration_seconds
+
+
+class TestGetLastRefreshJobRuns:
+    async def test_should_return_stored_refresh_job_runs(self):
+        async_redis_client_mock = AsyncMock(name='async_redis_client_mock')
+        async_redis_client_mock.hgetall.return_value = {
+            b'job1': json.dumps(REFRESH_JOB_RUN_DICT_1).encode()
+        }
+        assert await get_last_refresh_job_runs(async_redis_client_mock) == [
+            REFRESH_JOB_RUN_DICT_1
+        ]
+        async_redis_client_mock.hgetall.assert_called_once_with(REFRESH_JOB_LAST_RUN_KEY)
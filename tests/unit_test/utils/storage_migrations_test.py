@@ -0,0 +1,46 @@
+from unittest.mock import AsyncMock, MagicMock
+
+from data_hub_metrics_api.utils.storage_migrations import (
+    COMPLETED_STORAGE_MIGRATIONS_KEY,
+    get_completed_storage_migration_names,
+    is_storage_migration_completed,
+    set_storage_migration_completed
+)
+
+
+MIGRATION_NAME_1 = 'migration_1'
+
+
+class TestIsStorageMigrationCompleted:
+    def test_should_return_true_if_migration_is_member_of_completed_set(self):
+        redis_client_mock = MagicMock(name='redis_client_mock')
+        redis_client_mock.sismember.return_value = 1
+        assert is_storage_migration_completed(redis_client_mock, MIGRATION_NAME_1)
+        redis_client_mock.sismember.assert_called_once_with(
+            COMPLETED_STORAGE_MIGRATIONS_KEY,
+            MIGRATION_NAME_1
+        )
+
+    def test_should_return_false_if_migration_is_not_member_of_completed_set(self):
+        redis_client_mock = MagicMock(name='redis_client_mock')
+        redis_client_mock.sismember.return_value = 0
+        assert not is_storage_migration_completed(redis_client_mock, MIGRATION_NAME_1)
+
+
+class TestSetStorageMigrationCompleted:
+    def test_should_add_migration_to_completed_set(self):
+        redis_client_mock = MagicMock(name='redis_client_mock')
+        set_storage_migration_completed(redis_client_mock, MIGRATION_NAME_1)
+        redis_client_mock.sadd.assert_called_once_with(
+            COMPLETED_STORAGE_MIGRATIONS_KEY,
+            MIGRATION_NAME_1
+        )
+
+
+class TestGetCompletedStorageMigrationNames:
+    async def test_should_return_decoded_migration_names(self):
+        async_redis_client_mock = AsyncMock(name='async_redis_client_mock')
+        async_redis_client_mock.smembers.return_value = {b'migration_1', b'migration_2'}
+        assert await get_completed_storage_migration_names(async_redis_client_mock) == (
+            frozenset({'migration_1', 'migration_2'})
+        )
@@ -0,0 +1,62 @@
+from typing import AsyncIterator, Sequence
+
+import orjson
+
+from data_hub_metrics_api.utils.streaming_export import (
+    get_csv_bytes,
+    get_ndjson_bytes,
+    iter_export_chunks
+)
+
+
+ROW_1 = {'id': 10001, 'views': 123}
+ROW_2 = {'id': 10002, 'views': 0}
+
+ROW_JSON_1 = orjson.dumps(ROW_1)
+ROW_JSON_2 = orjson.dumps(ROW_2)
+
+
+async def iter_row_json_batches(
+    row_json_batches: Sequence[Sequence[bytes]]
+) -> AsyncIterator[Sequence[bytes]]:
+    for row_json_list in row_json_batches:
+        yield row_json_list
+
+
+class TestGetNdjsonBytes:
+    def test_should_return_one_json_line_per_row(self):
+        assert get_ndjson_bytes([ROW_JSON_1, ROW_JSON_2]) == (
+            b'{"id":10001,"views":123}\n{"id":10002,"views":0}\n'
+        )
+
+
+class TestGetCsvBytes:
+    def test_should_return_rows_with_header(self):
+        assert get_csv_bytes([ROW_1], ['id', 'views'], include_header=True) == (
+            b'id,views\r\n10001,123\r\n'
+        )
+
+
+class TestIterExportChunks:
+    async def test_should_return_one_ndjson_chunk_per_batch(self):
+        chunks = [
+            chunk
+            async for chunk in iter_export_chunks(
+                iter_row_json_batches([[ROW_JSON_1], [ROW_JSON_2]]),
+                export_format='ndjson',
+                field_names=['id', 'views']
+            )
+        ]
+        assert chunks == [ROW_JSON_1 + b'\n', ROW_JSON_2 + b'\n']
+
+    async def test_should_return_csv_header_followed_by_one_chunk_per_batch(self):
+        chunks = [
+            chunk
+            async for chunk in iter_export_chunks(
+                iter_row_json_batches([[ROW_JSON_1], [ROW_JSON_2]]),
+                export_format='csv',
+                field_names=['id', 'views']
+            )
+        ]
+        assert b''.join(chunks) == b'id,views\r\n10001,123\r\n10002,0\r\n'
+        assert len(chunks) == 3